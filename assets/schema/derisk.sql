@@ -75,9 +75,49 @@ CREATE TABLE IF NOT EXISTS `document_chunk`
   `gmt_modified` timestamp NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP COMMENT 'update time',
   `doc_id` varchar(100) DEFAULT NULL COMMENT 'doc_id',
   PRIMARY KEY (`id`),
-  KEY `idx_chunk_id` (`chunk_id`) BLOCK_SIZE 16384 GLOBAL COMMENT 'index:chunk_id'
+  KEY `idx_chunk_id` (`chunk_id`) BLOCK_SIZE 16384 GLOBAL COMMENT 'index:chunk_id',
+  KEY `idx_vector_id` (`vector_id`) BLOCK_SIZE 16384 GLOBAL COMMENT 'index:vector_id'
 ) ENGINE=InnoDB AUTO_INCREMENT=1 DEFAULT CHARSET=utf8mb4 COMMENT='knowledge document chunk detail';
 
+CREATE TABLE IF NOT EXISTS `knowledge_question_index`
+(
+  `id` bigint(20) NOT NULL AUTO_INCREMENT COMMENT 'auto increment id',
+  `knowledge_id` varchar(100) NOT NULL COMMENT 'knowledge id',
+  `question_hash` varchar(64) NOT NULL COMMENT 'sha256 of the normalized question',
+  `question` text DEFAULT NULL COMMENT 'question',
+  `doc_id` varchar(100) NOT NULL COMMENT 'doc_id',
+  `chunk_id` bigint(20) DEFAULT NULL COMMENT 'document chunk id, null for the document questions',
+  `gmt_create` timestamp NULL DEFAULT CURRENT_TIMESTAMP COMMENT 'created time',
+  PRIMARY KEY (`id`),
+  KEY `idx_knowledge_question` (`knowledge_id`, `question_hash`) BLOCK_SIZE 16384 GLOBAL COMMENT 'index:knowledge_id,question_hash',
+  KEY `idx_question_doc_id` (`doc_id`) BLOCK_SIZE 16384 GLOBAL COMMENT 'index:doc_id'
+) ENGINE=InnoDB AUTO_INCREMENT=1 DEFAULT CHARSET=utf8mb4 COMMENT='knowledge FAQ question index';
+
+CREATE TABLE IF NOT EXISTS `knowledge_doc_tree_index`
+(
+  `id` bigint(20) NOT NULL AUTO_INCREMENT COMMENT 'auto increment id',
+  `knowledge_id` varchar(100) NOT NULL COMMENT 'knowledge id',
+  `doc_id` varchar(100) NOT NULL COMMENT 'doc_id',
+  `chunk_id` varchar(100) NOT NULL COMMENT 'chunk_id of the leaf chunk',
+  `level` int DEFAULT NULL COMMENT 'tree level, 0 for the title, 1-6 for the headers',
+  `header_hash` varchar(64) NOT NULL COMMENT 'sha256 of the normalized header',
+  `header` text DEFAULT NULL COMMENT 'title or header',
+  `gmt_create` timestamp NULL DEFAULT CURRENT_TIMESTAMP COMMENT 'created time',
+  PRIMARY KEY (`id`),
+  KEY `idx_doc_tree_header` (`knowledge_id`, `header_hash`) BLOCK_SIZE 16384 GLOBAL COMMENT 'index:knowledge_id,header_hash',
+  KEY `idx_doc_tree_doc_id` (`doc_id`) BLOCK_SIZE 16384 GLOBAL COMMENT 'index:doc_id'
+) ENGINE=InnoDB AUTO_INCREMENT=1 DEFAULT CHARSET=utf8mb4 COMMENT='knowledge document header tree index';
+
+CREATE TABLE IF NOT EXISTS `knowledge_index_state`
+(
+  `id` bigint(20) NOT NULL AUTO_INCREMENT COMMENT 'auto increment id',
+  `knowledge_id` varchar(100) NOT NULL COMMENT 'knowledge id',
+  `index_name` varchar(50) NOT NULL COMMENT 'index name, question or doc_tree',
+  `gmt_create` timestamp NULL DEFAULT CURRENT_TIMESTAMP COMMENT 'created time',
+  PRIMARY KEY (`id`),
+  UNIQUE KEY `uk_knowledge_index` (`knowledge_id`, `index_name`) BLOCK_SIZE 16384 GLOBAL COMMENT 'index:knowledge_id,index_name'
+) ENGINE=InnoDB AUTO_INCREMENT=1 DEFAULT CHARSET=utf8mb4 COMMENT='knowledge derived index build state';
+
 CREATE TABLE `knowledge_task` (
   `id` bigint(20) unsigned NOT NULL AUTO_INCREMENT COMMENT '主键',
   `gmt_create` timestamp NOT NULL DEFAULT CURRENT_TIMESTAMP COMMENT '创建时间',
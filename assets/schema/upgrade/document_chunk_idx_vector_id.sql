@@ -0,0 +1,7 @@
+-- Add the vector id index of the document chunks to the existing deployments,
+-- the chunks recalled by the vector store are looked up by their vector ids.
+-- The new deployments created by derisk.sql already have it.
+use derisk;
+
+ALTER TABLE `document_chunk`
+  ADD KEY `idx_vector_id` (`vector_id`) BLOCK_SIZE 16384 GLOBAL COMMENT 'index:vector_id';
@@ -73,7 +73,16 @@ def _initialize_model_cache(system_app: SystemApp, web_config: ServiceWebParamet
     else:
         persist_dir = f"{MODEL_DISK_CACHE_DIR}_{web_config.port}"
     persist_dir = resolve_root_path(persist_dir)
-    initialize_cache(system_app, storage_type, max_memory_mb, persist_dir)
+    initialize_cache(
+        system_app,
+        storage_type,
+        max_memory_mb,
+        persist_dir,
+        similarity_threshold=web_config.model_cache.similarity_threshold,
+        max_entries=web_config.model_cache.max_entries,
+        ttl_seconds=web_config.model_cache.ttl_seconds,
+        enable_embedding_cache=web_config.model_cache.enable_embedding_cache,
+    )
 
 
 def _initialize_awel(system_app: SystemApp, awel_dirs: Optional[str] = None):
@@ -7,6 +7,7 @@ from derisk.model.parameter import (
     ModelServiceConfig,
 )
 from derisk.storage.cache.manager import ModelCacheParameters
+from derisk.storage.full_text.base import FullTextConfig
 from derisk.storage.vector_store.base import VectorStoreConfig
 from derisk.util.configure import HookConfig
 from derisk.util.i18n_utils import _
@@ -14,6 +15,7 @@ from derisk.util.parameter_utils import BaseParameters
 from derisk.util.tracer import TracerParameters
 from derisk.util.utils import LoggingParameters
 from derisk_ext.datasource.rdbms.conn_sqlite import SQLiteConnectorParameters
+from derisk_ext.storage.full_text.elasticsearch import ElasticsearchFullTextConfig
 from derisk_ext.storage.knowledge_graph.knowledge_graph import (
     BuiltinKnowledgeGraphConfig,
 )
@@ -64,10 +66,10 @@ class StorageConfig(BaseParameters):
             "help": _("default graph type"),
         },
     )
-    full_text: BuiltinKnowledgeGraphConfig = field(
-        default_factory=BuiltinKnowledgeGraphConfig,
+    full_text: FullTextConfig = field(
+        default_factory=ElasticsearchFullTextConfig,
         metadata={
-            "help": _("default graph type"),
+            "help": _("default full text type"),
         },
     )
 
@@ -106,13 +108,25 @@ class RagParameters(BaseParameters):
         metadata={"help": _("knowledge max chunks once load")},
     )
     max_threads: Optional[int] = field(
-        default=1,
+        default=4,
         metadata={"help": _("knowledge max load thread")},
     )
+    max_sync_documents: Optional[int] = field(
+        default=4,
+        metadata={"help": _("knowledge max documents synced concurrently")},
+    )
     rerank_top_k: Optional[int] = field(
         default=3,
         metadata={"help": _("knowledge rerank top k")},
     )
+    bm25_k1: Optional[float] = field(
+        default=2.0,
+        metadata={"help": _("The k1 of BM25, the term frequency saturation")},
+    )
+    bm25_b: Optional[float] = field(
+        default=0.75,
+        metadata={"help": _("The b of BM25, the document length normalization")},
+    )
     storage: StorageConfig = field(
         default_factory=lambda: StorageConfig(),
         metadata={"help": _("Storage configuration")},
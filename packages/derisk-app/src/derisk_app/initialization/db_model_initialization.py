@@ -13,8 +13,11 @@ from derisk_serve.datasource.manages.connect_config_db import ConnectConfigEntit
 from derisk_serve.file.models.models import ServeEntity as FileServeEntity
 from derisk_serve.prompt.models.models import ServeEntity as PromptManageEntity
 from derisk_serve.rag.models.chunk_db import DocumentChunkEntity
+from derisk_serve.rag.models.doc_tree_index_db import KnowledgeDocTreeIndexEntity
 from derisk_serve.rag.models.document_db import KnowledgeDocumentEntity
+from derisk_serve.rag.models.index_state_db import KnowledgeIndexStateEntity
 from derisk_serve.rag.models.models import KnowledgeSpaceEntity
+from derisk_serve.rag.models.question_index_db import KnowledgeQuestionIndexEntity
 
 _MODELS = [
     FileServeEntity,
@@ -22,6 +25,9 @@ _MODELS = [
     KnowledgeSpaceEntity,
     KnowledgeDocumentEntity,
     DocumentChunkEntity,
+    KnowledgeQuestionIndexEntity,
+    KnowledgeDocTreeIndexEntity,
+    KnowledgeIndexStateEntity,
     ChatFeedBackEntity,
     ConnectConfigEntity,
     ChatHistoryEntity,
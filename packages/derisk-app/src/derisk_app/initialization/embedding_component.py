@@ -39,6 +39,7 @@ class RemoteEmbeddingFactory(EmbeddingFactory):
         self._default_model_name = model_name
         self.kwargs = kwargs
         self.system_app = system_app
+        self._embeddings: Optional[Embeddings] = None
 
     def init_app(self, system_app):
         self.system_app = system_app
@@ -48,14 +49,27 @@ class RemoteEmbeddingFactory(EmbeddingFactory):
     ) -> "Embeddings":
         from derisk.model.cluster import WorkerManagerFactory
         from derisk.model.cluster.embedding.remote_embedding import RemoteEmbeddings
+        from derisk.storage.cache import CacheManager
 
         if embedding_cls:
             raise NotImplementedError
+        if self._embeddings:
+            return self._embeddings
         worker_manager = self.system_app.get_component(
             ComponentType.WORKER_MANAGER_FACTORY, WorkerManagerFactory
         ).create()
         # Ignore model_name args
-        return RemoteEmbeddings(self._default_model_name, worker_manager)
+        embeddings = RemoteEmbeddings(self._default_model_name, worker_manager)
+        cache_manager = self.system_app.get_component(
+            ComponentType.MODEL_CACHE_MANAGER, CacheManager, default_component=None
+        )
+        if cache_manager:
+            embeddings = cache_manager.wrap_embeddings(
+                embeddings, self._default_model_name
+            )
+        # Share the embeddings, the cache statistics are kept in it
+        self._embeddings = embeddings
+        return embeddings
 
 
 class RemoteRerankEmbeddingFactory(RerankEmbeddingFactory):
@@ -149,6 +149,7 @@ def register_serve_apps(
             query_rewrite=rag_config.query_rewrite,
             max_chunks_once_load=rag_config.max_chunks_once_load,
             max_threads=rag_config.max_threads,
+            max_sync_documents=rag_config.max_sync_documents,
             rerank_top_k=rag_config.rerank_top_k,
             api_keys=global_api_keys,
         ),
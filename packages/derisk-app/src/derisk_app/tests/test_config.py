@@ -0,0 +1,34 @@
+from derisk.util.configure import ConfigurationManager
+from derisk_app.config import RagParameters, StorageConfig
+from derisk_ext.storage.full_text.elasticsearch import ElasticsearchFullTextConfig
+from derisk_ext.storage.full_text.local_bm25 import LocalFullTextConfig
+
+
+def test_parse_local_full_text_config():
+    cfg = ConfigurationManager(
+        {
+            "rag": {
+                "storage": {
+                    "full_text": {
+                        "type": "local_bm25",
+                        "persist_path": "/tmp/full_text",
+                        "merge_factor": 8,
+                    }
+                }
+            }
+        }
+    )
+    rag = cfg.parse_config(RagParameters, prefix="rag")
+    full_text = rag.storage.full_text
+    assert isinstance(full_text, LocalFullTextConfig)
+    assert full_text.persist_path == "/tmp/full_text"
+    assert full_text.merge_factor == 8
+
+
+def test_parse_elasticsearch_full_text_config():
+    cfg = ConfigurationManager(
+        {"full_text": {"type": "elasticsearch", "uri": "es-host", "port": "9201"}}
+    )
+    full_text = cfg.parse_config(StorageConfig).full_text
+    assert isinstance(full_text, ElasticsearchFullTextConfig)
+    assert (full_text.uri, full_text.port) == ("es-host", "9201")
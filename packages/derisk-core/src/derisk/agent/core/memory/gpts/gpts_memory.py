@@ -1,24 +1,129 @@
 """GPTs memory."""
 
 import asyncio
+import bisect
 import json
 import logging
 from asyncio import Queue
 from collections import defaultdict
 from concurrent.futures import Executor, ThreadPoolExecutor
 from datetime import datetime
-from typing import Dict, List, Optional, Union
+from typing import Dict, List, Optional, Tuple, Union
 
 from derisk.util.executor_utils import blocking_func_to_async
 from .base import GptsMessage, GptsMessageMemory, GptsPlansMemory, GptsPlan
 from .default_gpts_memory import DefaultGptsMessageMemory, DefaultGptsPlansMemory
 from ...action.base import ActionOutput
 from .....util.id_generator import IdGenerator
-from .....vis.vis_converter import VisProtocolConverter, DefaultVisConverter
+from .....vis.vis_converter import (
+    DefaultVisConverter,
+    VisProtocolConverter,
+    VisRenderCache,
+)
 
 logger = logging.getLogger(__name__)
 
 
+def _merge_step(
+    messages: List[GptsMessage], i: int
+) -> Tuple[Optional[GptsMessage], int]:
+    """Merge the message at i, return the merged message and the next index."""
+    cu_item = messages[i]
+    # 屏蔽用户消息
+    if cu_item.sender == "Human":
+        return None, i + 1
+    if not cu_item.show_message and i + 1 < len(messages):
+        ## 接到消息的Agent不展示消息，消息直接往后传递展示
+        ne_item = messages[i + 1]
+        new_message = ne_item
+        new_message.sender = cu_item.sender
+        new_message.current_goal = ne_item.current_goal or cu_item.current_goal
+        new_message.resource_info = ne_item.resource_info or cu_item.resource_info
+        return new_message, i + 2  # 两个消息合并为一个
+    return cu_item, i + 1
+
+
+def _is_pending(message: GptsMessage) -> bool:
+    """Whether the message is merged into the next one when it comes."""
+    return message.sender != "Human" and not message.show_message
+
+
+class _MessageView:
+    """The merged messages of a conversation to render.
+
+    The messages are sorted by rounds. A new message with the largest rounds is
+    appended and an updated message keeps its position, then only the messages
+    from it are merged again. The other changes need a rebuild.
+    """
+
+    def __init__(self, messages: List[GptsMessage], start_round: int):
+        self.messages = messages
+        self.index = {message.message_id: i for i, message in enumerate(messages)}
+        self.start_round = start_round
+        self.merged: List[GptsMessage] = []
+        self.plans_map: Optional[Dict[str, GptsPlan]] = None
+        # The start and end index of each merge step and the number of the merged
+        # messages before it
+        self._step_indexes: List[int] = []
+        self._step_ends: List[int] = []
+        self._step_merged: List[int] = []
+        self._merge_from(start_round)
+
+    def update(self, message: GptsMessage) -> Optional[int]:
+        """Apply a new or updated message.
+
+        Returns:
+            Optional[int]: The index of the first changed merged message, None if
+                the view must be rebuilt.
+        """
+        messages = self.messages
+        pos = self.index.get(message.message_id)
+        if pos is None:
+            if messages and messages[-1].rounds > message.rounds:
+                return None
+            pos = len(messages)
+            messages.append(message)
+            self.index[message.message_id] = pos
+        else:
+            if (pos > 0 and messages[pos - 1].rounds > message.rounds) or (
+                pos + 1 < len(messages) and messages[pos + 1].rounds < message.rounds
+            ):
+                return None
+            messages[pos] = message
+        if pos < self.start_round:
+            # The message is not rendered
+            return len(self.merged)
+        return self._merge_from(pos)
+
+    def _merge_from(self, pos: int) -> int:
+        k = bisect.bisect_right(self._step_indexes, pos) - 1
+        if k < 0:
+            i, merged_len = self.start_round, 0
+            k = 0
+        elif self._step_ends[k] <= pos and not (
+            # The last message waits for the next one to merge into
+            self._step_ends[k] == self._step_indexes[k] + 1
+            and _is_pending(self.messages[self._step_indexes[k]])
+        ):
+            # A new message after the merged ones
+            i, merged_len = pos, len(self.merged)
+            k += 1
+        else:
+            i, merged_len = self._step_indexes[k], self._step_merged[k]
+        del self._step_indexes[k:]
+        del self._step_ends[k:]
+        del self._step_merged[k:]
+        del self.merged[merged_len:]
+        while i < len(self.messages):
+            self._step_indexes.append(i)
+            self._step_merged.append(len(self.merged))
+            item, i = _merge_step(self.messages, i)
+            self._step_ends.append(i)
+            if item is not None:
+                self.merged.append(item)
+        return merged_len
+
+
 class GptsMemory:
     """GPTs memory."""
 
@@ -45,6 +150,9 @@ class GptsMemory:
         self.channels: defaultdict = defaultdict(Queue)
         self.start_round_map: defaultdict = defaultdict(int)
         self._vis_converter: VisProtocolConverter = DefaultVisConverter()
+        # The rendered views of each conversation, reused by the stream chunks
+        self._render_caches: Dict[str, VisRenderCache] = {}
+        self._message_views: Dict[str, _MessageView] = {}
 
     @property
     def vis_converter(self):
@@ -70,12 +178,17 @@ class GptsMemory:
     ):
         """Gpt memory init."""
         self.channels[conv_id] = asyncio.Queue()
+        self._clear_view(conv_id)
         if history_messages:
             self._cache_messages(conv_id, history_messages)
 
         self.start_round_map[conv_id] = start_round
         self._message_rounds_generator[conv_id] = IdGenerator(start_round + 1)
         if vis_converter:
+            if vis_converter is not self._vis_converter:
+                # The cached views are rendered by the old converter
+                self._render_caches.clear()
+                self._message_views.clear()
             self._vis_converter = vis_converter
 
     def _cache_messages(self, conv_id: str, messages: List[GptsMessage]):
@@ -83,6 +196,41 @@ class GptsMemory:
             self.messages_cache_new[conv_id][message.message_id] = message
             if message.message_id not in self.messages_id_cache[conv_id]:
                 self.messages_id_cache[conv_id].append(message.message_id)
+            self._update_view(conv_id, message)
+
+    def _render_cache(self, conv_id: str) -> VisRenderCache:
+        render_cache = self._render_caches.get(conv_id)
+        if render_cache is None:
+            render_cache = VisRenderCache()
+            self._render_caches[conv_id] = render_cache
+        return render_cache
+
+    def _update_view(self, conv_id: str, message: GptsMessage):
+        """A message of the conversation is added or updated."""
+        message_view = self._message_views.get(conv_id)
+        if message_view is None:
+            return
+        changed_from = message_view.update(message)
+        if changed_from is None:
+            # Rebuilt by the next render
+            del self._message_views[conv_id]
+            changed_from = 0
+        render_cache = self._render_caches.get(conv_id)
+        if render_cache is not None:
+            render_cache.invalidate(changed_from)
+
+    def _invalidate_plans(self, conv_id: str):
+        """The plans of the conversation are changed."""
+        message_view = self._message_views.get(conv_id)
+        if message_view is not None:
+            message_view.plans_map = None
+        render_cache = self._render_caches.get(conv_id)
+        if render_cache is not None:
+            render_cache.invalidate()
+
+    def _clear_view(self, conv_id: str):
+        self._render_caches.pop(conv_id, None)
+        self._message_views.pop(conv_id, None)
 
     async def load_persistent_memory(self, conv_id: str):
         """Load persistent memory."""
@@ -97,6 +245,7 @@ class GptsMemory:
                 self._executor, self.plans_memory.get_by_conv_id, conv_id
             )
             self.plans_cache[conv_id] = plans
+            self._invalidate_plans(conv_id)
 
     def queue(self, conv_id: str):
         """Get conversation message queue."""
@@ -121,6 +270,8 @@ class GptsMemory:
             view_cache = self.view_cache.pop(conv_id)  # noqa
             del view_cache
 
+        self._clear_view(conv_id)
+
         # clear start_roun
         start_round = self.start_round_map.pop(conv_id)  # noqa
         del start_round
@@ -184,61 +335,48 @@ class GptsMemory:
             incremental: bool = False,
     ):
         """Get all persistent messages that have been converted through the visualization protocol(excluding the part that is currently being streamed.)"""
-        ## 消息数据流准备
-        messages = await self.get_messages(conv_id)
-        start_round = (
-            self.start_round_map[conv_id]
-            if conv_id in self.start_round_map
-            else 0
-        )
-        messages = messages[start_round:]
-
-        ## merge messages
-        messages = self._merge_messages(messages)
-
-        plans = await self.get_plans(conv_id=conv_id)
-        ## 消息可视化布局转换
-        vis_view = await self._vis_converter.visualization(
+        render_cache = self._render_cache(conv_id)
+        messages, plans_map = await self._view_messages(conv_id, render_cache)
+        ## 消息可视化布局转换, 只重新渲染变化的消息
+        vis_view = await self._vis_converter.incremental_visualization(
             messages=messages,
-            plans_map={item.sub_task_content: item for item in plans},
+            plans_map=plans_map,
             gpt_msg=gpt_msg,
             stream_msg=stream_msg,
             is_first_chunk=is_first_chunk,
             incremental=incremental,
+            render_cache=render_cache,
         )
         return vis_view
 
+    async def _view_messages(
+        self, conv_id: str, render_cache: VisRenderCache
+    ) -> Tuple[List[GptsMessage], Dict[str, GptsPlan]]:
+        """Get the merged messages and plans to render, updated incrementally."""
+        message_view = self._message_views.get(conv_id)
+        if message_view is None:
+            ## 消息数据流准备
+            messages = await self.get_messages(conv_id)
+            start_round = (
+                self.start_round_map[conv_id]
+                if conv_id in self.start_round_map
+                else 0
+            )
+            message_view = _MessageView(messages, start_round)
+            self._message_views[conv_id] = message_view
+            render_cache.invalidate()
+        if message_view.plans_map is None:
+            plans = await self.get_plans(conv_id=conv_id)
+            message_view.plans_map = {item.sub_task_content: item for item in plans}
+        return message_view.merged, message_view.plans_map
+
     def _merge_messages(self, messages: List[GptsMessage]):
         i = 0
         new_messages: List[GptsMessage] = []
-
         while i < len(messages):
-            cu_item = messages[i]
-            from derisk.agent import UserProxyAgent
-
-            # 屏蔽用户消息
-            # if cu_item.sender == UserProxyAgent().role:
-            if cu_item.sender == "Human":
-                i += 1
-                continue
-            if not cu_item.show_message:
-                ## 接到消息的Agent不展示消息，消息直接往后传递展示
-                if i + 1 < len(messages):
-                    ne_item = messages[i + 1]
-                    new_message = ne_item
-                    new_message.sender = cu_item.sender
-                    new_message.current_goal = (
-                            ne_item.current_goal or cu_item.current_goal
-                    )
-                    new_message.resource_info = (
-                            ne_item.resource_info or cu_item.resource_info
-                    )
-                    new_messages.append(new_message)
-                    i += 2  # 两个消息合并为一个
-                    continue
-            new_messages.append(cu_item)
-            i += 1
-
+            new_message, i = _merge_step(messages, i)
+            if new_message is not None:
+                new_messages.append(new_message)
         return new_messages
 
     async def chat_messages(
@@ -330,6 +468,7 @@ class GptsMemory:
     async def append_plans(self, conv_id: str, plans: List[GptsPlan]):
         """Append plans."""
         self.plans_cache[conv_id].extend(plans)
+        self._invalidate_plans(conv_id)
         await blocking_func_to_async(
             self._executor, self.plans_memory.batch_save, plans
         )
@@ -352,6 +491,7 @@ class GptsMemory:
             )
             logger.info(f"update_plan {conv_id}:{item.task_uid} sucess！")
         self.plans_cache[conv_id] = new_plans
+        self._invalidate_plans(conv_id)
 
     async def get_plans(self, conv_id: str) -> List[GptsPlan]:
         """Get plans by conv_id."""
@@ -0,0 +1,150 @@
+from typing import Dict, List, Optional, Union
+
+import pytest
+
+from derisk.vis.vis_converter import VisProtocolConverter, VisRenderCache
+
+from ..base import GptsMessage, GptsPlan
+from ..gpts_memory import GptsMemory
+
+_CONV_ID = "test_conv"
+
+
+class _CountingConverter(VisProtocolConverter):
+    """Render each message to its content and count the rendered messages."""
+
+    def __init__(self):
+        super().__init__()
+        self.rendered = 0
+
+    async def visualization(
+        self,
+        messages: List[GptsMessage],
+        plans_map: Optional[Dict[str, GptsPlan]] = None,
+        gpt_msg: Optional[GptsMessage] = None,
+        stream_msg: Optional[Union[Dict, str]] = None,
+        is_first_chunk: bool = False,
+        incremental: bool = False,
+    ):
+        self.rendered += len(messages)
+        views = [m.content for m in messages]
+        if stream_msg:
+            views.append(stream_msg)
+        return "\n".join(views)
+
+    async def incremental_visualization(
+        self,
+        messages: List[GptsMessage],
+        plans_map: Optional[Dict[str, GptsPlan]] = None,
+        gpt_msg: Optional[GptsMessage] = None,
+        stream_msg: Optional[Union[Dict, str]] = None,
+        is_first_chunk: bool = False,
+        incremental: bool = False,
+        render_cache: Optional[VisRenderCache] = None,
+    ):
+        start = render_cache.dirty_from
+        if start is not None:
+            render_cache.truncate(start)
+            for index in range(start, len(messages)):
+                self.rendered += 1
+                render_cache.append(index, messages[index].content)
+            render_cache.dirty_from = None
+        view = render_cache.view
+        return view + "\n" + stream_msg if stream_msg else view
+
+
+def _message(
+    idx: int, content: Optional[str] = None, show_message: bool = True
+) -> GptsMessage:
+    return GptsMessage(
+        conv_id=_CONV_ID,
+        conv_session_id=_CONV_ID,
+        sender="assistant",
+        sender_name="assistant",
+        receiver="user",
+        message_id=f"msg_{idx}",
+        role="assistant",
+        content=content or f"content_{idx}",
+        rounds=idx,
+        show_message=show_message,
+    )
+
+
+@pytest.fixture
+def memory():
+    memory = GptsMemory()
+    converter = _CountingConverter()
+    memory.init(_CONV_ID, vis_converter=converter)
+    return memory
+
+
+@pytest.mark.asyncio
+async def test_stream_chunk_not_rerender_messages(memory: GptsMemory):
+    converter = memory.vis_converter
+    for i in range(10):
+        await memory.append_message(_CONV_ID, _message(i), save_db=False)
+    assert converter.rendered == 10
+
+    for i in range(5):
+        await memory.push_message(_CONV_ID, stream_msg=f"chunk_{i}")
+    assert converter.rendered == 10
+    assert memory.view_cache[_CONV_ID].endswith("content_9\nchunk_4")
+
+
+@pytest.mark.asyncio
+async def test_updated_message_rerendered(memory: GptsMemory):
+    converter = memory.vis_converter
+    for i in range(10):
+        await memory.append_message(_CONV_ID, _message(i), save_db=False)
+    # Stream the last message by updating it
+    for text in ["Hello", "Hello world"]:
+        await memory.append_message(_CONV_ID, _message(9, text), save_db=False)
+    assert converter.rendered == 12
+    assert memory.view_cache[_CONV_ID].endswith("content_8\nHello world")
+
+    full_view = await converter.visualization(await memory.get_messages(_CONV_ID))
+    assert memory.view_cache[_CONV_ID] == full_view
+
+
+@pytest.mark.asyncio
+async def test_clear_view_cache(memory: GptsMemory):
+    await memory.append_message(_CONV_ID, _message(0), save_db=False)
+    assert _CONV_ID in memory._render_caches
+    memory.clear(_CONV_ID)
+    assert _CONV_ID not in memory._render_caches
+    assert _CONV_ID not in memory._message_views
+
+
+@pytest.mark.asyncio
+async def test_append_updates_view_incrementally(memory: GptsMemory, monkeypatch):
+    converter = memory.vis_converter
+    await memory.append_message(_CONV_ID, _message(0), save_db=False)
+    message_view = memory._message_views[_CONV_ID]
+
+    async def _get_messages(conv_id):
+        raise AssertionError("The messages are not fetched again")
+
+    monkeypatch.setattr(memory, "get_messages", _get_messages)
+    # The hidden message is merged into the next one
+    await memory.append_message(_CONV_ID, _message(1, show_message=False), False)
+    for i in range(2, 6):
+        await memory.append_message(_CONV_ID, _message(i), save_db=False)
+    await memory.append_message(_CONV_ID, _message(4, "Hello"), save_db=False)
+    assert memory._message_views[_CONV_ID] is message_view
+    # Each append renders the messages from the changed one, the update of
+    # message 4 renders it and message 5
+    assert converter.rendered == 6 + 2
+
+    expected = memory._merge_messages(list(message_view.messages))
+    assert [m.content for m in message_view.merged] == [
+        m.content for m in expected
+    ]
+    assert memory.view_cache[_CONV_ID] == "\n".join(m.content for m in expected)
+
+
+@pytest.mark.asyncio
+async def test_out_of_order_message_rebuilds_view(memory: GptsMemory):
+    for i in [0, 2]:
+        await memory.append_message(_CONV_ID, _message(i), save_db=False)
+    await memory.append_message(_CONV_ID, _message(1), save_db=False)
+    assert memory.view_cache[_CONV_ID] == "content_0\ncontent_1\ncontent_2"
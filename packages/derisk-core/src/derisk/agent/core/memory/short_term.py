@@ -3,12 +3,13 @@
 import random
 from concurrent.futures import Executor
 from datetime import datetime
-from typing import Dict, List, Optional, Tuple
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
 
 from derisk.core import Embeddings
 from derisk.util.annotations import immutable, mutable
 from derisk.util.executor_utils import blocking_func_to_async
-from derisk.util.similarity_util import cosine_similarity, sigmoid_function
 
 from .base import (
     DiscardedMemoryFragments,
@@ -20,7 +21,12 @@ from .base import (
 
 
 class EnhancedShortTermMemory(ShortTermMemory[T]):
-    """Enhanced short term memory."""
+    """Enhanced short term memory.
+
+    The embeddings of the short-term memories are kept in a contiguous matrix, the
+    similarities between a new memory fragment and all the short-term memories are
+    calculated with one matrix-vector product.
+    """
 
     def __init__(
         self,
@@ -34,12 +40,23 @@ class EnhancedShortTermMemory(ShortTermMemory[T]):
         super().__init__(buffer_size=buffer_size)
         self._executor = executor
         self._embeddings = embeddings
-        self.short_embeddings: List[List[float]] = []
-        self.enhance_cnt: List[int] = [0 for _ in range(self._buffer_size)]
-        self.enhance_memories: List[List[T]] = [[] for _ in range(self._buffer_size)]
+        # One more row for the new memory fragment before handling the overflow
+        self._capacity = self._buffer_size + 1
+        self._embedding_matrix: Optional[np.ndarray] = None
+        self._embedding_norms = np.zeros(self._capacity, dtype=np.float32)
+        self._num_embeddings = 0
+        self.enhance_cnt = np.zeros(self._capacity, dtype=np.int64)
+        self.enhance_memories: List[List[T]] = [[] for _ in range(self._capacity)]
         self.enhance_similarity_threshold = enhance_similarity_threshold
         self.enhance_threshold = enhance_threshold
 
+    @property
+    def short_embeddings(self) -> List[List[float]]:
+        """Return the embeddings of the short-term memories."""
+        if self._embedding_matrix is None:
+            return []
+        return self._embedding_matrix[: self._num_embeddings].tolist()
+
     @immutable
     def structure_clone(
         self: "EnhancedShortTermMemory[T]", now: Optional[datetime] = None
@@ -74,87 +91,111 @@ class EnhancedShortTermMemory(ShortTermMemory[T]):
             self._embeddings.embed_documents,
         )
         memory_fragment.update_embeddings(memory_fragment_embeddings)
+        vector = np.asarray(memory_fragment_embeddings, dtype=np.float32)
 
         async with self._lock:
-            for idx, memory_embedding in enumerate(self.short_embeddings):
-                similarity = await blocking_func_to_async(
-                    self._executor,
-                    cosine_similarity,
-                    memory_embedding,
-                    memory_fragment_embeddings,
-                )
-                # Sigmoid probability, transform similarity to [0, 1]
-                sigmoid_prob: float = await blocking_func_to_async(
-                    self._executor, sigmoid_function, similarity
-                )
-                if (
-                    sigmoid_prob >= self.enhance_similarity_threshold
-                    and random.random() < sigmoid_prob
-                ):
-                    self.enhance_cnt[idx] += 1
-                    self.enhance_memories[idx].append(memory_fragment)
+            for idx in self._enhanced_indexes(vector):
+                self.enhance_cnt[idx] += 1
+                self.enhance_memories[idx].append(memory_fragment)
             discard_memories = await self.transfer_to_long_term(memory_fragment)
             if op == WriteOperation.ADD:
                 self._fragments.append(memory_fragment)
-                self.short_embeddings.append(memory_fragment_embeddings)
+                self._append_embedding(vector)
                 await self.handle_overflow(self._fragments)
             return discard_memories
 
+    def _enhanced_indexes(self, vector: np.ndarray) -> List[int]:
+        """Get the indexes of the short-term memories enhanced by the vector."""
+        n = self._num_embeddings
+        if n == 0:
+            return []
+        self._check_dimension(vector)
+        # Cosine similarities of all the short-term memories in one batch, the zero
+        # vectors get NaN and are never enhanced.
+        with np.errstate(divide="ignore", invalid="ignore"):
+            similarities = (self._embedding_matrix[:n] @ vector) / (
+                self._embedding_norms[:n] * np.linalg.norm(vector)
+            )
+        # Sigmoid probability, transform similarity to [0, 1]
+        sigmoid_probs = 1 / (1 + np.exp(-similarities))
+        candidates = np.flatnonzero(sigmoid_probs >= self.enhance_similarity_threshold)
+        return [int(idx) for idx in candidates if random.random() < sigmoid_probs[idx]]
+
+    def _check_dimension(self, vector: np.ndarray):
+        if self._embedding_matrix is not None and (
+            vector.shape[0] != self._embedding_matrix.shape[1]
+        ):
+            raise ValueError(
+                f"Embedding dimension mismatch, expect "
+                f"{self._embedding_matrix.shape[1]}, got {vector.shape[0]}"
+            )
+
+    def _append_embedding(self, vector: np.ndarray):
+        if self._embedding_matrix is None:
+            self._embedding_matrix = np.zeros(
+                (self._capacity, vector.shape[0]), dtype=np.float32
+            )
+        self._check_dimension(vector)
+        if self._num_embeddings >= self._capacity:
+            raise ValueError("Short term memory buffer is full")
+        self._embedding_matrix[self._num_embeddings] = vector
+        self._embedding_norms[self._num_embeddings] = np.linalg.norm(vector)
+        self._num_embeddings += 1
+
+    def _remove_memories(self, indexes: Sequence[int]):
+        """Remove the short-term memories and re-construct the indexes."""
+        n = len(self._fragments)
+        keep = np.ones(n, dtype=bool)
+        keep[list(indexes)] = False
+        kept = np.flatnonzero(keep)
+        m = len(kept)
+        # Modify in place, the caller may hold the list of fragments
+        self._fragments[:] = [self._fragments[i] for i in kept]
+        if self._embedding_matrix is not None:
+            self._embedding_matrix[:m] = self._embedding_matrix[kept]
+            self._embedding_norms[:m] = self._embedding_norms[kept]
+        self._num_embeddings = m
+        self.enhance_cnt[:m] = self.enhance_cnt[kept]
+        self.enhance_cnt[m:] = 0
+        self.enhance_memories = [self.enhance_memories[i] for i in kept] + [
+            [] for _ in range(self._capacity - m)
+        ]
+
     @mutable
     async def transfer_to_long_term(
         self, memory_fragment: T
     ) -> Optional[DiscardedMemoryFragments[T]]:
         """Transfer memory fragment to long term memory."""
-        transfer_flag = False
-        existing_memory = [True for _ in range(len(self.short_term_memories))]
+        n = len(self.short_term_memories)
+        # The memories which exceed the enhancement threshold
+        transfer_ids = np.flatnonzero(self.enhance_cnt[:n] >= self.enhance_threshold)
 
         enhance_memories: List[T] = []
         to_get_insight_memories: List[T] = []
-        for idx, memory in enumerate(self.short_term_memories):
-            # if exceed the enhancement threshold
-            if (
-                self.enhance_cnt[idx] >= self.enhance_threshold
-                and existing_memory[idx] is True
-            ):
-                existing_memory[idx] = False
-                transfer_flag = True
-                #
-                # short-term memories
-                content = [memory]
-                # do not repeatedly add observation memory to summary, so use [:-1].
-                for enhance_memory in self.enhance_memories[idx][:-1]:
-                    content.append(enhance_memory)
-                # Append the current observation memory
-                content.append(memory_fragment)
-                # Merge the enhanced memories to single memory
-                merged_enhance_memory: T = memory.reduce(
-                    content, importance=memory.importance
-                )
-                to_get_insight_memories.append(merged_enhance_memory)
-                enhance_memories.append(merged_enhance_memory)
+        for idx in transfer_ids:
+            memory = self.short_term_memories[idx]
+            # short-term memories
+            content = [memory]
+            # do not repeatedly add observation memory to summary, so use [:-1].
+            for enhance_memory in self.enhance_memories[idx][:-1]:
+                content.append(enhance_memory)
+            # Append the current observation memory
+            content.append(memory_fragment)
+            # Merge the enhanced memories to single memory
+            merged_enhance_memory: T = memory.reduce(
+                content, importance=memory.importance
+            )
+            to_get_insight_memories.append(merged_enhance_memory)
+            enhance_memories.append(merged_enhance_memory)
         # Get insights for the every enhanced memory
         enhance_insights: List[InsightMemoryFragment] = await self.get_insights(
             to_get_insight_memories
         )
 
-        if transfer_flag:
+        if len(transfer_ids) > 0:
             # re-construct the indexes of short-term memories after removing summarized
             # memories
-            new_memories: List[T] = []
-            new_embeddings: List[List[float]] = []
-            new_enhance_memories: List[List[T]] = [[] for _ in range(self._buffer_size)]
-            new_enhance_cnt: List[int] = [0 for _ in range(self._buffer_size)]
-            for idx, memory in enumerate(self.short_term_memories):
-                if existing_memory[idx]:
-                    # Remove not enhanced memories to new memories
-                    new_enhance_memories[len(new_memories)] = self.enhance_memories[idx]
-                    new_enhance_cnt[len(new_memories)] = self.enhance_cnt[idx]
-                    new_memories.append(memory)
-                    new_embeddings.append(self.short_embeddings[idx])
-            self._fragments = new_memories
-            self.short_embeddings = new_embeddings
-            self.enhance_memories = new_enhance_memories
-            self.enhance_cnt = new_enhance_cnt
+            self._remove_memories(transfer_ids)
         return DiscardedMemoryFragments(enhance_memories, enhance_insights)
 
     @mutable
@@ -167,57 +208,39 @@ class EnhancedShortTermMemory(ShortTermMemory[T]):
         """
         discarded_memories = []
         if len(self._fragments) > self._buffer_size:
-            id2fragments: Dict[int, Dict] = {}
-            for idx in range(len(self._fragments) - 1):
-                memory = self._fragments[idx]
-                id2fragments[idx] = {
-                    "enhance_count": self.enhance_cnt[idx],
-                    "importance": memory.importance,
-                }
-            # Sort by importance and enhance count, first discard the least important
-            sorted_ids = sorted(
-                id2fragments.keys(),
-                key=lambda x: (
-                    id2fragments[x]["importance"],
-                    id2fragments[x]["enhance_count"],
-                ),
+            # The new memory fragment is never discarded
+            n = len(self._fragments) - 1
+            importance = np.array(
+                [memory.importance for memory in self._fragments[:n]],
+                dtype=np.float64,
             )
-            # Get the ID of the memory fragment to be popped
-            pop_id = sorted_ids[0]
+            # Sort by importance and enhance count, first discard the least important
+            pop_id = int(np.lexsort((self.enhance_cnt[:n], importance))[0])
             pop_memory = self._fragments[pop_id]
             pop_raw_observation = pop_memory.raw_observation
             # Save the discarded memory
-            discarded_memory = self._fragments.pop(pop_id)
-            discarded_memories.append(discarded_memory)
-            # Remove the corresponding embedding vector
-            self.short_embeddings.pop(pop_id)
-
-            # Reorganize enhance count and enhance memories
-            new_enhance_memories = [[] for _ in range(self._buffer_size)]
-            new_enhance_cnt = [0 for _ in range(self._buffer_size)]
-            # Copy and adjust enhanced memory and count
-            current_idx = 0
+            discarded_memories.append(pop_memory)
+            self._remove_memories([pop_id])
+
+            # Remove the enhanced memories matching the popped memory
             for idx in range(len(self._fragments)):
-                if idx == pop_id:
-                    continue  # Skip the popped memory
-
-                # Copy the enhanced memory list but remove any items matching the
-                # popped memory
-                current_memories = []
-                removed_count = 0
-
-                for ehf in self.enhance_memories[idx]:
-                    if ehf.raw_observation != pop_raw_observation:
-                        current_memories.append(ehf)
-                    else:
-                        removed_count += 1
-
-                # Update to new array
-                new_enhance_memories[current_idx] = current_memories
-                new_enhance_cnt[current_idx] = self.enhance_cnt[idx] - removed_count
-                current_idx += 1
-            # Update enhanced memories and counts
-            self.enhance_memories = new_enhance_memories
-            self.enhance_cnt = new_enhance_cnt
+                current_memories = [
+                    ehf
+                    for ehf in self.enhance_memories[idx]
+                    if ehf.raw_observation != pop_raw_observation
+                ]
+                removed_count = len(self.enhance_memories[idx]) - len(current_memories)
+                if removed_count:
+                    self.enhance_memories[idx] = current_memories
+                    self.enhance_cnt[idx] -= removed_count
 
         return memory_fragments, discarded_memories
+
+    @mutable
+    async def clear(self) -> List[T]:
+        """Clear all memory fragments."""
+        fragments = await super().clear()
+        self._num_embeddings = 0
+        self.enhance_cnt[:] = 0
+        self.enhance_memories = [[] for _ in range(self._capacity)]
+        return fragments
@@ -0,0 +1,113 @@
+import hashlib
+import random
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+
+import numpy as np
+import pytest
+
+from derisk.core import Embeddings
+from derisk.util.similarity_util import cosine_similarity, sigmoid_function
+
+from ..agent_memory import AgentMemoryFragment
+from ..short_term import EnhancedShortTermMemory
+
+_DIM = 256
+
+
+class _FakeEmbeddings(Embeddings):
+    """The same text always gets the same vector, different texts are orthogonal."""
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self.embed_query(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        seed = int(hashlib.md5(text.encode()).hexdigest()[:8], 16)
+        return np.random.default_rng(seed).standard_normal(_DIM).tolist()
+
+
+@pytest.fixture
+def executor():
+    executor = ThreadPoolExecutor(max_workers=2)
+    yield executor
+    executor.shutdown()
+
+
+@pytest.fixture(autouse=True)
+def always_enhance(monkeypatch):
+    monkeypatch.setattr(random, "random", lambda: 0.0)
+
+
+def _memory(executor, buffer_size: int = 10) -> EnhancedShortTermMemory:
+    return EnhancedShortTermMemory(
+        _FakeEmbeddings(), executor, buffer_size=buffer_size, enhance_threshold=3
+    )
+
+
+def _fragment(text: str, importance: float = 0.5) -> AgentMemoryFragment:
+    return AgentMemoryFragment(text, importance=importance)
+
+
+@pytest.mark.asyncio
+async def test_enhance_and_transfer(executor):
+    memory = _memory(executor)
+    await memory.write(_fragment("disk full on host-1"))
+    await memory.write(_fragment("cpu high on host-2"))
+    for _ in range(2):
+        discarded = await memory.write(_fragment("disk full on host-1"))
+        assert not discarded.discarded_memory_fragments
+    assert memory.enhance_cnt[0] == 2
+    assert memory.enhance_cnt[1] == 0
+
+    discarded = await memory.write(_fragment("disk full on host-1"))
+    # The first memory is enhanced 3 times and transferred to long-term memory
+    assert len(discarded.discarded_memory_fragments) == 1
+    observations = [m.raw_observation for m in memory.short_term_memories]
+    assert observations[0] == "cpu high on host-2"
+    assert len(memory.short_embeddings) == len(observations)
+    assert memory.short_embeddings[0] == pytest.approx(
+        _FakeEmbeddings().embed_query("cpu high on host-2"), rel=1e-5
+    )
+
+
+@pytest.mark.asyncio
+async def test_same_as_pairwise_similarity(executor, monkeypatch):
+    monkeypatch.setattr(random, "random", lambda: 0.5)
+    memory = _memory(executor)
+    embeddings = _FakeEmbeddings()
+    texts = [f"fragment {i}" for i in range(5)]
+    for text in texts:
+        await memory.write(_fragment(text))
+
+    vector = np.asarray(embeddings.embed_query("fragment 3"), dtype=np.float32)
+    expected = []
+    for idx, text in enumerate(texts):
+        prob = sigmoid_function(
+            cosine_similarity(embeddings.embed_query(text), vector.tolist())
+        )
+        if prob >= memory.enhance_similarity_threshold and 0.5 < prob:
+            expected.append(idx)
+    assert memory._enhanced_indexes(vector) == expected == [3]
+
+
+@pytest.mark.asyncio
+async def test_handle_overflow(executor):
+    memory = _memory(executor, buffer_size=3)
+    for i, importance in enumerate([0.9, 0.1, 0.5, 0.8]):
+        await memory.write(_fragment(f"fragment {i}", importance=importance))
+
+    observations = [m.raw_observation for m in memory.short_term_memories]
+    # The least important memory is discarded
+    assert observations == ["fragment 0", "fragment 2", "fragment 3"]
+    embeddings = _FakeEmbeddings()
+    for text, vector in zip(observations, memory.short_embeddings):
+        assert vector == pytest.approx(embeddings.embed_query(text), rel=1e-5)
+
+
+@pytest.mark.asyncio
+async def test_dimension_mismatch(executor):
+    memory = _memory(executor)
+    await memory.write(_fragment("fragment"))
+    with pytest.raises(ValueError):
+        memory._enhanced_indexes(np.zeros(_DIM + 1, dtype=np.float32))
+
@@ -3,17 +3,14 @@ import logging
 from datetime import datetime
 from typing import Optional, Any, List
 
-from cachetools import TTLCache
-from mcp.client.sse import sse_client
-from mcp.client.session import ClientSession
-
 from derisk._private.config import Config
 from derisk.util.async_executor_utils import ServiceUnavailableError, safe_call_tool
 from derisk.util.log_util import MCP_LOGGER as LOGGER
 from derisk.util.tracer import root_tracer
 
+from .session_pool import get_mcp_session_pool, mcp_metrics, mcp_tool_list_cache
+
 logger = logging.getLogger(__name__)
-tool_cache = TTLCache(maxsize=200, ttl=300)
 
 CFG = Config()
 
@@ -54,27 +51,33 @@ async def get_mcp_tool_list(mcp_name: str, server: str, headers: Optional[dict]
                             allow_tools: Optional[List[str]] = None, server_ssl_verify: Optional[Any] = None, use_cache: bool = True):
     trace_id = root_tracer.get_current_span().trace_id
 
+    def filter_tools(result):
+        if allow_tools and len(allow_tools) > 0:
+            tools = [tool for tool in result.tools if tool.name in allow_tools]
+            result = result.model_copy(update={"tools": tools})
+        return result
+
     async def mcp_tool_list(server: str):
-        if tool_cache.get(mcp_name):
-            LOGGER.info(f"[{trace_id}]mcp_server:{mcp_name}, hit tool list cache:{tool_cache.get(mcp_name)}")
-            return tool_cache.get(mcp_name)
-        from datetime import datetime
+        # The cache keeps the unfiltered tool list, the allowed tools may differ
+        cached = mcp_tool_list_cache.get(mcp_name, server) if use_cache else None
+        if cached:
+            LOGGER.info(f"[{trace_id}]mcp_server:{mcp_name}, hit tool list cache:{cached}")
+            return filter_tools(cached)
         start_time = int(datetime.now().timestamp() * 1000)
-        async with sse_client(url=server, headers=headers) as (read, write):
-            async with ClientSession(read, write) as session:
-                # Initialize the connection
-                await session.initialize()
+        success = False
+        try:
+            async with get_mcp_session_pool().session(server, headers) as session:
                 result = await session.list_tools()
-                if allow_tools and len(allow_tools) > 0:
-                    tools = [tool for tool in result.tools if tool.name in allow_tools]
-                    result.tools = tools
-                end_time = int(datetime.now().timestamp() * 1000)
-                LOGGER.info(
-                    f"[{trace_id}]mcp_server:{mcp_name},sse:{server},header:{headers},list_tools:[{result}],costMs:[{end_time - start_time}]"
-                )
-                if use_cache:
-                    tool_cache[mcp_name] = result
-                return result
+            success = True
+        finally:
+            end_time = int(datetime.now().timestamp() * 1000)
+            mcp_metrics.record(server, "tools/list", end_time - start_time, success)
+        LOGGER.info(
+            f"[{trace_id}]mcp_server:{mcp_name},sse:{server},header:{headers},list_tools:[{result}],costMs:[{end_time - start_time}]"
+        )
+        if use_cache:
+            mcp_tool_list_cache.set(mcp_name, server, result)
+        return filter_tools(result)
 
     try:
         if CFG.debug_mode:
@@ -105,27 +108,30 @@ async def call_mcp_tool(mcp_name: str, tool_name: str, server: str, headers: Opt
     async def call_tool(**kwargs):
         start_time = int(datetime.now().timestamp() * 1000)
         try:
-            async with sse_client(
-                    url=server, headers=headers
-            ) as (read, write):
-                async with ClientSession(read, write) as session:
-                    # Initialize the connection
-                    await session.initialize()
-                    arguments = kwargs.get("arguments")
-                    result = await session.call_tool(
-                        tool_name, arguments=arguments
-                    )
-                    end_time = int(
-                        datetime.now().timestamp() * 1000
-                    )
-                    LOGGER.info(
-                        f"[{trace_id}][DIGEST][tools/call]mcp_server=[{mcp_name}],sse=[{server}],tool=[{tool_name}],success=[Y],err_msg=[None],costMs=[{end_time - start_time}],result_length=[{len(str(result.json()))}],headers=[{headers}]"
-                    )
-                    LOGGER.info(
-                        f"[{trace_id}]mcp_server:{mcp_name},sse:[{server}],header:{headers},tool:{tool_name},result:[{result.json()}]"
-                    )
-                    return result.json()
+            # Reuse the pooled session, no SSE handshake per call
+            async with get_mcp_session_pool().session(server, headers) as session:
+                arguments = kwargs.get("arguments")
+                result = await session.call_tool(
+                    tool_name, arguments=arguments
+                )
+            end_time = int(
+                datetime.now().timestamp() * 1000
+            )
+            mcp_metrics.record(
+                server, f"tools/call:{tool_name}", end_time - start_time, True
+            )
+            LOGGER.info(
+                f"[{trace_id}][DIGEST][tools/call]mcp_server=[{mcp_name}],sse=[{server}],tool=[{tool_name}],success=[Y],err_msg=[None],costMs=[{end_time - start_time}],result_length=[{len(str(result.json()))}],headers=[{headers}]"
+            )
+            LOGGER.info(
+                f"[{trace_id}]mcp_server:{mcp_name},sse:[{server}],header:{headers},tool:{tool_name},result:[{result.json()}]"
+            )
+            return result.json()
         except Exception as e:
+            end_time = int(datetime.now().timestamp() * 1000)
+            mcp_metrics.record(
+                server, f"tools/call:{tool_name}", end_time - start_time, False
+            )
             LOGGER.exception(
                 f"[{trace_id}][DIGEST][tools/call]mcp_server=[{mcp_name}],sse=[{server}],tool=[{tool_name}],success=[N],err_msg=[{str(e)}],costMs=[None],result_length=[None],headers=[{headers}]"
             )
@@ -162,15 +168,14 @@ async def connect_mcp(mcp_name: str, server: str, headers: Optional[dict[str, st
     async def connect():
         start_time = int(datetime.now().timestamp() * 1000)
         try:
-            async with sse_client(url=server, headers=headers) as (read, write):
-                async with ClientSession(read, write) as session:
-                    # Initialize the connection
-                    await session.initialize()
-                    end_time = int(datetime.now().timestamp() * 1000)
-                    LOGGER.info(
-                        f"[{trace_id}][DIGEST][connect]mcp_server=[{mcp_name}],sse=[{server}],success=[Y],err_msg=[None],costMs=[{end_time - start_time}],headers=[{headers}]"
-                    )
-                    return True
+            # Ping the pooled session, connect if there is none
+            async with get_mcp_session_pool().session(server, headers) as session:
+                await session.send_ping()
+            end_time = int(datetime.now().timestamp() * 1000)
+            LOGGER.info(
+                f"[{trace_id}][DIGEST][connect]mcp_server=[{mcp_name}],sse=[{server}],success=[Y],err_msg=[None],costMs=[{end_time - start_time}],headers=[{headers}]"
+            )
+            return True
         except Exception as e:
             LOGGER.exception(
                 f"[{trace_id}][DIGEST][connect]mcp_server=[{mcp_name}],sse=[{server}],success=[N],err_msg=[{str(e)}],costMs=[None],headers=[{headers}]"
@@ -0,0 +1,466 @@
+"""Pooled MCP client sessions.
+
+Opening an MCP session costs a SSE handshake and an ``initialize`` round-trip, the
+pool keeps one initialized session per MCP server and header set, and shares it by
+the concurrent calls. The tool lists are cached with a TTL and invalidated by the
+``notifications/tools/list_changed`` of the servers.
+
+The pooled sessions are dropped when their transport is closed, the end of the
+transport is passed to the message handler of a session as a ``CONNECTION_CLOSED``
+error.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+import weakref
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import (
+    Any,
+    AsyncContextManager,
+    AsyncIterator,
+    Callable,
+    Dict,
+    Hashable,
+    Optional,
+    Tuple,
+)
+
+import anyio
+from cachetools import TTLCache
+from mcp import types
+from mcp.client.session import ClientSession
+from mcp.client.sse import sse_client
+from mcp.shared.exceptions import McpError
+
+logger = logging.getLogger(__name__)
+
+SessionKey = Tuple[str, Tuple[Tuple[str, str], ...]]
+MessageHandler = Callable[[Any], Any]
+SessionFactory = Callable[
+    [str, Optional[Dict[str, str]], MessageHandler],
+    AsyncContextManager[ClientSession],
+]
+
+
+def _connection_closed_error() -> McpError:
+    return McpError(
+        types.ErrorData(code=types.CONNECTION_CLOSED, message="Connection closed")
+    )
+
+
+def _is_connection_closed(error: Any) -> bool:
+    return isinstance(error, McpError) and error.error.code == types.CONNECTION_CLOSED
+
+
+async def _relay_stream(read, relay_write, message_handler: MessageHandler):
+    """Relay the messages of the transport to the session, and notify the message
+    handler when the transport is closed."""
+    async with relay_write:
+        try:
+            async for message in read:
+                await relay_write.send(message)
+        except (anyio.ClosedResourceError, anyio.BrokenResourceError):
+            # The session is closed
+            return
+    await message_handler(_connection_closed_error())
+
+
+@asynccontextmanager
+async def open_sse_session(
+    server: str, headers: Optional[Dict[str, str]], message_handler: MessageHandler
+) -> AsyncIterator[ClientSession]:
+    """Open an initialized MCP client session over SSE."""
+    async with sse_client(url=server, headers=headers) as (read, write):
+        relay_write, relay_read = anyio.create_memory_object_stream(0)
+        async with anyio.create_task_group() as tg:
+            tg.start_soon(_relay_stream, read, relay_write, message_handler)
+            try:
+                async with ClientSession(
+                    relay_read, write, message_handler=message_handler
+                ) as session:
+                    await session.initialize()
+                    yield session
+            finally:
+                tg.cancel_scope.cancel()
+
+
+def _session_key(server: str, headers: Optional[Dict[str, str]]) -> SessionKey:
+    return server, tuple(sorted((headers or {}).items()))
+
+
+@dataclass
+class _LatencyStats:
+    count: int = 0
+    errors: int = 0
+    total_ms: float = 0.0
+    max_ms: float = 0.0
+
+    def record(self, cost_ms: float, success: bool):
+        self.count += 1
+        if not success:
+            self.errors += 1
+        self.total_ms += cost_ms
+        self.max_ms = max(self.max_ms, cost_ms)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "avg_ms": round(self.total_ms / self.count, 2) if self.count else 0.0,
+            "max_ms": round(self.max_ms, 2),
+        }
+
+
+class McpMetrics:
+    """The latency of the MCP operations per server and per tool."""
+
+    def __init__(self):
+        """Create a new McpMetrics."""
+        # The pools of the different event loops share the metrics
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, _LatencyStats]] = {}
+
+    def record(self, server: str, operation: str, cost_ms: float, success: bool):
+        """Record the latency of an operation.
+
+        Args:
+            server (str): The MCP server.
+            operation (str): The operation, e.g. "connect", "tools/list" or
+                "tools/call:<tool name>".
+            cost_ms (float): The latency in milliseconds.
+            success (bool): Whether the operation succeeded.
+        """
+        with self._lock:
+            server_stats = self._stats.setdefault(server, {})
+            server_stats.setdefault(operation, _LatencyStats()).record(cost_ms, success)
+
+    def to_dict(self) -> Dict[str, Dict[str, Dict[str, Any]]]:
+        """Return the latency stats of each operation of each server."""
+        with self._lock:
+            return {
+                server: {op: stats.to_dict() for op, stats in server_stats.items()}
+                for server, server_stats in self._stats.items()
+            }
+
+    def clear(self):
+        """Clear all the stats."""
+        with self._lock:
+            self._stats.clear()
+
+
+class McpToolListCache:
+    """Cache the tool lists of the MCP servers with a TTL.
+
+    The cached lists of a server are invalidated when the server notifies that its
+    tool list changed.
+    """
+
+    def __init__(self, maxsize: int = 200, ttl: float = 300):
+        """Create a new McpToolListCache."""
+        self._lock = threading.Lock()
+        self._cache: TTLCache = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    def get(self, mcp_name: str, server: str) -> Optional[types.ListToolsResult]:
+        """Return the cached tool list, None if missed or expired."""
+        with self._lock:
+            return self._cache.get((mcp_name, server))
+
+    def set(self, mcp_name: str, server: str, result: types.ListToolsResult):
+        """Cache the tool list."""
+        with self._lock:
+            self._cache[(mcp_name, server)] = result
+
+    def invalidate(self, mcp_name: Optional[str] = None, server: Optional[str] = None):
+        """Invalidate the cached tool lists of the MCP name or the server.
+
+        Invalidate all the tool lists if both are None.
+        """
+        with self._lock:
+            for key in list(self._cache.keys()):
+                if (mcp_name is None or key[0] == mcp_name) and (
+                    server is None or key[1] == server
+                ):
+                    self._cache.pop(key, None)
+
+
+class _PooledSession:
+    """A MCP client session kept open by a background task.
+
+    The transport of the session must be entered and exited in the same task, so
+    the session is opened and closed by its own task, and used by the others.
+    """
+
+    def __init__(
+        self,
+        server: str,
+        headers: Optional[Dict[str, str]],
+        session_factory: SessionFactory,
+        message_handler: MessageHandler,
+    ):
+        self.server = server
+        self.session: Optional[ClientSession] = None
+        self.in_use = 0
+        self.last_used = time.monotonic()
+        self._headers = headers
+        self._session_factory = session_factory
+        self._message_handler = message_handler
+        self._ready = asyncio.Event()
+        self._closing = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._error: Optional[BaseException] = None
+
+    @property
+    def alive(self) -> bool:
+        return (
+            self.session is not None
+            and self._task is not None
+            and not self._task.done()
+            and not self._closing.is_set()
+        )
+
+    async def open(self, timeout: float):
+        self._task = asyncio.create_task(self._run())
+        ready = asyncio.create_task(self._ready.wait())
+        try:
+            await asyncio.wait(
+                {ready, self._task},
+                timeout=timeout,
+                return_when=asyncio.FIRST_COMPLETED,
+            )
+        finally:
+            ready.cancel()
+        if not self._ready.is_set():
+            await self.close()
+            if self._error:
+                raise self._error
+            raise asyncio.TimeoutError(f"Connect MCP server {self.server} timeout")
+
+    async def _run(self):
+        try:
+            async with self._session_factory(
+                self.server, self._headers, self._handle_message
+            ) as session:
+                self.session = session
+                self._ready.set()
+                await self._closing.wait()
+        except Exception as e:
+            self._error = e
+            if self._ready.is_set():
+                logger.warning(f"MCP session of {self.server} closed: {e}")
+        finally:
+            self.session = None
+
+    async def _handle_message(self, message: Any):
+        if _is_connection_closed(message):
+            if not self._closing.is_set():
+                logger.warning(f"MCP transport of {self.server} closed")
+            # End the session, it is not alive from now on
+            self._closing.set()
+            return
+        await self._message_handler(message)
+
+    async def ping(self, timeout: float) -> bool:
+        try:
+            await asyncio.wait_for(self.session.send_ping(), timeout=timeout)
+            return True
+        except Exception as e:
+            logger.warning(f"Ping MCP server {self.server} failed: {e}")
+            return False
+
+    def close_nowait(self):
+        """Close the session in its task."""
+        self._closing.set()
+
+    async def close(self, timeout: float = 5.0):
+        self._closing.set()
+        if self._task is None or self._task.done():
+            return
+        await asyncio.wait({self._task}, timeout=timeout)
+        if not self._task.done():
+            self._task.cancel()
+
+
+class McpSessionPool:
+    """Pool of the initialized MCP client sessions of an event loop.
+
+    One session is kept per MCP server and header set, the concurrent calls share
+    it, at most ``max_concurrency`` of them at a time. A session idle for longer
+    than ``health_check_interval`` is pinged before reuse and reconnected if the
+    ping fails, a session idle for longer than ``idle_timeout`` is closed. A
+    session is dropped if its transport is closed, or a call on it fails with an
+    error other than the error responses of the server or is cancelled, the next
+    call reconnects.
+
+    Examples:
+        .. code-block:: python
+
+            pool = get_mcp_session_pool()
+            async with pool.session(server, headers) as session:
+                result = await session.call_tool("query_metrics", arguments={})
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = 16,
+        idle_timeout: float = 300.0,
+        health_check_interval: float = 30.0,
+        connect_timeout: float = 30.0,
+        session_factory: SessionFactory = open_sse_session,
+        metrics: Optional[McpMetrics] = None,
+        tool_list_cache: Optional[McpToolListCache] = None,
+    ):
+        """Create a new McpSessionPool.
+
+        Args:
+            max_concurrency (int): The max number of the concurrent calls of a
+                session.
+            idle_timeout (float): Close the sessions idle for longer than it, in
+                seconds.
+            health_check_interval (float): Ping the sessions idle for longer than
+                it before reuse, in seconds.
+            connect_timeout (float): The timeout of opening a session, in seconds.
+            session_factory (SessionFactory): Open an initialized session.
+            metrics (Optional[McpMetrics]): Record the latency of the connections.
+            tool_list_cache (Optional[McpToolListCache]): Invalidated when a server
+                notifies that its tool list changed.
+        """
+        self._max_concurrency = max_concurrency
+        self._idle_timeout = idle_timeout
+        self._health_check_interval = health_check_interval
+        self._connect_timeout = connect_timeout
+        self._session_factory = session_factory
+        self._metrics = metrics
+        self._tool_list_cache = tool_list_cache
+        self._sessions: Dict[Hashable, _PooledSession] = {}
+        self._locks: Dict[Hashable, asyncio.Lock] = {}
+        self._semaphores: Dict[Hashable, asyncio.Semaphore] = {}
+
+    def __len__(self) -> int:
+        """Return the number of the open sessions."""
+        return sum(1 for pooled in self._sessions.values() if pooled.alive)
+
+    @asynccontextmanager
+    async def session(
+        self, server: str, headers: Optional[Dict[str, str]] = None
+    ) -> AsyncIterator[ClientSession]:
+        """Borrow the initialized session of the server and the headers."""
+        key = _session_key(server, headers)
+        semaphore = self._semaphores.setdefault(
+            key, asyncio.Semaphore(self._max_concurrency)
+        )
+        async with semaphore:
+            pooled = await self._acquire(key, server, headers)
+            pooled.in_use += 1
+            try:
+                yield pooled.session  # type: ignore
+            except McpError as e:
+                # Keep the session for the other error responses of the server
+                if _is_connection_closed(e):
+                    await self._discard(key, pooled)
+                raise
+            except asyncio.CancelledError:
+                # The response of the cancelled request may still come, don't
+                # wait for the session to close in the cancelled task
+                self._drop(key, pooled)
+                raise
+            except Exception:
+                # Including the timeout of the call
+                await self._discard(key, pooled)
+                raise
+            finally:
+                pooled.in_use -= 1
+                pooled.last_used = time.monotonic()
+
+    async def close(self):
+        """Close all the sessions."""
+        sessions = list(self._sessions.values())
+        self._sessions.clear()
+        await asyncio.gather(*(pooled.close() for pooled in sessions))
+
+    async def _acquire(
+        self, key: Hashable, server: str, headers: Optional[Dict[str, str]]
+    ) -> _PooledSession:
+        await self._close_idle()
+        lock = self._locks.setdefault(key, asyncio.Lock())
+        async with lock:
+            pooled = self._sessions.get(key)
+            if (
+                pooled is not None
+                and pooled.alive
+                and not pooled.in_use
+                and time.monotonic() - pooled.last_used > self._health_check_interval
+                and not await pooled.ping(self._connect_timeout)
+            ):
+                await self._discard(key, pooled)
+            if pooled is not None and pooled.alive:
+                return pooled
+            if pooled is not None:
+                logger.info(f"Reconnect MCP server {server}")
+                self._sessions.pop(key, None)
+            pooled = _PooledSession(
+                server, headers, self._session_factory, self._message_handler(server)
+            )
+            start_time = time.perf_counter()
+            success = False
+            try:
+                await pooled.open(self._connect_timeout)
+                success = True
+            finally:
+                if self._metrics:
+                    cost_ms = (time.perf_counter() - start_time) * 1000
+                    self._metrics.record(server, "connect", cost_ms, success)
+            self._sessions[key] = pooled
+            return pooled
+
+    async def _discard(self, key: Hashable, pooled: _PooledSession):
+        if self._sessions.get(key) is pooled:
+            del self._sessions[key]
+        await pooled.close()
+
+    def _drop(self, key: Hashable, pooled: _PooledSession):
+        """Drop the session without waiting for it to close."""
+        if self._sessions.get(key) is pooled:
+            del self._sessions[key]
+        pooled.close_nowait()
+
+    async def _close_idle(self):
+        now = time.monotonic()
+        for key, pooled in list(self._sessions.items()):
+            if not pooled.in_use and now - pooled.last_used > self._idle_timeout:
+                await self._discard(key, pooled)
+
+    def _message_handler(self, server: str) -> MessageHandler:
+        async def handle(message: Any):
+            if self._tool_list_cache is None:
+                return
+            if isinstance(message, types.ServerNotification) and isinstance(
+                message.root, types.ToolListChangedNotification
+            ):
+                logger.info(f"Tool list of MCP server {server} changed")
+                self._tool_list_cache.invalidate(server=server)
+
+        return handle
+
+
+mcp_metrics = McpMetrics()
+mcp_tool_list_cache = McpToolListCache()
+_pools: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, McpSessionPool]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def get_mcp_session_pool() -> McpSessionPool:
+    """Return the session pool of the running event loop.
+
+    The sessions are bound to the event loop which opened them, each event loop
+    has its own pool, the pools share the metrics and the tool list cache.
+    """
+    loop = asyncio.get_running_loop()
+    pool = _pools.get(loop)
+    if pool is None:
+        pool = McpSessionPool(metrics=mcp_metrics, tool_list_cache=mcp_tool_list_cache)
+        _pools[loop] = pool
+    return pool
@@ -0,0 +1,319 @@
+import asyncio
+from contextlib import asynccontextmanager
+from types import SimpleNamespace
+from typing import List
+
+import anyio
+import pytest
+from mcp import types
+from mcp.shared.exceptions import McpError
+
+from ..session_pool import (
+    McpMetrics,
+    McpSessionPool,
+    McpToolListCache,
+    _relay_stream,
+)
+
+
+class FakeSession:
+    def __init__(self, server: str):
+        self.server = server
+        self.calls: List[str] = []
+        self.pings = 0
+        self.broken = False
+        self.max_concurrent = 0
+        self._concurrent = 0
+
+    async def send_ping(self):
+        self.pings += 1
+        if self.broken:
+            raise ConnectionError("broken")
+
+    async def list_tools(self):
+        return types.ListToolsResult(
+            tools=[
+                types.Tool(name=name, inputSchema={"type": "object"})
+                for name in ["a", "b"]
+            ]
+        )
+
+    async def call_tool(self, name: str, arguments=None):
+        if self.broken:
+            raise ConnectionError("broken")
+        if name == "invalid":
+            raise McpError(types.ErrorData(code=-32602, message="invalid"))
+        if name == "closed":
+            raise McpError(
+                types.ErrorData(code=types.CONNECTION_CLOSED, message="closed")
+            )
+        if name == "slow":
+            await asyncio.sleep(10)
+        self._concurrent += 1
+        self.max_concurrent = max(self.max_concurrent, self._concurrent)
+        await asyncio.sleep(0.01)
+        self._concurrent -= 1
+        self.calls.append(name)
+        return types.CallToolResult(content=[types.TextContent(type="text", text=name)])
+
+
+class FakeSessionFactory:
+    def __init__(self):
+        self.sessions: List[FakeSession] = []
+        self.closed = 0
+        self.handlers = []
+        self.fail = False
+
+    @asynccontextmanager
+    async def __call__(self, server, headers, message_handler):
+        if self.fail:
+            raise ConnectionError("refused")
+        session = FakeSession(server)
+        self.sessions.append(session)
+        self.handlers.append(message_handler)
+        try:
+            yield session
+        finally:
+            self.closed += 1
+
+
+@pytest.fixture
+def factory():
+    return FakeSessionFactory()
+
+
+@pytest.fixture
+def metrics():
+    return McpMetrics()
+
+
+@pytest.mark.asyncio
+async def test_reuse_session(factory, metrics):
+    pool = McpSessionPool(session_factory=factory, metrics=metrics)
+    for _ in range(3):
+        async with pool.session("http://a/sse", {"k": "v"}) as session:
+            await session.call_tool("t")
+    # Another header set has its own session
+    async with pool.session("http://a/sse", {"k": "w"}) as session:
+        await session.call_tool("t")
+    assert len(factory.sessions) == 2
+    assert factory.sessions[0].calls == ["t", "t", "t"]
+    assert len(pool) == 2
+    assert metrics.to_dict()["http://a/sse"]["connect"]["count"] == 2
+
+    await pool.close()
+    assert factory.closed == 2
+    assert len(pool) == 0
+
+
+@pytest.mark.asyncio
+async def test_concurrency_limit(factory):
+    pool = McpSessionPool(max_concurrency=2, session_factory=factory)
+
+    async def call():
+        async with pool.session("http://a/sse") as session:
+            await session.call_tool("t")
+
+    await asyncio.gather(*(call() for _ in range(6)))
+    assert len(factory.sessions) == 1
+    assert factory.sessions[0].max_concurrent == 2
+    await pool.close()
+
+
+@pytest.mark.asyncio
+async def test_reconnect(factory):
+    pool = McpSessionPool(session_factory=factory, health_check_interval=0)
+    async with pool.session("http://a/sse") as session:
+        await session.call_tool("t")
+    # The idle session is pinged before reuse
+    async with pool.session("http://a/sse") as session:
+        await session.call_tool("t")
+    assert factory.sessions[0].pings == 1
+    assert len(factory.sessions) == 1
+
+    # The broken session fails the ping and is reconnected
+    factory.sessions[0].broken = True
+    async with pool.session("http://a/sse") as session:
+        await session.call_tool("t")
+    assert len(factory.sessions) == 2
+    assert factory.closed == 1
+
+    # The error response of the server keeps the session
+    with pytest.raises(McpError):
+        async with pool.session("http://a/sse") as session:
+            await session.call_tool("invalid")
+    assert len(pool) == 1
+    await pool.close()
+
+
+@pytest.mark.asyncio
+async def test_drop_session_on_error(factory):
+    pool = McpSessionPool(session_factory=factory)
+    async with pool.session("http://a/sse") as session:
+        await session.call_tool("t")
+    # The failed call drops the session
+    factory.sessions[0].broken = True
+    with pytest.raises(ConnectionError):
+        async with pool.session("http://a/sse") as session:
+            await session.call_tool("t")
+    assert len(pool) == 0
+    await pool.close()
+
+
+@pytest.mark.asyncio
+async def test_drop_closed_session(factory):
+    pool = McpSessionPool(session_factory=factory)
+    # The pending call fails when the connection is closed
+    with pytest.raises(McpError):
+        async with pool.session("http://a/sse") as session:
+            await session.call_tool("closed")
+    assert len(pool) == 0
+    async with pool.session("http://a/sse") as session:
+        await session.call_tool("t")
+    assert len(factory.sessions) == 2
+    assert factory.sessions[1].calls == ["t"]
+
+    # The transport is closed without a pending call
+    await factory.handlers[1](
+        McpError(types.ErrorData(code=types.CONNECTION_CLOSED, message="closed"))
+    )
+    assert len(pool) == 0
+    async with pool.session("http://a/sse") as session:
+        await session.call_tool("t")
+    assert len(factory.sessions) == 3
+    assert factory.closed == 2
+    await pool.close()
+
+
+@pytest.mark.asyncio
+async def test_drop_session_on_cancel(factory):
+    pool = McpSessionPool(session_factory=factory)
+
+    async def call():
+        async with pool.session("http://a/sse") as session:
+            await session.call_tool("slow")
+
+    with pytest.raises(asyncio.TimeoutError):
+        await asyncio.wait_for(call(), timeout=0.05)
+    assert len(pool) == 0
+    async with pool.session("http://a/sse") as session:
+        await session.call_tool("t")
+    assert len(factory.sessions) == 2
+    await pool.close()
+
+
+@pytest.mark.asyncio
+async def test_relay_stream():
+    received = []
+
+    async def handler(message):
+        received.append(message)
+
+    read_write, read = anyio.create_memory_object_stream(1)
+    relay_write, relay_read = anyio.create_memory_object_stream(1)
+    await read_write.send("message")
+    await read_write.aclose()
+    await _relay_stream(read, relay_write, handler)
+    assert await relay_read.receive() == "message"
+    # The end of the transport is passed to the message handler
+    assert len(received) == 1
+    assert received[0].error.code == types.CONNECTION_CLOSED
+
+
+@pytest.mark.asyncio
+async def test_connect_error(factory, metrics):
+    pool = McpSessionPool(session_factory=factory, metrics=metrics)
+    factory.fail = True
+    with pytest.raises(ConnectionError):
+        async with pool.session("http://a/sse"):
+            pass
+    assert metrics.to_dict()["http://a/sse"]["connect"]["errors"] == 1
+    factory.fail = False
+    async with pool.session("http://a/sse") as session:
+        await session.call_tool("t")
+    assert len(pool) == 1
+    await pool.close()
+
+
+@pytest.mark.asyncio
+async def test_close_idle(factory):
+    pool = McpSessionPool(session_factory=factory, idle_timeout=0)
+    async with pool.session("http://a/sse"):
+        pass
+    async with pool.session("http://b/sse"):
+        pass
+    # The idle session of "a" is closed
+    assert factory.closed == 1
+    assert len(pool) == 1
+    await pool.close()
+
+
+@pytest.mark.asyncio
+async def test_tool_list_changed(factory):
+    cache = McpToolListCache()
+    pool = McpSessionPool(session_factory=factory, tool_list_cache=cache)
+    async with pool.session("http://a/sse") as session:
+        cache.set("mcp_a", "http://a/sse", await session.list_tools())
+    cache.set("mcp_b", "http://b/sse", types.ListToolsResult(tools=[]))
+    assert cache.get("mcp_a", "http://a/sse") is not None
+
+    notification = types.ServerNotification(
+        types.ToolListChangedNotification(method="notifications/tools/list_changed")
+    )
+    await factory.handlers[0](notification)
+    assert cache.get("mcp_a", "http://a/sse") is None
+    assert cache.get("mcp_b", "http://b/sse") is not None
+    await pool.close()
+
+
+def test_tool_list_cache_ttl():
+    cache = McpToolListCache(ttl=0.01)
+    cache.set("mcp_a", "http://a/sse", types.ListToolsResult(tools=[]))
+    assert cache.get("mcp_a", "http://a/sse") is not None
+    cache.invalidate(mcp_name="mcp_a")
+    assert cache.get("mcp_a", "http://a/sse") is None
+
+
+def test_metrics():
+    metrics = McpMetrics()
+    metrics.record("s", "tools/call:t", 10, True)
+    metrics.record("s", "tools/call:t", 30, False)
+    assert metrics.to_dict() == {
+        "s": {"tools/call:t": {"count": 2, "errors": 1, "avg_ms": 20.0, "max_ms": 30}}
+    }
+
+
+@pytest.mark.asyncio
+async def test_mcp_utils(factory, monkeypatch):
+    from .. import mcp_utils, session_pool
+    from ..mcp_utils import call_mcp_tool, get_mcp_tool_list
+
+    span = SimpleNamespace(trace_id="trace_id")
+    tracer = SimpleNamespace(get_current_span=lambda: span)
+    monkeypatch.setattr(mcp_utils, "root_tracer", tracer)
+
+    loop = asyncio.get_running_loop()
+    pool = McpSessionPool(
+        session_factory=factory,
+        metrics=session_pool.mcp_metrics,
+        tool_list_cache=session_pool.mcp_tool_list_cache,
+    )
+    session_pool._pools[loop] = pool
+    try:
+        result = await get_mcp_tool_list("mcp_a", "http://a/sse", allow_tools=["a"])
+        assert [tool.name for tool in result.tools] == ["a"]
+        # The cached tool list is filtered by the allowed tools of each call
+        result = await get_mcp_tool_list("mcp_a", "http://a/sse")
+        assert [tool.name for tool in result.tools] == ["a", "b"]
+        for _ in range(3):
+            await call_mcp_tool("mcp_a", "t", "http://a/sse", arguments={})
+        assert len(factory.sessions) == 1
+        assert factory.sessions[0].calls == ["t", "t", "t"]
+        stats = session_pool.mcp_metrics.to_dict()["http://a/sse"]
+        assert stats["tools/call:t"]["count"] == 3
+        assert stats["tools/list"]["count"] == 1
+    finally:
+        await pool.close()
+        del session_pool._pools[loop]
+        session_pool.mcp_tool_list_cache.invalidate()
+        session_pool.mcp_metrics.clear()
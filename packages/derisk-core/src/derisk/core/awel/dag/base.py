@@ -22,6 +22,7 @@ from typing import (
     Optional,
     Sequence,
     Set,
+    Tuple,
     Union,
     cast,
 )
@@ -622,6 +623,13 @@ class DAGVariables:
         return self._cached_provider
 
 
+# The running task context and its DAG context, every asyncio task has its own
+# value, so the upstream nodes can run in parallel.
+_curr_task_ctx_var: contextvars.ContextVar[
+    Optional[Tuple["DAGContext", TaskContext]]
+] = contextvars.ContextVar("awel_curr_task_ctx", default=None)
+
+
 class DAGContext:
     """The context of current DAG, created when the DAG is running.
 
@@ -670,25 +678,47 @@ class DAGContext:
 
     @property
     def current_task_context(self) -> TaskContext:
-        """Return the current task context."""
-        if not self._curr_task_ctx:
+        """Return the current task context.
+
+        The task context set in the current asyncio task is preferred, otherwise
+        return the last one set in any task.
+        """
+        task_ctx = self._curr_task_ctx
+        curr = _curr_task_ctx_var.get()
+        if curr is not None and curr[0] is self:
+            task_ctx = curr[1]
+        if not task_ctx:
             raise RuntimeError("Current task context not set")
-        return self._curr_task_ctx
+        return task_ctx
 
     @property
     def streaming_call(self) -> bool:
         """Whether the current DAG is streaming call."""
         return self._streaming_call
 
-    def set_current_task_context(self, _curr_task_ctx: TaskContext) -> None:
+    def set_current_task_context(
+        self, _curr_task_ctx: TaskContext
+    ) -> contextvars.Token:
         """Set the current task context.
 
         When the task is running, the current task context
-        will be set to the task context.
+        will be set to the task context. It is bound to the current asyncio task,
+        so the nodes running in parallel don't overwrite each other.
 
-        TODO: We should support parallel task running in the future.
+        Returns:
+            contextvars.Token: Pass it to reset_current_task_context when the task
+                is finished.
         """
         self._curr_task_ctx = _curr_task_ctx
+        return _curr_task_ctx_var.set((self, _curr_task_ctx))
+
+    def reset_current_task_context(self, token: contextvars.Token) -> None:
+        """Restore the task context of the current asyncio task before the task.
+
+        The last task context is still returned by current_task_context out of the
+        running tasks.
+        """
+        _curr_task_ctx_var.reset(token)
 
     def get_task_output(self, task_name: str) -> TaskOutput:
         """Get the task output by task name.
@@ -793,8 +823,24 @@ class DAG:
         tags: Optional[Dict[str, str]] = None,
         description: Optional[str] = None,
         default_dag_variables: Optional[DAGVariables] = None,
+        max_concurrency: Optional[int] = None,
     ) -> None:
-        """Initialize a DAG."""
+        """Initialize a DAG.
+
+        Args:
+            dag_id (str): The DAG id.
+            resource_group (Optional[ResourceGroup], optional): The resource group.
+            tags (Optional[Dict[str, str]], optional): The tags of the DAG.
+            description (Optional[str], optional): The description of the DAG.
+            default_dag_variables (Optional[DAGVariables], optional): The default
+                DAG variables.
+            max_concurrency (Optional[int], optional): The max number of operators
+                running at the same time in one DAG run. The independent upstream
+                branches of a node run in parallel, 1 means running the operators
+                one by one. Defaults to None, no limit.
+        """
+        if max_concurrency is not None and max_concurrency < 1:
+            raise ValueError("max_concurrency must be greater than 0")
         self._dag_id = dag_id
         self._tags: Dict[str, str] = tags or {}
         self._description = description
@@ -807,6 +853,7 @@ class DAG:
         self._lock = asyncio.Lock()
         self._event_loop_task_id_to_ctx: Dict[int, DAGContext] = {}
         self._default_dag_variables = default_dag_variables
+        self._max_concurrency = max_concurrency
 
     def _append_node(self, node: DAGNode) -> None:
         if node.node_id in self.node_map:
@@ -843,6 +890,11 @@ class DAG:
         """Return the description of current DAG."""
         return self._description
 
+    @property
+    def max_concurrency(self) -> Optional[int]:
+        """Return the max number of operators running at the same time."""
+        return self._max_concurrency
+
     @property
     def dev_mode(self) -> bool:
         """Whether the current DAG is in dev mode.
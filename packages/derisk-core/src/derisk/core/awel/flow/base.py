@@ -219,6 +219,7 @@ _RESOURCE_CATEGORY_DETAIL = {
     "knowledge_graph": _CategoryDetail(
         "Knowledge Graph", "The knowledge graph resource"
     ),
+    "full_text": _CategoryDetail("Full Text", "The full text store resource"),
     "database": _CategoryDetail("Database", "Interact with the database"),
     "example": _CategoryDetail("Example", "The example resource"),
 }
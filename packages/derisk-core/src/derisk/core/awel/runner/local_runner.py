@@ -21,6 +21,22 @@ from .job_manager import JobManager
 logger = logging.getLogger(__name__)
 
 
+class _WorkflowRunState:
+    """The state of one workflow run, shared by all the nodes of the run."""
+
+    def __init__(self, max_concurrency: Optional[int] = None):
+        self.max_concurrency = max_concurrency
+        self.semaphore: Optional[asyncio.Semaphore] = (
+            asyncio.Semaphore(max_concurrency) if max_concurrency else None
+        )
+        # node id -> the asyncio task running the node
+        self.node_tasks: Dict[str, asyncio.Task] = {}
+
+    @property
+    def sequential(self) -> bool:
+        return self.max_concurrency == 1
+
+
 class DefaultWorkflowRunner(WorkflowRunner):
     """The default workflow runner."""
 
@@ -111,8 +127,17 @@ class DefaultWorkflowRunner(WorkflowRunner):
                 "awel_node_name": node.node_name,
             },
         ):
+            run_state = _WorkflowRunState(
+                node.dag.max_concurrency if node.dag else None
+            )
             await self._execute_node(
-                job_manager, node, dag_ctx, node_outputs, skip_node_ids, system_app
+                job_manager,
+                node,
+                dag_ctx,
+                node_outputs,
+                skip_node_ids,
+                system_app,
+                run_state=run_state,
             )
         if not streaming_call and node.dag and exist_dag_ctx is None:
             # streaming call not work for dag end
@@ -130,16 +155,24 @@ class DefaultWorkflowRunner(WorkflowRunner):
         node_outputs: Dict[str, TaskContext],
         skip_node_ids: Set[str],
         system_app: Optional[SystemApp],
+        run_state: Optional[_WorkflowRunState] = None,
     ):
         # Skip run node
         if node.node_id in node_outputs:
             return
+        if run_state is None:
+            run_state = _WorkflowRunState(
+                node.dag.max_concurrency if node.dag else None
+            )
 
-        # Run all upstream nodes
-        # TODO: run in parallel, there are some code to be changed:
-        #  dag_ctx.set_current_task_context(task_ctx)
-        for upstream_node in node.upstream:
-            if isinstance(upstream_node, BaseOperator):
+        upstream_nodes = [
+            upstream_node
+            for upstream_node in node.upstream
+            if isinstance(upstream_node, BaseOperator)
+        ]
+        if run_state.sequential:
+            # Run all upstream nodes one by one
+            for upstream_node in upstream_nodes:
                 await self._execute_node(
                     job_manager,
                     upstream_node,
@@ -147,7 +180,31 @@ class DefaultWorkflowRunner(WorkflowRunner):
                     node_outputs,
                     skip_node_ids,
                     system_app,
+                    run_state=run_state,
                 )
+        else:
+            # Run all upstream nodes in parallel, every node runs in its own asyncio
+            # task, and a node shared by multiple branches only runs once.
+            upstream_tasks = []
+            for upstream_node in upstream_nodes:
+                if upstream_node.node_id in node_outputs:
+                    continue
+                upstream_task = run_state.node_tasks.get(upstream_node.node_id)
+                if upstream_task is None:
+                    upstream_task = asyncio.create_task(
+                        self._execute_node(
+                            job_manager,
+                            upstream_node,
+                            dag_ctx,
+                            node_outputs,
+                            skip_node_ids,
+                            system_app,
+                            run_state=run_state,
+                        )
+                    )
+                    run_state.node_tasks[upstream_node.node_id] = upstream_task
+                upstream_tasks.append(upstream_task)
+            await _wait_all(upstream_tasks)
 
         inputs = [
             node_outputs[upstream_node.node_id] for upstream_node in node.upstream
@@ -163,13 +220,14 @@ class DefaultWorkflowRunner(WorkflowRunner):
             task_ctx.set_call_data(current_call_data)
 
         task_ctx.set_task_input(input_ctx)
-        dag_ctx.set_current_task_context(task_ctx)
+        token = dag_ctx.set_current_task_context(task_ctx)
         task_ctx.set_current_state(TaskState.RUNNING)
 
         if node.node_id in skip_node_ids:
             task_ctx.set_current_state(TaskState.SKIP)
             task_ctx.set_task_output(SimpleTaskOutput(SKIP_DATA))
             node_outputs[node.node_id] = task_ctx
+            dag_ctx.reset_current_task_context(token)
             return
         try:
             logger.debug(
@@ -189,7 +247,11 @@ class DefaultWorkflowRunner(WorkflowRunner):
             with root_tracer.start_span(
                 "derisk.awel.workflow.run_operator", metadata=run_metadata
             ) as span:
-                await node._run(dag_ctx, task_ctx.log_id)
+                if run_state.semaphore is not None:
+                    async with run_state.semaphore:
+                        await node._run(dag_ctx, task_ctx.log_id)
+                else:
+                    await node._run(dag_ctx, task_ctx.log_id)
                 node_outputs[node.node_id] = dag_ctx.current_task_context
                 task_ctx.set_current_state(TaskState.SUCCESS)
 
@@ -226,6 +288,21 @@ class DefaultWorkflowRunner(WorkflowRunner):
             )
             task_ctx.set_current_state(TaskState.FAILED)
             raise e
+        finally:
+            dag_ctx.reset_current_task_context(token)
+
+
+async def _wait_all(tasks: List[asyncio.Task]):
+    """Wait all the tasks, cancel the others if one of them failed."""
+    if not tasks:
+        return
+    try:
+        await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            if not task.done():
+                task.cancel()
+        raise
 
 
 def _skip_current_downstream_by_node_name(
@@ -1,3 +1,5 @@
+import asyncio
+import time
 from typing import List
 
 import pytest
@@ -138,3 +140,131 @@ async def test_branch_node(
         assert res.current_task_context.current_state == TaskState.SUCCESS
         expect_res = 999 if is_odd else 888
         assert res.current_task_context.task_output.output == expect_res
+
+
+def _sleep_map(value: int, delay: float = 0.2):
+    async def _map(x: int) -> int:
+        await asyncio.sleep(delay)
+        return x + value
+
+    return _map
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "input_node",
+    [({"outputs": [1]})],
+    indirect=["input_node"],
+)
+async def test_run_upstream_in_parallel(runner: WorkflowRunner, input_node):
+    with DAG("test_run_upstream_in_parallel") as _dag:
+        branch_nodes = [MapOperator(_sleep_map(i)) for i in range(3)]
+        join_node = JoinOperator(lambda o1, o2, o3: [o1, o2, o3])
+        for branch_node in branch_nodes:
+            input_node >> branch_node >> join_node
+
+        start = time.perf_counter()
+        res: DAGContext[List[int]] = await runner.execute_workflow(join_node)
+        cost = time.perf_counter() - start
+        assert res.current_task_context.current_state == TaskState.SUCCESS
+        assert res.current_task_context.task_output.output == [1, 2, 3]
+        # The branches run in parallel, the cost is the max of the branches
+        assert cost < 0.5
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "input_node",
+    [({"outputs": [1]})],
+    indirect=["input_node"],
+)
+async def test_run_upstream_with_max_concurrency(runner: WorkflowRunner, input_node):
+    with DAG("test_run_upstream_with_max_concurrency", max_concurrency=1) as _dag:
+        branch_nodes = [MapOperator(_sleep_map(i, delay=0.1)) for i in range(3)]
+        join_node = JoinOperator(lambda o1, o2, o3: [o1, o2, o3])
+        for branch_node in branch_nodes:
+            input_node >> branch_node >> join_node
+
+        start = time.perf_counter()
+        res: DAGContext[List[int]] = await runner.execute_workflow(join_node)
+        cost = time.perf_counter() - start
+        assert res.current_task_context.task_output.output == [1, 2, 3]
+        assert cost >= 0.3
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "input_node",
+    [({"outputs": [1]})],
+    indirect=["input_node"],
+)
+async def test_run_shared_upstream_once(runner: WorkflowRunner, input_node):
+    counter = {"count": 0}
+
+    async def shared_map(x: int) -> int:
+        counter["count"] += 1
+        await asyncio.sleep(0.05)
+        return x * 10
+
+    with DAG("test_run_shared_upstream_once") as _dag:
+        shared_node = MapOperator(shared_map)
+        left_node = MapOperator(_sleep_map(1, delay=0.05))
+        right_node = MapOperator(_sleep_map(2, delay=0.05))
+        join_node = JoinOperator(lambda o1, o2: o1 + o2)
+        input_node >> shared_node
+        shared_node >> left_node >> join_node
+        shared_node >> right_node >> join_node
+
+        res: DAGContext[int] = await runner.execute_workflow(join_node)
+        assert res.current_task_context.task_output.output == 23
+        assert counter["count"] == 1
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "input_node",
+    [({"outputs": [1]})],
+    indirect=["input_node"],
+)
+async def test_run_upstream_in_parallel_failed(runner: WorkflowRunner, input_node):
+    async def failed_map(x: int) -> int:
+        raise ValueError("failed")
+
+    with DAG("test_run_upstream_in_parallel_failed") as _dag:
+        ok_node = MapOperator(_sleep_map(1, delay=1))
+        failed_node = MapOperator(failed_map)
+        join_node = JoinOperator(lambda o1, o2: o1 + o2)
+        input_node >> ok_node >> join_node
+        input_node >> failed_node >> join_node
+
+        start = time.perf_counter()
+        with pytest.raises(ValueError):
+            await runner.execute_workflow(join_node)
+        # The other branch is cancelled
+        assert time.perf_counter() - start < 0.5
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "input_node",
+    [({"outputs": [1]})],
+    indirect=["input_node"],
+)
+async def test_task_context_reset_after_run(runner: WorkflowRunner, input_node):
+    from ..dag.base import _curr_task_ctx_var
+
+    with DAG("test_task_context_reset_after_run") as _dag:
+        branch_nodes = [MapOperator(_sleep_map(i, delay=0.01)) for i in range(2)]
+        join_node = JoinOperator(lambda o1, o2: [o1, o2])
+        for branch_node in branch_nodes:
+            input_node >> branch_node >> join_node
+
+        res: DAGContext[List[int]] = await runner.execute_workflow(join_node)
+        # The running task context is not kept once the DAG is finished
+        assert _curr_task_ctx_var.get() is None
+        assert res.current_task_context.task_output.output == [1, 2]
+
+
+def test_invalid_max_concurrency():
+    with pytest.raises(ValueError):
+        DAG("test_invalid_max_concurrency", max_concurrency=0)
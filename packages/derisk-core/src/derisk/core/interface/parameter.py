@@ -140,6 +140,24 @@ class EmbeddingDeployModelParameters(BaseDeployModelParameters, RegisterParamete
     concurrency: Optional[int] = field(
         default=100, metadata={"help": _("Model concurrency limit")}
     )
+    max_batch_size: Optional[int] = field(
+        default=None,
+        metadata={
+            "help": _(
+                "The max number of inputs merged into one model call by the dynamic "
+                "batching of the worker, None or 0 disables the dynamic batching"
+            )
+        },
+    )
+    max_batch_wait_ms: float = field(
+        default=5.0,
+        metadata={
+            "help": _(
+                "The max time in milliseconds to wait for more requests to merge "
+                "into a batch"
+            )
+        },
+    )
 
     @classmethod
     def worker_type(cls) -> "WorkerType":
@@ -156,6 +174,24 @@ class RerankerDeployModelParameters(BaseDeployModelParameters, RegisterParameter
     concurrency: Optional[int] = field(
         default=50, metadata={"help": _("Model concurrency limit")}
     )
+    max_batch_size: Optional[int] = field(
+        default=None,
+        metadata={
+            "help": _(
+                "The max number of inputs merged into one model call by the dynamic "
+                "batching of the worker, None or 0 disables the dynamic batching"
+            )
+        },
+    )
+    max_batch_wait_ms: float = field(
+        default=5.0,
+        metadata={
+            "help": _(
+                "The max time in milliseconds to wait for more requests to merge "
+                "into a batch"
+            )
+        },
+    )
 
     @classmethod
     def worker_type(cls) -> "WorkerType":
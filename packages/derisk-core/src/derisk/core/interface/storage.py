@@ -118,6 +118,28 @@ class StorageItemAdapter(Generic[T, TDataRepresentation]):
             Any: The query for the resource identifier
         """
 
+    def get_query_for_identifiers(
+        self,
+        storage_format: Type[TDataRepresentation],
+        resource_ids: List[ResourceIdentifier],
+        **kwargs,
+    ) -> Optional[Any]:
+        """Get the query for a list of resource identifiers.
+
+        The storage uses it to load, update and delete the items in bulk, the query
+        should match exactly the items of the identifiers.
+
+        Args:
+            storage_format (Type[TDataRepresentation]): The storage format
+            resource_ids (List[ResourceIdentifier]): The resource identifiers
+            kwargs: The additional arguments
+
+        Returns:
+            Optional[Any]: The query for the resource identifiers, None if the bulk
+                query is not supported, then the items are handled one by one.
+        """
+        return None
+
 
 class DefaultStorageItemAdapter(StorageItemAdapter[T, T]):
     """Default storage item adapter.
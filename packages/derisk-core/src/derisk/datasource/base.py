@@ -1,7 +1,19 @@
 """Base class for all connectors."""
 
 from abc import ABC, abstractmethod
-from typing import Dict, Iterable, List, Optional, Tuple, Type, TypeVar
+from dataclasses import dataclass
+from typing import (
+    Any,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Type,
+    TypeVar,
+)
 
 from .parameter import BaseDatasourceParameters  # noqa: F401
 
@@ -9,6 +21,45 @@ C = TypeVar("C", bound="BaseDatasourceParameters")
 T = TypeVar("T", bound="BaseConnector")
 
 
+@dataclass
+class QueryResultBatch:
+    """A batch of the rows of a query result.
+
+    Parameters:
+        field_names (List[str]): The field names of the query result.
+        rows (List[Sequence[Any]]): The rows of the batch.
+        truncated (bool): Whether the rows after this batch are dropped because
+            the query result exceeds the limits, only the last batch can be
+            truncated.
+    """
+
+    field_names: List[str]
+    rows: List[Sequence[Any]]
+    truncated: bool = False
+
+    def __len__(self) -> int:
+        """Return the number of rows."""
+        return len(self.rows)
+
+    def to_columns(self) -> List[List[Any]]:
+        """Return the values of each field."""
+        if not self.rows:
+            return [[] for _ in self.field_names]
+        return [list(values) for values in zip(*self.rows)]
+
+    def to_arrow(self) -> Any:
+        """Convert to a pyarrow RecordBatch."""
+        try:
+            import pyarrow as pa
+        except ImportError:
+            raise ImportError(
+                "pyarrow is required to convert the query result to arrow, please "
+                "install it by running `pip install pyarrow`"
+            )
+        arrays = [pa.array(values) for values in self.to_columns()]
+        return pa.RecordBatch.from_arrays(arrays, names=self.field_names)
+
+
 class BaseConnector(ABC):
     """Base class for all connectors."""
 
@@ -165,6 +216,27 @@ class BaseConnector(ABC):
         """
         raise NotImplementedError("Current connector does not support run_to_df")
 
+    def query_stream(
+        self,
+        query: str,
+        batch_size: int = 1000,
+        max_rows: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+    ) -> Iterator[QueryResultBatch]:
+        """Execute a query and yield the result in batches.
+
+        Args:
+            query (str): sql query
+            batch_size (int): the max number of rows of a batch
+            max_rows (Optional[int]): stop fetching after the number of rows
+            max_bytes (Optional[int]): stop fetching after the estimated bytes of
+                the rows
+
+        Returns:
+            Iterator[QueryResultBatch]: the batches of the result
+        """
+        raise NotImplementedError("Current connector does not support query_stream")
+
     def get_users(self) -> List[Tuple[str, str]]:
         """Return user information.
 
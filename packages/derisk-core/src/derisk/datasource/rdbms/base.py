@@ -13,8 +13,10 @@ from typing import (
     Dict,
     Generator,
     Iterable,
+    Iterator,
     List,
     Optional,
+    Sequence,
     Set,
     Tuple,
     Type,
@@ -32,7 +34,7 @@ from sqlalchemy.orm import scoped_session, sessionmaker
 from sqlalchemy.orm.session import Session
 from sqlalchemy.schema import CreateTable
 
-from derisk.datasource.base import BaseConnector
+from derisk.datasource.base import BaseConnector, QueryResultBatch
 from derisk.util.i18n_utils import _
 from derisk_ext.datasource.schema import DBType
 
@@ -41,6 +43,17 @@ from ..parameter import BaseDatasourceParameters
 logger = logging.getLogger(__name__)
 
 
+def _estimate_row_bytes(row: Sequence[Any]) -> int:
+    """Estimate the bytes of a row, the fixed size values are counted as 8 bytes."""
+    size = 0
+    for value in row:
+        if isinstance(value, (str, bytes, bytearray)):
+            size += len(value)
+        else:
+            size += 8
+    return size
+
+
 def _format_index(index: sqlalchemy.engine.interfaces.ReflectedIndex) -> str:
     return (
         f"Name: {index['name']}, Unique: {index['unique']},"
@@ -635,16 +648,124 @@ class RDBMSConnector(BaseConnector):
                 else:
                     return self.get_simple_fields(table_name)
 
-    def run_to_df(self, command: str, fetch: str = "all"):
-        """Execute sql command and return result as dataframe."""
+    def query_stream(
+        self,
+        query: str,
+        batch_size: int = 1000,
+        max_rows: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+    ) -> Iterator[QueryResultBatch]:
+        """Execute a query and yield the result in batches.
+
+        The rows are fetched with a server-side cursor if the driver supports it,
+        so the whole result is never loaded into memory. When the rows or the
+        estimated bytes reach the limits, the rest of the result is dropped and the
+        last batch is marked as truncated. Close the generator to stop the query
+        early.
+
+        Args:
+            query (str): SQL query to run
+            batch_size (int): The max number of rows of a batch
+            max_rows (Optional[int]): Stop fetching after the number of rows
+            max_bytes (Optional[int]): Stop fetching after the estimated bytes of
+                the rows
+
+        Returns:
+            Iterator[QueryResultBatch]: The batches of the result, at least one
+                batch for the query returns rows.
+        """
+        if batch_size < 1:
+            raise ValueError("batch_size must be greater than 0")
+        logger.info(f"Query stream[{query}]")
+        query = self._format_sql(query)
+        if not query:
+            return
+        with self.session_scope(commit=False) as session:
+            cursor = session.execute(
+                text(query), execution_options={"stream_results": True}
+            )
+            try:
+                if not cursor.returns_rows:
+                    return
+                field_names = list(cursor.keys())
+                num_rows, num_bytes, yielded = 0, 0, False
+                while True:
+                    limit = batch_size
+                    if max_rows is not None:
+                        limit = min(limit, max_rows - num_rows)
+                    rows = list(cursor.fetchmany(limit)) if limit > 0 else []
+                    truncated = False
+                    if max_bytes is not None:
+                        for i, row in enumerate(rows):
+                            num_bytes += _estimate_row_bytes(row)
+                            if num_bytes > max_bytes:
+                                rows = rows[:i]
+                                truncated = True
+                                break
+                    num_rows += len(rows)
+                    done = truncated or len(rows) < limit
+                    if not done and max_rows is not None and num_rows >= max_rows:
+                        truncated = cursor.fetchone() is not None
+                        done = True
+                    if rows or truncated or not yielded:
+                        yield QueryResultBatch(field_names, rows, truncated)
+                        yielded = True
+                    if done:
+                        if truncated:
+                            logger.info(
+                                f"Query result truncated at {num_rows} rows, "
+                                f"max_rows={max_rows}, max_bytes={max_bytes}"
+                            )
+                        return
+            finally:
+                # Discard the rest of the result
+                cursor.close()
+
+    def run_to_df(
+        self,
+        command: str,
+        fetch: str = "all",
+        max_rows: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+    ):
+        """Execute sql command and return result as dataframe.
+
+        The query result is streamed into the columns of the dataframe, the rows
+        are not copied.
+
+        Args:
+            command (str): SQL command to run
+            fetch (str): fetch type, either 'all' or 'one'
+            max_rows (Optional[int]): The max number of rows of the query result
+            max_bytes (Optional[int]): The max estimated bytes of the query result
+        """
         import pandas as pd
 
         # Pandas has too much dependence and the import time is too long
         # TODO: Remove the dependency on pandas
-        result_lst = self.run(command, fetch)
-        colunms = result_lst[0]
-        values = result_lst[1:]
-        return pd.DataFrame(values, columns=colunms)
+        parsed, ttype, sql_type, table_name = self.__sql_parse(command)
+        if ttype != sqlparse.tokens.DML or sql_type != "SELECT":
+            result_lst = self.run(command, fetch)
+            colunms = result_lst[0]
+            values = result_lst[1:]
+            return pd.DataFrame(values, columns=colunms)
+        if fetch == "one":
+            max_rows = 1 if max_rows is None else min(max_rows, 1)
+        elif fetch != "all":
+            raise ValueError("Fetch parameter must be either 'one' or 'all'")
+
+        field_names: List[str] = []
+        columns: List[List[Any]] = []
+        for batch in self.query_stream(command, max_rows=max_rows, max_bytes=max_bytes):
+            if not columns:
+                field_names = batch.field_names
+                columns = [[] for _ in field_names]
+            for values, batch_values in zip(columns, batch.to_columns()):
+                values.extend(batch_values)
+        # Key by the position, the field names may be duplicated
+        df = pd.DataFrame({i: values for i, values in enumerate(columns)})
+        df.columns = field_names
+        return df
 
     def run_no_throw(self, command: str, fetch: str = "all") -> List:
         """Execute a SQL command and return a string representing the results.
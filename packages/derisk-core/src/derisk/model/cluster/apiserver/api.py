@@ -49,6 +49,12 @@ from derisk.model.cluster.manager_base import WorkerManager, WorkerManagerFactor
 from derisk.model.cluster.registry import ModelRegistry
 from derisk.model.parameter import ModelAPIServerParameters, WorkerType
 from derisk.util.chat_util import transform_to_sse
+from derisk.util.embedding_utils import (
+    EMBEDDING_FORMAT_BASE64,
+    EMBEDDING_FORMAT_FLOAT,
+    embedding_to_list,
+    encode_embedding,
+)
 from derisk.util.fastapi import create_app
 from derisk.util.tracer import initialize_tracer, root_tracer
 from derisk.util.tracer.tracer_impl import TracerParameters
@@ -694,6 +700,17 @@ async def create_embeddings(
     request: EmbeddingsRequest, api_server: APIServer = Depends(get_api_server)
 ):
     await api_server.get_model_instances_or_raise(request.model, worker_type="text2vec")
+    encoding_format = request.encoding_format or EMBEDDING_FORMAT_FLOAT
+    if encoding_format not in (EMBEDDING_FORMAT_FLOAT, EMBEDDING_FORMAT_BASE64):
+        return create_error_response(
+            ErrorCode.PARAM_OUT_OF_RANGE,
+            f"{encoding_format} is not one of ['float', 'base64'] - 'encoding_format'",
+        )
+    encode = (
+        encode_embedding
+        if encoding_format == EMBEDDING_FORMAT_BASE64
+        else embedding_to_list
+    )
     texts = request.input
     if isinstance(texts, str):
         texts = [texts]
@@ -717,7 +734,7 @@ async def create_embeddings(
         data += [
             {
                 "object": "embedding",
-                "embedding": emb,
+                "embedding": encode(emb),
                 "index": num_batch * batch_size + i,
             }
             for i, emb in enumerate(embeddings)
@@ -42,6 +42,8 @@ class EmbeddingsRequest(BaseModel):
     span_id: Optional[str] = None
     query: Optional[str] = None
     """For rerank model, query is required"""
+    encoding_format: Optional[str] = None
+    """The encoding format of the embeddings, "float" or "base64"."""
 
 
 class CountTokenRequest(BaseModel):
@@ -9,6 +9,7 @@ from derisk.component import BaseComponent, ComponentType, SystemApp
 from derisk.configs.model_config import resolve_root_path
 from derisk.model.base import ModelInstance
 from derisk.model.cluster.registry import EmbeddedModelRegistry, ModelRegistry
+from derisk.model.cluster.selector import create_selector
 from derisk.model.parameter import DBModelRegistryParameters, ModelControllerParameters
 from derisk.util.api_utils import APIMixin
 from derisk.util.api_utils import _api_remote as api_remote
@@ -263,10 +264,15 @@ def _create_registry(controller_params: ModelControllerParameters) -> ModelRegis
     availability service for model instances if you use a database registry now. Also,
     we can implement more registry types in the future.
     """
+    instance_selector = create_selector(
+        controller_params.instance_select_policy,
+        session_affinity=bool(controller_params.instance_session_affinity),
+    )
     if not controller_params.registry:
         return EmbeddedModelRegistry(
             heartbeat_interval_secs=controller_params.heartbeat_interval_secs,
             heartbeat_timeout_secs=controller_params.heartbeat_timeout_secs,
+            instance_selector=instance_selector,
         )
     elif isinstance(controller_params.registry, DBModelRegistryParameters):
         from derisk.datasource.rdbms.base import (
@@ -307,6 +313,7 @@ def _create_registry(controller_params: ModelControllerParameters) -> ModelRegis
             try_to_create_db=try_to_create_db,
             heartbeat_interval_secs=controller_params.heartbeat_interval_secs,
             heartbeat_timeout_secs=controller_params.heartbeat_timeout_secs,
+            instance_selector=instance_selector,
         )
         return registry
     else:
@@ -91,13 +91,21 @@ class WorkerManager(ABC):
 
     @abstractmethod
     async def select_one_instance(
-        self, worker_type: str, model_name: str, healthy_only: bool = True
+        self,
+        worker_type: str,
+        model_name: str,
+        healthy_only: bool = True,
+        affinity_key: Optional[str] = None,
     ) -> WorkerRunData:
         """Asynchronous select one instance"""
 
     @abstractmethod
     def sync_select_one_instance(
-        self, worker_type: str, model_name: str, healthy_only: bool = True
+        self,
+        worker_type: str,
+        model_name: str,
+        healthy_only: bool = True,
+        affinity_key: Optional[str] = None,
     ) -> WorkerRunData:
         """Select one instance"""
 
@@ -1,15 +1,19 @@
 import itertools
 import logging
-import random
 import threading
 import time
 from abc import ABC, abstractmethod
 from collections import defaultdict
 from datetime import datetime, timedelta
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple
 
 from derisk.component import BaseComponent, ComponentType, SystemApp
 from derisk.model.base import ModelInstance
+from derisk.model.cluster.selector import (
+    InstanceSelector,
+    RequestTracker,
+    create_selector,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -23,10 +27,28 @@ class ModelRegistry(BaseComponent, ABC):
 
     name = ComponentType.MODEL_REGISTRY
 
-    def __init__(self, system_app: SystemApp | None = None):
+    _instance_selector: Optional[InstanceSelector] = None
+
+    def __init__(
+        self,
+        system_app: SystemApp | None = None,
+        instance_selector: Optional[InstanceSelector] = None,
+    ):
         self.system_app = system_app
+        self._instance_selector = instance_selector
         super().__init__(system_app)
 
+    @property
+    def instance_selector(self) -> InstanceSelector:
+        """The policy to select one instance, default is random selection."""
+        if self._instance_selector is None:
+            self._instance_selector = create_selector()
+        return self._instance_selector
+
+    @instance_selector.setter
+    def instance_selector(self, selector: InstanceSelector):
+        self._instance_selector = selector
+
     def init_app(self, system_app: SystemApp):
         """Initialize the component with the main application."""
         self.system_app = system_app
@@ -93,22 +115,43 @@ class ModelRegistry(BaseComponent, ABC):
         - List[ModelInstance]: A list of instances for the all models.
         """
 
-    async def select_one_health_instance(self, model_name: str) -> ModelInstance:
+    async def select_one_health_instance(
+        self, model_name: str, affinity_key: Optional[str] = None
+    ) -> ModelInstance:
         """
         Selects one healthy and enabled instance for a given model.
 
         Args:
         - model_name (str): Name of the model.
+        - affinity_key (Optional[str]): The session affinity key, e.g. the
+            conversation id.
 
         Returns:
-        - ModelInstance: One randomly selected healthy and enabled instance, or None
-            if no such instance exists.
+        - ModelInstance: One healthy and enabled instance selected by the
+            instance_selector, or None if no such instance exists.
         """
         instances = await self.get_all_instances(model_name, healthy_only=True)
         instances = [i for i in instances if i.enabled]
         if not instances:
             return None
-        return random.choice(instances)
+        return self.instance_selector.select(
+            instances, _instance_key, affinity_key=affinity_key
+        )
+
+    def track_instance(self, instance: ModelInstance) -> RequestTracker:
+        """Track a request sent to the instance, use it as a context manager.
+
+        The inflight requests and the latency of the instance are recorded in the
+        instance_selector, they are used by the next selections.
+
+        Examples:
+            .. code-block:: python
+
+                instance = await registry.select_one_health_instance(model_name)
+                with registry.track_instance(instance):
+                    ...  # Send the request to the instance
+        """
+        return self.instance_selector.track(_instance_key(instance))
 
     @abstractmethod
     async def send_heartbeat(self, instance: ModelInstance) -> bool:
@@ -124,14 +167,20 @@ class ModelRegistry(BaseComponent, ABC):
         """
 
 
+def _instance_key(instance: ModelInstance) -> str:
+    # The same key as the WorkerRunData of the instance in the worker manager
+    return f"{instance.model_name}@{instance.host}:{instance.port}"
+
+
 class EmbeddedModelRegistry(ModelRegistry):
     def __init__(
         self,
         system_app: SystemApp | None = None,
         heartbeat_interval_secs: int = 60,
         heartbeat_timeout_secs: int = 120,
+        instance_selector: Optional[InstanceSelector] = None,
     ):
-        super().__init__(system_app)
+        super().__init__(system_app, instance_selector=instance_selector)
         self.registry: Dict[str, List[ModelInstance]] = defaultdict(list)
         self.heartbeat_interval_secs = heartbeat_interval_secs
         self.heartbeat_timeout_secs = heartbeat_timeout_secs
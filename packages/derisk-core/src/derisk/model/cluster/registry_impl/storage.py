@@ -17,6 +17,7 @@ from derisk.util.executor_utils import blocking_func_to_async
 
 from ...base import ModelInstance
 from ..registry import ModelRegistry
+from ..selector import InstanceSelector
 
 logger = logging.getLogger(__name__)
 
@@ -170,8 +171,9 @@ class StorageModelRegistry(ModelRegistry):
         executor: Optional[Executor] = None,
         heartbeat_interval_secs: float | int = 60,
         heartbeat_timeout_secs: int = 120,
+        instance_selector: Optional[InstanceSelector] = None,
     ):
-        super().__init__(system_app)
+        super().__init__(system_app, instance_selector=instance_selector)
         self._storage = storage
         self._executor = executor or ThreadPoolExecutor(max_workers=2)
         self.heartbeat_interval_secs = heartbeat_interval_secs
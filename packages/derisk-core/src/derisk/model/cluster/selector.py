@@ -0,0 +1,299 @@
+"""Instance selection policies for the model workers.
+
+The selectors keep some lightweight statistics of each instance (inflight
+requests, EWMA of the time to first token, latency, throughput and error rate),
+and use them to choose the instance to send a new request to.
+"""
+
+import hashlib
+import logging
+import random
+import threading
+import time
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Sequence, Type, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+@dataclass
+class InstanceStats:
+    """The runtime statistics of one instance."""
+
+    inflight: int = 0
+    total: int = 0
+    errors: int = 0
+    ewma_ttft: Optional[float] = None
+    ewma_latency: Optional[float] = None
+    ewma_throughput: Optional[float] = None
+    ewma_error_rate: float = 0.0
+
+
+def _ewma(old: Optional[float], value: float, alpha: float) -> float:
+    if old is None:
+        return value
+    return alpha * value + (1 - alpha) * old
+
+
+class RequestTracker:
+    """Track one request sent to an instance."""
+
+    def __init__(self, selector: "InstanceSelector", key: str):
+        self._selector = selector
+        self._key = key
+        self._start = time.perf_counter()
+        self._first_token_recorded = False
+        self._success = True
+        self._completion_tokens: Optional[int] = None
+
+    def first_token(self):
+        """Record the time to first token, only the first call takes effect."""
+        if self._first_token_recorded:
+            return
+        self._first_token_recorded = True
+        self._selector._on_first_token(self._key, time.perf_counter() - self._start)
+
+    def set_completion_tokens(self, completion_tokens: Optional[int]):
+        """Set the number of generated tokens, used to compute the throughput."""
+        self._completion_tokens = completion_tokens
+
+    def fail(self):
+        """Mark the request as failed."""
+        self._success = False
+
+    def __enter__(self) -> "RequestTracker":
+        self._selector._on_request_start(self._key)
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if exc_type is not None and not issubclass(exc_type, GeneratorExit):
+            self._success = False
+        self._selector._on_request_end(
+            self._key,
+            time.perf_counter() - self._start,
+            self._success,
+            self._completion_tokens,
+        )
+        return False
+
+
+class InstanceSelector(ABC):
+    """The base class of the instance selection policies.
+
+    If session affinity is enabled and an affinity key (e.g. the conversation id)
+    is given, the same instance is chosen for the same key with rendezvous hashing,
+    so the prefix cache of the inference engine can be reused. When the preferred
+    instance is much busier than the others, the policy is used instead.
+    """
+
+    name: str
+
+    def __init__(
+        self,
+        session_affinity: bool = False,
+        ewma_alpha: float = 0.2,
+        affinity_max_inflight_gap: int = 8,
+    ):
+        self.session_affinity = session_affinity
+        self.ewma_alpha = ewma_alpha
+        self.affinity_max_inflight_gap = affinity_max_inflight_gap
+        self._stats: Dict[str, InstanceStats] = {}
+        self._lock = threading.Lock()
+
+    def get_stats(self, key: str) -> InstanceStats:
+        """Get the statistics of the instance."""
+        stats = self._stats.get(key)
+        if stats is None:
+            with self._lock:
+                stats = self._stats.setdefault(key, InstanceStats())
+        return stats
+
+    def select(
+        self,
+        instances: Sequence[T],
+        key_func: Callable[[T], str],
+        affinity_key: Optional[str] = None,
+    ) -> T:
+        """Select one instance.
+
+        Args:
+            instances (Sequence[T]): The candidate instances.
+            key_func (Callable[[T], str]): Get the unique key of an instance.
+            affinity_key (Optional[str]): The session affinity key.
+
+        Returns:
+            T: The selected instance.
+        """
+        if not instances:
+            raise ValueError("No instances to select")
+        if len(instances) == 1:
+            return instances[0]
+        keys = [key_func(ins) for ins in instances]
+        if self.session_affinity and affinity_key:
+            idx = self._select_by_affinity(keys, affinity_key)
+            if idx is not None:
+                return instances[idx]
+        return instances[self._select(keys)]
+
+    def track(self, key: str) -> RequestTracker:
+        """Track a request sent to the instance, use it as a context manager."""
+        return RequestTracker(self, key)
+
+    @abstractmethod
+    def _select(self, keys: List[str]) -> int:
+        """Return the index of the selected instance."""
+
+    def _select_by_affinity(self, keys: List[str], affinity_key: str) -> Optional[int]:
+        def _weight(key: str) -> int:
+            digest = hashlib.md5(f"{affinity_key}#{key}".encode("utf-8")).digest()
+            return int.from_bytes(digest[:8], "big")
+
+        idx = max(range(len(keys)), key=lambda i: _weight(keys[i]))
+        min_inflight = min(self.get_stats(k).inflight for k in keys)
+        if self.get_stats(keys[idx]).inflight - min_inflight > (
+            self.affinity_max_inflight_gap
+        ):
+            return None
+        return idx
+
+    def _random_min(self, keys: List[str], score: Callable[[str], float]) -> int:
+        scores = [score(k) for k in keys]
+        best = min(scores)
+        return random.choice([i for i, s in enumerate(scores) if s == best])
+
+    def _on_request_start(self, key: str):
+        stats = self.get_stats(key)
+        with self._lock:
+            stats.inflight += 1
+            stats.total += 1
+
+    def _on_first_token(self, key: str, ttft: float):
+        stats = self.get_stats(key)
+        with self._lock:
+            stats.ewma_ttft = _ewma(stats.ewma_ttft, ttft, self.ewma_alpha)
+
+    def _on_request_end(
+        self,
+        key: str,
+        latency: float,
+        success: bool,
+        completion_tokens: Optional[int] = None,
+    ):
+        stats = self.get_stats(key)
+        with self._lock:
+            stats.inflight = max(0, stats.inflight - 1)
+            stats.ewma_error_rate = _ewma(
+                stats.ewma_error_rate, 0.0 if success else 1.0, self.ewma_alpha
+            )
+            if not success:
+                stats.errors += 1
+                return
+            stats.ewma_latency = _ewma(stats.ewma_latency, latency, self.ewma_alpha)
+            if completion_tokens and latency > 0:
+                stats.ewma_throughput = _ewma(
+                    stats.ewma_throughput, completion_tokens / latency, self.ewma_alpha
+                )
+
+
+class RandomSelector(InstanceSelector):
+    """Select an instance randomly."""
+
+    name = "random"
+
+    def _select(self, keys: List[str]) -> int:
+        return random.randrange(len(keys))
+
+
+class LeastInflightSelector(InstanceSelector):
+    """Select the instance with the least inflight requests."""
+
+    name = "least_inflight"
+
+    def _select(self, keys: List[str]) -> int:
+        return self._random_min(keys, lambda k: self.get_stats(k).inflight)
+
+
+class PowerOfTwoSelector(InstanceSelector):
+    """Pick two instances randomly and select the one with less inflight requests.
+
+    It is almost as good as the least inflight policy, and avoids sending all the
+    concurrent requests to the same instance when the statistics are stale.
+    """
+
+    name = "power_of_two"
+
+    def _select(self, keys: List[str]) -> int:
+        i, j = random.sample(range(len(keys)), 2)
+        si, sj = self.get_stats(keys[i]), self.get_stats(keys[j])
+        if (si.inflight, si.ewma_error_rate) <= (sj.inflight, sj.ewma_error_rate):
+            return i
+        return j
+
+
+class LatencyEWMASelector(InstanceSelector):
+    """Select the instance with the lowest expected latency.
+
+    The cost of an instance is its EWMA of the time to first token (or of the
+    latency for non-stream requests) multiplied by the number of inflight requests
+    plus one, and penalized by the error rate. The instances without statistics
+    have zero cost, so they are explored first.
+    """
+
+    name = "latency_ewma"
+
+    def __init__(self, error_penalty: float = 10.0, **kwargs):
+        super().__init__(**kwargs)
+        self.error_penalty = error_penalty
+
+    def _cost(self, key: str) -> float:
+        stats = self.get_stats(key)
+        latency = stats.ewma_ttft
+        if latency is None:
+            latency = stats.ewma_latency
+        if latency is None:
+            return 0.0
+        error_factor = 1 + self.error_penalty * stats.ewma_error_rate
+        return latency * (stats.inflight + 1) * error_factor
+
+    def _select(self, keys: List[str]) -> int:
+        return self._random_min(keys, self._cost)
+
+
+_SELECTORS: Dict[str, Type[InstanceSelector]] = {
+    cls.name: cls
+    for cls in [
+        RandomSelector,
+        LeastInflightSelector,
+        PowerOfTwoSelector,
+        LatencyEWMASelector,
+    ]
+}
+
+
+def get_selector_names() -> List[str]:
+    """Get all the names of the instance selection policies."""
+    return list(_SELECTORS.keys())
+
+
+def create_selector(
+    policy: Optional[str] = None, session_affinity: bool = False, **kwargs
+) -> InstanceSelector:
+    """Create an instance selector by the policy name.
+
+    Args:
+        policy (Optional[str]): The name of the policy, default is "random".
+        session_affinity (bool): Whether to enable session affinity.
+
+    Returns:
+        InstanceSelector: The instance selector.
+    """
+    policy = policy or RandomSelector.name
+    if policy not in _SELECTORS:
+        raise ValueError(
+            f"Unknown instance select policy: {policy}, "
+            f"supported: {get_selector_names()}"
+        )
+    return _SELECTORS[policy](session_affinity=session_affinity, **kwargs)
@@ -0,0 +1,163 @@
+from collections import Counter
+from types import SimpleNamespace
+
+import pytest
+
+from derisk.model.base import ModelInstance
+from derisk.model.cluster import selector as selector_module
+from derisk.model.cluster.registry import EmbeddedModelRegistry
+from derisk.model.cluster.selector import (
+    LatencyEWMASelector,
+    LeastInflightSelector,
+    PowerOfTwoSelector,
+    RandomSelector,
+    create_selector,
+    get_selector_names,
+)
+
+_INSTANCES = ["worker_1", "worker_2", "worker_3"]
+
+
+def _key(ins: str) -> str:
+    return ins
+
+
+def test_create_selector():
+    assert set(get_selector_names()) == {
+        "random",
+        "least_inflight",
+        "power_of_two",
+        "latency_ewma",
+    }
+    assert isinstance(create_selector(), RandomSelector)
+    selector = create_selector("least_inflight", session_affinity=True)
+    assert isinstance(selector, LeastInflightSelector)
+    assert selector.session_affinity
+    with pytest.raises(ValueError):
+        create_selector("unknown")
+
+
+def test_select_empty():
+    with pytest.raises(ValueError):
+        RandomSelector().select([], _key)
+
+
+def test_track_inflight():
+    selector = RandomSelector()
+    with selector.track("worker_1") as tracker:
+        assert selector.get_stats("worker_1").inflight == 1
+        tracker.first_token()
+        tracker.set_completion_tokens(10)
+    stats = selector.get_stats("worker_1")
+    assert stats.inflight == 0
+    assert stats.total == 1
+    assert stats.ewma_ttft is not None
+    assert stats.ewma_latency is not None
+    assert stats.ewma_error_rate == 0
+
+    with pytest.raises(RuntimeError):
+        with selector.track("worker_1"):
+            raise RuntimeError("error")
+    stats = selector.get_stats("worker_1")
+    assert stats.inflight == 0
+    assert stats.errors == 1
+    assert stats.ewma_error_rate > 0
+
+
+def test_least_inflight():
+    selector = LeastInflightSelector()
+    selector.track("worker_1").__enter__()
+    selector.track("worker_2").__enter__()
+    for _ in range(10):
+        assert selector.select(_INSTANCES, _key) == "worker_3"
+
+
+def test_power_of_two():
+    selector = PowerOfTwoSelector()
+    for _ in range(5):
+        selector.track("worker_1").__enter__()
+    counter = Counter(selector.select(_INSTANCES, _key) for _ in range(200))
+    # worker_1 is never chosen because the other one of the pair is less loaded
+    assert counter["worker_1"] == 0
+
+
+def test_latency_ewma():
+    selector = LatencyEWMASelector()
+    selector._on_first_token("worker_1", 2.0)
+    selector._on_first_token("worker_2", 0.1)
+    selector._on_first_token("worker_3", 0.5)
+    assert selector.select(_INSTANCES, _key) == "worker_2"
+
+    # Errors make the instance more expensive
+    for _ in range(10):
+        selector._on_request_end("worker_2", 0.1, success=False)
+    assert selector.select(_INSTANCES, _key) == "worker_3"
+
+
+def test_latency_ewma_explore_new_instance():
+    selector = LatencyEWMASelector()
+    selector._on_first_token("worker_1", 0.1)
+    selector._on_first_token("worker_2", 0.1)
+    assert selector.select(_INSTANCES, _key) == "worker_3"
+
+
+def test_session_affinity():
+    selector = LeastInflightSelector(session_affinity=True)
+    chosen = selector.select(_INSTANCES, _key, affinity_key="conv_1")
+    for _ in range(3):
+        selector.track(chosen).__enter__()
+    # Still the same instance although it is busier than the others
+    assert selector.select(_INSTANCES, _key, affinity_key="conv_1") == chosen
+    # Different conversations are spread across the instances
+    chosen_set = {
+        selector.select(_INSTANCES, _key, affinity_key=f"conv_{i}") for i in range(50)
+    }
+    assert len(chosen_set) > 1
+
+
+def test_session_affinity_overloaded():
+    selector = LeastInflightSelector(session_affinity=True, affinity_max_inflight_gap=2)
+    chosen = selector.select(_INSTANCES, _key, affinity_key="conv_1")
+    for _ in range(3):
+        selector.track(chosen).__enter__()
+    # Fallback to the policy when the preferred instance is overloaded
+    assert selector.select(_INSTANCES, _key, affinity_key="conv_1") != chosen
+
+
+@pytest.mark.asyncio
+async def test_registry_picks_slower_instance_less_often(monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr(
+        selector_module, "time", SimpleNamespace(perf_counter=lambda: now[0])
+    )
+    registry = EmbeddedModelRegistry(
+        instance_selector=create_selector("latency_ewma"),
+    )
+    latencies = {5000: 0.05, 5001: 0.5}
+    for port in latencies:
+        await registry.register_instance(
+            ModelInstance(model_name="llm@llm", host="127.0.0.1", port=port)
+        )
+
+    counter = Counter()
+    for _ in range(100):
+        instance = await registry.select_one_health_instance("llm@llm")
+        counter[instance.port] += 1
+        with registry.track_instance(instance):
+            now[0] += latencies[instance.port]
+    assert counter[5001] < counter[5000] / 10
+
+
+def test_worker_manager_shares_registry_selector():
+    from derisk.model.cluster.worker.manager import LocalWorkerManager
+
+    registry = EmbeddedModelRegistry(
+        instance_selector=create_selector("least_inflight"),
+    )
+    manager = LocalWorkerManager(model_registry=registry)
+    assert isinstance(manager.instance_selector, LeastInflightSelector)
+    assert manager.instance_selector is registry.instance_selector
+
+    selector = create_selector("power_of_two")
+    manager = LocalWorkerManager(model_registry=registry, instance_selector=selector)
+    assert registry.instance_selector is selector
@@ -1,5 +1,5 @@
 import logging
-from typing import Dict, List, Optional, Type, Union
+from typing import Any, Dict, List, Optional, Type, Union
 
 from derisk.configs.model_config import get_device
 from derisk.core import Embeddings, ModelMetadata, RerankEmbeddings
@@ -9,6 +9,7 @@ from derisk.core.interface.parameter import (
     RerankerDeployModelParameters,
 )
 from derisk.model.adapter.base import EmbeddingModelAdapter, get_embedding_adapter
+from derisk.model.cluster.worker.micro_batch import MicroBatcher
 from derisk.model.cluster.worker_base import ModelWorker
 from derisk.model.parameter import (
     WorkerType,
@@ -31,6 +32,7 @@ class EmbeddingsModelWorker(ModelWorker):
             ]
         ] = None
         self._adapter: Optional[EmbeddingModelAdapter] = None
+        self._batcher: Optional[MicroBatcher] = None
 
         self.model_name: str = ""
         self.model_path: str = ""
@@ -82,11 +84,36 @@ class EmbeddingsModelWorker(ModelWorker):
         else:
             logger.info(f"Load embeddings model: {self.model_name}")
             self._embeddings_impl = self._adapter.load_from_params(self._model_params)
+        self._batcher = self._create_batcher()
+
+    def _create_batcher(self) -> Optional[MicroBatcher]:
+        max_batch_size = getattr(self._model_params, "max_batch_size", None)
+        if not max_batch_size or max_batch_size <= 1:
+            return None
+        logger.info(
+            f"Enable dynamic batching for model {self.model_name}, max_batch_size: "
+            f"{max_batch_size}, max_batch_wait_ms: "
+            f"{self._model_params.max_batch_wait_ms}"
+        )
+        return MicroBatcher(
+            self._embed_batch,
+            max_batch_size=max_batch_size,
+            max_wait_ms=self._model_params.max_batch_wait_ms,
+            name=f"embeddings_batcher_{self.model_name}",
+        )
+
+    def _embed_batch(self, query: Optional[str], texts: List[str]) -> List[Any]:
+        if isinstance(self._embeddings_impl, RerankEmbeddings):
+            return self._embeddings_impl.predict(query, texts)
+        return self._embeddings_impl.embed_documents(texts)
 
     def __del__(self):
         self.stop()
 
     def stop(self) -> None:
+        if self._batcher:
+            self._batcher.close()
+            self._batcher = None
         if not self._embeddings_impl:
             return
         del self._embeddings_impl
@@ -115,8 +142,13 @@ class EmbeddingsModelWorker(ModelWorker):
         textx: List[str] = params["input"]
         if isinstance(self._embeddings_impl, RerankEmbeddings):
             query = params["query"]
-            scores: List[float] = self._embeddings_impl.predict(query, textx)
+            if self._batcher:
+                scores: List[float] = self._batcher.submit(textx, key=query)
+            else:
+                scores = self._embeddings_impl.predict(query, textx)
             return [scores]
+        elif self._batcher:
+            return self._batcher.submit(textx)
         else:
             return self._embeddings_impl.embed_documents(textx)
 
@@ -3,7 +3,6 @@ import itertools
 import json
 import logging
 import os
-import random
 import sys
 import time
 import traceback
@@ -41,6 +40,7 @@ from derisk.model.cluster.manager_base import (
     WorkerRunData,
 )
 from derisk.model.cluster.registry import ModelRegistry
+from derisk.model.cluster.selector import InstanceSelector, create_selector
 from derisk.model.cluster.storage import ModelStorage, ModelStorageItem
 from derisk.model.cluster.worker_base import ModelWorker
 from derisk.model.parameter import (
@@ -49,6 +49,11 @@ from derisk.model.parameter import (
     WorkerType,
 )
 from derisk.model.utils.llm_utils import list_supported_models
+from derisk.util.embedding_utils import (
+    EMBEDDING_FORMAT_BASE64,
+    embeddings_to_list,
+    encode_embeddings,
+)
 from derisk.util.fastapi import create_app, register_event_handler
 from derisk.util.parameter_utils import (
     ParameterDescription,
@@ -95,6 +100,7 @@ class LocalWorkerManager(WorkerManager):
         host: str = None,
         port: int = None,
         model_storage: Optional[ModelStorage] = None,
+        instance_selector: Optional[InstanceSelector] = None,
     ) -> None:
         """Create a LocalWorkerManager instance.
 
@@ -109,6 +115,10 @@ class LocalWorkerManager(WorkerManager):
             port (int, optional): Port. Defaults to None.
             model_storage (Optional[ModelStorage], optional): Model storage. Defaults
                 to None. It is used to store model metadata.
+            instance_selector (Optional[InstanceSelector], optional): The policy to
+                select one instance from the instances of a model, it is shared
+                with the model registry. Defaults to the selector of the model
+                registry, or random selection.
         """
         self.workers: Dict[str, List[WorkerRunData]] = dict()
         self.executor = ThreadPoolExecutor(max_workers=os.cpu_count() * 5)
@@ -119,6 +129,13 @@ class LocalWorkerManager(WorkerManager):
         self.host = host
         self.port = port
         self.model_storage = model_storage
+        if model_registry:
+            # Share the selector with the registry, so both select with the same
+            # policy and the statistics recorded by this worker manager
+            if instance_selector:
+                model_registry.instance_selector = instance_selector
+            instance_selector = model_registry.instance_selector
+        self.instance_selector = instance_selector or create_selector()
         self.start_listeners = []
 
         self.run_data = WorkerRunData(
@@ -403,43 +420,67 @@ class LocalWorkerManager(WorkerManager):
         return self.workers.get(worker_key, [])
 
     def _simple_select(
-        self, worker_type: str, model_name: str, worker_instances: List[WorkerRunData]
+        self,
+        worker_type: str,
+        model_name: str,
+        worker_instances: List[WorkerRunData],
+        affinity_key: Optional[str] = None,
     ) -> WorkerRunData:
         if not worker_instances:
             raise Exception(
                 f"Cound not found worker instances for model name {model_name} and "
                 f"worker type {worker_type}"
             )
-        worker_run_data = random.choice(worker_instances)
-        return worker_run_data
+        return self.instance_selector.select(
+            worker_instances, _instance_key, affinity_key=affinity_key
+        )
 
     async def select_one_instance(
-        self, worker_type: str, model_name: str, healthy_only: bool = True
+        self,
+        worker_type: str,
+        model_name: str,
+        healthy_only: bool = True,
+        affinity_key: Optional[str] = None,
     ) -> WorkerRunData:
         worker_instances = await self.get_model_instances(
             worker_type, model_name, healthy_only
         )
-        return self._simple_select(worker_type, model_name, worker_instances)
+        return self._simple_select(
+            worker_type, model_name, worker_instances, affinity_key=affinity_key
+        )
 
     def sync_select_one_instance(
-        self, worker_type: str, model_name: str, healthy_only: bool = True
+        self,
+        worker_type: str,
+        model_name: str,
+        healthy_only: bool = True,
+        affinity_key: Optional[str] = None,
     ) -> WorkerRunData:
         worker_instances = self.sync_get_model_instances(
             worker_type, model_name, healthy_only
         )
-        return self._simple_select(worker_type, model_name, worker_instances)
+        return self._simple_select(
+            worker_type, model_name, worker_instances, affinity_key=affinity_key
+        )
 
     async def _get_model(self, params: Dict, worker_type: str = "llm") -> WorkerRunData:
         model = params.get("model")
         if not model:
             raise Exception("Model name count not be empty")
-        return await self.select_one_instance(worker_type, model, healthy_only=True)
+        return await self.select_one_instance(
+            worker_type, model, healthy_only=True, affinity_key=_affinity_key(params)
+        )
 
     def _sync_get_model(self, params: Dict, worker_type: str = "llm") -> WorkerRunData:
         model = params.get("model")
         if not model:
             raise Exception("Model name count not be empty")
-        return self.sync_select_one_instance(worker_type, model, healthy_only=True)
+        return self.sync_select_one_instance(
+            worker_type, model, healthy_only=True, affinity_key=_affinity_key(params)
+        )
+
+    def _track(self, worker_run_data: WorkerRunData):
+        return self.instance_selector.track(_instance_key(worker_run_data))
 
     async def generate_stream(
         self, params: Dict, async_wrapper=None, **kwargs
@@ -458,19 +499,27 @@ class LocalWorkerManager(WorkerManager):
                 )
                 return
             async with worker_run_data.semaphore:
-                if worker_run_data.worker.support_async():
-                    async for outout in worker_run_data.worker.async_generate_stream(
-                        params
-                    ):
-                        yield outout
-                else:
-                    if not async_wrapper:
-                        from starlette.concurrency import iterate_in_threadpool
+                with self._track(worker_run_data) as tracker:
+                    if worker_run_data.worker.support_async():
+                        output_iter = worker_run_data.worker.async_generate_stream(
+                            params
+                        )
+                    else:
+                        if not async_wrapper:
+                            from starlette.concurrency import iterate_in_threadpool
 
-                        async_wrapper = iterate_in_threadpool
-                    async for output in async_wrapper(
-                        worker_run_data.worker.generate_stream(params)
-                    ):
+                            async_wrapper = iterate_in_threadpool
+                        output_iter = async_wrapper(
+                            worker_run_data.worker.generate_stream(params)
+                        )
+                    async for output in output_iter:
+                        tracker.first_token()
+                        if output.error_code != 0:
+                            tracker.fail()
+                        elif output.usage:
+                            tracker.set_completion_tokens(
+                                output.usage.get("completion_tokens")
+                            )
                         yield output
 
     async def generate(self, params: Dict) -> ModelOutput:
@@ -487,12 +536,20 @@ class LocalWorkerManager(WorkerManager):
                     error_code=1,
                 )
             async with worker_run_data.semaphore:
-                if worker_run_data.worker.support_async():
-                    return await worker_run_data.worker.async_generate(params)
-                else:
-                    return await self.run_blocking_func(
-                        worker_run_data.worker.generate, params
-                    )
+                with self._track(worker_run_data) as tracker:
+                    if worker_run_data.worker.support_async():
+                        output = await worker_run_data.worker.async_generate(params)
+                    else:
+                        output = await self.run_blocking_func(
+                            worker_run_data.worker.generate, params
+                        )
+                    if output.error_code != 0:
+                        tracker.fail()
+                    elif output.usage:
+                        tracker.set_completion_tokens(
+                            output.usage.get("completion_tokens")
+                        )
+                    return output
 
     async def embeddings(self, params: Dict) -> List[List[float]]:
         """Embed input"""
@@ -506,17 +563,19 @@ class LocalWorkerManager(WorkerManager):
             except Exception as e:
                 raise e
             async with worker_run_data.semaphore:
-                if worker_run_data.worker.support_async():
-                    return await worker_run_data.worker.async_embeddings(params)
-                else:
-                    return await self.run_blocking_func(
-                        worker_run_data.worker.embeddings, params
-                    )
+                with self._track(worker_run_data):
+                    if worker_run_data.worker.support_async():
+                        return await worker_run_data.worker.async_embeddings(params)
+                    else:
+                        return await self.run_blocking_func(
+                            worker_run_data.worker.embeddings, params
+                        )
 
     def sync_embeddings(self, params: Dict) -> List[List[float]]:
         worker_type = params.get("worker_type", WorkerType.TEXT2VEC.value)
         worker_run_data = self._sync_get_model(params, worker_type=worker_type)
-        return worker_run_data.worker.embeddings(params)
+        with self._track(worker_run_data):
+            return worker_run_data.worker.embeddings(params)
 
     async def count_token(self, params: Dict) -> int:
         """Count token of prompt"""
@@ -765,6 +824,20 @@ class LocalWorkerManager(WorkerManager):
         return WorkerApplyOutput(message=message, timecost=timecost)
 
 
+def _instance_key(worker_run_data: WorkerRunData) -> str:
+    return (
+        f"{worker_run_data.worker_key}@{worker_run_data.host}:{worker_run_data.port}"
+    )
+
+
+def _affinity_key(params: Dict) -> Optional[str]:
+    """Get the session affinity key(conversation id) of the request."""
+    context = params.get("context")
+    if isinstance(context, dict):
+        return context.get("conv_uid")
+    return getattr(context, "conv_uid", None)
+
+
 class WorkerManagerAdapter(WorkerManager):
     def __init__(self, worker_manager: WorkerManager = None) -> None:
         self.worker_manager = worker_manager
@@ -810,17 +883,25 @@ class WorkerManagerAdapter(WorkerManager):
         )
 
     async def select_one_instance(
-        self, worker_type: str, model_name: str, healthy_only: bool = True
+        self,
+        worker_type: str,
+        model_name: str,
+        healthy_only: bool = True,
+        affinity_key: Optional[str] = None,
     ) -> WorkerRunData:
         return await self.worker_manager.select_one_instance(
-            worker_type, model_name, healthy_only
+            worker_type, model_name, healthy_only, affinity_key=affinity_key
         )
 
     def sync_select_one_instance(
-        self, worker_type: str, model_name: str, healthy_only: bool = True
+        self,
+        worker_type: str,
+        model_name: str,
+        healthy_only: bool = True,
+        affinity_key: Optional[str] = None,
     ) -> WorkerRunData:
         return self.worker_manager.sync_select_one_instance(
-            worker_type, model_name, healthy_only
+            worker_type, model_name, healthy_only, affinity_key=affinity_key
         )
 
     async def generate_stream(
@@ -899,10 +980,14 @@ async def api_generate(request: PromptRequest):
 @router.post("/worker/embeddings")
 async def api_embeddings(request: EmbeddingsRequest):
     params = request.dict(exclude_none=True)
+    encoding_format = params.pop("encoding_format", None)
     span_id = root_tracer.get_current_span_id()
     if "span_id" not in params and span_id:
         params["span_id"] = span_id
-    return await worker_manager.embeddings(params)
+    embeddings = await worker_manager.embeddings(params)
+    if encoding_format == EMBEDDING_FORMAT_BASE64:
+        return encode_embeddings(embeddings)
+    return embeddings_to_list(embeddings)
 
 
 @router.post("/worker/count_token")
@@ -1061,13 +1146,17 @@ def _create_local_model_manager(
             # Get current ip address
             register_host = _get_ip_address()
     port = worker_params.port
+    instance_selector = _create_instance_selector(worker_params)
     if not worker_params.register or not worker_params.controller_addr:
         logger.info(
             f"Not register current to controller, register: {worker_params.register}, "
             f"controller_addr: {worker_params.controller_addr}"
         )
         return LocalWorkerManager(
-            host=register_host, port=port, model_storage=model_storage
+            host=register_host,
+            port=port,
+            model_storage=model_storage,
+            instance_selector=instance_selector,
         )
     else:
         from derisk.model.cluster.controller.controller import ModelRegistryClient
@@ -1102,9 +1191,17 @@ def _create_local_model_manager(
             host=register_host,
             port=port,
             model_storage=model_storage,
+            instance_selector=instance_selector,
         )
 
 
+def _create_instance_selector(worker_params: ModelWorkerParameters):
+    return create_selector(
+        worker_params.instance_select_policy,
+        session_affinity=bool(worker_params.instance_session_affinity),
+    )
+
+
 def _build_worker(
     worker_type: Optional[str] = None,
     worker_class: Optional[str] = None,
@@ -1268,6 +1365,9 @@ def initialize_worker_manager_in_client(
             initialize_controller,
         )
         from derisk.model.cluster.worker.remote_manager import RemoteWorkerManager
+        from derisk.model.cluster.worker.remote_worker import (
+            HttpClientPoolParameters,
+        )
 
         if model_storage:
             raise ValueError("Model storage is not supported in remote mode now")
@@ -1276,8 +1376,27 @@ def initialize_worker_manager_in_client(
             raise ValueError("Controller can`t be None")
         logger.info(f"Worker params: {worker_params}")
         client = ModelRegistryClient(worker_params.controller_addr)
-        worker_manager.worker_manager = RemoteWorkerManager(client)
+        client_pool_params = HttpClientPoolParameters(
+            max_connections=worker_params.remote_max_connections,
+            max_keepalive_connections=worker_params.remote_max_keepalive_connections,
+            keepalive_expiry=worker_params.remote_keepalive_expiry,
+            http2=bool(worker_params.remote_http2),
+        )
+        worker_manager.worker_manager = RemoteWorkerManager(
+            client,
+            client_pool_params=client_pool_params,
+            instances_cache_ttl=worker_params.remote_instances_cache_ttl,
+            max_concurrency_per_instance=(
+                worker_params.remote_max_concurrency_per_instance
+            ),
+            instance_selector=_create_instance_selector(worker_params),
+        )
         worker_manager.after_start(start_listener)
+
+        async def shutdown_event():
+            await worker_manager.stop(ignore_exception=True)
+
+        register_event_handler(app, "shutdown", shutdown_event)
         initialize_controller(
             app=app,
             remote_controller_addr=worker_params.controller_addr,
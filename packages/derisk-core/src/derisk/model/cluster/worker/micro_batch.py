@@ -0,0 +1,254 @@
+"""Dynamic micro-batching of the requests to the embedding and reranker models.
+
+Concurrent requests are merged into one model call, up to ``max_batch_size``
+inputs. The requests queued while the model is busy are merged into the next
+call without waiting. If the last call merged more than one request, the
+batcher also waits at most ``max_wait_ms`` for more requests, so a single
+caller doesn't pay the wait time. The results are split back to the callers.
+
+The histograms of the batch size and the queue wait time are logged every
+``metrics_log_interval`` seconds and when the batcher is closed.
+"""
+
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Hashable, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+BatchFunc = Callable[[Optional[Hashable], List[str]], List[Any]]
+
+_BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256)
+_QUEUE_WAIT_MS_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+
+
+class Histogram:
+    """A histogram with fixed bucket upper bounds, thread-safe."""
+
+    def __init__(self, buckets: Sequence[float]):
+        self._buckets = sorted(buckets)
+        self._counts = [0] * (len(self._buckets) + 1)
+        self._count = 0
+        self._sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        """Record a value."""
+        idx = len(self._buckets)
+        for i, bound in enumerate(self._buckets):
+            if value <= bound:
+                idx = i
+                break
+        with self._lock:
+            self._counts[idx] += 1
+            self._count += 1
+            self._sum += value
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Get the cumulative counts of the buckets, the count and the sum."""
+        with self._lock:
+            counts = list(self._counts)
+            total, total_sum = self._count, self._sum
+        buckets = {}
+        cumulative = 0
+        for bound, count in zip([*self._buckets, "+Inf"], counts):
+            cumulative += count
+            buckets[f"le_{bound}"] = cumulative
+        return {"buckets": buckets, "count": total, "sum": total_sum}
+
+    def quantile(self, q: float) -> str:
+        """Get the upper bound of the bucket which the q-quantile falls in."""
+        snapshot = self.snapshot()
+        rank = q * snapshot["count"]
+        for bucket, count in snapshot["buckets"].items():
+            if count and count >= rank:
+                return bucket[len("le_") :]
+        return "-"
+
+
+@dataclass
+class _BatchRequest:
+    inputs: List[str]
+    key: Optional[Hashable]
+    future: Future = field(default_factory=Future)
+    enqueue_time: float = field(default_factory=time.perf_counter)
+
+
+_STOP = object()
+
+
+class MicroBatcher:
+    """Merge the concurrent requests into batches, run them in a worker thread.
+
+    Only the requests with the same key are merged into one call, e.g. the
+    reranker requests are grouped by the query.
+
+    Examples:
+        .. code-block:: python
+
+            batcher = MicroBatcher(
+                lambda _, texts: embeddings.embed_documents(texts),
+                max_batch_size=32,
+                max_wait_ms=5,
+            )
+            vectors = batcher.submit(["hello", "world"])
+    """
+
+    def __init__(
+        self,
+        batch_func: BatchFunc,
+        max_batch_size: int = 32,
+        max_wait_ms: float = 5,
+        name: str = "micro_batcher",
+        metrics_log_interval: float = 60,
+    ):
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be greater than 0")
+        self._batch_func = batch_func
+        self._max_batch_size = max_batch_size
+        self._max_wait = max(max_wait_ms, 0) / 1000
+        self._name = name
+        self._queue: queue.Queue = queue.Queue()
+        self._carry: Optional[_BatchRequest] = None
+        self._last_batch_requests = 0
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._closed = False
+        self._batch_size = Histogram(_BATCH_SIZE_BUCKETS)
+        self._queue_wait_ms = Histogram(_QUEUE_WAIT_MS_BUCKETS)
+        self._metrics_log_interval = metrics_log_interval
+        self._last_metrics_log = time.perf_counter()
+
+    def submit(self, inputs: List[str], key: Optional[Hashable] = None) -> List[Any]:
+        """Submit the inputs and wait for the results, one result per input."""
+        if not inputs:
+            return []
+        request = _BatchRequest(inputs=list(inputs), key=key)
+        with self._lock:
+            if self._closed:
+                raise RuntimeError(f"{self._name} is closed")
+            self._ensure_thread()
+            self._queue.put(request)
+        return request.future.result()
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Get the histograms of the batch size and the queue wait time in ms."""
+        return {
+            "batch_size": self._batch_size.snapshot(),
+            "queue_wait_ms": self._queue_wait_ms.snapshot(),
+        }
+
+    def close(self):
+        """Stop the worker thread after the queued requests are finished."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            thread = self._thread
+            if thread:
+                self._queue.put(_STOP)
+        if thread and thread is not threading.current_thread():
+            thread.join()
+        self._log_metrics()
+
+    def _log_metrics(self):
+        batch_size = self._batch_size.snapshot()
+        queue_wait = self._queue_wait_ms.snapshot()
+        if not batch_size["count"]:
+            return
+        logger.info(
+            f"{self._name} metrics, batches: {batch_size['count']}, requests: "
+            f"{queue_wait['count']}, mean batch size: "
+            f"{batch_size['sum'] / batch_size['count']:.1f}, p50 batch size <= "
+            f"{self._batch_size.quantile(0.5)}, mean queue wait: "
+            f"{queue_wait['sum'] / max(queue_wait['count'], 1):.1f}ms, "
+            f"p99 queue wait <= {self._queue_wait_ms.quantile(0.99)}ms"
+        )
+
+    def _ensure_thread(self):
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=self._run, name=self._name, daemon=True
+            )
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+            self._run_batch(batch)
+            now = time.perf_counter()
+            if now - self._last_metrics_log >= self._metrics_log_interval:
+                self._last_metrics_log = now
+                self._log_metrics()
+
+    def _next_batch(self) -> Optional[List[_BatchRequest]]:
+        first = self._carry or self._queue.get()
+        self._carry = None
+        if first is _STOP:
+            return None
+        batch = [first]
+        size = len(first.inputs)
+        max_wait = self._max_wait if self._last_batch_requests > 1 else 0
+        deadline = time.perf_counter() + max_wait
+        while size < self._max_batch_size:
+            timeout = deadline - time.perf_counter()
+            try:
+                if timeout > 0:
+                    request = self._queue.get(timeout=timeout)
+                else:
+                    request = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if request is _STOP or size + len(request.inputs) > self._max_batch_size:
+                # Run it in the next batch
+                self._carry = request
+                break
+            batch.append(request)
+            size += len(request.inputs)
+        self._last_batch_requests = len(batch)
+        return batch
+
+    def _run_batch(self, batch: List[_BatchRequest]):
+        now = time.perf_counter()
+        for request in batch:
+            self._queue_wait_ms.observe((now - request.enqueue_time) * 1000)
+        groups: Dict[Optional[Hashable], List[_BatchRequest]] = {}
+        for request in batch:
+            groups.setdefault(request.key, []).append(request)
+        for key, requests in groups.items():
+            inputs = [text for request in requests for text in request.inputs]
+            self._batch_size.observe(len(inputs))
+            try:
+                results = self._batch_func(key, inputs)
+                if len(results) != len(inputs):
+                    raise ValueError(
+                        f"Expected {len(inputs)} results, got {len(results)}"
+                    )
+            except Exception as e:
+                if len(requests) == 1:
+                    requests[0].future.set_exception(e)
+                else:
+                    # Don't fail all the requests for one bad request
+                    logger.warning(f"{self._name} batch failed, retry one by one: {e}")
+                    for request in requests:
+                        self._run_batch_one(request)
+                continue
+            offset = 0
+            for request in requests:
+                end = offset + len(request.inputs)
+                request.future.set_result(list(results[offset:end]))
+                offset = end
+
+    def _run_batch_one(self, request: _BatchRequest):
+        try:
+            request.future.set_result(
+                list(self._batch_func(request.key, request.inputs))
+            )
+        except Exception as e:
+            request.future.set_exception(e)
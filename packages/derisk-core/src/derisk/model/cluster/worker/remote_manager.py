@@ -1,5 +1,8 @@
 import asyncio
-from typing import Any, Callable, List
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 from derisk.model.base import ModelInstance, WorkerApplyOutput, WorkerSupportedModel
 from derisk.model.cluster.base import (
@@ -9,18 +12,70 @@ from derisk.model.cluster.base import (
     WorkerStartupRequest,
 )
 from derisk.model.cluster.registry import ModelRegistry
+from derisk.model.cluster.selector import InstanceSelector
 from derisk.model.cluster.worker.manager import (
     LocalWorkerManager,
     WorkerRunData,
     logger,
 )
-from derisk.model.cluster.worker.remote_worker import RemoteModelWorker
+from derisk.model.cluster.worker.remote_worker import (
+    HttpClientPoolParameters,
+    RemoteModelWorker,
+    RemoteWorkerHttpClientPool,
+)
 from derisk.model.parameter import WorkerType
 
 
+@dataclass
+class _CachedInstances:
+    """The cached instances of one worker key."""
+
+    instances: List[WorkerRunData] = field(default_factory=list)
+    expire_at: float = 0.0
+    refreshing: Optional[asyncio.Future] = None
+
+    @property
+    def expired(self) -> bool:
+        return time.monotonic() >= self.expire_at
+
+
 class RemoteWorkerManager(LocalWorkerManager):
-    def __init__(self, model_registry: ModelRegistry = None) -> None:
-        super().__init__(model_registry=model_registry)
+    def __init__(
+        self,
+        model_registry: ModelRegistry = None,
+        client_pool_params: Optional[HttpClientPoolParameters] = None,
+        instances_cache_ttl: Optional[float] = 10.0,
+        max_concurrency_per_instance: Optional[int] = 100,
+        instance_selector: Optional[InstanceSelector] = None,
+    ) -> None:
+        """Create a RemoteWorkerManager instance.
+
+        Args:
+            model_registry (ModelRegistry, optional): Model registry. Defaults to None.
+            client_pool_params (HttpClientPoolParameters, optional): The connection
+                pool parameters of the HTTP clients to the remote workers.
+            instances_cache_ttl (float, optional): How long the instances fetched
+                from the model registry are cached (seconds). After the TTL, the
+                stale instances are still used while they are refreshed in the
+                background. Zero or None disables the cache.
+            max_concurrency_per_instance (int, optional): The max number of
+                concurrent requests sent to one remote worker instance.
+            instance_selector (InstanceSelector, optional): The policy to select
+                one instance from the instances of a model.
+        """
+        super().__init__(
+            model_registry=model_registry, instance_selector=instance_selector
+        )
+        self._client_pool = RemoteWorkerHttpClientPool(client_pool_params)
+        self._instances_cache_ttl = instances_cache_ttl or 0
+        self._max_concurrency_per_instance = max_concurrency_per_instance or 100
+        # (worker_key, healthy_only) -> cached instances
+        self._instances_cache: Dict[Tuple[str, bool], _CachedInstances] = {}
+        # (worker_key, host, port) -> (stable WorkerRunData, last seen time)
+        self._run_data_cache: Dict[
+            Tuple[str, str, int], Tuple[WorkerRunData, float]
+        ] = {}
+        self._run_data_lock = threading.Lock()
 
     async def start(self):
         for listener in self.start_listeners:
@@ -30,7 +85,13 @@ class RemoteWorkerManager(LocalWorkerManager):
                 listener(self)
 
     async def stop(self, ignore_exception: bool = False):
-        pass
+        self.clear_instances_cache()
+        try:
+            await self._client_pool.aclose()
+        except Exception as e:
+            if not ignore_exception:
+                raise e
+            logger.warning(f"Close remote worker http clients error: {e}")
 
     async def _fetch_from_worker(
         self,
@@ -43,33 +104,31 @@ class RemoteWorkerManager(LocalWorkerManager):
         success_handler: Callable = None,
         error_handler: Callable = None,
     ) -> Any:
-        # Lazy import to avoid high time cost
-        import httpx
-
-        url = worker_run_data.worker.worker_addr + endpoint
+        worker_addr = worker_run_data.worker.worker_addr
+        url = worker_addr + endpoint
         headers = {**worker_run_data.worker.headers, **(additional_headers or {})}
         timeout = worker_run_data.worker.timeout
 
-        async with httpx.AsyncClient() as client:
-            request = client.build_request(
-                method,
-                url,
-                json=json,  # using json for data to ensure it sends as application/json
-                params=params,
-                headers=headers,
-                timeout=timeout,
-            )
+        client = self._client_pool.get_async_client(worker_addr)
+        request = client.build_request(
+            method,
+            url,
+            json=json,  # using json for data to ensure it sends as application/json
+            params=params,
+            headers=headers,
+            timeout=timeout,
+        )
 
-            response = await client.send(request)
-            if response.status_code != 200:
-                if error_handler:
-                    return error_handler(response)
-                else:
-                    error_msg = f"Request to {url} failed, error: {response.text}"
-                    raise Exception(error_msg)
-            if success_handler:
-                return success_handler(response)
-            return response.json()
+        response = await client.send(request)
+        if response.status_code != 200:
+            if error_handler:
+                return error_handler(response)
+            else:
+                error_msg = f"Request to {url} failed, error: {response.text}"
+                raise Exception(error_msg)
+        if success_handler:
+            return success_handler(response)
+        return response.json()
 
     async def _apply_to_worker_manager_instances(self):
         pass
@@ -150,7 +209,38 @@ class RemoteWorkerManager(LocalWorkerManager):
         return worker_instances
 
     def _build_single_worker_instance(self, model_name: str, instance: ModelInstance):
-        worker = RemoteModelWorker()
+        """Get the stable WorkerRunData of the instance, create it if not exists.
+
+        Reusing the same object for an instance keeps its semaphore, so the
+        concurrency limit of each remote worker is really enforced.
+        """
+        key = (instance.model_name, instance.host, instance.port)
+        now = time.monotonic()
+        with self._run_data_lock:
+            cached = self._run_data_cache.get(key)
+            if cached:
+                wr = cached[0]
+            else:
+                wr = self._new_worker_run_data(model_name, instance)
+            self._run_data_cache[key] = (wr, now)
+            self._prune_run_data_cache(now)
+        return wr
+
+    def _prune_run_data_cache(self, now: float):
+        # Drop the instances which have not been seen for a long time
+        max_idle = max(self._instances_cache_ttl * 10, 300)
+        expired_keys = [
+            k
+            for k, (_, last_seen) in self._run_data_cache.items()
+            if now - last_seen > max_idle
+        ]
+        for k in expired_keys:
+            del self._run_data_cache[k]
+
+    def _new_worker_run_data(
+        self, model_name: str, instance: ModelInstance
+    ) -> WorkerRunData:
+        worker = RemoteModelWorker(client_pool=self._client_pool)
         worker.load_worker(model_name, host=instance.host, port=instance.port)
         wr = WorkerRunData(
             host=instance.host,
@@ -161,18 +251,64 @@ class RemoteWorkerManager(LocalWorkerManager):
             worker_params=None,
             model_params=None,
             stop_event=asyncio.Event(),
-            semaphore=asyncio.Semaphore(100),  # Not limit in client
+            semaphore=asyncio.Semaphore(self._max_concurrency_per_instance),
         )
         return wr
 
-    async def get_model_instances(
-        self, worker_type: str, model_name: str, healthy_only: bool = True
+    def clear_instances_cache(self):
+        """Clear the cached instances, the next request will fetch them again."""
+        self._instances_cache.clear()
+
+    async def _fetch_model_instances(
+        self, worker_key: str, model_name: str, healthy_only: bool
     ) -> List[WorkerRunData]:
-        worker_key = self._worker_key(worker_type, model_name)
         instances: List[ModelInstance] = await self.model_registry.get_all_instances(
             worker_key, healthy_only
         )
-        return self._build_worker_instances(model_name, instances)
+        worker_instances = self._build_worker_instances(model_name, instances)
+        if self._instances_cache_ttl > 0:
+            cached = self._instances_cache.setdefault(
+                (worker_key, healthy_only), _CachedInstances()
+            )
+            cached.instances = worker_instances
+            cached.expire_at = time.monotonic() + self._instances_cache_ttl
+        return worker_instances
+
+    async def _refresh_model_instances(
+        self, cached: _CachedInstances, worker_key: str, model_name: str, healthy_only
+    ):
+        try:
+            await self._fetch_model_instances(worker_key, model_name, healthy_only)
+        except Exception as e:
+            logger.warning(
+                f"Refresh instances of {worker_key} from model registry failed, "
+                f"keep using the stale instances, error: {e}"
+            )
+        finally:
+            cached.refreshing = None
+
+    async def get_model_instances(
+        self, worker_type: str, model_name: str, healthy_only: bool = True
+    ) -> List[WorkerRunData]:
+        worker_key = self._worker_key(worker_type, model_name)
+        if self._instances_cache_ttl <= 0:
+            return await self._fetch_model_instances(
+                worker_key, model_name, healthy_only
+            )
+        cached = self._instances_cache.get((worker_key, healthy_only))
+        if cached is None or not cached.instances:
+            # Nothing to serve, fetch from the model registry directly
+            return await self._fetch_model_instances(
+                worker_key, model_name, healthy_only
+            )
+        if cached.expired and cached.refreshing is None:
+            # Stale-while-revalidate, the request is not blocked by the registry
+            cached.refreshing = asyncio.ensure_future(
+                self._refresh_model_instances(
+                    cached, worker_key, model_name, healthy_only
+                )
+            )
+        return cached.instances
 
     async def get_all_model_instances(
         self, worker_type: str, healthy_only: bool = True
@@ -192,6 +328,9 @@ class RemoteWorkerManager(LocalWorkerManager):
         self, worker_type: str, model_name: str, healthy_only: bool = True
     ) -> List[WorkerRunData]:
         worker_key = self._worker_key(worker_type, model_name)
+        cached = self._instances_cache.get((worker_key, healthy_only))
+        if cached and cached.instances and not cached.expired:
+            return cached.instances
         instances: List[ModelInstance] = self.model_registry.sync_get_all_instances(
             worker_key, healthy_only
         )
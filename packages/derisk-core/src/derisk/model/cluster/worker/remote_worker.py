@@ -1,21 +1,185 @@
+import asyncio
 import json
 import logging
-from typing import Dict, Iterator, List
+import threading
+import weakref
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, Optional
 
 from derisk.core import ModelMetadata, ModelOutput
 from derisk.model.cluster.worker_base import ModelWorker
+from derisk.util.embedding_utils import (
+    EMBEDDING_FORMAT_BASE64,
+    decode_embeddings,
+    embeddings_to_list,
+)
 from derisk.util.tracer import DERISK_TRACER_SPAN_ID, root_tracer
 
+if TYPE_CHECKING:
+    import httpx
+
 logger = logging.getLogger(__name__)
 
 
+@dataclass
+class HttpClientPoolParameters:
+    """The connection pool parameters of the HTTP clients to the remote workers."""
+
+    max_connections: Optional[int] = 100
+    max_keepalive_connections: Optional[int] = 20
+    keepalive_expiry: Optional[float] = 60.0
+    connect_timeout: Optional[float] = 10.0
+    http2: bool = False
+
+
+class RemoteWorkerHttpClientPool:
+    """Shared keep-alive HTTP clients, one per remote worker address.
+
+    ``httpx.AsyncClient`` can't be shared across event loops, so the async clients
+    are kept per event loop and per address. The sync client is thread-safe and
+    shared by all threads.
+    """
+
+    def __init__(
+        self,
+        params: Optional[HttpClientPoolParameters] = None,
+        transport: Optional[Any] = None,
+    ):
+        self._params = params or HttpClientPoolParameters()
+        # Only used for testing
+        self._transport = transport
+        self._lock = threading.Lock()
+        # event loop -> {address: httpx.AsyncClient}
+        self._async_clients: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+        self._sync_clients: Dict[str, "httpx.Client"] = {}
+        self._http2 = self._params.http2 and self._check_http2()
+
+    def _check_http2(self) -> bool:
+        try:
+            import h2  # noqa: F401
+
+            return True
+        except ImportError:
+            logger.warning(
+                "HTTP/2 is enabled for remote workers, but package 'h2' is not "
+                "installed, fallback to HTTP/1.1. You can install it by "
+                "`pip install httpx[http2]`"
+            )
+            return False
+
+    def _client_kwargs(self) -> Dict[str, Any]:
+        import httpx
+
+        params = self._params
+        kwargs = {
+            "limits": httpx.Limits(
+                max_connections=params.max_connections,
+                max_keepalive_connections=params.max_keepalive_connections,
+                keepalive_expiry=params.keepalive_expiry,
+            ),
+            "timeout": httpx.Timeout(None, connect=params.connect_timeout),
+        }
+        if self._transport is not None:
+            kwargs["transport"] = self._transport
+        else:
+            kwargs["http2"] = self._http2
+        return kwargs
+
+    def get_async_client(self, address: str) -> "httpx.AsyncClient":
+        """Get the shared async client of the address for the running event loop."""
+        import httpx
+
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            clients = self._async_clients.get(loop)
+            if clients is None:
+                clients = {}
+                self._async_clients[loop] = clients
+            client = clients.get(address)
+            if client is None or client.is_closed:
+                client = httpx.AsyncClient(**self._client_kwargs())
+                clients[address] = client
+            return client
+
+    def get_sync_client(self, address: str) -> "httpx.Client":
+        """Get the shared sync client of the address."""
+        import httpx
+
+        with self._lock:
+            client = self._sync_clients.get(address)
+            if client is None or client.is_closed:
+                client = httpx.Client(**self._client_kwargs())
+                self._sync_clients[address] = client
+            return client
+
+    async def aclose(self):
+        """Close all the clients.
+
+        The async clients created in the current event loop are closed gracefully,
+        the ones belonging to other event loops are just released.
+        """
+        try:
+            current_loop = asyncio.get_running_loop()
+        except RuntimeError:
+            current_loop = None
+        with self._lock:
+            all_async_clients = list(self._async_clients.items())
+            self._async_clients.clear()
+            sync_clients = list(self._sync_clients.values())
+            self._sync_clients.clear()
+        for loop, clients in all_async_clients:
+            if loop is not current_loop:
+                continue
+            for client in clients.values():
+                try:
+                    await client.aclose()
+                except Exception as e:
+                    logger.warning(f"Close remote worker http client error: {e}")
+        for client in sync_clients:
+            client.close()
+
+
+_DEFAULT_CLIENT_POOL: Optional[RemoteWorkerHttpClientPool] = None
+
+
+def _get_default_client_pool() -> RemoteWorkerHttpClientPool:
+    global _DEFAULT_CLIENT_POOL
+    if _DEFAULT_CLIENT_POOL is None:
+        _DEFAULT_CLIENT_POOL = RemoteWorkerHttpClientPool()
+    return _DEFAULT_CLIENT_POOL
+
+
+def _embeddings_request_params(params: Dict) -> Dict:
+    """Request the embeddings as base64 float32 instead of JSON float lists."""
+    return {**params, "encoding_format": EMBEDDING_FORMAT_BASE64}
+
+
+def _parse_embeddings(embeddings: List[Any]) -> List[List[float]]:
+    # The worker of old version ignores the encoding format and returns floats
+    if embeddings and isinstance(embeddings[0], str):
+        return embeddings_to_list(decode_embeddings(embeddings))
+    return embeddings
+
+
 class RemoteModelWorker(ModelWorker):
-    def __init__(self) -> None:
+    def __init__(
+        self, client_pool: Optional[RemoteWorkerHttpClientPool] = None
+    ) -> None:
         self.headers = {}
         # TODO Configured by ModelParameters
         self.timeout = 3600
         self.host = None
         self.port = None
+        self._client_pool = client_pool
+
+    @property
+    def client_pool(self) -> RemoteWorkerHttpClientPool:
+        if self._client_pool is None:
+            self._client_pool = _get_default_client_pool()
+        return self._client_pool
+
+    def _async_client(self) -> "httpx.AsyncClient":
+        return self.client_pool.get_async_client(self.worker_addr)
 
     @property
     def worker_addr(self) -> str:
@@ -44,29 +208,27 @@ class RemoteModelWorker(ModelWorker):
 
     async def async_generate_stream(self, params: Dict) -> Iterator[ModelOutput]:
         """Asynchronous generate stream"""
-        import httpx
-
-        async with httpx.AsyncClient() as client:
-            delimiter = b"\0"
-            buffer = b""
-            url = self.worker_addr + "/generate_stream"
-            logger.debug(f"Send async_generate_stream to url {url}, params: {params}")
-            async with client.stream(
-                "POST",
-                url,
-                headers=self._get_trace_headers(),
-                json=params,
-                timeout=self.timeout,
-            ) as response:
-                async for raw_chunk in response.aiter_raw():
-                    buffer += raw_chunk
-                    while delimiter in buffer:
-                        chunk, buffer = buffer.split(delimiter, 1)
-                        if not chunk:
-                            continue
-                        chunk = chunk.decode()
-                        data = json.loads(chunk)
-                        yield ModelOutput(**data)
+        client = self._async_client()
+        delimiter = b"\0"
+        buffer = b""
+        url = self.worker_addr + "/generate_stream"
+        logger.debug(f"Send async_generate_stream to url {url}, params: {params}")
+        async with client.stream(
+            "POST",
+            url,
+            headers=self._get_trace_headers(),
+            json=params,
+            timeout=self.timeout,
+        ) as response:
+            async for raw_chunk in response.aiter_raw():
+                buffer += raw_chunk
+                while delimiter in buffer:
+                    chunk, buffer = buffer.split(delimiter, 1)
+                    if not chunk:
+                        continue
+                    chunk = chunk.decode()
+                    data = json.loads(chunk)
+                    yield ModelOutput(**data)
 
     def generate(self, params: Dict) -> ModelOutput:
         """Generate non stream"""
@@ -74,58 +236,50 @@ class RemoteModelWorker(ModelWorker):
 
     async def async_generate(self, params: Dict) -> ModelOutput:
         """Asynchronous generate non stream"""
-        import httpx
-
-        async with httpx.AsyncClient() as client:
-            url = self.worker_addr + "/generate"
-            logger.debug(f"Send async_generate to url {url}, params: {params}")
-            response = await client.post(
-                url,
-                headers=self._get_trace_headers(),
-                json=params,
-                timeout=self.timeout,
-            )
-            if response.status_code not in [200, 201]:
-                raise Exception(f"Request to {url} failed, error: {response.text}")
-            return ModelOutput(**response.json())
+        client = self._async_client()
+        url = self.worker_addr + "/generate"
+        logger.debug(f"Send async_generate to url {url}, params: {params}")
+        response = await client.post(
+            url,
+            headers=self._get_trace_headers(),
+            json=params,
+            timeout=self.timeout,
+        )
+        if response.status_code not in [200, 201]:
+            raise Exception(f"Request to {url} failed, error: {response.text}")
+        return ModelOutput(**response.json())
 
     def count_token(self, prompt: str) -> int:
         raise NotImplementedError
 
     async def async_count_token(self, prompt: str) -> int:
-        import httpx
-
-        async with httpx.AsyncClient() as client:
-            url = self.worker_addr + "/count_token"
-            logger.debug(f"Send async_count_token to url {url}, params: {prompt}")
-            response = await client.post(
-                url,
-                headers=self._get_trace_headers(),
-                json={"prompt": prompt},
-                timeout=self.timeout,
-            )
-            if response.status_code not in [200, 201]:
-                raise Exception(f"Request to {url} failed, error: {response.text}")
-            return response.json()
+        client = self._async_client()
+        url = self.worker_addr + "/count_token"
+        logger.debug(f"Send async_count_token to url {url}, params: {prompt}")
+        response = await client.post(
+            url,
+            headers=self._get_trace_headers(),
+            json={"prompt": prompt},
+            timeout=self.timeout,
+        )
+        if response.status_code not in [200, 201]:
+            raise Exception(f"Request to {url} failed, error: {response.text}")
+        return response.json()
 
     async def async_get_model_metadata(self, params: Dict) -> ModelMetadata:
         """Asynchronously get model metadata"""
-        import httpx
-
-        async with httpx.AsyncClient() as client:
-            url = self.worker_addr + "/model_metadata"
-            logger.debug(
-                f"Send async_get_model_metadata to url {url}, params: {params}"
-            )
-            response = await client.post(
-                url,
-                headers=self._get_trace_headers(),
-                json=params,
-                timeout=self.timeout,
-            )
-            if response.status_code not in [200, 201]:
-                raise Exception(f"Request to {url} failed, error: {response.text}")
-            return ModelMetadata.from_dict(response.json())
+        client = self._async_client()
+        url = self.worker_addr + "/model_metadata"
+        logger.debug(f"Send async_get_model_metadata to url {url}, params: {params}")
+        response = await client.post(
+            url,
+            headers=self._get_trace_headers(),
+            json=params,
+            timeout=self.timeout,
+        )
+        if response.status_code not in [200, 201]:
+            raise Exception(f"Request to {url} failed, error: {response.text}")
+        return ModelMetadata.from_dict(response.json())
 
     def get_model_metadata(self, params: Dict) -> ModelMetadata:
         """Get model metadata"""
@@ -133,36 +287,33 @@ class RemoteModelWorker(ModelWorker):
 
     def embeddings(self, params: Dict) -> List[List[float]]:
         """Get embeddings for input"""
-        import requests
-
+        client = self.client_pool.get_sync_client(self.worker_addr)
         url = self.worker_addr + "/embeddings"
         logger.debug(f"Send embeddings to url {url}, params: {params}")
-        response = requests.post(
+        response = client.post(
             url,
             headers=self._get_trace_headers(),
-            json=params,
+            json=_embeddings_request_params(params),
             timeout=self.timeout,
         )
         if response.status_code not in [200, 201]:
             raise Exception(f"Request to {url} failed, error: {response.text}")
-        return response.json()
+        return _parse_embeddings(response.json())
 
     async def async_embeddings(self, params: Dict) -> List[List[float]]:
         """Asynchronous get embeddings for input"""
-        import httpx
-
-        async with httpx.AsyncClient() as client:
-            url = self.worker_addr + "/embeddings"
-            logger.debug(f"Send async_embeddings to url {url}")
-            response = await client.post(
-                url,
-                headers=self._get_trace_headers(),
-                json=params,
-                timeout=self.timeout,
-            )
-            if response.status_code not in [200, 201]:
-                raise Exception(f"Request to {url} failed, error: {response.text}")
-            return response.json()
+        client = self._async_client()
+        url = self.worker_addr + "/embeddings"
+        logger.debug(f"Send async_embeddings to url {url}")
+        response = await client.post(
+            url,
+            headers=self._get_trace_headers(),
+            json=_embeddings_request_params(params),
+            timeout=self.timeout,
+        )
+        if response.status_code not in [200, 201]:
+            raise Exception(f"Request to {url} failed, error: {response.text}")
+        return _parse_embeddings(response.json())
 
     def _get_trace_headers(self):
         span_id = root_tracer.get_current_span_id()
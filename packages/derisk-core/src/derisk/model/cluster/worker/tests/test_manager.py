@@ -5,7 +5,11 @@ import pytest
 
 from derisk.model.adapter.hf_adapter import HFLLMDeployModelParameters
 from derisk.model.base import WorkerApplyType
-from derisk.model.cluster.base import WorkerApplyRequest, WorkerStartupRequest
+from derisk.model.cluster.base import (
+    EmbeddingsRequest,
+    WorkerApplyRequest,
+    WorkerStartupRequest,
+)
 from derisk.model.cluster.manager_base import WorkerRunData
 from derisk.model.cluster.tests.conftest import (  # noqa
     _create_workers,
@@ -15,12 +19,15 @@ from derisk.model.cluster.tests.conftest import (  # noqa
     manager_2_workers,
     manager_with_2_workers,
 )
+from derisk.model.cluster.worker import manager as manager_module
 from derisk.model.cluster.worker.manager import (  # noqa
     LocalWorkerManager,
     _build_worker,
+    api_embeddings,
 )
 from derisk.model.cluster.worker_base import ModelWorker
 from derisk.model.parameter import ModelWorkerParameters, WorkerType
+from derisk.util.embedding_utils import decode_embeddings
 
 _TEST_MODEL_NAME = "vicuna-13b-v1.5"
 _TEST_MODEL_PATH = "/app/models/vicuna-13b-v1.5"
@@ -468,6 +475,35 @@ async def test_embeddings(
         assert out == expected_embedding
 
 
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "manager_2_embedding_workers",
+    [{"embeddings": [[0.5, 1.5, -2], [0.25, 0, 3]]}],
+    indirect=["manager_2_embedding_workers"],
+)
+async def test_api_embeddings_encoding_format(
+    manager_2_embedding_workers: Tuple[  # noqa: F811
+        LocalWorkerManager, List[Tuple[ModelWorker, ModelWorkerParameters]]
+    ],
+    monkeypatch,
+):
+    manager, workers = manager_2_embedding_workers
+    monkeypatch.setattr(manager_module.worker_manager, "worker_manager", manager)
+    model_name = workers[0][1].name
+    out = await api_embeddings(
+        EmbeddingsRequest(model=model_name, input=["hello", "world"])
+    )
+    assert out == [[0.5, 1.5, -2], [0.25, 0, 3]]
+
+    out = await api_embeddings(
+        EmbeddingsRequest(
+            model=model_name, input=["hello", "world"], encoding_format="base64"
+        )
+    )
+    assert all(isinstance(item, str) for item in out)
+    assert decode_embeddings(out).tolist() == [[0.5, 1.5, -2], [0.25, 0, 3]]
+
+
 @pytest.mark.asyncio
 async def test_parameter_descriptions(
     manager_with_2_workers: Tuple[  # noqa: F811
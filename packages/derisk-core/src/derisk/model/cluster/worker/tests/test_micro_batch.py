@@ -0,0 +1,152 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+
+import pytest
+
+from derisk.core import Embeddings
+from derisk.model.cluster.worker.embedding_worker import EmbeddingsModelWorker
+from derisk.model.cluster.worker.micro_batch import Histogram, MicroBatcher
+
+
+class _Recorder:
+    def __init__(self, delay: float = 0.02):
+        self.calls = []
+        self.delay = delay
+        self.lock = threading.Lock()
+
+    def __call__(self, key, texts: List[str]):
+        with self.lock:
+            self.calls.append((key, list(texts)))
+        if "bad" in texts:
+            raise ValueError("bad input")
+        time.sleep(self.delay)
+        return [f"{key}:{text}" for text in texts]
+
+
+def _submit_concurrently(batcher: MicroBatcher, requests):
+    with ThreadPoolExecutor(len(requests)) as executor:
+        futures = [
+            executor.submit(batcher.submit, inputs, key) for inputs, key in requests
+        ]
+        return [f.result() if not f.exception() else f.exception() for f in futures]
+
+
+def test_histogram():
+    histogram = Histogram([1, 10])
+    for value in [0.5, 1, 5, 100]:
+        histogram.observe(value)
+    assert histogram.snapshot() == {
+        "buckets": {"le_1": 2, "le_10": 3, "le_+Inf": 4},
+        "count": 4,
+        "sum": 106.5,
+    }
+    assert histogram.quantile(0.5) == "1"
+    assert histogram.quantile(0.99) == "+Inf"
+
+
+def test_merge_concurrent_requests():
+    recorder = _Recorder()
+    batcher = MicroBatcher(recorder, max_batch_size=64, max_wait_ms=50)
+    requests = [([f"text_{i}_0", f"text_{i}_1"], None) for i in range(16)]
+    results = _submit_concurrently(batcher, requests)
+    assert results == [[f"None:{t}" for t in inputs] for inputs, _ in requests]
+    # Much fewer model calls than requests
+    assert len(recorder.calls) < len(requests)
+    metrics = batcher.get_metrics()
+    assert metrics["queue_wait_ms"]["count"] == 16
+    assert metrics["batch_size"]["count"] == len(recorder.calls)
+    assert metrics["batch_size"]["sum"] == 32
+    batcher.close()
+
+
+def test_max_batch_size():
+    recorder = _Recorder()
+    batcher = MicroBatcher(recorder, max_batch_size=4, max_wait_ms=50)
+    requests = [([f"text_{i}"] * 3, None) for i in range(6)] + [(["big"] * 10, None)]
+    results = _submit_concurrently(batcher, requests)
+    assert [len(r) for r in results] == [3] * 6 + [10]
+    # The large request runs alone
+    assert all(len(texts) <= 4 or texts == ["big"] * 10 for _, texts in recorder.calls)
+    batcher.close()
+
+
+def test_group_by_key():
+    recorder = _Recorder()
+    batcher = MicroBatcher(recorder, max_batch_size=64, max_wait_ms=50)
+    requests = [([f"doc_{i}"], f"query_{i % 2}") for i in range(8)]
+    results = _submit_concurrently(batcher, requests)
+    assert results == [[f"query_{i % 2}:doc_{i}"] for i in range(8)]
+    assert all(
+        texts and all(int(t[-1]) % 2 == int(key[-1]) for t in texts)
+        for key, texts in recorder.calls
+    )
+    batcher.close()
+
+
+def test_failed_request_not_fail_others():
+    recorder = _Recorder()
+    batcher = MicroBatcher(recorder, max_batch_size=64, max_wait_ms=50)
+    results = _submit_concurrently(
+        batcher, [(["good_1"], None), (["bad"], None), (["good_2"], None)]
+    )
+    assert results[0] == ["None:good_1"]
+    assert isinstance(results[1], ValueError)
+    assert results[2] == ["None:good_2"]
+    batcher.close()
+
+
+def test_close():
+    batcher = MicroBatcher(_Recorder(delay=0), max_batch_size=8)
+    assert batcher.submit(["hello"]) == ["None:hello"]
+    assert batcher.submit([]) == []
+    batcher.close()
+    with pytest.raises(RuntimeError):
+        batcher.submit(["hello"])
+
+
+@pytest.mark.parametrize("interval, num_logs", [(0, 3), (3600, 1)])
+def test_log_metrics(caplog, interval, num_logs):
+    batcher = MicroBatcher(
+        _Recorder(delay=0), name="test_batcher", metrics_log_interval=interval
+    )
+    with caplog.at_level("INFO", logger="derisk.model.cluster.worker.micro_batch"):
+        batcher.submit(["hello"])
+        batcher.submit(["hello", "world"])
+        # The metrics are logged periodically and when closed
+        batcher.close()
+    records = [r.getMessage() for r in caplog.records if "test_batcher" in r.message]
+    assert len(records) == num_logs
+    assert records[-1].startswith(
+        "test_batcher metrics, batches: 2, requests: 2, mean batch size: 1.5, "
+        "p50 batch size <= 1, mean queue wait: "
+    )
+
+
+class _CountEmbeddings(Embeddings):
+    def __init__(self):
+        self.num_calls = 0
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        self.num_calls += 1
+        time.sleep(0.02)
+        return [[float(len(text))] for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+
+def test_embeddings_worker_batching():
+    worker = EmbeddingsModelWorker()
+    worker.model_name = "test_model"
+    worker._embeddings_impl = _CountEmbeddings()
+    worker._batcher = MicroBatcher(worker._embed_batch, max_batch_size=32)
+    texts = ["a" * i for i in range(1, 17)]
+    with ThreadPoolExecutor(16) as executor:
+        results = list(executor.map(lambda t: worker.embeddings({"input": [t]}), texts))
+    assert results == [[[float(len(t))]] for t in texts]
+    assert worker._embeddings_impl.num_calls < len(texts)
+    assert worker._batcher.get_metrics()["queue_wait_ms"]["count"] == len(texts)
+    worker.stop()
+    assert worker._batcher is None
@@ -0,0 +1,96 @@
+import asyncio
+from typing import List
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from derisk.model.base import ModelInstance
+from derisk.model.cluster.worker.remote_manager import RemoteWorkerManager
+
+_WORKER_KEY = "test_model@llm"
+
+
+def _instances(*ports: int) -> List[ModelInstance]:
+    return [
+        ModelInstance(model_name=_WORKER_KEY, host="127.0.0.1", port=port)
+        for port in ports
+    ]
+
+
+@pytest.fixture
+def model_registry():
+    registry = MagicMock()
+    registry.get_all_instances = AsyncMock(return_value=_instances(8001, 8002))
+    return registry
+
+
+@pytest.mark.asyncio
+async def test_instances_cached(model_registry):
+    manager = RemoteWorkerManager(model_registry, instances_cache_ttl=60)
+    first = await manager.get_model_instances("llm", "test_model")
+    second = await manager.get_model_instances("llm", "test_model")
+    assert model_registry.get_all_instances.await_count == 1
+    assert [wr.port for wr in first] == [8001, 8002]
+    assert first == second
+
+
+@pytest.mark.asyncio
+async def test_stable_worker_run_data(model_registry):
+    manager = RemoteWorkerManager(
+        model_registry, instances_cache_ttl=0, max_concurrency_per_instance=2
+    )
+    first = await manager.get_model_instances("llm", "test_model")
+    second = await manager.get_model_instances("llm", "test_model")
+    # Cache is disabled, but the WorkerRunData objects are reused
+    assert model_registry.get_all_instances.await_count == 2
+    assert all(a is b for a, b in zip(first, second))
+
+    wr = first[0]
+    async with wr.semaphore:
+        async with wr.semaphore:
+            # The concurrency limit of the instance is reached
+            assert wr.semaphore.locked()
+
+
+@pytest.mark.asyncio
+async def test_stale_while_revalidate(model_registry):
+    manager = RemoteWorkerManager(model_registry, instances_cache_ttl=60)
+    first = await manager.get_model_instances("llm", "test_model")
+    assert [wr.port for wr in first] == [8001, 8002]
+
+    model_registry.get_all_instances.return_value = _instances(8002, 8003)
+    # Expire the cache
+    for cached in manager._instances_cache.values():
+        cached.expire_at = 0
+    stale = await manager.get_model_instances("llm", "test_model")
+    assert stale is first
+    # Wait for the background refresh
+    await asyncio.sleep(0.01)
+    fresh = await manager.get_model_instances("llm", "test_model")
+    assert model_registry.get_all_instances.await_count == 2
+    assert [wr.port for wr in fresh] == [8002, 8003]
+    assert fresh[0] is first[1]
+
+
+@pytest.mark.asyncio
+async def test_refresh_failed_keep_stale(model_registry):
+    manager = RemoteWorkerManager(model_registry, instances_cache_ttl=60)
+    first = await manager.get_model_instances("llm", "test_model")
+
+    model_registry.get_all_instances.side_effect = Exception("Controller down")
+    for cached in manager._instances_cache.values():
+        cached.expire_at = 0
+    assert await manager.get_model_instances("llm", "test_model") is first
+    await asyncio.sleep(0.01)
+    assert await manager.get_model_instances("llm", "test_model") is first
+
+
+@pytest.mark.asyncio
+async def test_empty_instances_not_cached(model_registry):
+    model_registry.get_all_instances.return_value = []
+    manager = RemoteWorkerManager(model_registry, instances_cache_ttl=60)
+    assert await manager.get_model_instances("llm", "test_model") == []
+
+    model_registry.get_all_instances.return_value = _instances(8001)
+    instances = await manager.get_model_instances("llm", "test_model")
+    assert [wr.port for wr in instances] == [8001]
@@ -0,0 +1,113 @@
+import json
+
+import httpx
+import pytest
+
+from derisk.model.cluster.worker.remote_worker import (
+    HttpClientPoolParameters,
+    RemoteModelWorker,
+    RemoteWorkerHttpClientPool,
+)
+from derisk.util.embedding_utils import encode_embeddings
+
+
+def _handler(request: httpx.Request) -> httpx.Response:
+    path = request.url.path
+    if path.endswith("/generate_stream"):
+        chunks = [
+            json.dumps({"text": "Hello", "error_code": 0}).encode(),
+            json.dumps({"text": "Hello world", "error_code": 0}).encode(),
+        ]
+        return httpx.Response(200, stream=httpx.ByteStream(b"\0".join(chunks) + b"\0"))
+    if path.endswith("/generate"):
+        return httpx.Response(200, json={"text": "Hello world", "error_code": 0})
+    if path.endswith("/count_token"):
+        return httpx.Response(200, json=2)
+    if path.endswith("/embeddings"):
+        return httpx.Response(200, json=[[0.1, 0.2]])
+    return httpx.Response(404, text="Not found")
+
+
+@pytest.fixture
+def client_pool():
+    return RemoteWorkerHttpClientPool(transport=httpx.MockTransport(_handler))
+
+
+def _new_worker(pool: RemoteWorkerHttpClientPool, port: int = 8001):
+    worker = RemoteModelWorker(client_pool=pool)
+    worker.load_worker("test_model", host="127.0.0.1", port=port)
+    return worker
+
+
+@pytest.mark.asyncio
+async def test_reuse_client_per_address(client_pool):
+    worker1 = _new_worker(client_pool)
+    worker2 = _new_worker(client_pool)
+    worker3 = _new_worker(client_pool, port=8002)
+
+    assert worker1._async_client() is worker2._async_client()
+    assert worker1._async_client() is not worker3._async_client()
+    assert client_pool.get_sync_client(
+        worker1.worker_addr
+    ) is client_pool.get_sync_client(worker2.worker_addr)
+
+
+@pytest.mark.asyncio
+async def test_remote_worker_requests(client_pool):
+    worker = _new_worker(client_pool)
+
+    output = await worker.async_generate({"prompt": "Hello"})
+    assert output.text == "Hello world"
+
+    outputs = [out async for out in worker.async_generate_stream({"prompt": "Hi"})]
+    assert [out.text for out in outputs] == ["Hello", "Hello world"]
+
+    assert await worker.async_count_token("Hello") == 2
+    assert await worker.async_embeddings({"input": ["Hello"]}) == [[0.1, 0.2]]
+    assert worker.embeddings({"input": ["Hello"]}) == [[0.1, 0.2]]
+
+
+@pytest.mark.asyncio
+async def test_embeddings_base64():
+    requests = []
+
+    def _base64_handler(request: httpx.Request) -> httpx.Response:
+        params = json.loads(request.content)
+        requests.append(params)
+        assert params["encoding_format"] == "base64"
+        return httpx.Response(200, json=encode_embeddings([[0.5, -1.0], [2.0, 0]]))
+
+    pool = RemoteWorkerHttpClientPool(transport=httpx.MockTransport(_base64_handler))
+    worker = _new_worker(pool)
+    params = {"input": ["Hello", "World"]}
+    expected = [[0.5, -1.0], [2.0, 0.0]]
+    assert await worker.async_embeddings(params) == expected
+    assert worker.embeddings(params) == expected
+    assert len(requests) == 2
+    # The params of the caller are not changed
+    assert "encoding_format" not in params
+
+
+@pytest.mark.asyncio
+async def test_close_client_pool(client_pool):
+    worker = _new_worker(client_pool)
+    async_client = worker._async_client()
+    sync_client = client_pool.get_sync_client(worker.worker_addr)
+
+    await client_pool.aclose()
+    assert async_client.is_closed
+    assert sync_client.is_closed
+    # A new client is created after the pool is closed
+    assert worker._async_client() is not async_client
+    await client_pool.aclose()
+
+
+def test_http2_fallback_without_h2():
+    try:
+        import h2  # noqa: F401
+
+        pytest.skip("h2 is installed")
+    except ImportError:
+        pass
+    pool = RemoteWorkerHttpClientPool(HttpClientPoolParameters(http2=True))
+    assert not pool._http2
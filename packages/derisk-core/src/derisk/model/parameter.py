@@ -120,6 +120,30 @@ class ModelControllerParameters(BaseServerParameters):
             )
         },
     )
+    instance_select_policy: Optional[str] = field(
+        default="random",
+        metadata={
+            "valid_values": [
+                "random",
+                "least_inflight",
+                "power_of_two",
+                "latency_ewma",
+            ],
+            "help": _(
+                "The policy of the model registry to select one healthy instance "
+                "of a model, see the instance_select_policy of the model worker"
+            ),
+        },
+    )
+    instance_session_affinity: Optional[bool] = field(
+        default=False,
+        metadata={
+            "help": _(
+                "Whether the model registry selects the same instance for the same "
+                "conversation"
+            )
+        },
+    )
 
 
 @dataclass
@@ -187,6 +211,86 @@ class ModelWorkerParameters(BaseServerParameters):
         default=20,
         metadata={"help": _("The interval for sending heartbeats (seconds)")},
     )
+    instance_select_policy: Optional[str] = field(
+        default="random",
+        metadata={
+            "valid_values": [
+                "random",
+                "least_inflight",
+                "power_of_two",
+                "latency_ewma",
+            ],
+            "help": _(
+                "The policy to select one instance when a model has multiple "
+                "instances: random, least_inflight (the instance with the least "
+                "inflight requests), power_of_two (the less loaded one of two "
+                "random instances) or latency_ewma (the instance with the lowest "
+                "EWMA of time to first token weighted by its load)"
+            ),
+        },
+    )
+    instance_session_affinity: Optional[bool] = field(
+        default=False,
+        metadata={
+            "help": _(
+                "Whether to send the requests of the same conversation to the same "
+                "instance, to reuse the prefix cache of the inference engine"
+            )
+        },
+    )
+    remote_max_connections: Optional[int] = field(
+        default=100,
+        metadata={
+            "help": _(
+                "The max number of connections to each remote model worker, only "
+                "used when the model workers are remote"
+            )
+        },
+    )
+    remote_max_keepalive_connections: Optional[int] = field(
+        default=20,
+        metadata={
+            "help": _(
+                "The max number of keep-alive connections to each remote model worker"
+            )
+        },
+    )
+    remote_keepalive_expiry: Optional[float] = field(
+        default=60.0,
+        metadata={
+            "help": _(
+                "The time limit on idle keep-alive connections to the remote model "
+                "workers (seconds)"
+            )
+        },
+    )
+    remote_instances_cache_ttl: Optional[float] = field(
+        default=10.0,
+        metadata={
+            "help": _(
+                "How long the remote model instances fetched from the model "
+                "controller are cached (seconds), 0 means no cache"
+            )
+        },
+    )
+    remote_max_concurrency_per_instance: Optional[int] = field(
+        default=100,
+        metadata={
+            "help": _(
+                "The max number of concurrent requests sent to each remote model "
+                "worker instance"
+            )
+        },
+    )
+    remote_http2: Optional[bool] = field(
+        default=False,
+        metadata={
+            "help": _(
+                "Whether to use HTTP/2 to connect to the remote model workers, "
+                "package 'h2' is required"
+            )
+        },
+    )
 
 
 @dataclass
@@ -15,6 +15,7 @@ from derisk.model.adapter.embed_metadata import (
     EMBED_COMMON_HF_BGE_MODELS,
     EMBED_COMMON_HF_JINA_MODELS,
 )
+from derisk.util.embedding_utils import decode_embedding
 from derisk.util.i18n_utils import _
 from derisk.util.tracer import DERISK_TRACER_SPAN_ID, root_tracer
 
@@ -109,6 +110,15 @@ class HFEmbeddingDeployModelParameters(EmbeddingDeployModelParameters):
             )
         },
     )
+    max_batch_size: Optional[int] = field(
+        default=32,
+        metadata={
+            "help": _(
+                "The max number of inputs merged into one model call by the dynamic "
+                "batching of the worker, None or 0 disables the dynamic batching"
+            )
+        },
+    )
 
     @property
     def real_provider_model_name(self) -> str:
@@ -637,14 +647,26 @@ def _handle_request_result(res: requests.Response) -> List[List[float]]:
         RuntimeError: If the response is not successful.
     """
     res.raise_for_status()
-    resp = res.json()
+    return _parse_embeddings_response(res.json())
+
+
+def _parse_embeddings_response(resp: Dict[str, Any]) -> List[List[float]]:
+    """Parse the embeddings from the response of the embedding API.
+
+    The embeddings encoded in base64 float32 are decoded to float lists.
+    """
     if "data" not in resp:
         raise RuntimeError(resp["detail"])
     embeddings = resp["data"]
     # Sort resulting embeddings by index
     sorted_embeddings = sorted(embeddings, key=lambda e: e["index"])  # type: ignore
     # Return just the embeddings
-    return [result["embedding"] for result in sorted_embeddings]
+    return [
+        decode_embedding(result["embedding"]).tolist()
+        if isinstance(result["embedding"], str)
+        else result["embedding"]
+        for result in sorted_embeddings
+    ]
 
 
 @dataclass
@@ -681,6 +703,16 @@ class OpenAPIEmbeddingDeployModelParameters(EmbeddingDeployModelParameters):
             "help": _("The timeout for the request in seconds."),
         },
     )
+    encoding_format: Optional[str] = field(
+        default=None,
+        metadata={
+            "help": _(
+                "The encoding format of the embeddings in the response, 'float' or "
+                "'base64'. The base64 float32 is smaller and faster to decode, the "
+                "default is None, which uses the default format of the API."
+            ),
+        },
+    )
 
     @property
     def real_provider_model_name(self) -> str:
@@ -726,6 +758,16 @@ class OpenAPIEmbeddingDeployModelParameters(EmbeddingDeployModelParameters):
             default=60,
             description=_("The timeout for the request in seconds."),
         ),
+        Parameter.build_from(
+            _("Encoding Format"),
+            "encoding_format",
+            str,
+            optional=True,
+            default=None,
+            description=_(
+                "The encoding format of the embeddings, 'float' or 'base64'."
+            ),
+        ),
     ],
 )
 class OpenAPIEmbeddings(BaseModel, Embeddings):
@@ -806,6 +848,10 @@ class OpenAPIEmbeddings(BaseModel, Embeddings):
     pass_trace_id: bool = Field(
         default=True, description="Whether to pass the trace ID to the API."
     )
+    encoding_format: Optional[str] = Field(
+        default=None,
+        description="The encoding format of the embeddings, 'float' or 'base64'.",
+    )
 
     session: Optional[requests.Session] = None
 
@@ -842,8 +888,15 @@ class OpenAPIEmbeddings(BaseModel, Embeddings):
             api_key=parameters.api_key,
             model_name=parameters.real_provider_model_name,
             timeout=parameters.timeout,
+            encoding_format=parameters.encoding_format,
         )
 
+    def _request_body(self, texts: List[str]) -> Dict[str, Any]:
+        body: Dict[str, Any] = {"input": texts, "model": self.model_name}
+        if self.encoding_format:
+            body["encoding_format"] = self.encoding_format
+        return body
+
     def embed_documents(self, texts: List[str]) -> List[List[float]]:
         """Get the embeddings for a list of texts.
 
@@ -862,7 +915,7 @@ class OpenAPIEmbeddings(BaseModel, Embeddings):
             headers[DERISK_TRACER_SPAN_ID] = current_span_id
         res = self.session.post(  # type: ignore
             self.api_url,
-            json={"input": texts, "model": self.model_name},
+            json=self._request_body(texts),
             timeout=self.timeout,
             headers=headers,
         )
@@ -898,15 +951,10 @@ class OpenAPIEmbeddings(BaseModel, Embeddings):
             headers=headers, timeout=aiohttp.ClientTimeout(total=self.timeout)
         ) as session:
             async with session.post(
-                self.api_url, json={"input": texts, "model": self.model_name}
+                self.api_url, json=self._request_body(texts)
             ) as resp:
                 resp.raise_for_status()
-                data = await resp.json()
-                if "data" not in data:
-                    raise RuntimeError(data["detail"])
-                embeddings = data["data"]
-                sorted_embeddings = sorted(embeddings, key=lambda e: e["index"])
-                return [result["embedding"] for result in sorted_embeddings]
+                return _parse_embeddings_response(await resp.json())
 
     async def aembed_query(self, text: str) -> List[float]:
         """Asynchronous Embed query text."""
@@ -53,6 +53,15 @@ class CrossEncoderRerankEmbeddingsParameters(RerankerDeployModelParameters):
             "help": _("Keyword arguments to pass to the model."),
         },
     )
+    max_batch_size: Optional[int] = field(
+        default=32,
+        metadata={
+            "help": _(
+                "The max number of inputs merged into one model call by the dynamic "
+                "batching of the worker, None or 0 disables the dynamic batching"
+            )
+        },
+    )
 
     @property
     def real_provider_model_name(self) -> str:
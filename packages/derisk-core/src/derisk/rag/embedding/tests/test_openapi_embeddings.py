@@ -0,0 +1,39 @@
+from unittest.mock import MagicMock
+
+import pytest
+import requests
+
+from derisk.rag.embedding.embeddings import OpenAPIEmbeddings
+from derisk.util.embedding_utils import encode_embedding
+
+
+def _session(data):
+    response = MagicMock()
+    response.json.return_value = {"object": "list", "data": data}
+    session = MagicMock(spec=requests.Session)
+    session.post.return_value = response
+    return session
+
+
+@pytest.mark.parametrize("encoding_format", [None, "float", "base64"])
+def test_embed_documents(encoding_format):
+    embeddings = [[0.5, 1.0], [-2.0, 0.25]]
+    if encoding_format == "base64":
+        embeddings = [encode_embedding(e) for e in embeddings]
+    # The data is not in the order of the index
+    session = _session(
+        [
+            {"object": "embedding", "embedding": embeddings[1], "index": 1},
+            {"object": "embedding", "embedding": embeddings[0], "index": 0},
+        ]
+    )
+    openapi_embeddings = OpenAPIEmbeddings(
+        session=session, model_name="test_model", encoding_format=encoding_format
+    )
+    assert openapi_embeddings.embed_documents(["hello", "world"]) == [
+        [0.5, 1.0],
+        [-2.0, 0.25],
+    ]
+    body = session.post.call_args.kwargs["json"]
+    assert body["model"] == "test_model"
+    assert body.get("encoding_format") == encoding_format
@@ -5,7 +5,7 @@ from typing import Any, Dict, List, Optional, cast
 
 from derisk.core import Chunk
 from derisk.rag.retriever.base import BaseRetriever, RetrieverStrategy
-from derisk.rag.retriever.rerank import DefaultRanker, Ranker
+from derisk.rag.retriever.rerank import DefaultRanker, Ranker, RRFRanker
 from derisk.rag.retriever.rewrite import QueryRewrite
 from derisk.storage.base import IndexStoreBase
 from derisk.storage.vector_store.filters import MetadataFilters
@@ -131,32 +131,37 @@ class EmbeddingRetriever(BaseRetriever):
     ) -> List[Chunk]:
         """Retrieve knowledge chunks.
 
+        If query rewrite is enabled, the rewritten queries are searched
+        concurrently and the result lists are fused by reciprocal rank fusion.
+
         Args:
             query (str): query text.
             filters: metadata filters.
         Return:
             List[Chunk]: list of chunks
         """
-        queries = [query]
-        if self._query_rewrite:
-            candidates_tasks = [
-                self._similarity_search(
-                    query, filters, root_tracer.get_current_span_id()
-                )
-                for query in queries
-            ]
-            chunks = await self._run_async_tasks(candidates_tasks)
-            context = "\n".join([chunk.content for chunk in chunks])
-            new_queries = await self._query_rewrite.rewrite(
-                origin_query=query, context=context, nums=1
-            )
-            queries.extend(new_queries)
+        chunks = await self._similarity_search(
+            query, filters, root_tracer.get_current_span_id()
+        )
+        if not self._query_rewrite:
+            return chunks
+        context = "\n".join([chunk.content for chunk in chunks])
+        new_queries = await self._query_rewrite.rewrite(
+            origin_query=query, context=context, nums=1
+        )
+        if not new_queries:
+            return chunks
         candidates = [
-            self._similarity_search(query, filters, root_tracer.get_current_span_id())
-            for query in queries
+            self._similarity_search(q, filters, root_tracer.get_current_span_id())
+            for q in new_queries
         ]
-        new_candidates = await run_async_tasks(tasks=candidates, concurrency_limit=1)
-        return new_candidates
+        rewrite_candidates = await run_async_tasks(tasks=candidates)
+        fusion_ranker = (
+            self._rerank
+            if isinstance(self._rerank, RRFRanker)
+            else RRFRanker(topk=self._top_k * (len(new_queries) + 1))
+        )
+        return fusion_ranker.rank_lists([chunks] + rewrite_candidates, query)
 
     async def _aretrieve_with_score(
         self,
@@ -166,6 +171,12 @@ class EmbeddingRetriever(BaseRetriever):
     ) -> List[Chunk]:
         """Retrieve knowledge chunks with score.
 
+        If query rewrite is enabled, the chunks of the original query are the
+        context of the rewrite, then all the rewritten queries are searched
+        concurrently. The result list of each query is passed to the ranker, which
+        deduplicates them by chunk id (and fuses them by reciprocal rank fusion for
+        :class:`RRFRanker`).
+
         Args:
             query (str): query text
             score_threshold (float): score threshold
@@ -173,45 +184,19 @@ class EmbeddingRetriever(BaseRetriever):
         Return:
             List[Chunk]: list of chunks with score
         """
-        queries = [query]
-        if self._query_rewrite:
-            with root_tracer.start_span(
-                "derisk.rag.retriever.embeddings.query_rewrite.similarity_search",
-                metadata={"query": query, "score_threshold": score_threshold},
-            ):
-                candidates_tasks = [
-                    self._similarity_search(
-                        query, filters, root_tracer.get_current_span_id()
-                    )
-                    for query in queries
-                ]
-                chunks = await self._run_async_tasks(candidates_tasks)
-                context = "\n".join([chunk.content for chunk in chunks])
-            with root_tracer.start_span(
-                "derisk.rag.retriever.embeddings.query_rewrite.rewrite",
-                metadata={"query": query, "context": context, "nums": 1},
-            ):
-                new_queries = await self._query_rewrite.rewrite(
-                    origin_query=query, context=context, nums=1
-                )
-                queries.extend(new_queries)
-
         with root_tracer.start_span(
             "derisk.rag.retriever.embeddings.similarity_search_with_score",
             metadata={"query": query, "score_threshold": score_threshold},
         ):
-            candidates_with_score = [
-                self._similarity_search_with_score(
-                    query, score_threshold, filters, root_tracer.get_current_span_id()
-                )
-                for query in queries
-            ]
-            res_candidates_with_score = await run_async_tasks(
-                tasks=candidates_with_score, concurrency_limit=1
-            )
-            new_candidates_with_score = cast(
-                List[Chunk], reduce(lambda x, y: x + y, res_candidates_with_score)
+            span_id = root_tracer.get_current_span_id()
+            origin_candidates = await self._similarity_search_with_score(
+                query, score_threshold, filters, span_id
             )
+            ranked_lists = [origin_candidates]
+            if self._query_rewrite:
+                ranked_lists += await self._rewrite_and_search_with_score(
+                    query, origin_candidates, score_threshold, filters, span_id
+                )
 
         with root_tracer.start_span(
             "derisk.rag.retriever.embeddings.rerank",
@@ -221,10 +206,41 @@ class EmbeddingRetriever(BaseRetriever):
                 "rerank_cls": self._rerank.__class__.__name__,
             },
         ):
-            new_candidates_with_score = await self._rerank.arank(
-                new_candidates_with_score, query
+            if len(ranked_lists) == 1:
+                return await self._rerank.arank(ranked_lists[0], query)
+            return await self._rerank.arank_lists(ranked_lists, query)
+
+    async def _rewrite_and_search_with_score(
+        self,
+        query: str,
+        origin_chunks: List[Chunk],
+        score_threshold: float,
+        filters: Optional[MetadataFilters] = None,
+        parent_span_id: Optional[str] = None,
+    ) -> List[List[Chunk]]:
+        """Rewrite the query and search the rewritten queries concurrently.
+
+        The chunks already recalled by the original query are the context of the
+        rewrite, the original query is not searched again.
+        """
+        context = "\n".join([chunk.content for chunk in origin_chunks])
+        with root_tracer.start_span(
+            "derisk.rag.retriever.embeddings.query_rewrite.rewrite",
+            parent_span_id,
+            metadata={"query": query, "context": context, "nums": 1},
+        ):
+            new_queries = await self._query_rewrite.rewrite(
+                origin_query=query, context=context, nums=1
+            )
+        if not new_queries:
+            return []
+        candidates_with_score = [
+            self._similarity_search_with_score(
+                q, score_threshold, filters, parent_span_id
             )
-            return new_candidates_with_score
+            for q in new_queries
+        ]
+        return await run_async_tasks(tasks=candidates_with_score)
 
     async def _similarity_search(
         self,
@@ -1,7 +1,7 @@
 """Rerank module for RAG retriever."""
 
 from abc import ABC, abstractmethod
-from typing import Callable, List, Optional
+from typing import Callable, Dict, List, Optional
 
 from derisk.core import Chunk, RerankEmbeddings
 from derisk.core.awel.flow import Parameter, ResourceCategory, register_resource
@@ -11,6 +11,17 @@ from derisk.util.i18n_utils import _
 RANK_FUNC = Callable[[List[Chunk]], List[Chunk]]
 
 
+def _merge_by_chunk_id(ranked_lists: List[List[Chunk]]) -> List[Chunk]:
+    """Merge the result lists, keep the chunk with the highest score for each id."""
+    merged: Dict[str, Chunk] = {}
+    for candidates in ranked_lists:
+        for chunk in candidates:
+            exist = merged.get(chunk.chunk_id)
+            if exist is None or chunk.score > exist.score:
+                merged[chunk.chunk_id] = chunk
+    return list(merged.values())
+
+
 class Ranker(ABC):
     """Base Ranker."""
 
@@ -58,6 +69,28 @@ class Ranker(ABC):
             self.rank, candidates_with_scores, query
         )
 
+    def rank_lists(
+        self, ranked_lists: List[List[Chunk]], query: Optional[str] = None
+    ) -> List[Chunk]:
+        """Return top k chunks from the result lists of multiple queries.
+
+        The same chunk may be recalled by several queries (e.g. the rewritten
+        queries), only the one with the highest score is kept before ranking.
+
+        Args:
+            ranked_lists: List[List[Chunk]], one result list for each query
+            query: Optional[str]
+        Return:
+            List[Chunk]
+        """
+        return self.rank(_merge_by_chunk_id(ranked_lists), query)
+
+    async def arank_lists(
+        self, ranked_lists: List[List[Chunk]], query: Optional[str] = None
+    ) -> List[Chunk]:
+        """Return top k chunks from the result lists of multiple queries."""
+        return await self.arank(_merge_by_chunk_id(ranked_lists), query)
+
     def _filter(self, candidates_with_scores: List) -> List[Chunk]:
         """Filter duplicate candidates documents."""
         candidates_with_scores = sorted(
@@ -147,12 +180,34 @@ class RRFRanker(Ranker):
         self,
         topk: int = 4,
         rank_fn: Optional[RANK_FUNC] = None,
+        k: int = 60,
     ):
-        """RRF rank algorithm implementation."""
+        """RRF rank algorithm implementation.
+
+        Args:
+            topk (int): The number of top k documents.
+            rank_fn (Optional[RANK_FUNC]): The rank function applied after fusion.
+            k (int): The rank constant, a larger k gives the lower ranked
+                documents more weight, default is 60.
+        """
         super().__init__(topk, rank_fn)
+        self.k = k
 
     def rank(
         self, candidates_with_scores: List[Chunk], query: Optional[str] = None
+    ) -> List[Chunk]:
+        """Rank a single result list.
+
+        The candidates are ranked by their similarity scores, so the result is the
+        same as the default ranker except that the scores become the RRF scores.
+        """
+        candidates_with_scores = sorted(
+            candidates_with_scores, key=lambda x: x.score, reverse=True
+        )
+        return self.rank_lists([candidates_with_scores], query)
+
+    def rank_lists(
+        self, ranked_lists: List[List[Chunk]], query: Optional[str] = None
     ) -> List[Chunk]:
         """RRF rank algorithm implementation.
 
@@ -169,9 +224,44 @@ class RRFRanker(Ranker):
                 score += 1.0 / ( k + rank( result(q), d ) )
         return score
         reference:https://www.elastic.co/guide/en/elasticsearch/reference/current/rrf.html
+
+        Args:
+            ranked_lists: List[List[Chunk]], one result list for each query, each
+                list is ordered by relevance.
+            query: Optional[str]
+        Return:
+            List[Chunk]: top k chunks deduplicated by chunk id, the score of each
+                chunk is its RRF score.
         """
-        # it will be implemented soon when multi recall is implemented
-        return candidates_with_scores
+        rrf_scores: Dict[str, float] = {}
+        chunks: Dict[str, Chunk] = {}
+        for candidates in ranked_lists:
+            visited = set()
+            for rank, chunk in enumerate(candidates, start=1):
+                if chunk.chunk_id in visited:
+                    # Only the best rank of a chunk counts in one result list
+                    continue
+                visited.add(chunk.chunk_id)
+                chunks.setdefault(chunk.chunk_id, chunk)
+                rrf_scores[chunk.chunk_id] = rrf_scores.get(chunk.chunk_id, 0.0) + (
+                    1.0 / (self.k + rank)
+                )
+        # Python's sort is stable, ties keep the order of the first appearance
+        chunk_ids = sorted(rrf_scores, key=lambda x: rrf_scores[x], reverse=True)
+        fused_chunks = []
+        for chunk_id in chunk_ids:
+            chunk = chunks[chunk_id]
+            chunk.score = rrf_scores[chunk_id]
+            fused_chunks.append(chunk)
+        if self.rank_fn is not None:
+            fused_chunks = self.rank_fn(fused_chunks)
+        return fused_chunks[: self.topk]
+
+    async def arank_lists(
+        self, ranked_lists: List[List[Chunk]], query: Optional[str] = None
+    ) -> List[Chunk]:
+        """RRF rank algorithm implementation."""
+        return self.rank_lists(ranked_lists, query)
 
 
 @register_resource(
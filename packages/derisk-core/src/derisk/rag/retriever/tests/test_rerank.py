@@ -0,0 +1,41 @@
+from derisk.core import Chunk
+from derisk.rag.retriever.rerank import DefaultRanker, RRFRanker
+
+
+def _chunks(*ids: str) -> list:
+    return [Chunk(chunk_id=i, content=f"content {i}", score=0.5) for i in ids]
+
+
+def test_rrf_fuse_lists():
+    ranker = RRFRanker(topk=10)
+    fused = ranker.rank_lists([_chunks("a", "b", "c"), _chunks("b", "d", "a")])
+    # b: 1/62 + 1/61, a: 1/61 + 1/63, c: 1/63, d: 1/62
+    assert [c.chunk_id for c in fused] == ["b", "a", "d", "c"]
+    expected_score = 1 / 62 + 1 / 61
+    assert abs(fused[0].score - expected_score) < 1e-9
+
+
+def test_rrf_topk_and_dedupe():
+    ranker = RRFRanker(topk=2)
+    fused = ranker.rank_lists([_chunks("a", "a", "b"), _chunks("c")])
+    # Duplicates in the same list only count once
+    assert abs(fused[0].score - 1 / 61) < 1e-9
+    assert len(fused) == 2
+    assert len({c.chunk_id for c in fused}) == 2
+
+
+def test_rrf_single_list():
+    chunks = _chunks("a", "b", "c")
+    for chunk, score in zip(chunks, [0.1, 0.9, 0.5]):
+        chunk.score = score
+    fused = RRFRanker(topk=3).rank(chunks)
+    assert [c.chunk_id for c in fused] == ["b", "c", "a"]
+
+
+def test_default_ranker_rank_lists():
+    first = _chunks("a", "b")
+    second = _chunks("b", "c")
+    second[0].score = 0.9
+    ranked = DefaultRanker(topk=5).rank_lists([first, second])
+    assert [c.chunk_id for c in ranked] == ["b", "a", "c"]
+    assert ranked[0].score == 0.9
@@ -1,5 +1,6 @@
 """Index store base class."""
 
+import asyncio
 import logging
 import threading
 import time
@@ -148,6 +149,9 @@ class IndexStoreBase(ABC):
     ) -> List[str]:
         """Load document in index database with specified limit.
 
+        At most ``max_threads`` chunk groups are loaded concurrently, the same as
+        :meth:`load_document_with_limit`.
+
         Args:
             chunks(List[Chunk]): Document chunks.
             max_chunks_once_load(int): Max number of chunks to load at once.
@@ -164,22 +168,27 @@ class IndexStoreBase(ABC):
             f"Loading {len(chunks)} chunks in {len(chunk_groups)} groups with "
             f"{max_threads} threads."
         )
+        semaphore = asyncio.Semaphore(max(1, max_threads or 1))
+        loaded_cnt = 0
+        start_time = time.time()
 
-        tasks = []
-        for chunk_group in chunk_groups:
-            tasks.append(self.aload_document(chunk_group))
-
-        import asyncio
-
-        results = await asyncio.gather(*tasks)
+        async def _load_group(chunk_group: List[Chunk]) -> List[str]:
+            nonlocal loaded_cnt
+            async with semaphore:
+                success_ids = await self.aload_document(chunk_group)
+            loaded_cnt += len(success_ids)
+            logger.info(f"Loaded {loaded_cnt} chunks, total {len(chunks)} chunks.")
+            return success_ids
 
+        results = await asyncio.gather(
+            *[_load_group(chunk_group) for chunk_group in chunk_groups]
+        )
         ids = []
-        loaded_cnt = 0
         for success_ids in results:
             ids.extend(success_ids)
-            loaded_cnt += len(success_ids)
-            logger.info(f"Loaded {loaded_cnt} chunks, total {len(chunks)} chunks.")
-
+        logger.info(
+            f"Loaded {len(chunks)} chunks in {time.time() - start_time} seconds"
+        )
         return ids
 
     def similar_search(
@@ -1,10 +1,12 @@
 """Module for cache storage."""
 
+from .embedding_cache import CachedEmbeddings  # noqa: F401
 from .llm_cache import LLMCacheClient, LLMCacheKey, LLMCacheValue  # noqa: F401
 from .manager import CacheManager, initialize_cache  # noqa: F401
 from .storage.base import MemoryCacheStorage  # noqa: F401
 
 __all__ = [
+    "CachedEmbeddings",
     "LLMCacheKey",
     "LLMCacheValue",
     "LLMCacheClient",
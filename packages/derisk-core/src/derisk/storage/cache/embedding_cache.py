@@ -1 +1,252 @@
-"""Embeddings cache."""
+"""Embeddings cache.
+
+Cache the embeddings of the texts in a :class:`CacheStorage`, keyed by the model
+name and the hash of the text, so the identical texts are not embedded again.
+"""
+
+import hashlib
+import json
+import logging
+import threading
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from derisk.core import Embeddings
+from derisk.core.interface.cache import CacheKey, CacheValue
+from derisk.util.executor_utils import blocking_func_to_async_no_executor
+
+from .storage.base import CacheStorage
+
+logger = logging.getLogger(__name__)
+
+_FLOAT32 = np.dtype("<f4")
+
+
+@dataclass
+class EmbeddingCacheKeyData:
+    """Cache key data for embeddings."""
+
+    model_name: str
+    text_hash: str
+    # The query and documents may be embedded in different ways, e.g. the
+    # instruction models
+    kind: str = "document"
+
+
+class EmbeddingCacheKey(CacheKey[EmbeddingCacheKeyData]):
+    """Cache key for embeddings."""
+
+    def __init__(self, model_name: str, text: str, kind: str = "document") -> None:
+        """Create a new instance of EmbeddingCacheKey."""
+        super().__init__()
+        text_hash = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        self.config = EmbeddingCacheKeyData(
+            model_name=model_name, text_hash=text_hash, kind=kind
+        )
+        self._hash_bytes = hashlib.sha256(
+            f"{model_name}\0{kind}\0{text_hash}".encode("utf-8")
+        ).digest()
+
+    def __hash__(self) -> int:
+        """Return the hash value of the object."""
+        return int.from_bytes(self._hash_bytes, "big")
+
+    def __eq__(self, other: Any) -> bool:
+        """Check equality with another key."""
+        if not isinstance(other, EmbeddingCacheKey):
+            return False
+        return self.config == other.config
+
+    def get_hash_bytes(self) -> bytes:
+        """Return the byte array of hash value."""
+        return self._hash_bytes
+
+    def to_dict(self) -> Dict:
+        """Convert to dict."""
+        return asdict(self.config)
+
+    def serialize(self) -> bytes:
+        """Serialize the key, the key is small, no serializer is required."""
+        return json.dumps(self.to_dict()).encode("utf-8")
+
+    def get_value(self) -> EmbeddingCacheKeyData:
+        """Return the real object of current cache key."""
+        return self.config
+
+
+class EmbeddingCacheValue(CacheValue[np.ndarray]):
+    """Cache value for embeddings, stored as the float32 bytes of the embedding."""
+
+    def __init__(self, embedding: Any) -> None:
+        """Create a new instance of EmbeddingCacheValue."""
+        super().__init__()
+        self.value = np.asarray(embedding, dtype=_FLOAT32)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "EmbeddingCacheValue":
+        """Create the value from the float32 bytes."""
+        return cls(np.frombuffer(data, dtype=_FLOAT32))
+
+    def to_dict(self) -> Dict:
+        """Convert to dict."""
+        return {"embedding": self.value.tolist()}
+
+    def serialize(self) -> bytes:
+        """Serialize to the compact float32 bytes instead of JSON floats."""
+        return self.value.tobytes()
+
+    def get_value(self) -> np.ndarray:
+        """Return the underlying real value."""
+        return self.value
+
+
+class CachedEmbeddings(Embeddings):
+    """Wrap the embeddings with a cache.
+
+    Only the texts not in the cache are embedded, in one call to the wrapped
+    embeddings.
+
+    Examples:
+        .. code-block:: python
+
+            from derisk.storage.cache import MemoryCacheStorage
+            from derisk.storage.cache.embedding_cache import CachedEmbeddings
+
+            embeddings = CachedEmbeddings(
+                embeddings, MemoryCacheStorage(), model_name="text2vec"
+            )
+            embeddings.embed_documents(["hello", "world"])
+            print(embeddings.get_stats())
+    """
+
+    def __init__(
+        self, embeddings: Embeddings, storage: CacheStorage, model_name: str
+    ) -> None:
+        """Create a new CachedEmbeddings."""
+        self._embeddings = embeddings
+        self._storage = storage
+        self._model_name = model_name
+        # The memory storage is not thread-safe
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    @property
+    def embeddings(self) -> Embeddings:
+        """Return the wrapped embeddings."""
+        return self._embeddings
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get the number of hits and misses and the hit ratio."""
+        total = self._hits + self._misses
+        return {
+            "hits": self._hits,
+            "misses": self._misses,
+            "hit_ratio": self._hits / total if total else 0.0,
+        }
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embed search docs."""
+        results, misses = self._lookup(texts, "document")
+        if misses:
+            embeddings = self._embeddings.embed_documents(list(misses))
+            self._store(misses, embeddings, results, "document")
+        return results  # type: ignore
+
+    def embed_query(self, text: str) -> List[float]:
+        """Embed query text."""
+        results, misses = self._lookup([text], "query")
+        if misses:
+            embedding = self._embeddings.embed_query(text)
+            self._store(misses, [embedding], results, "query")
+        return results[0]  # type: ignore
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Asynchronous Embed search docs."""
+        results, misses = await blocking_func_to_async_no_executor(
+            self._lookup, texts, "document"
+        )
+        if misses:
+            embeddings = await self._embeddings.aembed_documents(list(misses))
+            await blocking_func_to_async_no_executor(
+                self._store, misses, embeddings, results, "document"
+            )
+        return results  # type: ignore
+
+    async def aembed_query(self, text: str) -> List[float]:
+        """Asynchronous Embed query text."""
+        results, misses = await blocking_func_to_async_no_executor(
+            self._lookup, [text], "query"
+        )
+        if misses:
+            embedding = await self._embeddings.aembed_query(text)
+            await blocking_func_to_async_no_executor(
+                self._store, misses, [embedding], results, "query"
+            )
+        return results[0]  # type: ignore
+
+    def _key(self, text: str, kind: str) -> EmbeddingCacheKey:
+        return EmbeddingCacheKey(self._model_name, text, kind)
+
+    def _lookup(
+        self, texts: List[str], kind: str
+    ) -> Tuple[List[Optional[List[float]]], Dict[str, List[int]]]:
+        """Read the cached embeddings.
+
+        Returns:
+            Tuple[List[Optional[List[float]]], Dict[str, List[int]]]: The embeddings,
+                None for the misses, and the indexes of each missed text.
+        """
+        results: List[Optional[List[float]]] = [None] * len(texts)
+        misses: Dict[str, List[int]] = {}
+        with self._lock:
+            for i, text in enumerate(texts):
+                if text in misses:
+                    misses[text].append(i)
+                    continue
+                item = self._get_item(self._key(text, kind))
+                if item is None:
+                    misses[text] = [i]
+                else:
+                    results[i] = EmbeddingCacheValue.from_bytes(
+                        item.value_data
+                    ).value.tolist()
+            # The duplicate texts of a miss are embedded once, count them as hits
+            self._hits += len(texts) - len(misses)
+            self._misses += len(misses)
+        return results, misses
+
+    def _get_item(self, key: EmbeddingCacheKey):
+        try:
+            return self._storage.get(key)
+        except Exception as e:
+            logger.warning(f"Read embedding cache failed: {e}")
+            return None
+
+    def _store(
+        self,
+        misses: Dict[str, List[int]],
+        embeddings: List[List[float]],
+        results: List[Optional[List[float]]],
+        kind: str,
+    ):
+        if len(embeddings) != len(misses):
+            raise ValueError(
+                f"Expected {len(misses)} embeddings, got {len(embeddings)}"
+            )
+        with self._lock:
+            for (text, indexes), embedding in zip(misses.items(), embeddings):
+                value = EmbeddingCacheValue(embedding)
+                try:
+                    self._storage.set(self._key(text, kind), value)
+                except Exception as e:
+                    logger.warning(f"Write embedding cache failed: {e}")
+                embedding = (
+                    embedding.tolist()
+                    if isinstance(embedding, np.ndarray)
+                    else embedding
+                )
+                for i in indexes:
+                    results[i] = embedding
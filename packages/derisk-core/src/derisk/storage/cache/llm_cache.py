@@ -21,6 +21,10 @@ class LLMCacheKeyData:
     top_p: Optional[float] = 1.0
     # See derisk.model.base.ModelType
     model_type: Optional[str] = "huggingface"
+    # The last human message of the prompt
+    query: Optional[str] = None
+    # The hash of the other messages of the prompt (system prompt and history)
+    context_hash: Optional[str] = None
 
 
 CacheOutputType = Union[ModelOutput, List[ModelOutput]]
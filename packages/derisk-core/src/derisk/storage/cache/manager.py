@@ -4,7 +4,7 @@ import logging
 from abc import ABC, abstractmethod
 from concurrent.futures import Executor
 from dataclasses import dataclass, field
-from typing import Optional, Type, cast
+from typing import TYPE_CHECKING, Optional, Type, cast
 
 from derisk.component import BaseComponent, ComponentType, SystemApp
 from derisk.core import CacheConfig, CacheKey, CacheValue, Serializable, Serializer
@@ -15,6 +15,9 @@ from derisk.util.parameter_utils import BaseParameters
 
 from .storage.base import CacheStorage
 
+if TYPE_CHECKING:
+    from derisk.core import Embeddings
+
 logger = logging.getLogger(__name__)
 
 
@@ -31,7 +34,9 @@ class ModelCacheParameters(BaseParameters):
     storage_type: str = field(
         default="memory",
         metadata={
-            "help": _("The storage type, default is memory"),
+            "help": _(
+                "The storage type, default is memory, supported: memory, disk, semantic"
+            ),
         },
     )
     max_memory_mb: int = field(
@@ -46,6 +51,40 @@ class ModelCacheParameters(BaseParameters):
             "help": _("The persist directory, default is model_cache"),
         },
     )
+    similarity_threshold: float = field(
+        default=0.95,
+        metadata={
+            "help": _(
+                "The min cosine similarity of the prompts to hit the semantic cache, "
+                "default is 0.95"
+            ),
+        },
+    )
+    max_entries: int = field(
+        default=10000,
+        metadata={
+            "help": _("The max number of entries of the semantic cache"),
+        },
+    )
+    ttl_seconds: Optional[int] = field(
+        default=None,
+        metadata={
+            "help": _(
+                "The time to live in seconds of the memory and semantic cache "
+                "entries, never expire by default"
+            ),
+        },
+    )
+    enable_embedding_cache: bool = field(
+        default=True,
+        metadata={
+            "help": _(
+                "Whether to cache the embeddings and the graph extraction results "
+                "of the texts, keyed by the model name and the hash of the text, "
+                "default is True"
+            ),
+        },
+    )
 
 
 class CacheManager(BaseComponent, ABC):
@@ -84,17 +123,39 @@ class CacheManager(BaseComponent, ABC):
     def serializer(self) -> Serializer:
         """Return serializer to serialize/deserialize cache value."""
 
+    def wrap_embeddings(
+        self, embeddings: "Embeddings", model_name: str
+    ) -> "Embeddings":
+        """Wrap the embeddings with the embedding cache.
+
+        Return the embeddings itself if the embedding cache is not enabled.
+        """
+        return embeddings
+
+    def get_content_storage(self) -> Optional[CacheStorage]:
+        """Return the storage of the values keyed by the hash of the content.
+
+        E.g. the embeddings and the graph extraction results of the texts, None if
+        the embedding cache is not enabled.
+        """
+        return None
+
 
 class LocalCacheManager(CacheManager):
     """Local cache manager."""
 
     def __init__(
-        self, system_app: SystemApp, serializer: Serializer, storage: CacheStorage
+        self,
+        system_app: SystemApp,
+        serializer: Serializer,
+        storage: CacheStorage,
+        embedding_storage: Optional[CacheStorage] = None,
     ) -> None:
         """Create local cache manager."""
         super().__init__(system_app)
         self._serializer = serializer
         self._storage = storage
+        self._embedding_storage = embedding_storage
 
     @property
     def executor(self) -> Executor:
@@ -141,9 +202,30 @@ class LocalCacheManager(CacheManager):
         """Return serializer to serialize/deserialize cache value."""
         return self._serializer
 
+    def wrap_embeddings(
+        self, embeddings: "Embeddings", model_name: str
+    ) -> "Embeddings":
+        """Wrap the embeddings with the embedding cache."""
+        from .embedding_cache import CachedEmbeddings
+
+        if self._embedding_storage is None:
+            return embeddings
+        return CachedEmbeddings(embeddings, self._embedding_storage, model_name)
+
+    def get_content_storage(self) -> Optional[CacheStorage]:
+        """Return the storage of the values keyed by the hash of the content."""
+        return self._embedding_storage
+
 
 def initialize_cache(
-    system_app: SystemApp, storage_type: str, max_memory_mb: int, persist_dir: str
+    system_app: SystemApp,
+    storage_type: str,
+    max_memory_mb: int,
+    persist_dir: str,
+    similarity_threshold: float = 0.95,
+    max_entries: int = 10000,
+    ttl_seconds: Optional[int] = None,
+    enable_embedding_cache: bool = True,
 ):
     """Initialize cache manager.
 
@@ -152,6 +234,12 @@ def initialize_cache(
         storage_type (str): The storage type.
         max_memory_mb (int): The max memory in MB.
         persist_dir (str): The persist directory.
+        similarity_threshold (float): The similarity threshold of semantic cache.
+        max_entries (int): The max number of entries of semantic cache.
+        ttl_seconds (Optional[int]): The time to live of memory and semantic cache
+            entries.
+        enable_embedding_cache (bool): Whether to cache the embeddings and the graph
+            extraction results of the texts.
     """
     from derisk.util.serialization.json_serialization import JsonSerializer
 
@@ -169,9 +257,40 @@ def initialize_cache(
                 f"Can't import DiskCacheStorage, use MemoryCacheStorage, import error "
                 f"message: {str(e)}"
             )
-            cache_storage = MemoryCacheStorage(max_memory_mb=max_memory_mb)
+            cache_storage = MemoryCacheStorage(
+                max_memory_mb=max_memory_mb, ttl_seconds=ttl_seconds
+            )
+    elif storage_type == "semantic":
+        from derisk.rag.embedding.embedding_factory import (
+            DefaultEmbeddings,
+            EmbeddingFactory,
+        )
+
+        from .storage.semantic.semantic_storage import SemanticCacheStorage
+
+        embeddings = DefaultEmbeddings(EmbeddingFactory.get_instance(system_app))
+        cache_storage = SemanticCacheStorage(
+            embeddings,
+            similarity_threshold=similarity_threshold,
+            max_entries=max_entries,
+            ttl_seconds=ttl_seconds,
+        )
     else:
-        cache_storage = MemoryCacheStorage(max_memory_mb=max_memory_mb)
+        cache_storage = MemoryCacheStorage(
+            max_memory_mb=max_memory_mb, ttl_seconds=ttl_seconds
+        )
+    embedding_storage: Optional[CacheStorage] = None
+    if enable_embedding_cache:
+        # The semantic storage matches the prompts by embeddings, it can't store
+        # the embeddings
+        embedding_storage = (
+            MemoryCacheStorage(max_memory_mb=max_memory_mb)
+            if storage_type == "semantic"
+            else cache_storage
+        )
     system_app.register(
-        LocalCacheManager, serializer=JsonSerializer(), storage=cache_storage
+        LocalCacheManager,
+        serializer=JsonSerializer(),
+        storage=cache_storage,
+        embedding_storage=embedding_storage,
     )
@@ -1,9 +1,10 @@
 """Operators for processing model outputs with caching support."""
 
+import hashlib
 import logging
-from typing import AsyncIterator, Dict, List, Optional, Union, cast
+from typing import AsyncIterator, Dict, List, Optional, Tuple, Union, cast
 
-from derisk.core import ModelOutput, ModelRequest
+from derisk.core import ModelMessage, ModelMessageRoleType, ModelOutput, ModelRequest
 from derisk.core.awel import (
     BaseOperator,
     BranchFunc,
@@ -245,17 +246,40 @@ def _parse_cache_key_dict(input_value: ModelRequest) -> Dict:
         Dict: A dictionary used for generating cache keys.
     """
     prompt: str = input_value.messages_to_string().strip()
+    query, context_hash = _split_query(input_value.get_messages())
     return {
         "prompt": prompt,
         "model_name": input_value.model,
         "temperature": input_value.temperature,
         "max_new_tokens": input_value.max_new_tokens,
+        "query": query,
+        "context_hash": context_hash,
         # "top_p": input_value.get("top_p", "1.0"),
         # TODO pass model_type
         # "model_type": input_value.get("model_type", "huggingface"),
     }
 
 
+def _split_query(
+    messages: List[ModelMessage],
+) -> Tuple[Optional[str], Optional[str]]:
+    """Split the last human message from the other messages.
+
+    Returns:
+        Tuple[Optional[str], Optional[str]]: The last human message and the hash of
+            the other messages, None if there is no human message.
+    """
+    for i in range(len(messages) - 1, -1, -1):
+        message = messages[i]
+        if message.role == ModelMessageRoleType.HUMAN and isinstance(
+            message.content, str
+        ):
+            context = ModelMessage.messages_to_string(messages[:i] + messages[i + 1 :])
+            context_hash = hashlib.sha256(context.encode("utf-8")).hexdigest()
+            return message.content.strip(), context_hash
+    return None, None
+
+
 def _is_success_model_output(out: Union[Dict, ModelOutput, List[ModelOutput]]) -> bool:
     if not out:
         return False
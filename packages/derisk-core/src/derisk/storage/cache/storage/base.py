@@ -1,10 +1,12 @@
 """Base cache storage class."""
 
 import logging
+import threading
+import time
 from abc import ABC, abstractmethod
-from collections import OrderedDict
-from dataclasses import dataclass
-from typing import Optional
+from collections import OrderedDict, deque
+from dataclasses import asdict, dataclass
+from typing import Any, Deque, Dict, Hashable, Optional, Tuple
 
 import msgpack
 
@@ -17,10 +19,12 @@ from derisk.core.interface.cache import (
     RetrievalPolicy,
     V,
 )
-from derisk.util.memory_utils import _get_object_bytes
 
 logger = logging.getLogger(__name__)
 
+# The fixed overhead of a storage item in bytes
+_ITEM_OVERHEAD = 32
+
 
 @dataclass
 class StorageItem:
@@ -30,7 +34,8 @@ class StorageItem:
     the hash of the key, and the data for both the key and value.
 
     Parameters:
-        length (int): The bytes length of the storage item.
+        length (int): The bytes length of the storage item, computed from the
+            length of the serialized key and value.
         key_hash (bytes): The hash value of the storage item's key.
         key_data (bytes): The data of the storage item's key, represented in bytes.
         value_data (bytes): The data of the storage item's value, also in bytes.
@@ -46,12 +51,7 @@ class StorageItem:
         key_hash: bytes, key_data: bytes, value_data: bytes
     ) -> "StorageItem":
         """Build a StorageItem from the provided key and value data."""
-        length = (
-            32
-            + _get_object_bytes(key_hash)
-            + _get_object_bytes(key_data)
-            + _get_object_bytes(value_data)
-        )
+        length = _ITEM_OVERHEAD + len(key_hash) + len(key_data) + len(value_data)
         return StorageItem(
             length=length, key_hash=key_hash, key_data=key_data, value_data=value_data
         )
@@ -191,14 +191,148 @@ class CacheStorage(ABC):
         raise NotImplementedError
 
 
+@dataclass
+class MemoryCacheMetrics:
+    """The metrics of the memory cache storage."""
+
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    expirations: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        """Return the hit rate."""
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to dict."""
+        data = asdict(self)
+        data["hit_rate"] = self.hit_rate
+        return data
+
+
+@dataclass
+class _MemoryCacheEntry:
+    item: StorageItem
+    expire_at: Optional[float] = None
+    freq: int = 1
+
+
+class _EvictionQueue:
+    """Keep the order of the keys to evict for LRU and FIFO."""
+
+    def __init__(self, touch_on_access: bool):
+        self._keys: OrderedDict[Hashable, None] = OrderedDict()
+        self._touch_on_access = touch_on_access
+
+    def add(self, key: Hashable, entry: _MemoryCacheEntry):
+        self._keys[key] = None
+
+    def access(self, key: Hashable, entry: _MemoryCacheEntry):
+        if self._touch_on_access:
+            self._keys.move_to_end(key)
+
+    def remove(self, key: Hashable, entry: _MemoryCacheEntry):
+        self._keys.pop(key, None)
+
+    def victim(self) -> Hashable:
+        # The first one is the least recently used one (or the oldest one)
+        return next(iter(self._keys))
+
+
+class _LFUQueue:
+    """Keep the keys in the buckets of the access frequency for LFU.
+
+    The keys with the same frequency are evicted in the LRU order.
+    """
+
+    def __init__(self):
+        self._buckets: Dict[int, OrderedDict[Hashable, None]] = {}
+        self._min_freq = 0
+
+    def add(self, key: Hashable, entry: _MemoryCacheEntry):
+        entry.freq = 1
+        self._buckets.setdefault(1, OrderedDict())[key] = None
+        self._min_freq = 1
+
+    def access(self, key: Hashable, entry: _MemoryCacheEntry):
+        self._remove_from_bucket(key, entry.freq)
+        if entry.freq == self._min_freq and entry.freq not in self._buckets:
+            self._min_freq += 1
+        entry.freq += 1
+        self._buckets.setdefault(entry.freq, OrderedDict())[key] = None
+
+    def remove(self, key: Hashable, entry: _MemoryCacheEntry):
+        self._remove_from_bucket(key, entry.freq)
+
+    def victim(self) -> Hashable:
+        if self._min_freq not in self._buckets:
+            # Only happens after removing a key which is not the victim
+            self._min_freq = min(self._buckets)
+        return next(iter(self._buckets[self._min_freq]))
+
+    def _remove_from_bucket(self, key: Hashable, freq: int):
+        bucket = self._buckets.get(freq)
+        if bucket is None:
+            return
+        bucket.pop(key, None)
+        if not bucket:
+            del self._buckets[freq]
+
+
 class MemoryCacheStorage(CacheStorage):
-    """A simple in-memory cache storage implementation."""
+    """A bounded in-memory cache storage.
+
+    The size of an entry is computed from the length of its serialized key and
+    value. When the memory or the number of entries exceeds the limit, the entries
+    are evicted in O(1) by the cache policy:
 
-    def __init__(self, max_memory_mb: int = 256):
-        """Create a new instance of MemoryCacheStorage."""
-        self.cache: OrderedDict = OrderedDict()
+    - LRU: the least recently used one.
+    - FIFO: the oldest one.
+    - LFU: the least frequently used one, the least recently used one of them.
+
+    The cache policy is fixed when the storage is created, the policy of the cache
+    config passed to the methods is ignored. The entries expire after the ttl.
+    """
+
+    def __init__(
+        self,
+        max_memory_mb: int = 256,
+        cache_policy: CachePolicy = CachePolicy.LRU,
+        ttl_seconds: Optional[float] = None,
+        max_entries: Optional[int] = None,
+    ):
+        """Create a new instance of MemoryCacheStorage.
+
+        Args:
+            max_memory_mb (int): The max memory in MB.
+            cache_policy (CachePolicy): The policy to evict the entries.
+            ttl_seconds (Optional[float]): The time to live of the entries, never
+                expire if None.
+            max_entries (Optional[int]): The max number of entries, no limit if None.
+        """
+        self.cache: Dict[Hashable, _MemoryCacheEntry] = {}
         self.max_memory = max_memory_mb * 1024 * 1024
+        self.max_entries = max_entries
         self.current_memory_usage = 0
+        self.cache_policy = cache_policy
+        self.ttl_seconds = ttl_seconds
+        self._queue = self._new_queue()
+        # The ttl is fixed, so the expire times are in the order of writing
+        self._expire_queue: Deque[Tuple[float, Hashable]] = deque()
+        self._metrics = MemoryCacheMetrics()
+        self._lock = threading.Lock()
+
+    @property
+    def metrics(self) -> MemoryCacheMetrics:
+        """Return the hit/miss/eviction metrics."""
+        return self._metrics
+
+    def __len__(self) -> int:
+        """Return the number of entries."""
+        return len(self.cache)
 
     def check_config(
         self,
@@ -224,14 +358,19 @@ class MemoryCacheStorage(CacheStorage):
         self.check_config(cache_config, raise_error=True)
         # Exact match retrieval
         key_hash = hash(key)
-        item: Optional[StorageItem] = self.cache.get(key_hash)
-        logger.debug(f"MemoryCacheStorage get key {key}, hash {key_hash}, item: {item}")
-
-        if not item:
-            return None
-        # Move the item to the end of the OrderedDict to signify recent use.
-        self.cache.move_to_end(key_hash)
-        return item
+        with self._lock:
+            entry = self.cache.get(key_hash)
+            if entry and entry.expire_at is not None and entry.expire_at <= time.time():
+                self._remove(key_hash)
+                self._metrics.expirations += 1
+                entry = None
+            if not entry:
+                self._metrics.misses += 1
+                return None
+            self._metrics.hits += 1
+            self._queue.access(key_hash, entry)
+        logger.debug(f"MemoryCacheStorage get key {key}, hash {key_hash}")
+        return entry.item
 
     def set(
         self,
@@ -242,16 +381,30 @@ class MemoryCacheStorage(CacheStorage):
         """Set a value in the cache for the provided key."""
         key_hash = hash(key)
         item = StorageItem.build_from_kv(key, value)
-        # Calculate memory size of the new entry
-        new_entry_size = _get_object_bytes(item)
-        # Evict entries if necessary
-        while self.current_memory_usage + new_entry_size > self.max_memory:
-            self._apply_cache_policy(cache_config)
-
-        # Store the item in the cache.
-        self.cache[key_hash] = item
-        self.current_memory_usage += new_entry_size
-        logger.debug(f"MemoryCacheStorage set key {key}, hash {key_hash}, item: {item}")
+        if item.length > self.max_memory:
+            logger.debug(
+                f"MemoryCacheStorage skip key {key}, the size {item.length} exceeds "
+                f"the max memory {self.max_memory}"
+            )
+            return
+        expire_at = time.time() + self.ttl_seconds if self.ttl_seconds else None
+        entry = _MemoryCacheEntry(item=item, expire_at=expire_at)
+        with self._lock:
+            # Overwrite the old entry
+            self._remove(key_hash)
+            self._expire()
+            while self.cache and (
+                self.current_memory_usage + item.length > self.max_memory
+                or (self.max_entries and len(self.cache) >= self.max_entries)
+            ):
+                self._remove(self._queue.victim())
+                self._metrics.evictions += 1
+            self.cache[key_hash] = entry
+            self._queue.add(key_hash, entry)
+            self.current_memory_usage += item.length
+            if expire_at is not None:
+                self._expire_queue.append((expire_at, key_hash))
+        logger.debug(f"MemoryCacheStorage set key {key}, hash {key_hash}")
 
     def exists(
         self, key: CacheKey[K], cache_config: Optional[CacheConfig] = None
@@ -259,9 +412,32 @@ class MemoryCacheStorage(CacheStorage):
         """Check if the key exists in the cache."""
         return self.get(key, cache_config) is not None
 
-    def _apply_cache_policy(self, cache_config: Optional[CacheConfig] = None):
-        # Remove the oldest/newest item based on the cache policy.
-        if cache_config and cache_config.cache_policy == CachePolicy.FIFO:
-            self.cache.popitem(last=False)
-        else:  # Default is LRU
-            self.cache.popitem(last=True)
+    def clear(self):
+        """Remove all the entries."""
+        with self._lock:
+            self.cache.clear()
+            self._expire_queue.clear()
+            self.current_memory_usage = 0
+            self._queue = self._new_queue()
+
+    def _new_queue(self) -> Any:
+        if self.cache_policy == CachePolicy.LFU:
+            return _LFUQueue()
+        return _EvictionQueue(touch_on_access=self.cache_policy != CachePolicy.FIFO)
+
+    def _expire(self):
+        now = time.time()
+        while self._expire_queue and self._expire_queue[0][0] <= now:
+            expire_at, key_hash = self._expire_queue.popleft()
+            entry = self.cache.get(key_hash)
+            # Skip the entries which are removed or rewritten
+            if entry and entry.expire_at == expire_at:
+                self._remove(key_hash)
+                self._metrics.expirations += 1
+
+    def _remove(self, key_hash: Hashable):
+        entry = self.cache.pop(key_hash, None)
+        if not entry:
+            return
+        self._queue.remove(key_hash, entry)
+        self.current_memory_usage -= entry.item.length
@@ -0,0 +1 @@
+"""Semantic cache storage."""
@@ -0,0 +1,425 @@
+"""Semantic cache storage.
+
+Cache the LLM responses by the embedding of the prompt, so the paraphrased prompts
+can hit the cache of each other.
+"""
+
+import logging
+import threading
+import time
+from collections import OrderedDict, deque
+from dataclasses import asdict, dataclass
+from typing import Any, Deque, Dict, List, Optional, Sequence, Tuple, cast
+
+import numpy as np
+
+from derisk.core import Embeddings
+from derisk.core.interface.cache import (
+    CacheConfig,
+    CacheKey,
+    CachePolicy,
+    CacheValue,
+    K,
+    RetrievalPolicy,
+    V,
+)
+
+from ..base import CacheStorage, StorageItem
+
+logger = logging.getLogger(__name__)
+
+_MAX_MISSED_VECTORS = 1024
+
+
+@dataclass
+class SemanticCacheMetrics:
+    """The metrics of the semantic cache storage."""
+
+    exact_hits: int = 0
+    similar_hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    expirations: int = 0
+
+    @property
+    def hits(self) -> int:
+        """Return the total number of hits."""
+        return self.exact_hits + self.similar_hits
+
+    @property
+    def hit_rate(self) -> float:
+        """Return the hit rate."""
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to dict."""
+        data = asdict(self)
+        data["hits"] = self.hits
+        data["hit_rate"] = self.hit_rate
+        return data
+
+
+@dataclass
+class _CacheEntry:
+    key_hash: bytes
+    scope: Tuple
+    item: StorageItem
+    expire_at: Optional[float] = None
+
+
+class _VectorIndex:
+    """A local vector index of one scope.
+
+    The normalized embeddings are kept in a contiguous matrix, so a lookup is one
+    matrix-vector product, which is fast enough for the size of a cache.
+    """
+
+    def __init__(self, dim: int, capacity: int = 64):
+        self._matrix = np.zeros((capacity, dim), dtype=np.float32)
+        self._key_hashes: List[bytes] = []
+        self._positions: Dict[bytes, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._key_hashes)
+
+    def key_hashes(self) -> List[bytes]:
+        return list(self._key_hashes)
+
+    @property
+    def dim(self) -> int:
+        return self._matrix.shape[1]
+
+    def add(self, key_hash: bytes, vector: np.ndarray):
+        if key_hash in self._positions:
+            self._matrix[self._positions[key_hash]] = vector
+            return
+        size = len(self._key_hashes)
+        if size == self._matrix.shape[0]:
+            matrix = np.zeros((size * 2, self.dim), dtype=np.float32)
+            matrix[:size] = self._matrix
+            self._matrix = matrix
+        self._matrix[size] = vector
+        self._positions[key_hash] = size
+        self._key_hashes.append(key_hash)
+
+    def remove(self, key_hash: bytes):
+        pos = self._positions.pop(key_hash, None)
+        if pos is None:
+            return
+        # Move the last one to the removed position
+        last = len(self._key_hashes) - 1
+        last_hash = self._key_hashes.pop()
+        if pos != last:
+            self._matrix[pos] = self._matrix[last]
+            self._key_hashes[pos] = last_hash
+            self._positions[last_hash] = pos
+
+    def search(self, vector: np.ndarray) -> Optional[Tuple[bytes, float]]:
+        size = len(self._key_hashes)
+        if not size:
+            return None
+        scores = self._matrix[:size] @ vector
+        idx = int(np.argmax(scores))
+        return self._key_hashes[idx], float(scores[idx])
+
+
+class SemanticCacheStorage(CacheStorage):
+    """Semantic cache storage.
+
+    The exact match is tried first, then the most similar query in the same scope
+    is looked up, it is a hit if the cosine similarity is not less than the
+    similarity threshold. Only the last human message is embedded, the system
+    prompt and the history must be equal (by the context hash of the key), with the
+    same model name, temperature and max new tokens by default.
+
+    The entries expire after the ttl, and the least recently used entries are evicted
+    when the number of entries exceeds the max entries (or the oldest ones with the
+    FIFO cache policy).
+    """
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        similarity_threshold: float = 0.95,
+        max_entries: int = 10000,
+        ttl_seconds: Optional[float] = None,
+        prompt_field: str = "prompt",
+        scope_fields: Sequence[str] = (
+            "model_name",
+            "temperature",
+            "max_new_tokens",
+            "context_hash",
+        ),
+        query_field: str = "query",
+    ):
+        """Create a new instance of SemanticCacheStorage.
+
+        Args:
+            embeddings (Embeddings): The embeddings to embed the prompt.
+            similarity_threshold (float): The min cosine similarity of a hit.
+            max_entries (int): The max number of entries.
+            ttl_seconds (Optional[float]): The time to live of the entries, never
+                expire if None.
+            prompt_field (str): The field of the cache key to embed if the key has
+                no query field.
+            scope_fields (Sequence[str]): The fields of the cache key which must be
+                equal for a similarity hit.
+            query_field (str): The field of the cache key to embed, the last human
+                message of the prompt.
+        """
+        if max_entries <= 0:
+            raise ValueError("max_entries must be greater than 0")
+        self._embeddings = embeddings
+        self.similarity_threshold = similarity_threshold
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._prompt_field = prompt_field
+        self._query_field = query_field
+        self._scope_fields = tuple(scope_fields)
+        self._entries: OrderedDict[bytes, _CacheEntry] = OrderedDict()
+        self._indexes: Dict[Tuple, _VectorIndex] = {}
+        # The ttl is fixed, so the expire times are in the order of writing
+        self._expire_queue: Deque[Tuple[float, bytes]] = deque()
+        self._missed_vectors: OrderedDict[bytes, List[float]] = OrderedDict()
+        self._metrics = SemanticCacheMetrics()
+        self._lock = threading.Lock()
+
+    @property
+    def metrics(self) -> SemanticCacheMetrics:
+        """Return the hit/miss metrics."""
+        return self._metrics
+
+    def __len__(self) -> int:
+        """Return the number of entries."""
+        return len(self._entries)
+
+    def check_config(
+        self,
+        cache_config: Optional[CacheConfig] = None,
+        raise_error: Optional[bool] = True,
+    ) -> bool:
+        """Check whether the CacheConfig is legal."""
+        return True
+
+    def support_async(self) -> bool:
+        """Check whether the storage support async operation."""
+        return True
+
+    def get(
+        self, key: CacheKey[K], cache_config: Optional[CacheConfig] = None
+    ) -> Optional[StorageItem]:
+        """Retrieve a storage item from the cache using the provided key."""
+        item = self._get_exact(key, cache_config)
+        if item or not self._need_similarity(key, cache_config):
+            return self._record(item, exact=True)
+        vector = self._embeddings.embed_query(cast(str, self._prompt(key)))
+        return self._record(
+            self._get_similar(key, vector, cache_config),
+            exact=False,
+            key=key,
+            vector=vector,
+        )
+
+    async def aget(
+        self, key: CacheKey[K], cache_config: Optional[CacheConfig] = None
+    ) -> Optional[StorageItem]:
+        """Retrieve a storage item from the cache using the provided key."""
+        item = self._get_exact(key, cache_config)
+        if item or not self._need_similarity(key, cache_config):
+            return self._record(item, exact=True)
+        vector = await self._embeddings.aembed_query(cast(str, self._prompt(key)))
+        return self._record(
+            self._get_similar(key, vector, cache_config),
+            exact=False,
+            key=key,
+            vector=vector,
+        )
+
+    def set(
+        self,
+        key: CacheKey[K],
+        value: CacheValue[V],
+        cache_config: Optional[CacheConfig] = None,
+    ) -> None:
+        """Set a value in the cache for the provided key."""
+        vector = None
+        prompt = self._prompt(key)
+        if prompt is not None:
+            vector = self._pop_missed_vector(key)
+            if vector is None:
+                vector = self._embeddings.embed_query(prompt)
+        self._set(key, value, vector, cache_config)
+
+    async def aset(
+        self,
+        key: CacheKey[K],
+        value: CacheValue[V],
+        cache_config: Optional[CacheConfig] = None,
+    ) -> None:
+        """Set a value in the cache for the provided key."""
+        vector = None
+        prompt = self._prompt(key)
+        if prompt is not None:
+            vector = self._pop_missed_vector(key)
+            if vector is None:
+                vector = await self._embeddings.aembed_query(prompt)
+        self._set(key, value, vector, cache_config)
+
+    def clear(self):
+        """Remove all the entries."""
+        with self._lock:
+            self._entries.clear()
+            self._indexes.clear()
+            self._expire_queue.clear()
+            self._missed_vectors.clear()
+
+    def _pop_missed_vector(self, key: CacheKey[K]) -> Optional[List[float]]:
+        with self._lock:
+            return self._missed_vectors.pop(key.get_hash_bytes(), None)
+
+    def _prompt(self, key: CacheKey[K]) -> Optional[str]:
+        key_dict = key.to_dict()
+        prompt = key_dict.get(self._query_field)
+        if prompt is None:
+            prompt = key_dict.get(self._prompt_field)
+        return prompt if isinstance(prompt, str) and prompt else None
+
+    def _scope(self, key: CacheKey[K]) -> Tuple:
+        key_dict = key.to_dict()
+        return tuple(str(key_dict.get(f)) for f in self._scope_fields)
+
+    def _need_similarity(
+        self, key: CacheKey[K], cache_config: Optional[CacheConfig] = None
+    ) -> bool:
+        # Without cache config, similarity match is the default of this storage
+        if (
+            cache_config
+            and cache_config.retrieval_policy != RetrievalPolicy.SIMILARITY_MATCH
+        ):
+            return False
+        return self._prompt(key) is not None
+
+    def _record(
+        self,
+        item: Optional[StorageItem],
+        exact: bool,
+        key: Optional[CacheKey[K]] = None,
+        vector: Optional[List[float]] = None,
+    ) -> Optional[StorageItem]:
+        with self._lock:
+            if not item:
+                self._metrics.misses += 1
+                if key is not None and vector is not None:
+                    # A miss is usually followed by a set of the same key, keep the
+                    # embedding to avoid embedding the prompt again
+                    self._missed_vectors[key.get_hash_bytes()] = vector
+                    while len(self._missed_vectors) > _MAX_MISSED_VECTORS:
+                        self._missed_vectors.popitem(last=False)
+            elif exact:
+                self._metrics.exact_hits += 1
+            else:
+                self._metrics.similar_hits += 1
+        return item
+
+    def _get_exact(
+        self, key: CacheKey[K], cache_config: Optional[CacheConfig] = None
+    ) -> Optional[StorageItem]:
+        with self._lock:
+            return self._touch(key.get_hash_bytes(), cache_config)
+
+    def _get_similar(
+        self,
+        key: CacheKey[K],
+        vector: List[float],
+        cache_config: Optional[CacheConfig] = None,
+    ) -> Optional[StorageItem]:
+        query = _normalize(vector)
+        with self._lock:
+            index = self._indexes.get(self._scope(key))
+            if index is None or index.dim != query.shape[0]:
+                return None
+            while True:
+                result = index.search(query)
+                if not result or result[1] < self.similarity_threshold:
+                    return None
+                item = self._touch(result[0], cache_config)
+                if item:
+                    logger.debug(
+                        f"SemanticCacheStorage similar hit, similarity: {result[1]}"
+                    )
+                    return item
+                # The most similar one is expired and removed, try the next one
+
+    def _touch(
+        self, key_hash: bytes, cache_config: Optional[CacheConfig] = None
+    ) -> Optional[StorageItem]:
+        entry = self._entries.get(key_hash)
+        if not entry:
+            return None
+        if entry.expire_at is not None and entry.expire_at <= time.time():
+            self._remove(key_hash)
+            self._metrics.expirations += 1
+            return None
+        if not cache_config or cache_config.cache_policy != CachePolicy.FIFO:
+            self._entries.move_to_end(key_hash)
+        return entry.item
+
+    def _set(
+        self,
+        key: CacheKey[K],
+        value: CacheValue[V],
+        vector: Optional[List[float]],
+        cache_config: Optional[CacheConfig] = None,
+    ):
+        item = StorageItem.build_from_kv(key, value)
+        key_hash = item.key_hash
+        scope = self._scope(key)
+        expire_at = time.time() + self.ttl_seconds if self.ttl_seconds else None
+        with self._lock:
+            self._remove(key_hash)
+            self._entries[key_hash] = _CacheEntry(key_hash, scope, item, expire_at)
+            if expire_at is not None:
+                self._expire_queue.append((expire_at, key_hash))
+            if vector is not None:
+                normalized = _normalize(vector)
+                index = self._indexes.get(scope)
+                if index is None or index.dim != normalized.shape[0]:
+                    # The embedding model is changed, rebuild the index of the scope
+                    if index is not None:
+                        for h in index.key_hashes():
+                            self._remove(h)
+                    index = _VectorIndex(normalized.shape[0])
+                    self._indexes[scope] = index
+                index.add(key_hash, normalized)
+            self._evict()
+
+    def _evict(self):
+        now = time.time()
+        while self._expire_queue and self._expire_queue[0][0] <= now:
+            expire_at, key_hash = self._expire_queue.popleft()
+            entry = self._entries.get(key_hash)
+            # Skip the entries which are removed or rewritten
+            if entry and entry.expire_at == expire_at:
+                self._remove(key_hash)
+                self._metrics.expirations += 1
+        while len(self._entries) > self.max_entries:
+            # The first one is the least recently used one (or the oldest one)
+            self._remove(next(iter(self._entries)))
+            self._metrics.evictions += 1
+
+    def _remove(self, key_hash: bytes):
+        entry = self._entries.pop(key_hash, None)
+        if not entry:
+            return
+        index = self._indexes.get(entry.scope)
+        if index is not None:
+            index.remove(key_hash)
+            if not len(index):
+                del self._indexes[entry.scope]
+
+
+def _normalize(vector: List[float]) -> np.ndarray:
+    array = np.asarray(vector, dtype=np.float32)
+    norm = np.linalg.norm(array)
+    return array / norm if norm > 0 else array
@@ -0,0 +1,146 @@
+import time
+
+import pytest
+
+from derisk.core.interface.cache import CacheConfig, CachePolicy, RetrievalPolicy
+
+from ...embedding_cache import EmbeddingCacheKey, EmbeddingCacheValue
+from ..base import MemoryCacheStorage, StorageItem
+
+
+def _key(text: str):
+    return EmbeddingCacheKey("test_model", text)
+
+
+def _value(dim: int = 4):
+    return EmbeddingCacheValue([0.5] * dim)
+
+
+def _item_length(text: str, dim: int = 4) -> int:
+    return StorageItem.build_from_kv(_key(text), _value(dim)).length
+
+
+def _keys(storage: MemoryCacheStorage, texts):
+    return [text for text in texts if storage.exists(_key(text))]
+
+
+def test_get_set():
+    storage = MemoryCacheStorage()
+    assert storage.get(_key("a")) is None
+    storage.set(_key("a"), _value())
+    item = storage.get(_key("a"))
+    assert item.value_data == _value().serialize()
+    assert storage.metrics.to_dict() == {
+        "hits": 1,
+        "misses": 1,
+        "evictions": 0,
+        "expirations": 0,
+        "hit_rate": 0.5,
+    }
+
+
+def test_only_exact_match():
+    storage = MemoryCacheStorage()
+    config = CacheConfig(retrieval_policy=RetrievalPolicy.SIMILARITY_MATCH)
+    assert not storage.check_config(config, raise_error=False)
+    with pytest.raises(ValueError):
+        storage.get(_key("a"), config)
+
+
+def test_lru_evicts_least_recently_used():
+    storage = MemoryCacheStorage(max_entries=3, cache_policy=CachePolicy.LRU)
+    for text in ["a", "b", "c"]:
+        storage.set(_key(text), _value())
+    storage.get(_key("a"))
+    storage.set(_key("d"), _value())
+    # "b" is the least recently used one, "a" was just read
+    assert storage.get(_key("b")) is None
+    assert _keys(storage, "acd") == ["a", "c", "d"]
+    assert storage.metrics.evictions == 1
+
+
+def test_fifo_evicts_oldest():
+    storage = MemoryCacheStorage(max_entries=3, cache_policy=CachePolicy.FIFO)
+    for text in ["a", "b", "c"]:
+        storage.set(_key(text), _value())
+    storage.get(_key("a"))
+    storage.set(_key("d"), _value())
+    assert storage.get(_key("a")) is None
+    assert _keys(storage, "bcd") == ["b", "c", "d"]
+
+
+def test_lfu_evicts_least_frequently_used():
+    storage = MemoryCacheStorage(max_entries=3, cache_policy=CachePolicy.LFU)
+    for text in ["a", "b", "c"]:
+        storage.set(_key(text), _value())
+    for text in ["a", "a", "b", "c"]:
+        storage.get(_key(text))
+    storage.set(_key("d"), _value())
+    # "b" and "c" are both read once, "b" is the least recently used one
+    assert storage.get(_key("b")) is None
+    storage.set(_key("e"), _value())
+    # "d" is never read
+    assert storage.get(_key("d")) is None
+    assert _keys(storage, "ace") == ["a", "c", "e"]
+
+
+def test_lfu_remove_not_victim():
+    storage = MemoryCacheStorage(max_entries=2, cache_policy=CachePolicy.LFU)
+    storage.set(_key("a"), _value())
+    storage.get(_key("a"))
+    storage.set(_key("b"), _value())
+    # Overwrite the only entry with the min frequency
+    storage.set(_key("b"), _value())
+    storage.get(_key("b"))
+    storage.get(_key("b"))
+    storage.set(_key("c"), _value())
+    assert storage.get(_key("a")) is None
+    assert _keys(storage, "bc") == ["b", "c"]
+
+
+def test_memory_accounting():
+    length = _item_length("a")
+    storage = MemoryCacheStorage()
+    storage.max_memory = length * 3
+    for text in ["a", "b", "c", "d"]:
+        storage.set(_key(text), _value())
+    assert len(storage) == 3
+    assert storage.current_memory_usage == length * 3
+    assert storage.metrics.evictions == 1
+
+    # Overwrite with a smaller value
+    storage.set(_key("d"), _value(dim=2))
+    assert storage.current_memory_usage == length * 2 + _item_length("d", dim=2)
+    assert len(storage) == 3
+    # Overwrite with a larger value, evict the least recently used one
+    storage.set(_key("d"), _value(dim=8))
+    assert storage.current_memory_usage == length + _item_length("d", dim=8)
+    assert _keys(storage, "cd") == ["c", "d"]
+    assert storage.metrics.evictions == 2
+
+    storage.clear()
+    assert len(storage) == 0
+    assert storage.current_memory_usage == 0
+
+
+def test_skip_too_large_item():
+    storage = MemoryCacheStorage()
+    storage.max_memory = _item_length("a") * 2
+    storage.set(_key("a"), _value())
+    storage.set(_key("b"), _value(dim=64))
+    assert _keys(storage, "ab") == ["a"]
+
+
+def test_ttl():
+    storage = MemoryCacheStorage(ttl_seconds=0.05)
+    storage.set(_key("a"), _value())
+    storage.set(_key("b"), _value())
+    assert storage.exists(_key("a"))
+    time.sleep(0.1)
+    # Expired lazily on read
+    assert storage.get(_key("a")) is None
+    # Expired on write
+    storage.set(_key("c"), _value())
+    assert len(storage) == 1
+    assert storage.current_memory_usage == _item_length("c")
+    assert storage.metrics.expirations == 2
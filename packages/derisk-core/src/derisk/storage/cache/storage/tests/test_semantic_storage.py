@@ -0,0 +1,206 @@
+import re
+import time
+from typing import List
+
+import pytest
+
+from derisk.component import SystemApp
+from derisk.core import (
+    Embeddings,
+    ModelMessage,
+    ModelMessageRoleType,
+    ModelOutput,
+    ModelRequest,
+)
+from derisk.core.interface.cache import CacheConfig, CachePolicy, RetrievalPolicy
+from derisk.util.serialization.json_serialization import JsonSerializer
+
+from ...llm_cache import LLMCacheClient, LLMCacheKey, LLMCacheValue
+from ...manager import LocalCacheManager
+from ...operators import _parse_cache_key_dict
+from ..semantic.semantic_storage import SemanticCacheStorage
+
+_VOCAB = ["weather", "today", "beijing", "how", "is", "the", "what", "python"]
+
+
+class BagOfWordsEmbeddings(Embeddings):
+    """Count the words of a small vocabulary, good enough for tests."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self.embed_query(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        self.calls += 1
+        words = re.findall(r"\w+", text.lower())
+        return [float(words.count(w)) for w in _VOCAB] + [0.01]
+
+
+def _key(prompt: str, model_name: str = "test_model", temperature: float = 0.7):
+    key = LLMCacheKey(prompt=prompt, model_name=model_name, temperature=temperature)
+    key.set_serializer(JsonSerializer())
+    return key
+
+
+def _request_key(
+    question: str,
+    system_prompt: str = "",
+    history: List[str] = (),
+    max_new_tokens: int = 1024,
+):
+    messages = []
+    if system_prompt:
+        messages.append(
+            ModelMessage(role=ModelMessageRoleType.SYSTEM, content=system_prompt)
+        )
+    for i, content in enumerate(history):
+        role = ModelMessageRoleType.HUMAN if i % 2 == 0 else ModelMessageRoleType.AI
+        messages.append(ModelMessage(role=role, content=content))
+    messages.append(ModelMessage.build_human_message(question))
+    request = ModelRequest(
+        model="test_model", messages=messages, max_new_tokens=max_new_tokens
+    )
+    key = LLMCacheKey(**_parse_cache_key_dict(request))
+    key.set_serializer(JsonSerializer())
+    return key
+
+
+def _value(text: str):
+    value = LLMCacheValue(output=ModelOutput(text=text, error_code=0).to_dict())
+    value.set_serializer(JsonSerializer())
+    return value
+
+
+@pytest.fixture
+def embeddings():
+    return BagOfWordsEmbeddings()
+
+
+@pytest.fixture
+def storage(embeddings):
+    return SemanticCacheStorage(embeddings, similarity_threshold=0.8)
+
+
+def test_similar_hit(storage, embeddings):
+    key = _key("How is the weather today in Beijing")
+    assert storage.get(key) is None
+    storage.set(key, _value("Sunny"))
+    # The embedding of the missed prompt is reused
+    assert embeddings.calls == 1
+
+    assert storage.get(key).value_data == _value("Sunny").serialize()
+    item = storage.get(_key("what is the weather in Beijing today"))
+    assert item.value_data == _value("Sunny").serialize()
+    assert storage.get(_key("what is python")) is None
+
+    metrics = storage.metrics
+    assert metrics.exact_hits == 1
+    assert metrics.similar_hits == 1
+    assert metrics.misses == 2
+    assert metrics.to_dict()["hit_rate"] == 0.5
+
+
+def test_scope(storage):
+    storage.set(_key("How is the weather today"), _value("Sunny"))
+    assert storage.get(_key("how is the weather today?")) is not None
+    assert storage.get(_key("how is the weather today?", temperature=0.1)) is None
+    assert storage.get(_key("how is the weather today?", model_name="other")) is None
+
+
+def test_shared_system_prompt(storage, embeddings):
+    system_prompt = "You answer what is asked, how the weather is today. " * 50
+    storage.set(
+        _request_key("How is the weather today in Beijing", system_prompt),
+        _value("Sunny"),
+    )
+    # Only the question is embedded, the long system prompt doesn't make the
+    # different questions similar
+    assert storage.get(_request_key("what is python", system_prompt)) is None
+    assert (
+        storage.get(_request_key("what is the weather in Beijing today", system_prompt))
+        is not None
+    )
+    assert embeddings.calls == 3
+
+
+def test_context_and_max_new_tokens_scope(storage):
+    storage.set(
+        _request_key("How is the weather today", "system", history=["hi", "hello"]),
+        _value("Sunny"),
+    )
+    question = "how is the weather today?"
+    assert storage.get(_request_key(question, "system", ["hi", "hello"])) is not None
+    # Another system prompt or history
+    assert storage.get(_request_key(question, "other", ["hi", "hello"])) is None
+    assert storage.get(_request_key(question, "system", ["hi", "hey"])) is None
+    assert storage.get(_request_key(question, "system")) is None
+    # A truncated answer is not served to a longer max_new_tokens
+    assert (
+        storage.get(
+            _request_key(question, "system", ["hi", "hello"], max_new_tokens=4096)
+        )
+        is None
+    )
+
+
+def test_exact_match_policy(storage):
+    storage.set(_key("How is the weather today"), _value("Sunny"))
+    cache_config = CacheConfig(retrieval_policy=RetrievalPolicy.EXACT_MATCH)
+    assert storage.get(_key("how is the weather today?"), cache_config) is None
+    cache_config = CacheConfig(retrieval_policy=RetrievalPolicy.SIMILARITY_MATCH)
+    assert storage.get(_key("how is the weather today?"), cache_config) is not None
+
+
+def test_ttl(embeddings):
+    storage = SemanticCacheStorage(embeddings, ttl_seconds=0.05)
+    storage.set(_key("How is the weather today"), _value("Sunny"))
+    assert storage.get(_key("How is the weather today")) is not None
+    time.sleep(0.06)
+    assert storage.get(_key("How is the weather today")) is None
+    assert storage.get(_key("how is the weather today?")) is None
+    assert len(storage) == 0
+    assert storage.metrics.expirations == 1
+
+
+@pytest.mark.parametrize(
+    "cache_policy, evicted",
+    [(CachePolicy.LRU, "what is python"), (CachePolicy.FIFO, "the weather")],
+)
+def test_evict(embeddings, cache_policy, evicted):
+    storage = SemanticCacheStorage(embeddings, max_entries=2)
+    cache_config = CacheConfig(
+        retrieval_policy=RetrievalPolicy.SIMILARITY_MATCH, cache_policy=cache_policy
+    )
+    storage.set(_key("the weather"), _value("Sunny"), cache_config)
+    storage.set(_key("what is python"), _value("A language"), cache_config)
+    # Access the first one
+    assert storage.get(_key("the weather"), cache_config) is not None
+    storage.set(_key("beijing"), _value("A city"), cache_config)
+
+    assert len(storage) == 2
+    assert storage.metrics.evictions == 1
+    assert storage.get(_key(evicted), cache_config) is None
+
+
+@pytest.mark.asyncio
+async def test_cache_manager(embeddings):
+    storage = SemanticCacheStorage(embeddings)
+    cache_manager = LocalCacheManager(
+        SystemApp(), serializer=JsonSerializer(), storage=storage
+    )
+    client = LLMCacheClient(cache_manager)
+    key = client.new_key(prompt="How is the weather today", model_name="test_model")
+    assert await client.get(key) is None
+    output = ModelOutput(text="Sunny", error_code=0).to_dict()
+    await client.set(key, client.new_value(output=output))
+
+    similar_key = client.new_key(
+        prompt="how is the weather today?", model_name="test_model"
+    )
+    value = await client.get(similar_key)
+    assert value is not None
+    assert value.to_dict() == client.new_value(output=output).to_dict()
+    # One for the missed key (reused by set), one for the similar key
+    assert embeddings.calls == 2
@@ -1,5 +1,3 @@
-from derisk.util.memory_utils import _get_object_bytes
-
 from ..base import StorageItem
 
 
@@ -12,9 +10,7 @@ def test_build_from():
     assert item.key_hash == key_hash
     assert item.key_data == key_data
     assert item.value_data == value_data
-    assert item.length == 32 + _get_object_bytes(key_hash) + _get_object_bytes(
-        key_data
-    ) + _get_object_bytes(value_data)
+    assert item.length == 32 + len(key_hash) + len(key_data) + len(value_data)
 
 
 def test_build_from_kv():
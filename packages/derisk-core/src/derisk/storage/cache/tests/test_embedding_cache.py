@@ -0,0 +1,117 @@
+from typing import List
+
+import pytest
+
+from derisk.component import SystemApp
+from derisk.core import Embeddings
+
+from ..embedding_cache import CachedEmbeddings, EmbeddingCacheKey
+from ..manager import CacheManager, initialize_cache
+from ..storage.base import MemoryCacheStorage
+
+
+class CountEmbeddings(Embeddings):
+    def __init__(self):
+        self.calls: List[List[str]] = []
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        self.calls.append(list(texts))
+        return [[float(len(text)), 0.5] for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        self.calls.append([text])
+        return [float(len(text)), -0.5]
+
+
+@pytest.fixture
+def upstream():
+    return CountEmbeddings()
+
+
+@pytest.fixture
+def embeddings(upstream):
+    return CachedEmbeddings(upstream, MemoryCacheStorage(), model_name="test_model")
+
+
+def test_key():
+    key = EmbeddingCacheKey("model_a", "hello")
+    assert key == EmbeddingCacheKey("model_a", "hello")
+    assert hash(key) == hash(EmbeddingCacheKey("model_a", "hello"))
+    assert (
+        key.get_hash_bytes() != EmbeddingCacheKey("model_b", "hello").get_hash_bytes()
+    )
+    assert key != EmbeddingCacheKey("model_a", "hello", kind="query")
+    assert "hello" not in key.serialize().decode()
+
+
+def test_embed_documents(embeddings, upstream):
+    assert embeddings.embed_documents(["a", "bb", "a"]) == [
+        [1.0, 0.5],
+        [2.0, 0.5],
+        [1.0, 0.5],
+    ]
+    # The duplicate texts are embedded once
+    assert upstream.calls == [["a", "bb"]]
+
+    assert embeddings.embed_documents(["bb", "ccc", "a", "dddd"]) == [
+        [2.0, 0.5],
+        [3.0, 0.5],
+        [1.0, 0.5],
+        [4.0, 0.5],
+    ]
+    # Only the misses are embedded, in one call
+    assert upstream.calls[1:] == [["ccc", "dddd"]]
+
+    assert embeddings.embed_documents(["a", "bb", "ccc"]) == [
+        [1.0, 0.5],
+        [2.0, 0.5],
+        [3.0, 0.5],
+    ]
+    assert len(upstream.calls) == 2
+    assert embeddings.get_stats() == {"hits": 6, "misses": 4, "hit_ratio": 0.6}
+
+
+def test_embed_query(embeddings, upstream):
+    embeddings.embed_documents(["a"])
+    # The query is cached separately
+    assert embeddings.embed_query("a") == [1.0, -0.5]
+    assert embeddings.embed_query("a") == [1.0, -0.5]
+    assert upstream.calls == [["a"], ["a"]]
+
+
+@pytest.mark.asyncio
+async def test_async_embed(embeddings, upstream):
+    assert await embeddings.aembed_documents(["a", "bb"]) == [[1.0, 0.5], [2.0, 0.5]]
+    assert await embeddings.aembed_documents(["bb", "a"]) == [[2.0, 0.5], [1.0, 0.5]]
+    assert await embeddings.aembed_query("a") == [1.0, -0.5]
+    assert await embeddings.aembed_query("a") == [1.0, -0.5]
+    assert len(upstream.calls) == 2
+
+
+def test_share_storage_between_models(upstream):
+    storage = MemoryCacheStorage()
+    model_a = CachedEmbeddings(upstream, storage, model_name="model_a")
+    model_b = CachedEmbeddings(upstream, storage, model_name="model_b")
+    model_a.embed_documents(["a"])
+    model_b.embed_documents(["a"])
+    assert upstream.calls == [["a"], ["a"]]
+
+
+@pytest.mark.parametrize(
+    "enable_embedding_cache, storage_type",
+    [(True, "memory"), (False, "memory")],
+)
+def test_cache_manager_wrap_embeddings(
+    upstream, enable_embedding_cache, storage_type, tmp_path
+):
+    system_app = SystemApp()
+    initialize_cache(
+        system_app,
+        storage_type,
+        16,
+        str(tmp_path),
+        enable_embedding_cache=enable_embedding_cache,
+    )
+    cache_manager = CacheManager.get_instance(system_app)
+    embeddings = cache_manager.wrap_embeddings(upstream, "test_model")
+    assert isinstance(embeddings, CachedEmbeddings) == enable_embedding_cache
@@ -1,8 +1,9 @@
 """Adapter for chat history storage."""
 
 import json
-from typing import Dict, List, Optional, Type
+from typing import Dict, List, Optional, Set, Type
 
+from sqlalchemy import and_, or_
 from sqlalchemy.orm import Session
 
 from derisk.core.interface.message import (
@@ -86,6 +87,20 @@ class DBStorageConversationItemAdapter(
             ChatHistoryEntity.conv_uid == resource_id.conv_uid
         )
 
+    def get_query_for_identifiers(
+        self,
+        storage_format: Type[ChatHistoryEntity],
+        resource_ids: List[ConversationIdentifier],  # type: ignore
+        **kwargs,
+    ):
+        """Get query for identifiers."""
+        session: Optional[Session] = kwargs.get("session")
+        if session is None:
+            raise Exception("session is None")
+        return session.query(ChatHistoryEntity).filter(
+            ChatHistoryEntity.conv_uid.in_({r.conv_uid for r in resource_ids})
+        )
+
 
 class DBMessageStorageItemAdapter(
     StorageItemAdapter[MessageStorageItem, ChatHistoryMessageEntity]
@@ -133,6 +148,33 @@ class DBMessageStorageItemAdapter(
             ChatHistoryMessageEntity.index == resource_id.index,
         )
 
+    def get_query_for_identifiers(
+        self,
+        storage_format: Type[ChatHistoryMessageEntity],
+        resource_ids: List[MessageIdentifier],  # type: ignore
+        **kwargs,
+    ):
+        """Get query for identifiers, the messages are grouped by conversation."""
+        session: Optional[Session] = kwargs.get("session")
+        if session is None:
+            raise Exception("session is None")
+        indexes_by_conv: Dict[str, Set[int]] = {}
+        for resource_id in resource_ids:
+            indexes_by_conv.setdefault(resource_id.conv_uid, set()).add(
+                resource_id.index
+            )
+        return session.query(ChatHistoryMessageEntity).filter(
+            or_(
+                *[
+                    and_(
+                        ChatHistoryMessageEntity.conv_uid == conv_uid,
+                        ChatHistoryMessageEntity.index.in_(indexes),
+                    )
+                    for conv_uid, indexes in indexes_by_conv.items()
+                ]
+            )
+        )
+
 
 def _parse_old_conversations(old_conversations: List[Dict]) -> List[BaseMessage]:
     old_messages_dict = []
@@ -1,8 +1,15 @@
+import re
 from typing import List
 
 import pytest
+from sqlalchemy import event
 
-from derisk.core.interface.message import AIMessage, HumanMessage, StorageConversation
+from derisk.core.interface.message import (
+    AIMessage,
+    HumanMessage,
+    MessageStorageItem,
+    StorageConversation,
+)
 from derisk.core.interface.storage import QuerySpec
 from derisk.storage.chat_history.chat_history_db import (
     ChatHistoryEntity,
@@ -218,3 +225,56 @@ def test_query_with_page(
     assert page_result.page_size == 2
     assert len(page_result.items) == 2
     assert page_result.items[0].conv_uid == "conv0"
+
+
+@pytest.fixture
+def statements(db_manager):
+    """Record the statements of the message table."""
+    result = []
+
+    def _record(conn, cursor, statement, parameters, context, executemany):
+        if re.search(r"\b(FROM|INTO|UPDATE) chat_history_message\b", statement):
+            result.append(statement.split()[0].upper())
+
+    event.listen(db_manager.engine, "before_cursor_execute", _record)
+    yield result
+    event.remove(db_manager.engine, "before_cursor_execute", _record)
+
+
+def test_load_messages_in_bulk(
+    four_round_conversation: StorageConversation,
+    conv_storage,
+    message_storage,
+    statements: List[str],
+):
+    saved_conversation = StorageConversation(
+        conv_uid=four_round_conversation.conv_uid,
+        conv_storage=conv_storage,
+        message_storage=message_storage,
+    )
+    assert [m.content for m in saved_conversation.messages] == [
+        m.content for m in four_round_conversation.messages
+    ]
+    assert statements == ["SELECT"]
+
+
+def test_message_list_in_bulk(
+    four_round_conversation: StorageConversation,
+    message_storage,
+    statements: List[str],
+):
+    items = four_round_conversation._get_message_items()
+    ids = [item.identifier for item in items]
+    # Load in the order of the ids, skip the nonexistent ones
+    other_id = MessageStorageItem("other_conv", 0, {}).identifier
+    loaded = message_storage.load_list([other_id] + ids[::-1], MessageStorageItem)
+    assert [item.index for item in loaded] == [item.index for item in items][::-1]
+
+    items[0].message_detail["data"]["content"] = "updated"
+    message_storage.save_or_update_list(items[:1])
+    loaded = message_storage.load(ids[0], MessageStorageItem)
+    assert loaded.message_detail["data"]["content"] == "updated"
+
+    message_storage.delete_list(ids[:4])
+    assert len(message_storage.load_list(ids, MessageStorageItem)) == 4
+    assert statements.count("DELETE") == 1
@@ -3,16 +3,25 @@
 import logging
 from abc import abstractmethod
 from concurrent.futures import Executor
+from dataclasses import dataclass
 from typing import List, Optional
 
 from derisk.core import Chunk
-from derisk.storage.base import IndexStoreBase
+from derisk.storage.base import IndexStoreBase, IndexStoreConfig
 from derisk.storage.vector_store.filters import MetadataFilters
+from derisk.util import RegisterParameters
 from derisk.util.executor_utils import blocking_func_to_async
 
 logger = logging.getLogger(__name__)
 
 
+@dataclass
+class FullTextConfig(IndexStoreConfig, RegisterParameters):
+    """Full text store config."""
+
+    __cfg_type__ = "full_text"
+
+
 class FullTextStoreBase(IndexStoreBase):
     """Graph store base class."""
 
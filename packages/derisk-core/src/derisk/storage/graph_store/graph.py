@@ -5,7 +5,7 @@ import json
 import logging
 import re
 from abc import ABC, abstractmethod
-from collections import defaultdict
+from array import array
 from enum import Enum
 from typing import Any, Callable, Dict, Iterator, List, Optional, Set, Tuple
 
@@ -282,8 +282,87 @@ class Graph(ABC):
         """Truncate graph."""
 
 
+class _Adjacency:
+    """The adjacency of the vertices, a CSR snapshot and a buffer of the appends.
+
+    The edge ids of vertex ``v`` in the snapshot are
+    ``eids[offsets[v]:offsets[v + 1]]``, the edges appended after the snapshot are
+    kept in the delta buffer until the next rebuild.
+    """
+
+    def __init__(self):
+        self._offsets = array("q", [0])
+        self._eids = array("q")
+        self._delta: Dict[int, List[int]] = {}
+        self.delta_count = 0
+
+    def add(self, vidx: int, eid: int):
+        self._delta.setdefault(vidx, []).append(eid)
+        self.delta_count += 1
+
+    def neighbors(self, vidx: int) -> List[int]:
+        """Return the edge ids of the vertex, in the order of appending."""
+        eids = (
+            self._eids[self._offsets[vidx] : self._offsets[vidx + 1]].tolist()
+            if vidx + 1 < len(self._offsets)
+            else []
+        )
+        delta = self._delta.get(vidx)
+        if delta:
+            eids.extend(delta)
+        return eids
+
+    def rebuild(self, keys: array, alive: bytearray, num_vertices: int):
+        """Rebuild the snapshot with a counting sort of the alive edges by keys."""
+        counts = [0] * (num_vertices + 1)
+        for eid, vidx in enumerate(keys):
+            if alive[eid]:
+                counts[vidx + 1] += 1
+        offsets = array("q", itertools.accumulate(counts))
+        positions = offsets.tolist()
+        eids = array("q", bytes(8 * offsets[-1]))
+        for eid, vidx in enumerate(keys):
+            if alive[eid]:
+                eids[positions[vidx]] = eid
+                positions[vidx] += 1
+        self._offsets = offsets
+        self._eids = eids
+        self._delta.clear()
+        self.delta_count = 0
+
+
+class _ImplicitVertex(IdVertex):
+    """A vertex without properties, stored in the graph when a prop is set."""
+
+    def __init__(self, graph: "MemoryGraph", idx: int):
+        super().__init__(graph._vids[idx])
+        self._graph = graph
+        self._idx = idx
+
+    def set_prop(self, key: str, value: Any):
+        """Set a property, the vertex is stored in the graph on the first one."""
+        vertices = self._graph._vertices
+        if vertices[self._idx] is None:
+            vertices[self._idx] = self
+        stored = vertices[self._idx]
+        if stored is self:
+            super().set_prop(key, value)
+        else:
+            stored.set_prop(key, value)
+
+
 class MemoryGraph(Graph):
-    """Graph class."""
+    """Graph class.
+
+    The vertex ids and the edge labels are interned to integers. The edges are
+    stored in arrays and indexed by the CSR adjacency of both directions, the
+    snapshot of the adjacency is rebuilt lazily when many edges are appended or
+    deleted. The vertices without properties are not stored as objects.
+    """
+
+    # Rebuild the adjacency when the changed edges exceed the ratio of the edges
+    _REBUILD_RATIO = 0.25
+    _MIN_REBUILD_EDGES = 1024
 
     def __init__(self):
         """Initialize MemoryGraph with vertex label and edge label."""
@@ -291,16 +370,35 @@ class MemoryGraph(Graph):
         self._vertex_prop_keys = set()
         self._edge_prop_keys = set()
         self._edge_count = 0
-
-        # vertices index, out edges index, in edges index
-        self._vs: Any = defaultdict()
-        self._oes: Any = defaultdict(lambda: defaultdict(set))
-        self._ies: Any = defaultdict(lambda: defaultdict(set))
+        self._init_index()
+
+    def _init_index(self):
+        # interned vertex ids, None for the vertices without properties
+        self._vid_idx: Dict[str, int] = {}
+        self._vids: List[str] = []
+        self._vertices: List[Optional[Vertex]] = []
+
+        # interned edge labels
+        self._label_idx: Dict[str, int] = {}
+        self._labels: List[str] = []
+
+        # edges, indexed by edge id
+        self._edge_src = array("q")
+        self._edge_dst = array("q")
+        self._edge_label = array("q")
+        self._edge_props: List[Optional[Dict[str, Any]]] = []
+        self._edge_alive = bytearray()
+        self._edge_keys: Dict[int, int] = {}
+        self._dead_count = 0
+
+        # out edges index, in edges index
+        self._oes = _Adjacency()
+        self._ies = _Adjacency()
 
     @property
     def vertex_count(self):
         """Return the number of vertices in the graph."""
-        return len(self._vs)
+        return len(self._vid_idx)
 
     @property
     def edge_count(self):
@@ -309,32 +407,58 @@ class MemoryGraph(Graph):
 
     def upsert_vertex(self, vertex: Vertex):
         """Insert or update a vertex based on its ID."""
-        if vertex.vid in self._vs:
-            if isinstance(self._vs[vertex.vid], IdVertex):
-                self._vs[vertex.vid] = vertex
-            else:
-                self._vs[vertex.vid].props.update(vertex.props)
+        idx = self._vid_idx.get(vertex.vid)
+        if idx is None:
+            idx = self._intern_vertex(vertex.vid)
+        stored = self._vertices[idx]
+        if isinstance(vertex, IdVertex):
+            pass
+        elif stored is None:
+            self._vertices[idx] = vertex
+        elif isinstance(stored, IdVertex):
+            # Replace the implicit vertex whose props were set
+            self._vertices[idx] = vertex
+            for k, v in stored.props.items():
+                vertex.props.setdefault(k, v)
         else:
-            self._vs[vertex.vid] = vertex
+            stored.props.update(vertex.props)
 
         # update metadata
         self._vertex_prop_keys.update(vertex.props.keys())
 
     def append_edge(self, edge: Edge) -> bool:
         """Append an edge if it doesn't exist; requires edge label."""
-        sid = edge.sid
-        tid = edge.tid
-
-        if edge in self._oes[sid][tid]:
-            return False
+        src = self._vid_idx.get(edge.sid)
+        dst = self._vid_idx.get(edge.tid)
+        label = self._label_idx.get(edge.name)
+        if src is not None and dst is not None and label is not None:
+            if self._edge_key(src, dst, label) in self._edge_keys:
+                return False
 
         # init vertex index
-        self._vs.setdefault(sid, IdVertex(sid))
-        self._vs.setdefault(tid, IdVertex(tid))
+        if src is None:
+            src = self._intern_vertex(edge.sid)
+        if dst is None:
+            dst = self._vid_idx.get(edge.tid)
+            if dst is None:
+                dst = self._intern_vertex(edge.tid)
+        if label is None:
+            label = len(self._labels)
+            self._label_idx[edge.name] = label
+            self._labels.append(edge.name)
 
         # update edge index
-        self._oes[sid][tid].add(edge)
-        self._ies[tid][sid].add(edge)
+        eid = len(self._edge_alive)
+        self._edge_src.append(src)
+        self._edge_dst.append(dst)
+        self._edge_label.append(label)
+        # Keep the properties of the edge, the changes of the properties of the
+        # edges got from the graph are visible to the graph
+        self._edge_props.append(edge.props)
+        self._edge_alive.append(1)
+        self._edge_keys[self._edge_key(src, dst, label)] = eid
+        self._oes.add(src, eid)
+        self._ies.add(dst, eid)
 
         # update metadata
         self._edge_prop_keys.update(edge.props.keys())
@@ -351,11 +475,11 @@ class MemoryGraph(Graph):
 
     def has_vertex(self, vid: str) -> bool:
         """Retrieve a vertex by ID."""
-        return vid in self._vs
+        return vid in self._vid_idx
 
     def get_vertex(self, vid: str) -> Vertex:
         """Retrieve a vertex by ID."""
-        return self._vs[vid]
+        return self._get_vertex(self._vid_idx[vid])
 
     def get_neighbor_edges(
         self,
@@ -364,42 +488,21 @@ class MemoryGraph(Graph):
         limit: Optional[int] = None,
     ) -> Iterator[Edge]:
         """Get edges connected to a vertex by direction."""
-        if direction == Direction.OUT:
-            es = (e for es in self._oes[vid].values() for e in es)
-
-        elif direction == Direction.IN:
-            es = iter(e for es in self._ies[vid].values() for e in es)
-
-        elif direction == Direction.BOTH:
-            oes = (e for es in self._oes[vid].values() for e in es)
-            ies = (e for es in self._ies[vid].values() for e in es)
-
-            # merge
-            tuples = itertools.zip_longest(oes, ies)
-            es = (e for t in tuples for e in t if e is not None)
-
-            # distinct
-            seen = set()
-
-            # es = (e for e in es if e not in seen and not seen.add(e))
-            def unique_elements(elements):
-                for element in elements:
-                    if element not in seen:
-                        seen.add(element)
-                        yield element
-
-            es = unique_elements(es)
-        else:
+        if direction not in (Direction.OUT, Direction.IN, Direction.BOTH):
             raise ValueError(f"Invalid direction: {direction}")
-
-        return itertools.islice(es, limit) if limit else es
+        idx = self._vid_idx.get(vid)
+        if idx is None:
+            return iter(())
+        eids = self._neighbor_eids(idx, direction, limit)
+        # The edge ids change when the index is rebuilt, build the edges now
+        return iter([self._get_edge(eid) for eid in eids])
 
     def vertices(
         self, filter_fn: Optional[Callable[[Vertex], bool]] = None
     ) -> Iterator[Vertex]:
         """Return vertices."""
         # Get all vertices in the graph
-        all_vertices = self._vs.values()
+        all_vertices = (self._get_vertex(idx) for idx in self._vid_idx.values())
 
         return all_vertices if filter_fn is None else filter(filter_fn, all_vertices)
 
@@ -408,7 +511,9 @@ class MemoryGraph(Graph):
     ) -> Iterator[Edge]:
         """Return edges."""
         # Get all edges in the graph
-        all_edges = (e for nbs in self._oes.values() for es in nbs.values() for e in es)
+        all_edges = (
+            self._get_edge(eid) for eid, alive in enumerate(self._edge_alive) if alive
+        )
 
         if filter_fn is None:
             return all_edges
@@ -418,42 +523,35 @@ class MemoryGraph(Graph):
     def del_vertices(self, *vids: str):
         """Delete specified vertices."""
         for vid in vids:
-            self.del_neighbor_edges(vid, Direction.BOTH)
-            self._vs.pop(vid, None)
+            idx = self._vid_idx.pop(vid, None)
+            if idx is None:
+                continue
+            self._del_eids(self._neighbor_eids(idx, Direction.BOTH))
+            self._vertices[idx] = None
 
     def del_edges(self, sid: str, tid: str, name: str, **props):
         """Delete edges."""
-        old_edge_cnt = len(self._oes[sid][tid])
-
-        def remove_matches(es: Set[Edge]):
-            return set(
-                filter(
-                    lambda e: not (
-                        (name == e.name if name else True) and e.has_props(**props)
-                    ),
-                    es,
-                )
-            )
-
-        self._oes[sid][tid] = remove_matches(self._oes[sid][tid])
-        self._ies[tid][sid] = remove_matches(self._ies[tid][sid])
-
-        self._edge_count -= old_edge_cnt - len(self._oes[sid][tid])
+        src = self._vid_idx.get(sid)
+        dst = self._vid_idx.get(tid)
+        if src is None or dst is None:
+            return
+        label = self._label_idx.get(name) if name else None
+        if name and label is None:
+            return
+        eids = [
+            eid
+            for eid in self._neighbor_eids(src, Direction.OUT)
+            if self._edge_dst[eid] == dst
+            and (label is None or self._edge_label[eid] == label)
+            and all((self._edge_props[eid] or {}).get(k) == v for k, v in props.items())
+        ]
+        self._del_eids(eids)
 
     def del_neighbor_edges(self, vid: str, direction: Direction = Direction.OUT):
         """Delete all neighbor edges."""
-
-        def del_index(idx, i_idx):
-            for nid in idx[vid].keys():
-                self._edge_count -= len(i_idx[nid][vid])
-                i_idx[nid].pop(vid, None)
-            idx.pop(vid, None)
-
-        if direction in [Direction.OUT, Direction.BOTH]:
-            del_index(self._oes, self._ies)
-
-        if direction in [Direction.IN, Direction.BOTH]:
-            del_index(self._ies, self._oes)
+        idx = self._vid_idx.get(vid)
+        if idx is not None:
+            self._del_eids(self._neighbor_eids(idx, direction))
 
     def search(
         self,
@@ -463,51 +561,147 @@ class MemoryGraph(Graph):
         fan: Optional[int] = None,
         limit: Optional[int] = None,
     ) -> "MemoryGraph":
-        """Search the graph from a vertex with specified parameters."""
+        """Search the graph from vertices with a breadth-first search.
+
+        Args:
+            vids (List[str]): The start vertex IDs.
+            direct (Direction): The direction of the edges to follow.
+            depth (Optional[int]): The max number of hops, no limit if None.
+            fan (Optional[int]): The max number of edges to follow of a vertex.
+            limit (Optional[int]): The max number of edges of the subgraph, the
+                edges closer to the start vertices are kept.
+
+        Returns:
+            MemoryGraph: The subgraph of the visited vertices and edges, the
+                vertices on the boundary only have the IDs.
+        """
         subgraph = MemoryGraph()
 
+        frontier = []
+        visited: Set[int] = set()
         for vid in vids:
-            self.__search(vid, direct, depth, fan, limit, 0, set(), subgraph)
+            idx = self._vid_idx.get(vid)
+            if idx is not None and idx not in visited:
+                visited.add(idx)
+                frontier.append(idx)
+
+        hops = 0
+        while frontier and not (depth and hops >= depth):
+            next_frontier = []
+            for idx in frontier:
+                # visit vertex
+                subgraph.upsert_vertex(self._get_vertex(idx))
+
+                # visit edges
+                for eid in self._neighbor_eids(idx, direct, fan):
+                    if limit and subgraph.edge_count >= limit:
+                        return subgraph
+
+                    # append edge success then visit new vertex
+                    if subgraph.append_edge(self._get_edge(eid)):
+                        nidx = self._edge_dst[eid]
+                        if nidx == idx:
+                            nidx = self._edge_src[eid]
+                        if nidx not in visited:
+                            visited.add(nidx)
+                            next_frontier.append(nidx)
+            frontier = next_frontier
+            hops += 1
 
         return subgraph
 
-    def __search(
-        self,
-        vid: str,
-        direct: Direction,
-        depth: Optional[int],
-        fan: Optional[int],
-        limit: Optional[int],
-        _depth: int,
-        _visited: Set,
-        _subgraph: "MemoryGraph",
-    ):
-        if vid in _visited or depth and _depth >= depth:
-            return
-
-        # visit vertex
-        if not self.has_vertex(vid):
+    def _intern_vertex(self, vid: str) -> int:
+        idx = len(self._vids)
+        self._vid_idx[vid] = idx
+        self._vids.append(vid)
+        self._vertices.append(None)
+        return idx
+
+    @staticmethod
+    def _edge_key(src: int, dst: int, label: int) -> int:
+        return (src << 64) | (dst << 32) | label
+
+    def _get_vertex(self, idx: int) -> Vertex:
+        vertex = self._vertices[idx]
+        return vertex if vertex is not None else _ImplicitVertex(self, idx)
+
+    def _get_edge(self, eid: int) -> Edge:
+        edge = Edge(
+            self._vids[self._edge_src[eid]],
+            self._vids[self._edge_dst[eid]],
+            self._labels[self._edge_label[eid]],
+        )
+        # Share the properties like the stored edge
+        edge._props = self._edge_props[eid]
+        return edge
+
+    def _neighbor_eids(
+        self, idx: int, direction: Direction, limit: Optional[int] = None
+    ) -> List[int]:
+        self._maybe_rebuild()
+        alive = self._edge_alive
+        if direction == Direction.OUT:
+            eids = [eid for eid in self._oes.neighbors(idx) if alive[eid]]
+        elif direction == Direction.IN:
+            eids = [eid for eid in self._ies.neighbors(idx) if alive[eid]]
+        else:
+            oes = [eid for eid in self._oes.neighbors(idx) if alive[eid]]
+            # The self loops are out edges too
+            ies = [
+                eid
+                for eid in self._ies.neighbors(idx)
+                if alive[eid] and self._edge_src[eid] != idx
+            ]
+            # merge
+            eids = [
+                eid
+                for pair in itertools.zip_longest(oes, ies)
+                for eid in pair
+                if eid is not None
+            ]
+        return eids[:limit] if limit else eids
+
+    def _del_eids(self, eids: List[int]):
+        for eid in eids:
+            if not self._edge_alive[eid]:
+                continue
+            self._edge_alive[eid] = 0
+            del self._edge_keys[
+                self._edge_key(
+                    self._edge_src[eid], self._edge_dst[eid], self._edge_label[eid]
+                )
+            ]
+            self._edge_props[eid] = None
+            self._edge_count -= 1
+            self._dead_count += 1
+
+    def _maybe_rebuild(self):
+        changed = self._oes.delta_count + self._dead_count
+        if changed <= max(
+            self._MIN_REBUILD_EDGES, self._edge_count * self._REBUILD_RATIO
+        ):
             return
-        _subgraph.upsert_vertex(self.get_vertex(vid))
-        _visited.add(vid)
-
-        # visit edges
-        nids = set()
-        for edge in self.get_neighbor_edges(vid, direct, fan):
-            if limit and _subgraph.edge_count >= limit:
-                return
-
-            # append edge success then visit new vertex
-            if _subgraph.append_edge(edge):
-                nid = edge.nid(vid)
-                if nid not in _visited:
-                    nids.add(nid)
-
-        # next hop
-        for nid in nids:
-            self.__search(
-                nid, direct, depth, fan, limit, _depth + 1, _visited, _subgraph
+        if self._dead_count:
+            self._drop_dead_edges()
+        num_vertices = len(self._vids)
+        self._oes.rebuild(self._edge_src, self._edge_alive, num_vertices)
+        self._ies.rebuild(self._edge_dst, self._edge_alive, num_vertices)
+
+    def _drop_dead_edges(self):
+        """Renumber the alive edges."""
+        keep = [eid for eid, alive in enumerate(self._edge_alive) if alive]
+        self._edge_src = array("q", (self._edge_src[eid] for eid in keep))
+        self._edge_dst = array("q", (self._edge_dst[eid] for eid in keep))
+        self._edge_label = array("q", (self._edge_label[eid] for eid in keep))
+        self._edge_props = [self._edge_props[eid] for eid in keep]
+        self._edge_alive = bytearray(b"\x01" * len(keep))
+        self._edge_keys = {
+            self._edge_key(src, dst, label): eid
+            for eid, (src, dst, label) in enumerate(
+                zip(self._edge_src, self._edge_dst, self._edge_label)
             )
+        }
+        self._dead_count = 0
 
     def schema(self) -> Dict[str, Any]:
         """Return schema."""
@@ -550,9 +744,7 @@ class MemoryGraph(Graph):
         self._edge_count = 0
 
         # clean data and index
-        self._vs.clear()
-        self._oes.clear()
-        self._ies.clear()
+        self._init_index()
 
     def graphviz(self, name="g"):
         """View graphviz graph: https://dreampuf.github.io/GraphvizOnline."""
@@ -20,9 +20,14 @@ class MemoryGraphStore(GraphStoreBase):
 
     def __init__(self, graph_store_config: MemoryGraphStoreConfig):
         """Initialize MemoryGraphStore with a memory graph."""
+        super().__init__(graph_store_config)
         self._graph_store_config = graph_store_config
         self._graph = MemoryGraph()
 
     def get_config(self):
         """Get the graph store config."""
         return self._graph_store_config
+
+    def is_exist(self, name) -> bool:
+        """Check Graph Name is Exist."""
+        return name == self._graph_store_config.name
@@ -0,0 +1,196 @@
+import pytest
+
+from ..graph import Direction, Edge, IdVertex, MemoryGraph, Vertex
+
+
+@pytest.fixture
+def g():
+    g = MemoryGraph()
+    g.append_edge(Edge("A", "A", "0"))
+    g.append_edge(Edge("A", "A", "1"))
+    g.append_edge(Edge("A", "B", "2"))
+    g.append_edge(Edge("B", "C", "3"))
+    g.append_edge(Edge("B", "D", "4"))
+    g.append_edge(Edge("C", "D", "5"))
+    g.append_edge(Edge("B", "E", "6"))
+    g.append_edge(Edge("F", "E", "7"))
+    g.append_edge(Edge("E", "F", "8"))
+    g.upsert_vertex(Vertex("G"))
+    return g
+
+
+@pytest.fixture(params=[True, False])
+def rebuilt(request, g):
+    """Run the tests with the edges in the snapshot and in the delta buffer."""
+    if request.param:
+        g._MIN_REBUILD_EDGES = 0
+    return g
+
+
+def _triplets(graph):
+    return sorted(e.triplet() for e in graph.edges())
+
+
+@pytest.mark.parametrize(
+    "action, vc, ec",
+    [
+        (lambda g: g.del_vertices("A"), 6, 6),
+        (lambda g: g.del_vertices("B"), 6, 5),
+        (lambda g: g.del_vertices("A", "B"), 5, 3),
+        (lambda g: g.del_vertices("A", "B", "C"), 4, 2),
+        (lambda g: g.del_vertices("A", "B", "C", "D"), 3, 2),
+        (lambda g: g.del_vertices("A", "B", "C", "D", "E"), 2, 0),
+        (lambda g: g.del_vertices("A", "B", "C", "D", "E", "F"), 1, 0),
+        (lambda g: g.del_vertices("A", "B", "C", "D", "E", "F", "G"), 0, 0),
+        (lambda g: g.del_edges("A", "A", None), 7, 7),
+        (lambda g: g.del_edges("A", "B", None), 7, 8),
+        (lambda g: g.del_edges("A", "A", "0"), 7, 8),
+        (lambda g: g.del_edges("E", "F", "8"), 7, 8),
+        (lambda g: g.del_edges("E", "F", "9"), 7, 9),
+        (lambda g: g.del_neighbor_edges("A", Direction.IN), 7, 7),
+        (lambda g: g.del_neighbor_edges("A", Direction.OUT), 7, 6),
+        (lambda g: g.del_neighbor_edges("A", Direction.BOTH), 7, 6),
+        (lambda g: g.del_neighbor_edges("E", Direction.BOTH), 7, 6),
+    ],
+)
+def test_delete(rebuilt, action, vc, ec):
+    action(rebuilt)
+    rebuilt._maybe_rebuild()
+    assert rebuilt.vertex_count == vc
+    assert rebuilt.edge_count == ec
+    assert len(list(rebuilt.edges())) == ec
+
+
+def test_append_duplicate_edge(g):
+    assert not g.append_edge(Edge("A", "B", "2"))
+    assert g.append_edge(Edge("A", "B", "9"))
+    assert g.edge_count == 10
+
+
+def test_vertex_and_edge_props():
+    g = MemoryGraph()
+    g.append_edge(Edge("A", "B", "knows", weight=1))
+    assert isinstance(g.get_vertex("A"), IdVertex)
+    g.upsert_vertex(Vertex("A", name="Alice", age=20))
+    g.upsert_vertex(Vertex("A", city="Beijing"))
+    g.upsert_vertex(IdVertex("A"))
+    vertex = g.get_vertex("A")
+    assert vertex.name == "Alice"
+    assert vertex.props == {"age": 20, "city": "Beijing"}
+    assert [e.props for e in g.edges()] == [{"weight": 1}]
+    with pytest.raises(KeyError):
+        g.get_vertex("X")
+
+    # The properties are shared with the graph
+    next(g.vertices(lambda v: v.vid == "B")).set_prop("_embedding", [0.5])
+    assert g.get_vertex("B").get_prop("_embedding") == [0.5]
+    for edge in g.edges():
+        edge.set_prop("weight", 1)
+    g.append_edge(Edge("B", "C", "knows"))
+    next(g.get_neighbor_edges("B")).set_prop("weight", 2)
+    assert [e.props for e in g.edges()] == [{"weight": 1}, {"weight": 2}]
+    g.del_edges("B", "C", "knows")
+
+    g.del_edges("A", "B", "knows", weight=2)
+    assert g.edge_count == 1
+    g.del_edges("A", "B", "knows", weight=1)
+    assert g.edge_count == 0
+
+
+def test_implicit_vertices():
+    g = MemoryGraph()
+    g.append_edge(Edge("A", "B", "knows"))
+    g.append_edge(Edge("B", "C", "knows"))
+    # Scanning the vertices doesn't store the implicit ones
+    assert [v.vid for v in g.vertices()] == ["A", "B", "C"]
+    assert g._vertices == [None, None, None]
+
+    # Stored when a prop is set
+    vertex = g.get_vertex("B")
+    vertex.set_prop("_embedding", [0.5])
+    assert g.get_vertex("B").get_prop("_embedding") == [0.5]
+    assert g._vertices.count(None) == 2
+    g.upsert_vertex(Vertex("B", name="Bob", age=20))
+    vertex.set_prop("_embedding", [1.0])
+    stored = g.get_vertex("B")
+    assert stored.name == "Bob"
+    assert stored.props == {"age": 20, "_embedding": [1.0]}
+
+
+@pytest.mark.parametrize(
+    "direction, expected",
+    [
+        (Direction.OUT, [("A", "0", "A"), ("A", "1", "A"), ("A", "2", "B")]),
+        (Direction.IN, [("A", "0", "A"), ("A", "1", "A")]),
+        (Direction.BOTH, [("A", "0", "A"), ("A", "1", "A"), ("A", "2", "B")]),
+    ],
+)
+def test_get_neighbor_edges(rebuilt, direction, expected):
+    rebuilt._maybe_rebuild()
+    edges = rebuilt.get_neighbor_edges("A", direction)
+    assert sorted(e.triplet() for e in edges) == expected
+    assert len(list(rebuilt.get_neighbor_edges("A", direction, limit=1))) == 1
+    assert list(rebuilt.get_neighbor_edges("X", direction)) == []
+
+
+def test_search(rebuilt):
+    rebuilt._maybe_rebuild()
+    subgraph = rebuilt.search(["B"], Direction.OUT, depth=1)
+    assert _triplets(subgraph) == [("B", "3", "C"), ("B", "4", "D"), ("B", "6", "E")]
+
+    subgraph = rebuilt.search(["B"], Direction.OUT, depth=2)
+    assert subgraph.edge_count == 5
+
+    subgraph = rebuilt.search(["B"], Direction.BOTH)
+    assert subgraph.edge_count == 9
+    assert subgraph.vertex_count == 6
+
+    subgraph = rebuilt.search(["B"], Direction.OUT, fan=1)
+    assert _triplets(subgraph) == [("B", "3", "C"), ("C", "5", "D")]
+
+    assert rebuilt.search(["X"]).vertex_count == 0
+
+
+def test_search_limit_keeps_closest_edges():
+    g = MemoryGraph()
+    # A long chain from "0" and a star around "0"
+    for i in range(5):
+        g.append_edge(Edge(str(i), str(i + 1), "next"))
+    for i in range(3):
+        g.append_edge(Edge("0", f"leaf_{i}", "leaf"))
+    subgraph = g.search(["0"], Direction.OUT, limit=4)
+    assert _triplets(subgraph) == [
+        ("0", "leaf", "leaf_0"),
+        ("0", "leaf", "leaf_1"),
+        ("0", "leaf", "leaf_2"),
+        ("0", "next", "1"),
+    ]
+
+
+def test_search_deep_graph():
+    g = MemoryGraph()
+    num = 5000
+    for i in range(num):
+        g.append_edge(Edge(str(i), str(i + 1), "next"))
+    # The recursive search exceeds the recursion limit
+    assert g.search(["0"], Direction.OUT).edge_count == num
+
+
+def test_rebuild_after_delete():
+    g = MemoryGraph()
+    g._MIN_REBUILD_EDGES = 2
+    for i in range(10):
+        g.append_edge(Edge("A", str(i), "to"))
+    g.del_vertices(*[str(i) for i in range(0, 10, 2)])
+    g.append_edge(Edge("A", "0", "to"))
+    assert [e.tid for e in g.get_neighbor_edges("A")] == ["1", "3", "5", "7", "9", "0"]
+    assert g.edge_count == 6
+    assert not g.append_edge(Edge("A", "3", "to"))
+
+
+def test_truncate(g):
+    g.truncate()
+    assert g.vertex_count == 0
+    assert g.edge_count == 0
+    assert list(g.edges()) == []
+    assert g.schema()["schema"][0]["properties"] == []
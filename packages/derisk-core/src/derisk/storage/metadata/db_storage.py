@@ -1,7 +1,7 @@
 """Database storage implementation using SQLAlchemy."""
 
 from contextlib import contextmanager
-from typing import Dict, Iterator, List, Optional, Type, Union
+from typing import Any, Dict, Iterator, List, Optional, Type, Union
 
 from sqlalchemy import URL, inspect
 from sqlalchemy.orm import DeclarativeMeta, Session
@@ -48,6 +48,7 @@ class SQLAlchemyStorage(StorageInterface[T, BaseModel]):
             db_url_or_db, engine_args, base, query_class
         )
         self._model_class = model_class
+        self._batch_size = 500
 
     @contextmanager
     def session(self) -> Iterator[Session]:
@@ -89,6 +90,51 @@ class SQLAlchemyStorage(StorageInterface[T, BaseModel]):
                 return
         self.save(data)
 
+    def save_list(self, data: List[T]) -> None:
+        """Save a list of data to the storage in one transaction."""
+        if not data:
+            return
+        with self.session() as session:
+            for i in range(0, len(data), self._batch_size):
+                session.add_all(
+                    [
+                        self.adapter.to_storage_format(d)
+                        for d in data[i : i + self._batch_size]
+                    ]
+                )
+                session.flush()
+
+    def save_or_update_list(self, data: List[T]) -> None:
+        """Save or update a list of data, the existing data are loaded in bulk."""
+        if not data:
+            return
+        with self.session() as session:
+            for i in range(0, len(data), self._batch_size):
+                batch = data[i : i + self._batch_size]
+                exists = self._query_for_identifiers(
+                    session, [d.identifier for d in batch]
+                )
+                if exists is None:
+                    # The adapter does not support the bulk query
+                    break
+                exist_models = {
+                    self.adapter.from_storage_format(
+                        model
+                    ).identifier.str_identifier: model
+                    for model in exists.all()
+                }
+                for d in batch:
+                    new_instance = self.adapter.to_storage_format(d)
+                    model_instance = exist_models.get(d.identifier.str_identifier)
+                    if model_instance:
+                        _copy_public_properties(new_instance, model_instance)
+                    else:
+                        session.add(new_instance)
+                session.flush()
+            else:
+                return
+        super().save_or_update_list(data)
+
     def load(self, resource_id: ResourceIdentifier, cls: Type[T]) -> Optional[T]:
         """Load data by identifier from the storage."""
         with self.session() as session:
@@ -100,6 +146,34 @@ class SQLAlchemyStorage(StorageInterface[T, BaseModel]):
                 return self.adapter.from_storage_format(model_instance)
             return None
 
+    def load_list(self, resource_id: List[ResourceIdentifier], cls: Type[T]) -> List[T]:
+        """Load a list of data with one query per batch of identifiers.
+
+        The data are returned in the order of the identifiers, the nonexistent data
+        are skipped.
+        """
+        if not resource_id:
+            return []
+        items: Dict[str, T] = {}
+        with self.session() as session:
+            for i in range(0, len(resource_id), self._batch_size):
+                query = self._query_for_identifiers(
+                    session, resource_id[i : i + self._batch_size]
+                )
+                if query is None:
+                    # The adapter does not support the bulk query
+                    break
+                for model_instance in query.all():
+                    item = self.adapter.from_storage_format(model_instance)
+                    items[item.identifier.str_identifier] = item
+            else:
+                return [
+                    items[r.str_identifier]
+                    for r in resource_id
+                    if r.str_identifier in items
+                ]
+        return super().load_list(resource_id, cls)
+
     def delete(self, resource_id: ResourceIdentifier) -> None:
         """Delete data by identifier from the storage."""
         with self.session() as session:
@@ -110,6 +184,32 @@ class SQLAlchemyStorage(StorageInterface[T, BaseModel]):
             if model_instance:
                 session.delete(model_instance)
 
+    def delete_list(self, resource_id: List[ResourceIdentifier]) -> None:
+        """Delete a list of data with one statement per batch of identifiers."""
+        if not resource_id:
+            return
+        with self.session() as session:
+            for i in range(0, len(resource_id), self._batch_size):
+                query = self._query_for_identifiers(
+                    session, resource_id[i : i + self._batch_size]
+                )
+                if query is None:
+                    break
+                query.delete(synchronize_session=False)
+            else:
+                return
+        super().delete_list(resource_id)
+
+    def _query_for_identifiers(
+        self, session: Session, resource_ids: List[ResourceIdentifier]
+    ) -> Optional[Any]:
+        query = self.adapter.get_query_for_identifiers(
+            self._model_class, resource_ids, session=session
+        )
+        if query is None:
+            return None
+        return query.with_session(session)
+
     def query(self, spec: QuerySpec, cls: Type[T]) -> List[T]:
         """Query data from the storage.
 
@@ -107,6 +107,21 @@ def test_delete(sqlalchemy_storage):
     assert sqlalchemy_storage.load(resource_id, MockStorageItem) is None
 
 
+def test_list_without_bulk_query(sqlalchemy_storage):
+    # The adapter has no bulk query, the items are handled one by one
+    items = [MockStorageItem(MockResourceIdentifier(str(i)), f"d{i}") for i in range(3)]
+    sqlalchemy_storage.save_list(items)
+    ids = [MockResourceIdentifier(i) for i in ["2", "5", "0"]]
+    loaded = sqlalchemy_storage.load_list(ids, MockStorageItem)
+    assert [item.data for item in loaded] == ["d2", "d0"]
+
+    items[0].data = "new"
+    sqlalchemy_storage.save_or_update_list(items[:1])
+    assert sqlalchemy_storage.load(ids[2], MockStorageItem).data == "new"
+    sqlalchemy_storage.delete_list(ids)
+    assert sqlalchemy_storage.load_list(ids, MockStorageItem) == []
+
+
 def test_query_with_various_conditions(sqlalchemy_storage):
     # Add multiple items for testing
     for i in range(5):
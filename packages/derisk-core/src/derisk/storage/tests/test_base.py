@@ -0,0 +1,60 @@
+import asyncio
+from typing import List, Optional
+
+import pytest
+
+from derisk.core import Chunk
+from derisk.storage.base import IndexStoreBase, IndexStoreConfig
+from derisk.storage.vector_store.filters import MetadataFilters
+
+
+class SlowIndexStore(IndexStoreBase):
+    """Record the max number of concurrent loads."""
+
+    def __init__(self):
+        self.running = 0
+        self.max_running = 0
+
+    def get_config(self) -> IndexStoreConfig:
+        return IndexStoreConfig()
+
+    def load_document(self, chunks: List[Chunk]) -> List[str]:
+        return [chunk.chunk_id for chunk in chunks]
+
+    async def aload_document(self, chunks: List[Chunk]) -> List[str]:
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        await asyncio.sleep(0.01)
+        self.running -= 1
+        return [chunk.chunk_id for chunk in chunks]
+
+    def similar_search_with_scores(
+        self,
+        text,
+        topk,
+        score_threshold: float,
+        filters: Optional[MetadataFilters] = None,
+    ) -> List[Chunk]:
+        return []
+
+    def delete_by_ids(self, ids: str) -> List[str]:
+        return []
+
+    def truncate(self) -> List[str]:
+        return []
+
+    def delete_vector_name(self, index_name: str):
+        pass
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("max_threads, expected", [(1, 1), (3, 3), (100, 10)])
+async def test_aload_document_with_limit(max_threads, expected):
+    store = SlowIndexStore()
+    chunks = [Chunk(content=f"content {i}") for i in range(50)]
+    ids = await store.aload_document_with_limit(
+        chunks, max_chunks_once_load=5, max_threads=max_threads
+    )
+    # The ids are in the order of the chunks
+    assert ids == [chunk.chunk_id for chunk in chunks]
+    assert store.max_running == expected
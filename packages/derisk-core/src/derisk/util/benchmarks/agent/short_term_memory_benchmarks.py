@@ -0,0 +1,94 @@
+"""Benchmark the writes of the enhanced short term memory.
+
+The vectorized enhancement of the memory is compared with the pairwise
+similarities, which run two executor hops for each memory in the buffer, run:
+
+    python -m derisk.util.benchmarks.agent.short_term_memory_benchmarks --writes 200
+"""
+
+import argparse
+import asyncio
+import hashlib
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+
+import numpy as np
+
+from derisk.agent.core.memory.agent_memory import AgentMemoryFragment
+from derisk.agent.core.memory.short_term import EnhancedShortTermMemory
+from derisk.core import Embeddings
+from derisk.util.executor_utils import blocking_func_to_async
+from derisk.util.similarity_util import cosine_similarity, sigmoid_function
+
+buffer_sizes = [10, 50, 200]
+
+
+class HashEmbeddings(Embeddings):
+    """The same text always gets the same random vector."""
+
+    def __init__(self, dim: int):
+        self._dim = dim
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self.embed_query(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        seed = int(hashlib.md5(text.encode()).hexdigest()[:8], 16)
+        return np.random.default_rng(seed).standard_normal(self._dim).tolist()
+
+
+async def _vectorized_cost(executor, embeddings, buffer_size, fragments) -> float:
+    memory = EnhancedShortTermMemory(embeddings, executor, buffer_size=buffer_size)
+    start = time.perf_counter()
+    for text in fragments:
+        await memory.write(AgentMemoryFragment(text))
+    return time.perf_counter() - start
+
+
+async def _pairwise_cost(executor, embeddings, buffer_size, fragments) -> float:
+    short_embeddings = [
+        embeddings.embed_query(text) for text in fragments[:buffer_size]
+    ]
+    start = time.perf_counter()
+    for text in fragments:
+        fragment = AgentMemoryFragment(text)
+        vector = await blocking_func_to_async(
+            executor, fragment.calculate_current_embeddings, embeddings.embed_documents
+        )
+        for memory_embedding in short_embeddings:
+            similarity = await blocking_func_to_async(
+                executor, cosine_similarity, memory_embedding, vector
+            )
+            await blocking_func_to_async(executor, sigmoid_function, similarity)
+    return time.perf_counter() - start
+
+
+async def run_benchmark(num_writes: int, dim: int):
+    # Always enhance the similar memories
+    random.random = lambda: 0.0
+    embeddings = HashEmbeddings(dim)
+    print(f"writes: {num_writes}, dim: {dim}")
+    print(f"{'buffer':>10}{'vectorized(w/s)':>18}{'pairwise(w/s)':>16}")
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        for buffer_size in buffer_sizes:
+            fragments = [f"fragment {i % (buffer_size * 2)}" for i in range(num_writes)]
+            vectorized = await _vectorized_cost(
+                executor, embeddings, buffer_size, fragments
+            )
+            pairwise = await _pairwise_cost(
+                executor, embeddings, buffer_size, fragments
+            )
+            print(
+                f"{buffer_size:>10}{num_writes / vectorized:>18.0f}"
+                f"{num_writes / pairwise:>16.0f}"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--writes", type=int, default=200)
+    parser.add_argument("--dim", type=int, default=256)
+    args = parser.parse_args()
+    asyncio.run(run_benchmark(args.writes, args.dim))
@@ -0,0 +1,116 @@
+"""Benchmark the dynamic batching of the embedding worker.
+
+The embedding model simulates a fixed cost per call and a cost per text, like an
+embedding model running on CPU. Many concurrent single-text requests are sent to
+the worker with and without the dynamic batching, run:
+
+    python -m derisk.util.benchmarks.model.embedding_batch_benchmarks --requests 512
+"""
+
+import argparse
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+
+from derisk.core import Embeddings
+from derisk.model.cluster.worker.embedding_worker import EmbeddingsModelWorker
+from derisk.model.cluster.worker.micro_batch import MicroBatcher
+
+parallel_nums = [1, 8, 32, 64]
+
+
+class SimulatedEmbeddings(Embeddings):
+    """Embeddings which sleep for a fixed time per call and per text.
+
+    The calls are serialized, the model on CPU uses all the cores for one call.
+    """
+
+    def __init__(self, call_latency: float, text_latency: float):
+        self._call_latency = call_latency
+        self._text_latency = text_latency
+        self._lock = threading.Lock()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        with self._lock:
+            time.sleep(self._call_latency + self._text_latency * len(texts))
+        return [[0.0] * 8 for _ in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+
+def _new_worker(embeddings: Embeddings, max_batch_size: int, max_wait_ms: float):
+    worker = EmbeddingsModelWorker()
+    worker.model_name = "benchmark"
+    worker._embeddings_impl = embeddings
+    if max_batch_size > 1:
+        worker._batcher = MicroBatcher(
+            worker._embed_batch, max_batch_size=max_batch_size, max_wait_ms=max_wait_ms
+        )
+    return worker
+
+
+def run_benchmark(
+    num_requests: int,
+    max_batch_size: int,
+    max_wait_ms: float,
+    call_latency: float,
+    text_latency: float,
+):
+    embeddings = SimulatedEmbeddings(call_latency, text_latency)
+    print(
+        f"requests: {num_requests}, max_batch_size: {max_batch_size}, "
+        f"max_wait_ms: {max_wait_ms}, call latency: {call_latency}s, "
+        f"text latency: {text_latency}s"
+    )
+    print(
+        f"{'parallel':>10}{'batching':>10}{'cost(s)':>10}{'req/s':>10}{'p50 batch':>11}"
+    )
+    for parallel in parallel_nums:
+        for batch_size in [1, max_batch_size]:
+            worker = _new_worker(embeddings, batch_size, max_wait_ms)
+            start = time.perf_counter()
+            with ThreadPoolExecutor(parallel) as executor:
+                list(
+                    executor.map(
+                        lambda i: worker.embeddings({"input": [f"text {i}"]}),
+                        range(num_requests),
+                    )
+                )
+            cost = time.perf_counter() - start
+            metrics = worker._batcher.get_metrics() if worker._batcher else None
+            p50 = _p50(metrics["batch_size"]) if metrics else 1
+            print(
+                f"{parallel:>10}{str(batch_size > 1):>10}{cost:>10.3f}"
+                f"{num_requests / cost:>10.1f}{p50:>11}"
+            )
+            if worker._batcher:
+                worker._batcher.close()
+            # Nothing to release of the simulated model
+            worker._embeddings_impl = None
+
+
+def _p50(histogram) -> str:
+    half = histogram["count"] / 2
+    for bucket, count in histogram["buckets"].items():
+        if count >= half:
+            return bucket
+    return "-"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=512)
+    parser.add_argument("--max_batch_size", type=int, default=32)
+    parser.add_argument("--max_wait_ms", type=float, default=5)
+    parser.add_argument("--call_latency", type=float, default=0.01)
+    parser.add_argument("--text_latency", type=float, default=0.0005)
+    args = parser.parse_args()
+    run_benchmark(
+        args.requests,
+        args.max_batch_size,
+        args.max_wait_ms,
+        args.call_latency,
+        args.text_latency,
+    )
@@ -0,0 +1,91 @@
+"""Benchmark the throughput of loading chunks into an index store.
+
+The index store simulates the latency of the embedding and the vector write, run:
+
+    python -m derisk.util.benchmarks.rag.ingestion_benchmarks --num_chunks 2000
+"""
+
+import argparse
+import asyncio
+import time
+from typing import List, Optional
+
+from derisk.core import Chunk
+from derisk.storage.base import IndexStoreBase, IndexStoreConfig
+from derisk.storage.vector_store.filters import MetadataFilters
+
+parallel_nums = [1, 2, 4, 8, 16]
+
+
+class SimulatedIndexStore(IndexStoreBase):
+    """Index store which sleeps for a fixed time per call and per chunk."""
+
+    def __init__(self, call_latency: float, chunk_latency: float):
+        self._call_latency = call_latency
+        self._chunk_latency = chunk_latency
+
+    def get_config(self) -> IndexStoreConfig:
+        return IndexStoreConfig()
+
+    def load_document(self, chunks: List[Chunk]) -> List[str]:
+        time.sleep(self._call_latency + self._chunk_latency * len(chunks))
+        return [chunk.chunk_id for chunk in chunks]
+
+    async def aload_document(self, chunks: List[Chunk]) -> List[str]:
+        await asyncio.sleep(self._call_latency + self._chunk_latency * len(chunks))
+        return [chunk.chunk_id for chunk in chunks]
+
+    def similar_search_with_scores(
+        self,
+        text,
+        topk,
+        score_threshold: float,
+        filters: Optional[MetadataFilters] = None,
+    ) -> List[Chunk]:
+        return []
+
+    def delete_by_ids(self, ids: str) -> List[str]:
+        return []
+
+    def truncate(self) -> List[str]:
+        return []
+
+    def delete_vector_name(self, index_name: str):
+        pass
+
+
+async def run_benchmark(
+    num_chunks: int,
+    max_chunks_once_load: int,
+    call_latency: float,
+    chunk_latency: float,
+):
+    chunks = [Chunk(content=f"chunk {i}") for i in range(num_chunks)]
+    store = SimulatedIndexStore(call_latency, chunk_latency)
+    print(
+        f"chunks: {num_chunks}, max_chunks_once_load: {max_chunks_once_load}, "
+        f"call latency: {call_latency}s, chunk latency: {chunk_latency}s"
+    )
+    print(f"{'max_threads':>12}{'cost(s)':>12}{'chunks/s':>12}")
+    for max_threads in parallel_nums:
+        start = time.perf_counter()
+        await store.aload_document_with_limit(chunks, max_chunks_once_load, max_threads)
+        cost = time.perf_counter() - start
+        print(f"{max_threads:>12}{cost:>12.3f}{num_chunks / cost:>12.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--num_chunks", type=int, default=2000)
+    parser.add_argument("--max_chunks_once_load", type=int, default=10)
+    parser.add_argument("--call_latency", type=float, default=0.05)
+    parser.add_argument("--chunk_latency", type=float, default=0.001)
+    args = parser.parse_args()
+    asyncio.run(
+        run_benchmark(
+            args.num_chunks,
+            args.max_chunks_once_load,
+            args.call_latency,
+            args.chunk_latency,
+        )
+    )
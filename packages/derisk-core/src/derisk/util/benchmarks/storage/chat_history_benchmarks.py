@@ -0,0 +1,101 @@
+"""Benchmark loading a conversation from the database storage.
+
+Compare the bulk load of the messages with loading them one by one, run:
+
+    python -m derisk.util.benchmarks.storage.chat_history_benchmarks --messages 200
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+from sqlalchemy import event
+
+from derisk.core.interface.message import StorageConversation
+from derisk.storage.chat_history.chat_history_db import (
+    ChatHistoryEntity,
+    ChatHistoryMessageEntity,
+)
+from derisk.storage.chat_history.storage_adapter import (
+    DBMessageStorageItemAdapter,
+    DBStorageConversationItemAdapter,
+)
+from derisk.storage.metadata import db
+from derisk.storage.metadata.db_storage import SQLAlchemyStorage
+from derisk.util.serialization.json_serialization import JsonSerializer
+
+
+class _OneByOneMessageAdapter(DBMessageStorageItemAdapter):
+    """Disable the bulk query, the messages are loaded one by one."""
+
+    def get_query_for_identifiers(self, storage_format, resource_ids, **kwargs):
+        return None
+
+
+def _create_conversation(conv_storage, message_storage, num_messages: int):
+    conversation = StorageConversation(
+        "benchmark_conv",
+        chat_mode="chat_normal",
+        user_name="benchmark",
+        conv_storage=conv_storage,
+        message_storage=message_storage,
+    )
+    for i in range(num_messages // 2):
+        conversation.start_new_round()
+        conversation.add_user_message(f"question {i}")
+        conversation.add_ai_message(f"answer {i}")
+        conversation.end_current_round()
+
+
+def _benchmark(name: str, conv_storage, message_storage, rounds: int):
+    queries = 0
+
+    def _count(conn, cursor, statement, parameters, context, executemany):
+        nonlocal queries
+        queries += 1
+
+    event.listen(db.engine, "before_cursor_execute", _count)
+    start = time.perf_counter()
+    for _ in range(rounds):
+        conversation = StorageConversation(
+            "benchmark_conv",
+            conv_storage=conv_storage,
+            message_storage=message_storage,
+        )
+    cost = (time.perf_counter() - start) / rounds
+    event.remove(db.engine, "before_cursor_execute", _count)
+    print(
+        f"{name:>12}{len(conversation.messages):>10}{queries // rounds:>10}"
+        f"{cost * 1000:>12.2f}"
+    )
+
+
+def run_benchmark(num_messages: int, rounds: int):
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db.init_db(f"sqlite:///{os.path.join(tmp_dir, 'benchmark.db')}")
+        db.create_all()
+        serializer = JsonSerializer()
+        conv_storage = SQLAlchemyStorage(
+            db, ChatHistoryEntity, DBStorageConversationItemAdapter(), serializer
+        )
+        message_storage = SQLAlchemyStorage(
+            db, ChatHistoryMessageEntity, DBMessageStorageItemAdapter(), serializer
+        )
+        one_by_one_storage = SQLAlchemyStorage(
+            db, ChatHistoryMessageEntity, _OneByOneMessageAdapter(), serializer
+        )
+        _create_conversation(conv_storage, message_storage, num_messages)
+
+        print(f"{'load':>12}{'messages':>10}{'queries':>10}{'cost(ms)':>12}")
+        _benchmark("one by one", conv_storage, one_by_one_storage, rounds)
+        _benchmark("bulk", conv_storage, message_storage, rounds)
+        db.engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--messages", type=int, default=200)
+    parser.add_argument("--rounds", type=int, default=10)
+    args = parser.parse_args()
+    run_benchmark(args.messages, args.rounds)
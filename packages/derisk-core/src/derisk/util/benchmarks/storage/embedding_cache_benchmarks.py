@@ -0,0 +1,55 @@
+"""Benchmark re-indexing unchanged documents with the embedding cache.
+
+The embedding model simulates a fixed cost per call and a cost per text, run:
+
+    python -m derisk.util.benchmarks.storage.embedding_cache_benchmarks --chunks 2000
+"""
+
+import argparse
+import time
+from typing import List
+
+from derisk.core import Embeddings
+from derisk.storage.cache import CachedEmbeddings, MemoryCacheStorage
+
+
+class SimulatedEmbeddings(Embeddings):
+    """Embeddings which sleep for a fixed time per call and per text."""
+
+    def __init__(self, call_latency: float, text_latency: float, dim: int):
+        self._call_latency = call_latency
+        self._text_latency = text_latency
+        self._dim = dim
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        time.sleep(self._call_latency + self._text_latency * len(texts))
+        return [[0.1] * self._dim for _ in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+
+def run_benchmark(
+    num_chunks: int, batch_size: int, call_latency: float, text_latency: float
+):
+    upstream = SimulatedEmbeddings(call_latency, text_latency, dim=768)
+    embeddings = CachedEmbeddings(upstream, MemoryCacheStorage(), "benchmark")
+    chunks = [f"chunk {i}" for i in range(num_chunks)]
+    print(f"chunks: {num_chunks}, batch_size: {batch_size}")
+    print(f"{'round':>10}{'cost(s)':>10}{'hit ratio':>12}")
+    for name in ["index", "re-index"]:
+        start = time.perf_counter()
+        for i in range(0, num_chunks, batch_size):
+            embeddings.embed_documents(chunks[i : i + batch_size])
+        cost = time.perf_counter() - start
+        print(f"{name:>10}{cost:>10.3f}{embeddings.get_stats()['hit_ratio']:>12.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--chunks", type=int, default=2000)
+    parser.add_argument("--batch_size", type=int, default=32)
+    parser.add_argument("--call_latency", type=float, default=0.01)
+    parser.add_argument("--text_latency", type=float, default=0.002)
+    args = parser.parse_args()
+    run_benchmark(args.chunks, args.batch_size, args.call_latency, args.text_latency)
@@ -0,0 +1,37 @@
+"""Benchmark the set and get of the memory cache storage when it is full, run:
+
+python -m derisk.util.benchmarks.storage.memory_cache_benchmarks --entries 20000
+"""
+
+import argparse
+import time
+
+from derisk.storage.cache import MemoryCacheStorage
+from derisk.storage.cache.embedding_cache import EmbeddingCacheKey, EmbeddingCacheValue
+
+
+def run_benchmark(num_entries: int, dim: int, max_memory_mb: int):
+    keys = [EmbeddingCacheKey("benchmark", f"text {i}") for i in range(num_entries)]
+    value = EmbeddingCacheValue([0.1] * dim)
+    storage = MemoryCacheStorage(max_memory_mb=max_memory_mb)
+    print(f"entries: {num_entries}, dim: {dim}, max_memory_mb: {max_memory_mb}")
+    print(f"{'op':>6}{'cost(s)':>10}{'ops/s':>12}")
+    start = time.perf_counter()
+    for key in keys:
+        storage.set(key, value)
+    cost = time.perf_counter() - start
+    print(f"{'set':>6}{cost:>10.3f}{num_entries / cost:>12.1f}")
+    start = time.perf_counter()
+    hits = sum(1 for key in keys if storage.get(key) is not None)
+    cost = time.perf_counter() - start
+    print(f"{'get':>6}{cost:>10.3f}{num_entries / cost:>12.1f}")
+    print(f"hits: {hits}, memory usage: {storage.current_memory_usage} bytes")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--entries", type=int, default=20000)
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--max_memory_mb", type=int, default=16)
+    args = parser.parse_args()
+    run_benchmark(args.entries, args.dim, args.max_memory_mb)
@@ -0,0 +1,47 @@
+"""Benchmark the memory and the search of the memory graph, run:
+
+python -m derisk.util.benchmarks.storage.memory_graph_benchmarks --edges 200000
+"""
+
+import argparse
+import random
+import time
+import tracemalloc
+
+from derisk.storage.graph_store.graph import Direction, Edge, MemoryGraph, Vertex
+
+
+def run_benchmark(num_vertices: int, num_edges: int, num_searches: int):
+    rnd = random.Random(42)
+    labels = [f"relation_{i}" for i in range(50)]
+    print(f"vertices: {num_vertices}, edges: {num_edges}")
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    graph = MemoryGraph()
+    for i in range(num_vertices):
+        graph.upsert_vertex(Vertex(f"entity_{i}", description=f"entity {i}"))
+    for _ in range(num_edges):
+        sid = f"entity_{rnd.randrange(num_vertices)}"
+        tid = f"entity_{rnd.randrange(num_vertices)}"
+        graph.append_edge(Edge(sid, tid, rnd.choice(labels)))
+    cost = time.perf_counter() - start
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    print(f"build: {cost:.3f}s, memory: {memory / 1024 / 1024:.1f}MB")
+
+    start = time.perf_counter()
+    for _ in range(num_searches):
+        vid = f"entity_{rnd.randrange(num_vertices)}"
+        graph.search([vid], Direction.BOTH, depth=3, fan=10, limit=100)
+    cost = time.perf_counter() - start
+    print(f"search: {num_searches / cost:.1f} searches/s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--vertices", type=int, default=50000)
+    parser.add_argument("--edges", type=int, default=200000)
+    parser.add_argument("--searches", type=int, default=1000)
+    args = parser.parse_args()
+    run_benchmark(args.vertices, args.edges, args.searches)
@@ -0,0 +1,66 @@
+"""Utilities for encoding embeddings on the wire.
+
+The embeddings are encoded as little-endian float32 bytes in base64, which is
+the ``encoding_format="base64"`` of the OpenAI embedding API. It is about a
+quarter of the size of the JSON float list and much cheaper to decode.
+"""
+
+import base64
+from typing import List, Sequence, Union
+
+import numpy as np
+
+EMBEDDING_FORMAT_FLOAT = "float"
+EMBEDDING_FORMAT_BASE64 = "base64"
+
+_FLOAT32 = np.dtype("<f4")
+
+EmbeddingVector = Union[Sequence[float], np.ndarray]
+
+
+def encode_embedding(embedding: EmbeddingVector) -> str:
+    """Encode an embedding to base64 string of float32 bytes."""
+    array = np.asarray(embedding, dtype=_FLOAT32)
+    return base64.b64encode(array.tobytes()).decode("ascii")
+
+
+def decode_embedding(data: Union[str, bytes]) -> np.ndarray:
+    """Decode a base64 string of float32 bytes to a numpy array."""
+    return np.frombuffer(base64.b64decode(data), dtype=_FLOAT32)
+
+
+def encode_embeddings(embeddings: Sequence[EmbeddingVector]) -> List[str]:
+    """Encode a list of embeddings to base64 strings."""
+    return [encode_embedding(embedding) for embedding in embeddings]
+
+
+def decode_embeddings(data: Sequence[Union[str, bytes]]) -> np.ndarray:
+    """Decode a list of base64 strings to a 2-D numpy array.
+
+    Returns:
+        np.ndarray: The embeddings, one row per input, all rows must have the
+            same dimension.
+    """
+    if not data:
+        return np.empty((0, 0), dtype=_FLOAT32)
+    return np.stack([decode_embedding(item) for item in data])
+
+
+def embedding_to_list(embedding: EmbeddingVector) -> List[float]:
+    """Convert an embedding to python float list."""
+    if isinstance(embedding, np.ndarray):
+        return embedding.tolist()
+    return embedding if isinstance(embedding, list) else list(embedding)
+
+
+def embeddings_to_list(
+    embeddings: Union[Sequence[EmbeddingVector], np.ndarray],
+) -> List[List[float]]:
+    """Convert the embeddings to python float lists.
+
+    The float lists are required by the callers which serialize the embeddings
+    to JSON or pass them to the vector stores.
+    """
+    if isinstance(embeddings, np.ndarray):
+        return embeddings.tolist()
+    return [embedding_to_list(embedding) for embedding in embeddings]
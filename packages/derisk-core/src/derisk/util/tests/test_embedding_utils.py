@@ -0,0 +1,47 @@
+import json
+
+import numpy as np
+
+from derisk.util.embedding_utils import (
+    decode_embedding,
+    decode_embeddings,
+    embeddings_to_list,
+    encode_embedding,
+    encode_embeddings,
+)
+
+
+def test_encode_decode_embedding():
+    embedding = [0.1, -0.5, 3.25, 0]
+    data = encode_embedding(embedding)
+    assert isinstance(data, str)
+    decoded = decode_embedding(data)
+    assert decoded.dtype == np.float32
+    np.testing.assert_array_equal(decoded, np.asarray(embedding, dtype=np.float32))
+    # The same bytes for the numpy array input
+    assert encode_embedding(np.asarray(embedding)) == data
+
+
+def test_encode_decode_embeddings():
+    embeddings = np.random.rand(3, 768).astype(np.float32)
+    data = encode_embeddings(embeddings)
+    assert len(data) == 3
+    decoded = decode_embeddings(data)
+    assert decoded.shape == (3, 768)
+    np.testing.assert_array_equal(decoded, embeddings)
+    # Smaller than the JSON float list
+    assert len(json.dumps(data)) < len(json.dumps(embeddings.tolist())) / 2
+
+    assert decode_embeddings([]).shape == (0, 0)
+
+
+def test_embeddings_to_list():
+    assert embeddings_to_list(np.asarray([[1, 2], [3, 4]], dtype=np.float32)) == [
+        [1.0, 2.0],
+        [3.0, 4.0],
+    ]
+    assert embeddings_to_list([np.asarray([0.5]), [1.5], (2.5,)]) == [
+        [0.5],
+        [1.5],
+        [2.5],
+    ]
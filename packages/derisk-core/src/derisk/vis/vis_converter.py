@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import bisect
 import importlib
 import json
 import sys
@@ -8,10 +9,13 @@ from collections import defaultdict
 from enum import Enum
 from importlib import util
 from pathlib import Path
-from typing import List, Optional, Union, Dict, Type, Tuple
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Set, Tuple, Type, Union
 
 from derisk.vis import Vis
 
+if TYPE_CHECKING:
+    from derisk.agent.core.memory.gpts.base import GptsMessage, GptsPlan
+
 
 def scan_vis_tags(vis_tag_paths: List[str]):
     """
@@ -51,6 +55,86 @@ class SystemVisTag(Enum):
     VisSelect = "vis-select"
 
 
+class VisRenderCache:
+    """The render cache of one conversation.
+
+    It keeps the rendered view of each message in the order of the view, and the
+    joined view, so a new or updated message only renders the messages from its
+    index. The owner must call `invalidate` with the index of the first changed
+    message when the messages or plans of the conversation change.
+    """
+
+    def __init__(self):
+        self.message_views: Dict[str, Tuple[Tuple, Any]] = {}
+        # The index of the first changed message, None if the view is up to date
+        self.dirty_from: Optional[int] = 0
+        # The message index and the offset in the view of each rendered item
+        self._indexes: List[int] = []
+        self._offsets: List[int] = []
+        self._view: str = ""
+
+    @property
+    def view(self) -> str:
+        """The joined view of the rendered messages."""
+        return self._view
+
+    def invalidate(self, from_index: int = 0):
+        """Mark the messages from the index as changed."""
+        if self.dirty_from is None or from_index < self.dirty_from:
+            self.dirty_from = from_index
+
+    def truncate(self, from_index: int):
+        """Drop the rendered items of the messages from the index."""
+        k = bisect.bisect_left(self._indexes, from_index)
+        if k < len(self._indexes):
+            self._view = self._view[: self._offsets[k] - 1] if k > 0 else ""
+            del self._indexes[k:]
+            del self._offsets[k:]
+
+    def append(self, index: int, view: str):
+        """Append the rendered view of the message at the index."""
+        if self._indexes:
+            self._view += "\n"
+        self._indexes.append(index)
+        self._offsets.append(len(self._view))
+        self._view += view
+
+    def get_message_view(self, message_id: str, fingerprint: Tuple) -> Optional[Any]:
+        """Return the rendered view of the message if it is not changed."""
+        cached = self.message_views.get(message_id)
+        if cached is None or cached[0] != fingerprint:
+            return None
+        return cached[1]
+
+    def set_message_view(self, message_id: str, fingerprint: Tuple, view: Any):
+        """Cache the rendered view of the message."""
+        self.message_views[message_id] = (fingerprint, view)
+
+    def retain_messages(self, message_ids: Set[str]):
+        """Drop the views of the messages which are not in the conversation."""
+        for message_id in list(self.message_views.keys()):
+            if message_id not in message_ids:
+                del self.message_views[message_id]
+
+
+def message_fingerprint(message: "GptsMessage") -> Tuple:
+    """The fields of a message used to render it, changed means re-render."""
+    return (
+        message.rounds,
+        message.sender,
+        message.sender_name,
+        message.receiver,
+        message.receiver_name,
+        message.avatar,
+        message.model_name,
+        message.content,
+        message.thinking,
+        message.action_report,
+        message.resource_info,
+        message.current_goal,
+    )
+
+
 class VisProtocolConverter(ABC):
     # The default Vis component that needs to exist as the basis for organizing message structures can be overridden. If not overridden, the default component will be used
     SYSTEM_TAGS = [member.value for member in SystemVisTag]
@@ -132,6 +216,32 @@ class VisProtocolConverter(ABC):
     ):
         pass
 
+    async def incremental_visualization(
+        self,
+        messages: List["GptsMessage"],
+        plans_map: Optional[Dict[str, "GptsPlan"]] = None,
+        gpt_msg: Optional["GptsMessage"] = None,
+        stream_msg: Optional[Union[Dict, str]] = None,
+        is_first_chunk: bool = False,
+        incremental: bool = False,
+        render_cache: Optional[VisRenderCache] = None,
+    ):
+        """Visualize the messages, reuse the views cached in the render cache.
+
+        The messages are sorted by rounds, the messages before the
+        `render_cache.dirty_from` index are not changed since the last call. The
+        result must be the same as `visualization`. The converters which can not
+        render the messages one by one just render the whole view again.
+        """
+        return await self.visualization(
+            messages,
+            plans_map=plans_map,
+            gpt_msg=gpt_msg,
+            stream_msg=stream_msg,
+            is_first_chunk=is_first_chunk,
+            incremental=incremental,
+        )
+
     def get_package_path_dynamic(self) -> str:
         """动态解析模块的包路径"""
         spec = util.find_spec(__name__)
@@ -102,6 +102,72 @@ def test_query_ex(db):
     assert result == [1]
 
 
+def _insert_rows(db, num_rows: int):
+    db.run("CREATE TABLE test (id INTEGER PRIMARY KEY, name TEXT);")
+    for i in range(num_rows):
+        db.run(f"insert into test(id, name) values ({i}, 'name_{i}')")
+
+
+def test_query_stream(db):
+    _insert_rows(db, 5)
+    batches = list(db.query_stream("select * from test", batch_size=2))
+    assert [len(batch) for batch in batches] == [2, 2, 1]
+    assert batches[0].field_names == ["id", "name"]
+    assert batches[0].to_columns() == [[0, 1], ["name_0", "name_1"]]
+    assert not any(batch.truncated for batch in batches)
+
+
+def test_query_stream_empty(db):
+    _insert_rows(db, 0)
+    batches = list(db.query_stream("select id from test"))
+    assert len(batches) == 1
+    assert batches[0].field_names == ["id"]
+    assert batches[0].to_columns() == [[]]
+
+
+def test_query_stream_max_rows(db):
+    _insert_rows(db, 5)
+    batches = list(db.query_stream("select * from test", batch_size=2, max_rows=4))
+    assert [len(batch) for batch in batches] == [2, 2]
+    assert batches[-1].truncated
+
+    # Not truncated if the result has exactly max_rows rows
+    batches = list(db.query_stream("select * from test", max_rows=5))
+    assert [len(batch) for batch in batches] == [5]
+    assert not batches[-1].truncated
+
+
+def test_query_stream_max_bytes(db):
+    _insert_rows(db, 5)
+    # Each row is estimated as 8 + 6 bytes
+    batches = list(db.query_stream("select * from test", max_bytes=14 * 3))
+    assert [len(batch) for batch in batches] == [3]
+    assert batches[-1].truncated
+
+
+def test_query_stream_stop_early(db):
+    _insert_rows(db, 5)
+    stream = db.query_stream("select * from test", batch_size=1)
+    assert next(stream).to_columns() == [[0], ["name_0"]]
+    stream.close()
+    # The connection is released
+    assert db.query_ex("select count(*) from test")[1] == [(5,)]
+
+
+def test_run_to_df(db):
+    _insert_rows(db, 3)
+    df = db.run_to_df("select id, name, id from test")
+    assert list(df.columns) == ["id", "name", "id"]
+    assert df.iloc[:, 0].tolist() == [0, 1, 2]
+    assert df["name"].tolist() == ["name_0", "name_1", "name_2"]
+
+    assert len(db.run_to_df("select * from test", max_rows=2)) == 2
+    assert len(db.run_to_df("select * from test", fetch="one")) == 1
+    df = db.run_to_df("select * from test where id < 0")
+    assert list(df.columns) == ["id", "name"]
+    assert len(df) == 0
+
+
 def test_convert_sql_write_to_select(db):
     # TODO
     pass
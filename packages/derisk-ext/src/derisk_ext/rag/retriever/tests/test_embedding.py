@@ -1,9 +1,11 @@
-from unittest.mock import MagicMock
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
 
 import pytest
 
 from derisk.core import Chunk
 from derisk.rag.retriever.embedding import EmbeddingRetriever
+from derisk.rag.retriever.rerank import RRFRanker
 
 
 @pytest.fixture
@@ -37,3 +39,90 @@ def test_retrieve(query, top_k, mock_vector_store_connector, embedding_retriever
     retrieved_chunks = embedding_retriever._retrieve(query)
 
     assert len(retrieved_chunks) == top_k
+
+
+class _SlowIndexStore:
+    """Index store returning different chunks for different queries."""
+
+    def __init__(self, delay: float = 0.1):
+        self.delay = delay
+        self.queries = []
+
+    def _chunks(self, query: str):
+        results = {
+            "test query": ["a", "b", "c"],
+            "rewritten 1": ["b", "d"],
+            "rewritten 2": ["b", "a"],
+        }
+        return [
+            Chunk(chunk_id=i, content=f"content {i}", score=0.8)
+            for i in results.get(query, [])
+        ]
+
+    async def asimilar_search(self, query, topk, filters=None):
+        self.queries.append(query)
+        await asyncio.sleep(self.delay)
+        return self._chunks(query)
+
+    async def asimilar_search_with_scores(
+        self, query, topk, score_threshold, filters=None
+    ):
+        self.queries.append(query)
+        await asyncio.sleep(self.delay)
+        return self._chunks(query)
+
+
+def _query_rewrite(delay: float = 0.1):
+    async def _rewrite(origin_query, context, nums):
+        await asyncio.sleep(delay)
+        return ["rewritten 1", "rewritten 2"]
+
+    query_rewrite = MagicMock()
+    query_rewrite.rewrite = AsyncMock(side_effect=_rewrite)
+    return query_rewrite
+
+
+@pytest.mark.asyncio
+async def test_aretrieve_with_score_rrf(query):
+    index_store = _SlowIndexStore()
+    retriever = EmbeddingRetriever(
+        index_store=index_store,
+        top_k=3,
+        query_rewrite=_query_rewrite(),
+        rerank=RRFRanker(topk=3),
+    )
+    chunks = await retriever._aretrieve_with_score(query, 0.0)
+    # b is recalled by all the queries
+    assert [c.chunk_id for c in chunks] == ["b", "a", "d"]
+    # The origin query is searched once, its chunks are the rewrite context
+    assert sorted(index_store.queries) == ["rewritten 1", "rewritten 2", "test query"]
+    retriever._query_rewrite.rewrite.assert_awaited_once_with(
+        origin_query=query, context="content a\ncontent b\ncontent c", nums=1
+    )
+
+
+@pytest.mark.asyncio
+async def test_aretrieve_with_score_dedupe(query):
+    retriever = EmbeddingRetriever(
+        index_store=_SlowIndexStore(delay=0),
+        top_k=10,
+        query_rewrite=_query_rewrite(delay=0),
+    )
+    chunks = await retriever._aretrieve_with_score(query, 0.0)
+    assert sorted(c.chunk_id for c in chunks) == ["a", "b", "c", "d"]
+
+
+@pytest.mark.asyncio
+async def test_aretrieve_fused(query):
+    index_store = _SlowIndexStore(delay=0)
+    retriever = EmbeddingRetriever(
+        index_store=index_store, top_k=3, query_rewrite=_query_rewrite(delay=0)
+    )
+    chunks = await retriever._aretrieve(query)
+    assert [c.chunk_id for c in chunks] == ["b", "a", "d", "c"]
+    # The result of the origin query is reused
+    assert index_store.queries.count("test query") == 1
+
+    retriever = EmbeddingRetriever(index_store=index_store, top_k=3)
+    chunks = await retriever._aretrieve(query)
+    assert [c.chunk_id for c in chunks] == ["a", "b", "c"]
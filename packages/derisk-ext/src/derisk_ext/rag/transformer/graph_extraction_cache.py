@@ -0,0 +1,305 @@
+"""Graph extraction cache.
+
+Cache the graphs extracted from the chunks by the LLM, and the embeddings of their
+vertices, keyed by the extractor prompt version, the model name and the hash of
+the chunk content, so the unchanged chunks are not extracted again when a
+document is re-imported.
+"""
+
+import copy
+import hashlib
+import json
+import logging
+import struct
+import threading
+from array import array
+from dataclasses import asdict, dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from derisk.core.interface.cache import CacheKey, CacheValue
+from derisk.storage.cache.storage.base import CacheStorage
+from derisk.storage.graph_store.graph import Edge, Graph, MemoryGraph, Vertex
+from derisk.util.executor_utils import blocking_func_to_async_no_executor
+
+logger = logging.getLogger(__name__)
+
+_EMBEDDING_PROP = "_embedding"
+_HEADER = struct.Struct("<I")
+
+
+def prompt_version(prompt_template: str) -> str:
+    """Return the version of the prompt template, the prefix of its hash."""
+    return hashlib.sha256(prompt_template.encode("utf-8")).hexdigest()[:16]
+
+
+def _has_embeddings(graphs: List[Graph]) -> bool:
+    return all(
+        vertex.get_prop(_EMBEDDING_PROP) is not None
+        for graph in graphs
+        for vertex in graph.vertices()
+    )
+
+
+@dataclass
+class GraphExtractionCacheKeyData:
+    """Cache key data for graph extraction."""
+
+    prompt_version: str
+    model_name: str
+    text_hash: str
+
+
+class GraphExtractionCacheKey(CacheKey[GraphExtractionCacheKeyData]):
+    """Cache key for graph extraction."""
+
+    def __init__(self, prompt_version: str, model_name: str, text: str) -> None:
+        """Create a new instance of GraphExtractionCacheKey."""
+        super().__init__()
+        text_hash = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        self.config = GraphExtractionCacheKeyData(
+            prompt_version=prompt_version, model_name=model_name, text_hash=text_hash
+        )
+        self._hash_bytes = hashlib.sha256(
+            f"graph_extraction\0{prompt_version}\0{model_name}\0{text_hash}".encode(
+                "utf-8"
+            )
+        ).digest()
+
+    def __hash__(self) -> int:
+        """Return the hash value of the object."""
+        return int.from_bytes(self._hash_bytes, "big")
+
+    def __eq__(self, other: Any) -> bool:
+        """Check equality with another key."""
+        if not isinstance(other, GraphExtractionCacheKey):
+            return False
+        return self.config == other.config
+
+    def get_hash_bytes(self) -> bytes:
+        """Return the byte array of hash value."""
+        return self._hash_bytes
+
+    def to_dict(self) -> Dict:
+        """Convert to dict."""
+        return asdict(self.config)
+
+    def serialize(self) -> bytes:
+        """Serialize the key, the key is small, no serializer is required."""
+        return json.dumps(self.to_dict()).encode("utf-8")
+
+    def get_value(self) -> GraphExtractionCacheKeyData:
+        """Return the real object of current cache key."""
+        return self.config
+
+
+class GraphExtractionCacheValue(CacheValue[List[Graph]]):
+    """Cache value for graph extraction.
+
+    The graphs are serialized to a JSON header followed by the float32 bytes of the
+    vertex embeddings, the embeddings are not stored as JSON floats.
+    """
+
+    def __init__(self, graphs: List[Graph]) -> None:
+        """Create a new instance of GraphExtractionCacheValue."""
+        super().__init__()
+        self.value = graphs
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "GraphExtractionCacheValue":
+        """Create the value from the serialized bytes."""
+        (header_size,) = _HEADER.unpack_from(data)
+        header_end = _HEADER.size + header_size
+        header = json.loads(data[_HEADER.size : header_end].decode("utf-8"))
+        vectors = array("f")
+        vectors.frombytes(data[header_end:])
+        offset = 0
+        graphs: List[Graph] = []
+        for graph_data in header:
+            graph = MemoryGraph()
+            for vid, name, props, dim in graph_data["vertices"]:
+                if dim is not None:
+                    props[_EMBEDDING_PROP] = vectors[offset : offset + dim].tolist()
+                    offset += dim
+                graph.upsert_vertex(Vertex(vid, name, **props))
+            for sid, tid, name, props in graph_data["edges"]:
+                graph.append_edge(Edge(sid, tid, name, **props))
+            graphs.append(graph)
+        return cls(graphs)
+
+    def to_dict(self) -> Dict:
+        """Convert to dict."""
+        return {"graphs": [graph.graphviz() for graph in self.value]}
+
+    def serialize(self) -> bytes:
+        """Serialize to the JSON header and the float32 bytes of the embeddings."""
+        vectors = array("f")
+        header = []
+        for graph in self.value:
+            vertices = []
+            for vertex in graph.vertices():
+                props = dict(vertex.props)
+                embedding = props.pop(_EMBEDDING_PROP, None)
+                dim = None
+                if embedding is not None:
+                    vectors.extend(embedding)
+                    dim = len(embedding)
+                vertices.append([vertex.vid, vertex.name, props, dim])
+            edges = [
+                [edge.sid, edge.tid, edge.name, edge.props] for edge in graph.edges()
+            ]
+            header.append({"vertices": vertices, "edges": edges})
+        header_bytes = json.dumps(header, ensure_ascii=False).encode("utf-8")
+        return _HEADER.pack(len(header_bytes)) + header_bytes + vectors.tobytes()
+
+    def get_value(self) -> List[Graph]:
+        """Return the underlying real value."""
+        return self.value
+
+
+class GraphExtractionCache:
+    """Cache the graphs extracted from the texts in a :class:`CacheStorage`.
+
+    Examples:
+        .. code-block:: python
+
+            from derisk.storage.cache import MemoryCacheStorage
+
+            cache = GraphExtractionCache(MemoryCacheStorage(), "v1", "qwen")
+            graphs_list = await cache.abatch_extract(
+                texts, extractor.batch_extract, embedder.batch_embed
+            )
+            print(cache.get_stats())
+    """
+
+    def __init__(
+        self, storage: CacheStorage, prompt_version: str, model_name: str
+    ) -> None:
+        """Create a new GraphExtractionCache.
+
+        Args:
+            storage (CacheStorage): The storage of the extraction results.
+            prompt_version (str): The version of the extractor prompt, the results
+                of the other versions are not used.
+            model_name (str): The name of the LLM which extracts the graphs.
+        """
+        self._storage = storage
+        self._prompt_version = prompt_version
+        self._model_name = model_name
+        # The memory storage is not thread-safe
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get the number of hits and misses and the hit ratio."""
+        total = self._hits + self._misses
+        return {
+            "hits": self._hits,
+            "misses": self._misses,
+            "hit_ratio": self._hits / total if total else 0.0,
+        }
+
+    async def abatch_extract(
+        self,
+        texts: List[str],
+        extract_fn: Callable[[List[str]], Awaitable[Optional[List[List[Graph]]]]],
+        embed_fn: Optional[Callable[[List[Graph]], Awaitable[List[Graph]]]] = None,
+    ) -> List[List[Graph]]:
+        """Extract the graphs of the texts, only the missed texts are extracted.
+
+        Args:
+            texts (List[str]): The texts to extract.
+            extract_fn: Extract the graphs of the missed texts, in the same order.
+            embed_fn: Embed the vertices of the graphs of a text, the embeddings
+                are cached with the graphs. The cached graphs without embeddings
+                are embedded again, without extraction.
+
+        Returns:
+            List[List[Graph]]: The graphs of each text, in the same order.
+        """
+        results, misses = await blocking_func_to_async_no_executor(self._lookup, texts)
+        if misses:
+            graphs_list = await extract_fn(list(misses))
+            if not graphs_list or len(graphs_list) != len(misses):
+                raise ValueError(
+                    f"Expected the graphs of {len(misses)} texts, got "
+                    f"{len(graphs_list) if graphs_list else 0}"
+                )
+            for indexes, graphs in zip(misses.values(), graphs_list):
+                for i in indexes:
+                    results[i] = graphs
+
+        # The graphs to (re)write in the cache
+        updates: Dict[str, List[Graph]] = {
+            text: results[indexes[0]] for text, indexes in misses.items()
+        }
+        if embed_fn:
+            embedded: Dict[str, List[Graph]] = {}
+            for i, text in enumerate(texts):
+                if text not in embedded:
+                    graphs = results[i]
+                    if text not in updates and _has_embeddings(graphs):
+                        continue
+                    embedded[text] = await embed_fn(graphs)
+                results[i] = embedded[text]
+            updates.update(embedded)
+        if updates:
+            await blocking_func_to_async_no_executor(self._store, updates)
+
+        # The duplicate texts share the graphs, copy them, the callers may set the
+        # props of each, e.g. the chunk id of the edges
+        seen = set()
+        for i, graphs in enumerate(results):
+            if id(graphs) in seen:
+                results[i] = copy.deepcopy(graphs)
+            else:
+                seen.add(id(graphs))
+        return results  # type: ignore
+
+    def _key(self, text: str) -> GraphExtractionCacheKey:
+        return GraphExtractionCacheKey(self._prompt_version, self._model_name, text)
+
+    def _lookup(
+        self, texts: List[str]
+    ) -> Tuple[List[Optional[List[Graph]]], Dict[str, List[int]]]:
+        """Read the cached graphs.
+
+        Returns:
+            Tuple[List[Optional[List[Graph]]], Dict[str, List[int]]]: The graphs,
+                None for the misses, and the indexes of each missed text.
+        """
+        results: List[Optional[List[Graph]]] = [None] * len(texts)
+        misses: Dict[str, List[int]] = {}
+        with self._lock:
+            for i, text in enumerate(texts):
+                if text in misses:
+                    misses[text].append(i)
+                    continue
+                item = self._get_item(self._key(text))
+                if item is None:
+                    misses[text] = [i]
+                else:
+                    results[i] = GraphExtractionCacheValue.from_bytes(
+                        item.value_data
+                    ).value
+            # The duplicate texts of a miss are extracted once, count them as hits
+            self._hits += len(texts) - len(misses)
+            self._misses += len(misses)
+        return results, misses
+
+    def _get_item(self, key: GraphExtractionCacheKey):
+        try:
+            return self._storage.get(key)
+        except Exception as e:
+            logger.warning(f"Read graph extraction cache failed: {e}")
+            return None
+
+    def _store(self, updates: Dict[str, List[Graph]]):
+        with self._lock:
+            for text, graphs in updates.items():
+                try:
+                    self._storage.set(
+                        self._key(text), GraphExtractionCacheValue(graphs)
+                    )
+                except Exception as e:
+                    logger.warning(f"Write graph extraction cache failed: {e}")
@@ -9,6 +9,7 @@ from derisk.core import Chunk, LLMClient
 from derisk.rag.transformer.llm_extractor import LLMExtractor
 from derisk.storage.graph_store.graph import Edge, Graph, MemoryGraph, Vertex
 from derisk.storage.vector_store.base import VectorStoreBase
+from derisk_ext.rag.transformer.graph_extraction_cache import prompt_version
 
 logger = logging.getLogger(__name__)
 
@@ -31,6 +32,16 @@ class GraphExtractor(LLMExtractor):
         self._topk = config.topk
         self._score_threshold = config.score_threshold
 
+    @property
+    def model_name(self) -> str:
+        """Return the name of the LLM which extracts the graphs."""
+        return self._model_name
+
+    @property
+    def prompt_version(self) -> str:
+        """Return the version of the prompt, changed with the prompt template."""
+        return prompt_version(self._prompt_template)
+
     async def aload_chunk_context(self, texts: List[str]) -> Dict[str, str]:
         """Load chunk context."""
         text_context_map: Dict[str, str] = {}
@@ -0,0 +1,150 @@
+from typing import List
+
+import pytest
+
+from derisk.storage.cache import MemoryCacheStorage
+from derisk.storage.graph_store.graph import Edge, Graph, MemoryGraph, Vertex
+
+from ..graph_extraction_cache import (
+    GraphExtractionCache,
+    GraphExtractionCacheKey,
+    GraphExtractionCacheValue,
+)
+
+
+class MockExtractor:
+    def __init__(self):
+        self.calls: List[List[str]] = []
+
+    async def batch_extract(self, texts: List[str]) -> List[List[Graph]]:
+        self.calls.append(list(texts))
+        graphs_list = []
+        for text in texts:
+            graph = MemoryGraph()
+            graph.upsert_vertex(Vertex(text, description="desc", vertex_type="entity"))
+            graph.append_edge(Edge(text, "b", "rel", description="d"))
+            graphs_list.append([graph])
+        return graphs_list
+
+
+class MockEmbedder:
+    def __init__(self):
+        self.calls = 0
+
+    async def batch_embed(self, graphs: List[Graph]) -> List[Graph]:
+        self.calls += 1
+        for graph in graphs:
+            for vertex in graph.vertices():
+                vertex.set_prop("_embedding", [float(len(vertex.vid)), 0.5])
+        return graphs
+
+
+@pytest.fixture
+def extractor():
+    return MockExtractor()
+
+
+@pytest.fixture
+def cache():
+    return GraphExtractionCache(MemoryCacheStorage(), "v1", "test_model")
+
+
+def test_key():
+    key = GraphExtractionCacheKey("v1", "model", "hello")
+    assert key == GraphExtractionCacheKey("v1", "model", "hello")
+    assert key != GraphExtractionCacheKey("v2", "model", "hello")
+    assert (
+        key.get_hash_bytes()
+        != GraphExtractionCacheKey("v1", "model_b", "hello").get_hash_bytes()
+    )
+    assert "hello" not in key.serialize().decode()
+
+
+def test_value_serialize():
+    graph = MemoryGraph()
+    graph.upsert_vertex(Vertex("a", "A", description="中文", _embedding=[0.5, 1.0]))
+    graph.upsert_vertex(Vertex("b"))
+    graph.append_edge(Edge("a", "b", "rel", description="d", _chunk_id="c1"))
+    data = GraphExtractionCacheValue([graph, MemoryGraph()]).serialize()
+    graphs = GraphExtractionCacheValue.from_bytes(data).value
+    assert len(graphs) == 2
+    assert graphs[1].vertex_count == 0
+    assert graphs[0].get_vertex("a").name == "A"
+    assert graphs[0].get_vertex("a").get_prop("description") == "中文"
+    assert graphs[0].get_vertex("a").get_prop("_embedding") == [0.5, 1.0]
+    assert graphs[0].get_vertex("b").get_prop("_embedding") is None
+    edge = next(graphs[0].edges())
+    assert (edge.sid, edge.tid, edge.name) == ("a", "b", "rel")
+    assert edge.props == {"description": "d", "_chunk_id": "c1"}
+
+
+@pytest.mark.asyncio
+async def test_only_extract_changed_texts(cache, extractor):
+    graphs_list = await cache.abatch_extract(["x", "y", "x"], extractor.batch_extract)
+    assert [graphs[0].has_vertex("x") for graphs in graphs_list] == [True, False, True]
+    assert extractor.calls == [["x", "y"]]
+
+    graphs_list = await cache.abatch_extract(["x", "z", "y"], extractor.batch_extract)
+    assert extractor.calls[1:] == [["z"]]
+    assert [sorted(v.vid for v in graphs[0].vertices()) for graphs in graphs_list] == [
+        ["b", "x"],
+        ["b", "z"],
+        ["b", "y"],
+    ]
+    assert cache.get_stats() == {"hits": 3, "misses": 3, "hit_ratio": 0.5}
+
+    # The results of the other prompt versions are not used
+    storage = cache._storage
+    other = GraphExtractionCache(storage, "v2", "test_model")
+    await other.abatch_extract(["x"], extractor.batch_extract)
+    assert extractor.calls[2:] == [["x"]]
+
+
+@pytest.mark.asyncio
+async def test_cache_embeddings(cache, extractor):
+    embedder = MockEmbedder()
+    # Cached without embeddings
+    await cache.abatch_extract(["x"], extractor.batch_extract)
+
+    graphs_list = await cache.abatch_extract(
+        ["x", "yy"], extractor.batch_extract, embedder.batch_embed
+    )
+    # "x" is embedded without extraction
+    assert extractor.calls == [["x"], ["yy"]]
+    assert embedder.calls == 2
+    assert graphs_list[1][0].get_vertex("yy").get_prop("_embedding") == [2.0, 0.5]
+
+    graphs_list = await cache.abatch_extract(
+        ["yy", "x"], extractor.batch_extract, embedder.batch_embed
+    )
+    assert len(extractor.calls) == 2
+    assert embedder.calls == 2
+    assert graphs_list[1][0].get_vertex("x").get_prop("_embedding") == [1.0, 0.5]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("embed", [False, True])
+async def test_duplicate_texts_not_share_graphs(cache, extractor, embed):
+    embed_fn = MockEmbedder().batch_embed if embed else None
+    chunk_ids = ["c1", "c2"]
+    graphs_list = await cache.abatch_extract(
+        ["x", "x"], extractor.batch_extract, embed_fn
+    )
+    assert extractor.calls == [["x"]]
+    # Set the chunk id of the edges like loading the triplet graph
+    for chunk_id, graphs in zip(chunk_ids, graphs_list):
+        for edge in graphs[0].edges():
+            edge.set_prop("_chunk_id", chunk_id)
+    assert [next(g[0].edges()).get_prop("_chunk_id") for g in graphs_list] == chunk_ids
+    assert graphs_list[1][0].get_vertex("x").get_prop("description") == "desc"
+    if embed:
+        assert graphs_list[1][0].get_vertex("x").get_prop("_embedding") == [1.0, 0.5]
+
+
+@pytest.mark.asyncio
+async def test_extract_error(cache):
+    async def extract(texts):
+        return []
+
+    with pytest.raises(ValueError):
+        await cache.abatch_extract(["x"], extract)
@@ -90,6 +90,15 @@ def _import_full_text() -> Tuple[Type, Type]:
     return ElasticDocumentStore, ElasticsearchStoreConfig
 
 
+def _import_local_full_text() -> Tuple[Type, Type]:
+    from derisk_ext.storage.full_text.local_bm25 import (
+        LocalFullTextConfig,
+        LocalFullTextStore,
+    )
+
+    return LocalFullTextStore, LocalFullTextConfig
+
+
 def _select_rag_storage(name: str) -> Tuple[Type, Type]:
     if name == "Chroma":
         return _import_chroma()
@@ -111,6 +120,8 @@ def _select_rag_storage(name: str) -> Tuple[Type, Type]:
         return _import_openspg()
     elif name == "FullText":
         return _import_full_text()
+    elif name == "LocalFullText":
+        return _import_local_full_text()
     else:
         raise AttributeError(f"Could not find: {name}")
 
@@ -131,6 +142,7 @@ def scan_storage_configs():
         "derisk_ext.storage.vector_store",
         "derisk_ext.storage.knowledge_graph",
         "derisk_ext.storage.graph_store",
+        "derisk_ext.storage.full_text",
     ]
 
     scanner = ModelScanner[IndexStoreConfig]()
@@ -155,6 +167,6 @@ __vector_store__ = [
 
 __knowledge_graph__ = ["KnowledgeGraph", "CommunitySummaryKnowledgeGraph", "OpenSPG"]
 
-__document_store__ = ["FullText"]
+__document_store__ = ["FullText", "LocalFullText"]
 
 __all__ = __vector_store__ + __knowledge_graph__ + __document_store__
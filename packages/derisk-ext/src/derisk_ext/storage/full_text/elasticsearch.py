@@ -3,23 +3,64 @@
 import json
 import os
 from concurrent.futures import Executor, ThreadPoolExecutor
-from typing import List, Optional
+from dataclasses import dataclass, field
+from typing import List, Optional, Union
 
 from derisk.core import Chunk
 from derisk.storage.base import IndexStoreConfig, logger
-from derisk.storage.full_text.base import FullTextStoreBase
+from derisk.storage.full_text.base import FullTextConfig, FullTextStoreBase
 from derisk.storage.vector_store.filters import MetadataFilters
 from derisk.util import string_utils
 from derisk.util.executor_utils import blocking_func_to_async
+from derisk.util.i18n_utils import _
 from derisk_ext.storage.vector_store.elastic_store import ElasticsearchStoreConfig
 
 
+@dataclass
+class ElasticsearchFullTextConfig(FullTextConfig):
+    """Elasticsearch full text store config."""
+
+    __type__ = "elasticsearch"
+
+    uri: Optional[str] = field(
+        default=None,
+        metadata={
+            "help": _("The uri of elasticsearch, if not set, will use the env var."),
+        },
+    )
+    port: Optional[str] = field(
+        default=None,
+        metadata={
+            "help": _("The port of elasticsearch, if not set, will use the env var."),
+        },
+    )
+    user: Optional[str] = field(
+        default=None,
+        metadata={
+            "help": _("The user of elasticsearch, if not set, will use the env var."),
+        },
+    )
+    password: Optional[str] = field(
+        default=None,
+        metadata={
+            "help": _(
+                "The password of elasticsearch, if not set, will use the env var."
+            ),
+            "tags": "privacy",
+        },
+    )
+
+    def create_store(self, **kwargs) -> "ElasticDocumentStore":
+        """Create index store."""
+        return ElasticDocumentStore(self, **kwargs)
+
+
 class ElasticDocumentStore(FullTextStoreBase):
     """Elasticsearch index store."""
 
     def __init__(
         self,
-        es_config: ElasticsearchStoreConfig,
+        es_config: Union[ElasticsearchStoreConfig, ElasticsearchFullTextConfig],
         name: Optional[str] = "derisk",
         k1: Optional[float] = 2.0,
         b: Optional[float] = 0.75,
@@ -0,0 +1,580 @@
+"""Local full text store, an on-disk inverted index with BM25 scoring.
+
+It is an alternative to Elasticsearch for the deployments which only need keyword
+recall. The index of a collection is a list of immutable segments:
+
+- ``terms.json``: term -> [offset, document frequency] of the posting list.
+- ``doc_ids.npy``/``tfs.npy``: the concatenated posting lists (document ordinal
+  and term frequency), memory-mapped when searching.
+- ``doc_lens.npy``: the number of tokens of each document.
+- ``docs.jsonl``/``doc_offsets.npy``: the chunks, read by offset for the hits only.
+- ``chunk_ids.json``: the chunk id of each document ordinal.
+
+Adding chunks writes a new segment, deleting chunks writes tombstones to the
+manifest. The segments are merged by tiers: a tier holds the segments of
+``merge_factor ** n`` to ``merge_factor ** (n + 1)`` live documents, and when a tier
+has ``merge_factor`` segments they are merged to one of the next tier, so each
+document is rewritten a logarithmic number of times. A segment with too many
+deleted documents is rewritten alone.
+"""
+
+import hashlib
+import json
+import logging
+import math
+import os
+import re
+import shutil
+import threading
+import unicodedata
+from collections import Counter
+from concurrent.futures import Executor
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+from derisk.configs.model_config import PILOT_PATH, resolve_root_path
+from derisk.core import Chunk
+from derisk.core.awel.flow import Parameter, ResourceCategory, register_resource
+from derisk.storage.full_text.base import FullTextConfig, FullTextStoreBase
+from derisk.storage.vector_store.filters import (
+    FilterCondition,
+    FilterOperator,
+    MetadataFilter,
+    MetadataFilters,
+)
+from derisk.util.i18n_utils import _
+
+logger = logging.getLogger(__name__)
+
+_CJK_RANGES = "\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af"
+_CJK_PATTERN = re.compile(f"[{_CJK_RANGES}]+")
+_TOKEN_PATTERN = re.compile(f"[{_CJK_RANGES}]+|[^\\W_{_CJK_RANGES}]+")
+_MANIFEST = "manifest.json"
+
+
+def tokenize(text: str) -> List[str]:
+    """Split the text to the terms of the inverted index.
+
+    The text is NFKC normalized and lower-cased, the runs of CJK characters are
+    split to unigrams and bigrams, so both single characters and words can be
+    matched without a dictionary.
+    """
+    tokens: List[str] = []
+    text = unicodedata.normalize("NFKC", text).lower()
+    for match in _TOKEN_PATTERN.finditer(text):
+        word = match.group()
+        if _CJK_PATTERN.match(word):
+            tokens.extend(word)
+            tokens.extend(word[i : i + 2] for i in range(len(word) - 1))
+        else:
+            tokens.append(word)
+    return tokens
+
+
+def _load_array(path: str) -> np.ndarray:
+    try:
+        return np.load(path, mmap_mode="r")
+    except ValueError:
+        # Empty arrays can not be memory-mapped
+        return np.load(path)
+
+
+def _match_filter(metadata: Dict[str, Any], metadata_filter: MetadataFilter) -> bool:
+    op = metadata_filter.operator
+    if op == FilterOperator.EXISTS:
+        return metadata_filter.key in metadata
+    if metadata_filter.key not in metadata:
+        return op == FilterOperator.NIN or op == FilterOperator.NE
+    value = metadata[metadata_filter.key]
+    expected = metadata_filter.value
+    try:
+        if op == FilterOperator.EQ:
+            return value == expected
+        elif op == FilterOperator.NE:
+            return value != expected
+        elif op == FilterOperator.GT:
+            return value > expected
+        elif op == FilterOperator.LT:
+            return value < expected
+        elif op == FilterOperator.GTE:
+            return value >= expected
+        elif op == FilterOperator.LTE:
+            return value <= expected
+        elif op == FilterOperator.IN:
+            return value in expected
+        elif op == FilterOperator.NIN:
+            return value not in expected
+    except TypeError:
+        return False
+    raise ValueError(f"Unsupported filter operator: {op}")
+
+
+def _match_filters(metadata: Dict[str, Any], filters: MetadataFilters) -> bool:
+    matches = (_match_filter(metadata, f) for f in filters.filters)
+    if filters.condition == FilterCondition.OR:
+        return any(matches)
+    return all(matches)
+
+
+class _Segment:
+    """An immutable segment of the inverted index."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.name = os.path.basename(path)
+        with open(os.path.join(path, "terms.json"), encoding="utf-8") as f:
+            self.terms: Dict[str, List[int]] = json.load(f)
+        with open(os.path.join(path, "chunk_ids.json"), encoding="utf-8") as f:
+            self.chunk_ids: List[str] = json.load(f)
+        self.doc_ids = _load_array(os.path.join(path, "doc_ids.npy"))
+        self.tfs = _load_array(os.path.join(path, "tfs.npy"))
+        self.doc_lens = np.load(os.path.join(path, "doc_lens.npy"))
+        self.doc_offsets = np.load(os.path.join(path, "doc_offsets.npy"))
+
+    @property
+    def num_docs(self) -> int:
+        return len(self.chunk_ids)
+
+    def df(self, term: str) -> int:
+        """Return the document frequency of the term."""
+        posting = self.terms.get(term)
+        return posting[1] if posting else 0
+
+    def postings(self, term: str) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """Return the document ordinals and term frequencies of the term."""
+        posting = self.terms.get(term)
+        if not posting:
+            return None
+        offset, df = posting
+        return self.doc_ids[offset : offset + df], self.tfs[offset : offset + df]
+
+    def read_docs(self, ordinals: List[int]) -> List[Dict[str, Any]]:
+        """Read the stored chunks of the documents."""
+        docs = []
+        with open(os.path.join(self.path, "docs.jsonl"), "rb") as f:
+            for ordinal in ordinals:
+                f.seek(int(self.doc_offsets[ordinal]))
+                docs.append(json.loads(f.readline()))
+        return docs
+
+    @classmethod
+    def write(cls, path: str, chunks: List[Chunk]) -> "_Segment":
+        """Build a segment from the chunks."""
+        tmp_path = path + ".tmp"
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        os.makedirs(tmp_path)
+        postings: Dict[str, List[Tuple[int, int]]] = {}
+        doc_lens = np.zeros(len(chunks), dtype=np.int32)
+        doc_offsets = np.zeros(len(chunks), dtype=np.int64)
+        with open(os.path.join(tmp_path, "docs.jsonl"), "wb") as f:
+            for ordinal, chunk in enumerate(chunks):
+                tokens = tokenize(chunk.content or "")
+                doc_lens[ordinal] = len(tokens)
+                for term, tf in Counter(tokens).items():
+                    postings.setdefault(term, []).append((ordinal, tf))
+                doc_offsets[ordinal] = f.tell()
+                doc = {
+                    "chunk_id": chunk.chunk_id,
+                    "content": chunk.content,
+                    "metadata": chunk.metadata,
+                }
+                f.write(json.dumps(doc, ensure_ascii=False).encode("utf-8") + b"\n")
+
+        terms: Dict[str, List[int]] = {}
+        doc_ids: List[int] = []
+        tfs: List[int] = []
+        for term, term_postings in postings.items():
+            terms[term] = [len(doc_ids), len(term_postings)]
+            for ordinal, tf in term_postings:
+                doc_ids.append(ordinal)
+                tfs.append(tf)
+        np.save(os.path.join(tmp_path, "doc_ids.npy"), np.array(doc_ids, np.int32))
+        np.save(os.path.join(tmp_path, "tfs.npy"), np.array(tfs, np.int32))
+        np.save(os.path.join(tmp_path, "doc_lens.npy"), doc_lens)
+        np.save(os.path.join(tmp_path, "doc_offsets.npy"), doc_offsets)
+        with open(os.path.join(tmp_path, "terms.json"), "w", encoding="utf-8") as f:
+            json.dump(terms, f, ensure_ascii=False)
+        with open(os.path.join(tmp_path, "chunk_ids.json"), "w", encoding="utf-8") as f:
+            json.dump([chunk.chunk_id for chunk in chunks], f)
+        os.replace(tmp_path, path)
+        return cls(path)
+
+
+@register_resource(
+    _("Local Full Text Config"),
+    "local_full_text_config",
+    category=ResourceCategory.FULL_TEXT,
+    description=_("Local full text store config."),
+    parameters=[
+        Parameter.build_from(
+            _("Persist Path"),
+            "persist_path",
+            str,
+            description=_("the persist path of the full text index."),
+            optional=True,
+            default=None,
+        ),
+    ],
+)
+@dataclass
+class LocalFullTextConfig(FullTextConfig):
+    """Local full text store config."""
+
+    __type__ = "local_bm25"
+
+    persist_path: Optional[str] = field(
+        default=os.getenv("LOCAL_FULL_TEXT_PERSIST_PATH", None),
+        metadata={
+            "help": _("The persist path of the full text index."),
+        },
+    )
+    merge_factor: int = field(
+        default=10,
+        metadata={
+            "help": _("The number of segments of the same tier merged to one segment."),
+        },
+    )
+    merge_deleted_ratio: float = field(
+        default=0.3,
+        metadata={
+            "help": _(
+                "Rewrite a segment when the ratio of its deleted documents exceeds it."
+            ),
+        },
+    )
+
+    def create_store(self, **kwargs) -> "LocalFullTextStore":
+        """Create index store."""
+        return LocalFullTextStore(self, **kwargs)
+
+
+class LocalFullTextStore(FullTextStoreBase):
+    """Local full text store with BM25 scoring."""
+
+    def __init__(
+        self,
+        config: LocalFullTextConfig,
+        name: Optional[str] = "derisk",
+        k1: Optional[float] = 2.0,
+        b: Optional[float] = 0.75,
+        executor: Optional[Executor] = None,
+    ):
+        """Create a local full text store.
+
+        Args:
+            config(LocalFullTextConfig): The store config.
+            name(str): The index name.
+            k1(Optional[float]): Controls non-linear term frequency normalization
+                (saturation). The default value is 2.0.
+            b(Optional[float]): Controls to what degree document length normalizes
+                tf values. The default value is 0.75.
+            executor(Optional[Executor]): The executor of the async methods.
+        """
+        super().__init__(executor)
+        self._config = config
+        self._k1 = k1 or 2.0
+        self._b = b or 0.75
+        name = name or "derisk"
+        if not re.fullmatch(r"[A-Za-z0-9_\-]+", name):
+            name = hashlib.sha256(name.encode("utf-8")).hexdigest()
+        persist_path = config.persist_path or os.path.join(PILOT_PATH, "data")
+        self._index_path = os.path.join(
+            resolve_root_path(persist_path), "full_text", name
+        )
+        self._lock = threading.RLock()
+        self._load()
+
+    def get_config(self) -> LocalFullTextConfig:
+        """Get the store config."""
+        return self._config
+
+    def _load(self):
+        self._segments: Dict[str, _Segment] = {}
+        self._deleted: Dict[str, Set[int]] = {}
+        # chunk id -> (segment name, document ordinal)
+        self._locations: Dict[str, Tuple[str, int]] = {}
+        self._total_len = 0
+        self._next_segment = 0
+        manifest_path = os.path.join(self._index_path, _MANIFEST)
+        if not os.path.exists(manifest_path):
+            return
+        with open(manifest_path, encoding="utf-8") as f:
+            manifest = json.load(f)
+        self._next_segment = manifest["next_segment"]
+        for seg_name in manifest["segments"]:
+            segment = _Segment(os.path.join(self._index_path, seg_name))
+            self._segments[seg_name] = segment
+            self._deleted[seg_name] = set(manifest["deleted"].get(seg_name, []))
+            for ordinal, chunk_id in enumerate(segment.chunk_ids):
+                if ordinal not in self._deleted[seg_name]:
+                    self._locations[chunk_id] = (seg_name, ordinal)
+                    self._total_len += int(segment.doc_lens[ordinal])
+
+    def _save_manifest(self):
+        manifest = {
+            "segments": list(self._segments.keys()),
+            "next_segment": self._next_segment,
+            "deleted": {k: sorted(v) for k, v in self._deleted.items() if v},
+        }
+        manifest_path = os.path.join(self._index_path, _MANIFEST)
+        with open(manifest_path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(manifest, f)
+        os.replace(manifest_path + ".tmp", manifest_path)
+
+    def _delete_chunk(self, chunk_id: str) -> bool:
+        location = self._locations.pop(chunk_id, None)
+        if location is None:
+            return False
+        seg_name, ordinal = location
+        self._deleted[seg_name].add(ordinal)
+        self._total_len -= int(self._segments[seg_name].doc_lens[ordinal])
+        return True
+
+    def _add_segment(self, chunks: List[Chunk]) -> _Segment:
+        seg_name = f"seg_{self._next_segment:08d}"
+        self._next_segment += 1
+        segment = _Segment.write(os.path.join(self._index_path, seg_name), chunks)
+        self._segments[seg_name] = segment
+        self._deleted[seg_name] = set()
+        for ordinal, chunk_id in enumerate(segment.chunk_ids):
+            self._locations[chunk_id] = (seg_name, ordinal)
+            self._total_len += int(segment.doc_lens[ordinal])
+        return segment
+
+    def load_document(self, chunks: List[Chunk]) -> List[str]:
+        """Add the chunks to the index, the chunks with the same id are replaced.
+
+        Args:
+            chunks(List[Chunk]): document chunks.
+
+        Return:
+            List[str]: chunk ids.
+        """
+        # The last one wins if the same chunk id appears more than once
+        unique_chunks = list({chunk.chunk_id: chunk for chunk in chunks}.values())
+        if not unique_chunks:
+            return []
+        with self._lock:
+            os.makedirs(self._index_path, exist_ok=True)
+            for chunk in unique_chunks:
+                self._delete_chunk(chunk.chunk_id)
+            self._add_segment(unique_chunks)
+            self._save_manifest()
+            self._maybe_merge()
+        return [chunk.chunk_id for chunk in chunks]
+
+    def delete_by_ids(self, ids: str) -> List[str]:
+        """Delete the chunks by ids.
+
+        Args:
+            ids(str): The chunk ids to delete, separated by comma.
+        """
+        id_list = [chunk_id for chunk_id in ids.split(",") if chunk_id]
+        with self._lock:
+            deleted = [chunk_id for chunk_id in id_list if self._delete_chunk(chunk_id)]
+            if deleted:
+                self._save_manifest()
+                self._maybe_merge()
+        return id_list
+
+    def _num_live(self, segment: _Segment) -> int:
+        return segment.num_docs - len(self._deleted[segment.name])
+
+    @staticmethod
+    def _tier(num_docs: int, merge_factor: int) -> int:
+        tier = 0
+        while num_docs >= merge_factor ** (tier + 1):
+            tier += 1
+        return tier
+
+    def _maybe_merge(self):
+        for segment in list(self._segments.values()):
+            num_deleted = len(self._deleted[segment.name])
+            if num_deleted > segment.num_docs * self._config.merge_deleted_ratio:
+                self._merge_segments([segment])
+        merge_factor = max(self._config.merge_factor, 2)
+        while True:
+            tiers: Dict[int, List[_Segment]] = {}
+            for segment in self._segments.values():
+                tier = self._tier(self._num_live(segment), merge_factor)
+                tiers.setdefault(tier, []).append(segment)
+            full_tiers = [
+                tier for tier, segs in tiers.items() if len(segs) >= merge_factor
+            ]
+            if not full_tiers:
+                return
+            # Merge the oldest segments of the lowest full tier, the merged
+            # segment belongs to a higher tier
+            self._merge_segments(tiers[min(full_tiers)][:merge_factor])
+
+    def _merge_segments(self, segments: List[_Segment]) -> Optional[_Segment]:
+        """Merge the segments to one and drop the deleted documents."""
+        live_chunks: List[Chunk] = []
+        for segment in segments:
+            deleted = self._deleted.pop(segment.name)
+            del self._segments[segment.name]
+            ordinals = [i for i in range(segment.num_docs) if i not in deleted]
+            for ordinal in ordinals:
+                self._total_len -= int(segment.doc_lens[ordinal])
+            for doc in segment.read_docs(ordinals):
+                live_chunks.append(
+                    Chunk(
+                        chunk_id=doc["chunk_id"],
+                        content=doc["content"],
+                        metadata=doc["metadata"],
+                    )
+                )
+        merged = self._add_segment(live_chunks) if live_chunks else None
+        self._save_manifest()
+        for segment in segments:
+            shutil.rmtree(segment.path, ignore_errors=True)
+        logger.info(
+            f"Merged {len(segments)} segments of {self._index_path}, "
+            f"{len(live_chunks)} documents left"
+        )
+        return merged
+
+    def merge(self):
+        """Merge all the segments to one and drop the deleted documents."""
+        with self._lock:
+            if self._segments:
+                self._merge_segments(list(self._segments.values()))
+
+    def _search(
+        self,
+        text: str,
+        topk: int,
+        score_threshold: Optional[float] = None,
+        filters: Optional[MetadataFilters] = None,
+    ) -> List[Chunk]:
+        terms = set(tokenize(text))
+        with self._lock:
+            num_docs = len(self._locations)
+            if not terms or num_docs == 0 or topk <= 0:
+                return []
+            avgdl = max(self._total_len / num_docs, 1.0)
+            idf: Dict[str, float] = {}
+            for term in terms:
+                df = sum(seg.df(term) for seg in self._segments.values())
+                if df > 0:
+                    idf[term] = math.log(1 + (num_docs - df + 0.5) / (df + 0.5))
+
+            candidates: List[Tuple[float, _Segment, int]] = []
+            for segment in self._segments.values():
+                scores = self._score_segment(segment, idf, avgdl)
+                if scores is None:
+                    continue
+                deleted = self._deleted[segment.name]
+                if deleted:
+                    scores[list(deleted)] = 0
+                hits = np.flatnonzero(scores > 0)
+                if score_threshold is not None:
+                    hits = hits[scores[hits] >= score_threshold]
+                if not filters and len(hits) > topk:
+                    # Only the top k of each segment can be in the final top k
+                    hits = hits[np.argpartition(-scores[hits], topk - 1)[:topk]]
+                candidates.extend((float(scores[i]), segment, int(i)) for i in hits)
+            candidates.sort(key=lambda x: x[0], reverse=True)
+
+            results: List[Chunk] = []
+            for score, segment, ordinal in candidates:
+                doc = segment.read_docs([ordinal])[0]
+                if filters and not _match_filters(doc["metadata"] or {}, filters):
+                    continue
+                results.append(
+                    Chunk(
+                        chunk_id=doc["chunk_id"],
+                        content=doc["content"],
+                        metadata=doc["metadata"],
+                        score=score,
+                    )
+                )
+                if len(results) >= topk:
+                    break
+        return results
+
+    def _score_segment(
+        self, segment: _Segment, idf: Dict[str, float], avgdl: float
+    ) -> Optional[np.ndarray]:
+        scores: Optional[np.ndarray] = None
+        for term, term_idf in idf.items():
+            postings = segment.postings(term)
+            if postings is None:
+                continue
+            doc_ids, tfs = postings
+            tf = tfs.astype(np.float32)
+            norm = self._k1 * (
+                1 - self._b + self._b * segment.doc_lens[doc_ids] / avgdl
+            )
+            if scores is None:
+                scores = np.zeros(segment.num_docs, dtype=np.float32)
+            scores[doc_ids] += term_idf * tf * (self._k1 + 1) / (tf + norm)
+        return scores
+
+    def similar_search(
+        self, text: str, topk: int, filters: Optional[MetadataFilters] = None
+    ) -> List[Chunk]:
+        """Search the chunks matching the text.
+
+        Args:
+            text(str): text.
+            topk(int): topk.
+            filters(MetadataFilters): filters.
+
+        Return:
+            List[Chunk]: similar text.
+        """
+        return self._search(text, topk, filters=filters)
+
+    def similar_search_with_scores(
+        self,
+        text,
+        topk: int = 10,
+        score_threshold: float = 0.3,
+        filters: Optional[MetadataFilters] = None,
+    ) -> List[Chunk]:
+        """Search the chunks matching the text with BM25 scores.
+
+        Args:
+            text(str): text.
+            topk(int): top k.
+            score_threshold(float): the min BM25 score.
+            filters(MetadataFilters): filters.
+
+        Return:
+            List[Chunk]: the chunks sorted by the scores.
+        """
+        return self._search(text, topk, score_threshold, filters)
+
+    def full_text_search(
+        self, text: str, topk: int, filters: Optional[MetadataFilters] = None
+    ) -> List[Chunk]:
+        """Full text search in the local index."""
+        return self._search(text, topk, filters=filters)
+
+    def is_support_full_text_search(self) -> bool:
+        """Support full text search."""
+        return True
+
+    def vector_name_exists(self) -> bool:
+        """Whether the index exists."""
+        return os.path.exists(os.path.join(self._index_path, _MANIFEST))
+
+    def truncate(self) -> List[str]:
+        """Remove all the chunks of the index."""
+        with self._lock:
+            chunk_ids = list(self._locations.keys())
+            self.delete_vector_name(self._index_path)
+        return chunk_ids
+
+    def delete_vector_name(self, index_name: str):
+        """Delete the index.
+
+        Args:
+            index_name(str): The name of index to delete.
+        """
+        with self._lock:
+            shutil.rmtree(self._index_path, ignore_errors=True)
+            self._load()
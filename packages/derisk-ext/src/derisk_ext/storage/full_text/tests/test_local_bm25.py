@@ -0,0 +1,165 @@
+import pytest
+
+from derisk.core import Chunk
+from derisk.storage.vector_store.filters import (
+    FilterCondition,
+    FilterOperator,
+    MetadataFilter,
+    MetadataFilters,
+)
+
+from ..local_bm25 import LocalFullTextConfig, LocalFullTextStore, tokenize
+
+_CHUNKS = [
+    Chunk(
+        chunk_id="c1",
+        content="Disk is full on host-1, clean the logs",
+        metadata={"source": "runbook", "level": 1},
+    ),
+    Chunk(
+        chunk_id="c2",
+        content="CPU usage is high on host-2",
+        metadata={"source": "alert", "level": 2},
+    ),
+    Chunk(
+        chunk_id="c3",
+        content="磁盘空间已满，请清理日志文件",
+        metadata={"source": "runbook", "level": 3},
+    ),
+    Chunk(
+        chunk_id="c4",
+        content="The disk of the database is slow, disk io is high",
+        metadata={"source": "alert", "level": 4},
+    ),
+]
+
+
+@pytest.fixture
+def config(tmp_path):
+    return LocalFullTextConfig(persist_path=str(tmp_path))
+
+
+@pytest.fixture
+def store(config):
+    store = LocalFullTextStore(config, name="test_index")
+    store.load_document(_CHUNKS)
+    return store
+
+
+def test_tokenize():
+    assert tokenize("Disk FULL, host-1") == ["disk", "full", "host", "1"]
+    assert tokenize("磁盘已满") == [
+        "磁",
+        "盘",
+        "已",
+        "满",
+        "磁盘",
+        "盘已",
+        "已满",
+    ]
+    # Full width characters are normalized
+    assert tokenize("ＣＰＵ") == ["cpu"]
+
+
+def test_search(store: LocalFullTextStore):
+    chunks = store.similar_search_with_scores("disk full", 10, 0.0)
+    assert [c.chunk_id for c in chunks] == ["c1", "c4"]
+    assert chunks[0].score > chunks[1].score
+    assert chunks[0].metadata == {"source": "runbook", "level": 1}
+
+    chunks = store.full_text_search("磁盘 日志", 10)
+    assert [c.chunk_id for c in chunks] == ["c3"]
+    assert store.is_support_full_text_search()
+
+    assert store.similar_search_with_scores("disk", 10, 100.0) == []
+    assert store.similar_search("not exist", 10) == []
+
+
+def test_search_with_filters(store: LocalFullTextStore):
+    filters = MetadataFilters(
+        filters=[MetadataFilter(key="source", value="alert")],
+    )
+    chunks = store.full_text_search("disk high", 10, filters)
+    assert [c.chunk_id for c in chunks] == ["c4", "c2"]
+
+    filters = MetadataFilters(
+        condition=FilterCondition.OR,
+        filters=[
+            MetadataFilter(key="level", operator=FilterOperator.LT, value=2),
+            MetadataFilter(key="level", operator=FilterOperator.IN, value=[4]),
+        ],
+    )
+    chunks = store.full_text_search("disk high", 10, filters)
+    assert {c.chunk_id for c in chunks} == {"c1", "c4"}
+
+
+@pytest.mark.asyncio
+async def test_async_search(store: LocalFullTextStore):
+    chunks = await store.afull_text_search("cpu", 10)
+    assert [c.chunk_id for c in chunks] == ["c2"]
+
+
+def test_delete_and_update(store: LocalFullTextStore):
+    store.delete_by_ids("c1,not_exist")
+    assert [c.chunk_id for c in store.full_text_search("disk", 10)] == ["c4"]
+
+    store.load_document([Chunk(chunk_id="c2", content="Disk usage is high on host-2")])
+    chunks = store.full_text_search("disk", 10)
+    assert {c.chunk_id for c in chunks} == {"c2", "c4"}
+    assert store.full_text_search("cpu", 10) == []
+
+
+def test_reopen_from_disk(store: LocalFullTextStore, config):
+    store.delete_by_ids("c1")
+    reopened = LocalFullTextStore(config, name="test_index")
+    assert reopened.vector_name_exists()
+    assert [c.chunk_id for c in reopened.full_text_search("disk", 10)] == ["c4"]
+    assert reopened.full_text_search("磁盘", 10)[0].chunk_id == "c3"
+
+
+def test_merge_segments(config):
+    config.merge_factor = 4
+    store = LocalFullTextStore(config, name="merge_index")
+    for i, chunk in enumerate(_CHUNKS):
+        store.load_document([chunk])
+    # The 4 segments of the first tier are merged
+    assert len(store._segments) == 1
+    store.delete_by_ids("c1,c2")
+    # Too many deleted documents, rewritten
+    assert len(store._segments) == 1
+    assert sum(seg.num_docs for seg in store._segments.values()) == 2
+    assert [c.chunk_id for c in store.full_text_search("disk", 10)] == ["c4"]
+
+    reopened = LocalFullTextStore(config, name="merge_index")
+    assert [c.chunk_id for c in reopened.full_text_search("disk", 10)] == ["c4"]
+
+
+def test_tiered_merge_postings(config, monkeypatch):
+    config.merge_factor = 4
+    store = LocalFullTextStore(config, name="tiered_index")
+    rewritten = []
+    merge_segments = store._merge_segments
+
+    def _merge_segments(segments):
+        merged = merge_segments(segments)
+        rewritten.append(len(merged.doc_ids))
+        return merged
+
+    monkeypatch.setattr(store, "_merge_segments", _merge_segments)
+    for i in range(64):
+        store.load_document([Chunk(chunk_id=f"c{i}", content=f"term{i}")])
+
+    # Each merge rewrites the postings of 4 segments of the same tier, each
+    # posting is rewritten once per tier instead of once per merge
+    assert rewritten == ([4] * 4 + [16]) * 4 + [64]
+    assert sum(rewritten) == 64 * 3
+    assert [seg.num_docs for seg in store._segments.values()] == [64]
+    assert [c.chunk_id for c in store.full_text_search("term7", 10)] == ["c7"]
+
+
+def test_truncate(store: LocalFullTextStore):
+    assert sorted(store.truncate()) == ["c1", "c2", "c3", "c4"]
+    assert not store.vector_name_exists()
+    assert store.full_text_search("disk", 10) == []
+    store.load_document(_CHUNKS[:1])
+    assert [c.chunk_id for c in store.full_text_search("disk", 10)] == ["c1"]
@@ -3,7 +3,7 @@
 import logging
 from abc import ABC, abstractmethod
 from dataclasses import dataclass
-from typing import AsyncGenerator, Dict, Iterator, List, Optional, Union
+from typing import AsyncGenerator, Dict, Iterator, List, Optional, Tuple, Union
 
 from derisk.storage.graph_store.base import GraphStoreBase
 from derisk.storage.graph_store.graph import (
@@ -18,6 +18,35 @@ from derisk.storage.knowledge_graph.base import ParagraphChunk
 
 logger = logging.getLogger(__name__)
 
+# The label, the source vertex type and the target vertex type of each edge type
+_EDGE_SCHEMAS: Dict[str, Tuple[str, str, str]] = {
+    GraphElemType.DOCUMENT_INCLUDE_CHUNK.value: (
+        GraphElemType.INCLUDE.value,
+        GraphElemType.DOCUMENT.value,
+        GraphElemType.CHUNK.value,
+    ),
+    GraphElemType.CHUNK_INCLUDE_CHUNK.value: (
+        GraphElemType.INCLUDE.value,
+        GraphElemType.CHUNK.value,
+        GraphElemType.CHUNK.value,
+    ),
+    GraphElemType.CHUNK_INCLUDE_ENTITY.value: (
+        GraphElemType.INCLUDE.value,
+        GraphElemType.CHUNK.value,
+        GraphElemType.ENTITY.value,
+    ),
+    GraphElemType.CHUNK_NEXT_CHUNK.value: (
+        GraphElemType.NEXT.value,
+        GraphElemType.CHUNK.value,
+        GraphElemType.CHUNK.value,
+    ),
+    GraphElemType.RELATION.value: (
+        GraphElemType.RELATION.value,
+        GraphElemType.ENTITY.value,
+        GraphElemType.ENTITY.value,
+    ),
+}
+
 
 @dataclass
 class Community:
@@ -49,6 +78,15 @@ class GraphStoreAdapter(ABC):
     async def discover_communities(self, **kwargs) -> List[str]:
         """Run community discovery."""
 
+    async def discover_community_changes(
+        self, **kwargs
+    ) -> Tuple[List[str], Optional[List[str]]]:
+        """Run community discovery, return the changed and the removed ids.
+
+        The removed ids are None if all the communities are discovered again.
+        """
+        return await self.discover_communities(**kwargs), None
+
     @abstractmethod
     async def get_community(self, community_id: str) -> Community:
         """Get community."""
@@ -111,6 +149,40 @@ class GraphStoreAdapter(ABC):
     def upsert_graph(self, graph: Graph) -> None:
         """Insert graph."""
 
+    def batch(self, max_batch_size: int = 1000) -> "GraphWriteBatch":
+        """Create a write batch which buffers the upserts and flushes them in bulk.
+
+        Examples:
+            .. code-block:: python
+
+                with adapter.batch() as batch:
+                    for graph in graphs:
+                        batch.upsert_graph(graph)
+        """
+        return GraphWriteBatch(self, max_batch_size)
+
+    def upsert_batch(
+        self,
+        vertices: Dict[str, List[Union[Vertex, ParagraphChunk]]],
+        edges: Dict[str, List[Edge]],
+    ) -> None:
+        """Upsert the vertices and the edges of a write batch.
+
+        The vertices and the edges are grouped by their vertex_type and edge_type,
+        each group is upserted in bulk. The elements of the unknown types are
+        ignored.
+        """
+        if vertices.get(GraphElemType.ENTITY.value):
+            self.upsert_entities(iter(vertices[GraphElemType.ENTITY.value]))
+        if vertices.get(GraphElemType.CHUNK.value):
+            self.upsert_chunks(iter(vertices[GraphElemType.CHUNK.value]))
+        if vertices.get(GraphElemType.DOCUMENT.value):
+            self.upsert_documents(iter(vertices[GraphElemType.DOCUMENT.value]))
+        for edge_type, type_edges in edges.items():
+            if edge_type in _EDGE_SCHEMAS and type_edges:
+                label, src_type, dst_type = _EDGE_SCHEMAS[edge_type]
+                self.upsert_edge(iter(type_edges), label, src_type, dst_type)
+
     @abstractmethod
     def upsert_doc_include_chunk(
         self,
@@ -268,6 +340,151 @@ class GraphStoreAdapter(ABC):
         """Execute a stream query."""
 
 
+class GraphWriteBatch:
+    """Buffer the upserts of a graph store adapter and flush them in bulk.
+
+    The vertices and the edges are deduplicated and grouped by their types, then
+    flushed by :meth:`GraphStoreAdapter.upsert_batch` with a few bulk upserts,
+    instead of a round-trip to the graph store per upsert. The batch is flushed
+    when it is full and when the context exits, it is discarded on error.
+    """
+
+    def __init__(self, adapter: GraphStoreAdapter, max_batch_size: int = 1000):
+        """Create a new GraphWriteBatch.
+
+        Args:
+            adapter (GraphStoreAdapter): The adapter to flush the batch to.
+            max_batch_size (int): The max number of the buffered vertices and
+                edges, the batch is flushed when it is full.
+        """
+        self._adapter = adapter
+        self._max_batch_size = max_batch_size
+        self._vertices: Dict[str, Dict[str, Union[Vertex, ParagraphChunk]]] = {}
+        self._edges: Dict[str, Dict[Tuple[str, str, str], Edge]] = {}
+        self._size = 0
+
+    def __enter__(self) -> "GraphWriteBatch":
+        """Enter the batch context."""
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """Flush the batch if no error."""
+        if exc_type is None:
+            self.flush()
+
+    def __len__(self) -> int:
+        """Return the number of the buffered vertices and edges."""
+        return self._size
+
+    def flush(self) -> None:
+        """Upsert the buffered vertices and edges to the graph store."""
+        if not self._size:
+            return
+        vertices = {k: list(v.values()) for k, v in self._vertices.items()}
+        edges = {k: list(v.values()) for k, v in self._edges.items()}
+        self._vertices, self._edges, self._size = {}, {}, 0
+        self._adapter.upsert_batch(vertices, edges)
+
+    def upsert_graph(self, graph: Graph) -> None:
+        """Upsert the vertices and the edges of the graph."""
+        for vertex in graph.vertices():
+            self._add_vertex(vertex.get_prop("vertex_type") or "", vertex)
+        for edge in graph.edges():
+            self._add_edge(edge.get_prop("edge_type") or "", edge)
+
+    def upsert_entities(self, entities: Iterator[Vertex]) -> None:
+        """Upsert entities."""
+        for entity in entities:
+            self._add_vertex(GraphElemType.ENTITY.value, entity)
+
+    def upsert_chunks(
+        self, chunks: Union[Iterator[Vertex], Iterator[ParagraphChunk]]
+    ) -> None:
+        """Upsert chunks."""
+        for chunk in chunks:
+            self._add_vertex(GraphElemType.CHUNK.value, chunk)
+
+    def upsert_documents(
+        self, documents: Union[Iterator[Vertex], Iterator[ParagraphChunk]]
+    ) -> None:
+        """Upsert documents."""
+        for document in documents:
+            self._add_vertex(GraphElemType.DOCUMENT.value, document)
+
+    def upsert_doc_include_chunk(self, chunk: ParagraphChunk) -> None:
+        """Upsert the edge from the parent document to the chunk."""
+        self._add_include_edge(chunk, GraphElemType.DOCUMENT_INCLUDE_CHUNK.value)
+
+    def upsert_chunk_include_chunk(self, chunk: ParagraphChunk) -> None:
+        """Upsert the edge from the parent chunk to the chunk."""
+        self._add_include_edge(chunk, GraphElemType.CHUNK_INCLUDE_CHUNK.value)
+
+    def upsert_chunk_next_chunk(
+        self, chunk: ParagraphChunk, next_chunk: ParagraphChunk
+    ) -> None:
+        """Upsert the edge from the chunk to the next chunk."""
+        edge_type = GraphElemType.CHUNK_NEXT_CHUNK.value
+        edge = Edge(
+            sid=chunk.chunk_id,
+            tid=next_chunk.chunk_id,
+            name=GraphElemType.NEXT.value,
+            edge_type=edge_type,
+        )
+        self._add_edge(edge_type, edge)
+
+    def upsert_chunk_include_entity(
+        self, chunk: ParagraphChunk, entity: Vertex
+    ) -> None:
+        """Upsert the edge from the chunk to the entity."""
+        edge_type = GraphElemType.CHUNK_INCLUDE_ENTITY.value
+        edge = Edge(
+            sid=chunk.chunk_id,
+            tid=entity.vid,
+            name=GraphElemType.INCLUDE.value,
+            edge_type=edge_type,
+        )
+        self._add_edge(edge_type, edge)
+
+    def _add_include_edge(self, chunk: ParagraphChunk, edge_type: str):
+        assert chunk.chunk_parent_id and chunk.chunk_parent_name, (
+            f"Chunk parent ID and name are required ({edge_type})"
+        )
+        edge = Edge(
+            sid=chunk.chunk_parent_id,
+            tid=chunk.chunk_id,
+            name=GraphElemType.INCLUDE.value,
+            edge_type=edge_type,
+        )
+        self._add_edge(edge_type, edge)
+
+    def _add_vertex(self, vertex_type: str, vertex: Union[Vertex, ParagraphChunk]):
+        vid = vertex.vid if isinstance(vertex, Vertex) else vertex.chunk_id
+        type_vertices = self._vertices.setdefault(vertex_type, {})
+        old = type_vertices.get(vid)
+        if old is None:
+            self._size += 1
+        elif isinstance(old, Vertex) and isinstance(vertex, Vertex):
+            # Merge the properties like the upserts one by one
+            vertex = Vertex(vid, vertex.name, **{**old.props, **vertex.props})
+        type_vertices[vid] = vertex
+        self._check_full()
+
+    def _add_edge(self, edge_type: str, edge: Edge):
+        key = (edge.sid, edge.tid, edge.name)
+        type_edges = self._edges.setdefault(edge_type, {})
+        old = type_edges.get(key)
+        if old is None:
+            self._size += 1
+        else:
+            edge = Edge(edge.sid, edge.tid, edge.name, **{**old.props, **edge.props})
+        type_edges[key] = edge
+        self._check_full()
+
+    def _check_full(self):
+        if self._size >= self._max_batch_size:
+            self.flush()
+
+
 class CommunityMetastore(ABC):
     """Community metastore class."""
 
@@ -287,6 +504,10 @@ class CommunityMetastore(ABC):
     async def save(self, communities: List[Community]):
         """Save communities."""
 
+    async def delete(self, community_ids: List[str]):
+        """Delete the communities."""
+        raise NotImplementedError("Delete communities not allowed")
+
     @abstractmethod
     async def truncate(self):
         """Truncate all communities."""
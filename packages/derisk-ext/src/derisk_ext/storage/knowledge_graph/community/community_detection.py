@@ -0,0 +1,234 @@
+"""Incremental community detection on the memory graph."""
+
+import logging
+from collections import deque
+from typing import Deque, Dict, Iterable, List, Optional, Set, Tuple
+
+from derisk.storage.graph_store.graph import Direction, MemoryGraph
+
+logger = logging.getLogger(__name__)
+
+
+class LocalCommunityDetector:
+    """Detect the communities of a memory graph with the Louvain local moving.
+
+    The edges are treated as undirected and each edge weighs 1, the self loops are
+    ignored. Each vertex is moved to the neighbor community with the largest
+    modularity gain until no vertex moves, then the communities are split into
+    their connected components, like the refinement of Leiden.
+
+    The detection is incremental: only the vertices changed since the last
+    detection and their neighbors are moved, the other vertices keep their
+    communities unless a neighbor moved. The communities keep their ids if their
+    members change.
+
+    Examples:
+        .. code-block:: python
+
+            detector = LocalCommunityDetector()
+            detector.mark_dirty(["alice", "bob"])
+            changed_ids, removed_ids = detector.detect(graph)
+            members = detector.get_members(changed_ids[0])
+    """
+
+    def __init__(self, resolution: float = 1.0, max_moves: Optional[int] = None):
+        """Create a new LocalCommunityDetector.
+
+        Args:
+            resolution (float): The resolution of the modularity, the larger the
+                smaller the communities.
+            max_moves (Optional[int]): The max number of the vertex visits of a
+                detection, no limit if None.
+        """
+        self._resolution = resolution
+        self._max_moves = max_moves
+        self.reset()
+
+    def reset(self):
+        """Forget all the communities."""
+        self._dirty: Set[str] = set()
+        self._community: Dict[str, str] = {}
+        self._members: Dict[str, Set[str]] = {}
+        self._degree: Dict[str, int] = {}
+        # The sum of the degrees of the members of each community
+        self._tot: Dict[str, int] = {}
+        self._total_degree = 0
+        self._next_id = 0
+
+    def mark_dirty(self, vids: Iterable[str]):
+        """Mark the vertices whose edges changed since the last detection."""
+        self._dirty.update(vids)
+
+    def community_ids(self) -> List[str]:
+        """Return the ids of all the communities."""
+        return list(self._members)
+
+    def get_members(self, community_id: str) -> Set[str]:
+        """Return the vertex ids of the community."""
+        return self._members.get(community_id, set())
+
+    def get_community_id(self, vid: str) -> Optional[str]:
+        """Return the community id of the vertex."""
+        return self._community.get(vid)
+
+    def detect(self, graph: MemoryGraph) -> Tuple[List[str], List[str]]:
+        """Update the communities with the changes of the graph.
+
+        Returns:
+            Tuple[List[str], List[str]]: The ids of the new or changed communities
+                and the ids of the removed communities.
+        """
+        dirty, self._dirty = self._dirty, set()
+        existing = set(self._members)
+        touched: Set[str] = set()
+        neighbors: Dict[str, Dict[str, int]] = {}
+
+        def get_neighbors(vid: str) -> Dict[str, int]:
+            if vid not in neighbors:
+                weights: Dict[str, int] = {}
+                for edge in graph.get_neighbor_edges(vid, Direction.BOTH):
+                    nid = edge.nid(vid)
+                    if nid != vid:
+                        weights[nid] = weights.get(nid, 0) + 1
+                neighbors[vid] = weights
+            return neighbors[vid]
+
+        # Update the degrees of the changed vertices
+        queue: Deque[str] = deque()
+        queued: Set[str] = set()
+        for vid in sorted(dirty):
+            cid = self._community.get(vid)
+            degree = sum(get_neighbors(vid).values()) if graph.has_vertex(vid) else None
+            if cid is not None:
+                touched.add(cid)
+                self._remove(vid, cid)
+                self._total_degree -= self._degree.pop(vid)
+            if degree is None:
+                continue
+            self._degree[vid] = degree
+            self._total_degree += degree
+            if cid is None:
+                cid = self._new_community_id()
+            self._add(vid, cid)
+            touched.add(cid)
+            for nid in [vid, *get_neighbors(vid)]:
+                if nid not in queued and nid in self._community:
+                    queued.add(nid)
+                    queue.append(nid)
+
+        # Local moving
+        moves = 0
+        while queue and (self._max_moves is None or moves < self._max_moves):
+            vid = queue.popleft()
+            queued.discard(vid)
+            moves += 1
+            old_cid = self._community[vid]
+            new_cid = self._best_community(vid, get_neighbors(vid))
+            if new_cid == old_cid:
+                continue
+            self._remove(vid, old_cid)
+            self._add(vid, new_cid)
+            touched.update((old_cid, new_cid))
+            for nid in get_neighbors(vid):
+                if (
+                    nid not in queued
+                    and nid in self._community
+                    and self._community[nid] != new_cid
+                ):
+                    queued.add(nid)
+                    queue.append(nid)
+
+        # Split the disconnected communities
+        for cid in list(touched):
+            touched.update(self._split(cid, get_neighbors))
+
+        changed = sorted((cid for cid in touched if cid in self._members), key=int)
+        # The new communities may be merged before they are returned
+        removed = sorted(
+            (cid for cid in touched & existing if cid not in self._members), key=int
+        )
+        logger.info(
+            f"Detect communities of {len(dirty)} changed vertices with {moves} moves, "
+            f"{len(changed)} changed and {len(removed)} removed communities, "
+            f"{len(self._members)} communities in total"
+        )
+        return changed, removed
+
+    def _best_community(self, vid: str, weights: Dict[str, int]) -> str:
+        old_cid = self._community[vid]
+        degree = self._degree[vid]
+        if not degree or not self._total_degree:
+            return old_cid
+        links: Dict[str, int] = {}
+        for nid, weight in weights.items():
+            cid = self._community.get(nid)
+            if cid is not None:
+                links[cid] = links.get(cid, 0) + weight
+
+        # The modularity gain of moving the vertex from nowhere into a community
+        scale = self._resolution * degree / self._total_degree
+
+        def gain(cid: str) -> float:
+            tot = self._tot.get(cid, 0)
+            if cid == old_cid:
+                tot -= degree
+            return links.get(cid, 0) - scale * tot
+
+        best_cid, best_gain = old_cid, gain(old_cid)
+        for cid in links:
+            cid_gain = gain(cid)
+            if cid_gain > best_gain + 1e-9:
+                best_cid, best_gain = cid, cid_gain
+        return best_cid
+
+    def _split(self, cid: str, get_neighbors) -> List[str]:
+        """Split the community into its connected components.
+
+        The largest component keeps the id, return the ids of the others.
+        """
+        members = self._members.get(cid)
+        if not members:
+            return []
+        components: List[Set[str]] = []
+        unvisited = set(members)
+        while unvisited:
+            start = unvisited.pop()
+            component = {start}
+            stack = [start]
+            while stack:
+                for nid in get_neighbors(stack.pop()):
+                    if nid in unvisited:
+                        unvisited.discard(nid)
+                        component.add(nid)
+                        stack.append(nid)
+            components.append(component)
+        if len(components) == 1:
+            return []
+        components.sort(key=lambda component: (-len(component), min(component)))
+        new_cids = []
+        for component in components[1:]:
+            new_cid = self._new_community_id()
+            for vid in component:
+                self._remove(vid, cid)
+                self._add(vid, new_cid)
+            new_cids.append(new_cid)
+        return new_cids
+
+    def _add(self, vid: str, cid: str):
+        self._community[vid] = cid
+        self._members.setdefault(cid, set()).add(vid)
+        self._tot[cid] = self._tot.get(cid, 0) + self._degree[vid]
+
+    def _remove(self, vid: str, cid: str):
+        del self._community[vid]
+        members = self._members[cid]
+        members.discard(vid)
+        self._tot[cid] -= self._degree[vid]
+        if not members:
+            del self._members[cid]
+            del self._tot[cid]
+
+    def _new_community_id(self) -> str:
+        cid = str(self._next_id)
+        self._next_id += 1
+        return cid
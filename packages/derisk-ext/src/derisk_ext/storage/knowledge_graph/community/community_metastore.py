@@ -1,7 +1,7 @@
 """Builtin Community metastore."""
 
 import logging
-from typing import List, Optional
+from typing import Dict, List, Optional
 
 from derisk.core import Chunk
 from derisk.datasource.rdbms.base import RDBMSConnector
@@ -36,6 +36,8 @@ class BuiltinCommunityMetastore(CommunityMetastore):
         self._max_threads = max_threads
         self._topk = top_k
         self._score_threshold = score_threshold
+        # The vector ids of the saved communities
+        self._vector_ids: Dict[str, str] = {}
 
     def get(self, community_id: str) -> Community:
         """Get community."""
@@ -58,14 +60,28 @@ class BuiltinCommunityMetastore(CommunityMetastore):
             Chunk(id=c.id, content=c.summary, metadata={"total": len(communities)})
             for c in communities
         ]
-        await self._vector_store.aload_document_with_limit(
+        vector_ids = await self._vector_store.aload_document_with_limit(
             chunks, self._max_chunks_once_load, self._max_threads
         )
+        for community, vector_id in zip(communities, vector_ids or []):
+            self._vector_ids[community.id] = vector_id
         logger.info(f"Save {len(communities)} communities")
 
+    async def delete(self, community_ids: List[str]):
+        """Delete the saved communities."""
+        vector_ids = [
+            self._vector_ids.pop(cid)
+            for cid in community_ids
+            if cid in self._vector_ids
+        ]
+        if vector_ids:
+            self._vector_store.delete_by_ids(",".join(vector_ids))
+        logger.info(f"Delete {len(vector_ids)} communities")
+
     async def truncate(self):
         """Truncate community metastore."""
         self._vector_store.truncate()
+        self._vector_ids.clear()
 
     def drop(self):
         """Drop community metastore."""
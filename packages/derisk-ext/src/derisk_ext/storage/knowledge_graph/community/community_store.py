@@ -1,8 +1,9 @@
 """Define the CommunityStore class."""
 
 import asyncio
+import hashlib
 import logging
-from typing import List, Optional
+from typing import Dict, List, Optional
 
 from derisk.storage.vector_store.base import VectorStoreBase
 from derisk_ext.rag.transformer.community_summarizer import CommunitySummarizer
@@ -42,28 +43,40 @@ class CommunityStore:
             top_k=top_k,
             score_threshold=score_threshold,
         )
+        # The summaries of the communities keyed by the hash of the community
+        # graph, the unchanged communities are not summarized again
+        self._summaries: Dict[str, str] = {}
 
     async def build_communities(self, batch_size: int = 1):
         """Discover communities."""
-        community_ids = await self._graph_store_adapter.discover_communities()
+        adapter = self._graph_store_adapter
+        community_ids, removed_ids = await adapter.discover_community_changes()
 
         # summarize communities
         communities = []
         n_communities = len(community_ids)
+        summaries: Dict[str, str] = {}
 
         for i in range(0, n_communities, batch_size):
             batch_ids = community_ids[i : i + batch_size]
             batch_results = await asyncio.gather(
-                *[self._summary_community(cid) for cid in batch_ids]
+                *[self._summary_community(cid, summaries) for cid in batch_ids]
             )
             # filter out None returns
             communities.extend([c for c in batch_results if c is not None])
-
-        # truncate then save new summaries
-        await self._meta_store.truncate()
+        self._summaries = summaries
+
+        if removed_ids is None:
+            # truncate then save new summaries
+            await self._meta_store.truncate()
+        else:
+            # Only the changed communities are discovered, replace them
+            await self._meta_store.delete([*community_ids, *removed_ids])
         await self._meta_store.save(communities)
 
-    async def _summary_community(self, community_id: str) -> Optional[Community]:
+    async def _summary_community(
+        self, community_id: str, summaries: Dict[str, str]
+    ) -> Optional[Community]:
         """Summarize single community."""
         community = await self._graph_store_adapter.get_community(community_id)
         if community is None or community.data is None:
@@ -71,10 +84,13 @@ class CommunityStore:
             return None
 
         graph = community.data.format()
-        community.summary = (
-            await self._community_summarizer.summarize(graph=graph) or ""
-        )
-        logger.info(f"Summarize community {community_id}: {community.summary[:50]}...")
+        graph_hash = hashlib.sha256(graph.encode("utf-8")).hexdigest()
+        summary = self._summaries.get(graph_hash)
+        if summary is None:
+            summary = await self._community_summarizer.summarize(graph=graph) or ""
+            logger.info(f"Summarize community {community_id}: {summary[:50]}...")
+        community.summary = summary
+        summaries[graph_hash] = summary
         return community
 
     async def search_communities(self, query: str) -> List[Community]:
@@ -85,6 +101,7 @@ class CommunityStore:
         """Truncate community store."""
         logger.info("Truncate community metastore")
         self._meta_store.truncate()
+        self._summaries.clear()
 
         logger.info("Truncate community summarizer")
         self._community_summarizer.truncate()
@@ -3,8 +3,12 @@
 import logging
 
 from derisk.storage.graph_store.base import GraphStoreBase
+from derisk.storage.graph_store.memgraph_store import MemoryGraphStore
 from derisk_ext.storage.graph_store.tugraph_store import TuGraphStore
 from derisk_ext.storage.knowledge_graph.community.base import GraphStoreAdapter
+from derisk_ext.storage.knowledge_graph.community.memgraph_store_adapter import (
+    MemGraphStoreAdapter,
+)
 from derisk_ext.storage.knowledge_graph.community.tugraph_store_adapter import (
     TuGraphStoreAdapter,
 )
@@ -24,6 +28,8 @@ class GraphStoreAdapterFactory:
         """
         if isinstance(graph_store, TuGraphStore):
             return TuGraphStoreAdapter(graph_store)
+        elif isinstance(graph_store, MemoryGraphStore):
+            return MemGraphStoreAdapter(graph_store=graph_store)
         else:
             raise Exception(
                 "create community store adapter for %s failed",
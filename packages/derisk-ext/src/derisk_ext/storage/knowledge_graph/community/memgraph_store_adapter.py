@@ -1,4 +1,4 @@
-"""TuGraph Community Store Adapter."""
+"""MemGraph Community Store Adapter."""
 
 import json
 import logging
@@ -21,6 +21,9 @@ from derisk_ext.storage.knowledge_graph.community.base import (
     Community,
     GraphStoreAdapter,
 )
+from derisk_ext.storage.knowledge_graph.community.community_detection import (
+    LocalCommunityDetector,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -30,22 +33,55 @@ class MemGraphStoreAdapter(GraphStoreAdapter):
 
     MAX_HIERARCHY_LEVEL = 3
 
-    def __init__(self, enable_summary: bool = False):
+    def __init__(
+        self,
+        enable_summary: bool = False,
+        graph_store: Optional[MemoryGraphStore] = None,
+    ):
         """Initialize MemGraph Community Store Adapter."""
-        self._graph_store: MemoryGraphStore = MemoryGraphStore(MemoryGraphStoreConfig())
+        self._graph_store: MemoryGraphStore = graph_store or MemoryGraphStore(
+            MemoryGraphStoreConfig()
+        )
 
         super().__init__(self._graph_store)
 
+        # Detect the communities of the changed vertices only
+        self._community_detector = LocalCommunityDetector()
+
         # Create the graph
         self.create_graph(self._graph_store.get_config().name)
 
     async def discover_communities(self, **kwargs) -> List[str]:
-        """Run community discovery with leiden."""
-        return []
+        """Run community discovery, return the ids of the changed communities."""
+        changed_ids, _ = await self.discover_community_changes(**kwargs)
+        return changed_ids
+
+    async def discover_community_changes(
+        self, **kwargs
+    ) -> Tuple[List[str], Optional[List[str]]]:
+        """Detect the communities of the changed vertices with local Louvain."""
+        changed_ids, removed_ids = self._community_detector.detect(
+            self._graph_store._graph
+        )
+        logger.info(
+            f"Discovered {len(changed_ids)} changed and {len(removed_ids)} removed "
+            "communities."
+        )
+        return changed_ids, removed_ids
 
     async def get_community(self, community_id: str) -> Community:
         """Get community."""
-        raise NotImplementedError("Memory graph store does not have community")
+        graph = self._graph_store._graph
+        members = self._community_detector.get_members(community_id)
+        community_graph = MemoryGraph()
+        for vid in members:
+            if not graph.has_vertex(vid):
+                continue
+            community_graph.upsert_vertex(graph.get_vertex(vid))
+            for edge in graph.get_neighbor_edges(vid, Direction.OUT):
+                if edge.tid in members:
+                    community_graph.append_edge(edge)
+        return Community(id=community_id, data=community_graph)
 
     def get_graph_config(self):
         """Get the graph store config."""
@@ -144,6 +180,7 @@ class MemGraphStoreAdapter(GraphStoreAdapter):
     def insert_triplet(self, subj: str, rel: str, obj: str) -> None:
         """Add triplet."""
         self._graph_store._graph.append_edge(Edge(subj, obj, rel))
+        self._community_detector.mark_dirty((subj, obj))
 
     def upsert_graph(self, graph: Graph) -> None:
         """Add graph to the graph store.
@@ -153,9 +190,33 @@ class MemGraphStoreAdapter(GraphStoreAdapter):
         """
         for vertex in graph.vertices():
             self._graph_store._graph.upsert_vertex(vertex)
+            self._community_detector.mark_dirty((vertex.vid,))
 
         for edge in graph.edges():
             self._graph_store._graph.append_edge(edge)
+            self._community_detector.mark_dirty((edge.sid, edge.tid))
+
+    def upsert_batch(
+        self,
+        vertices: Dict[str, List[Union[Vertex, ParagraphChunk]]],
+        edges: Dict[str, List[Edge]],
+    ) -> None:
+        """Upsert the entities and the relations of a write batch.
+
+        The documents, the chunks and their edges are not kept in memory, like
+        upsert_chunks and upsert_doc_include_chunk.
+        """
+        graph = self._graph_store._graph
+        dirty = set()
+        for vertex_type in (GraphElemType.ENTITY.value, ""):
+            for vertex in vertices.get(vertex_type, []):
+                graph.upsert_vertex(vertex)
+                dirty.add(vertex.vid)
+        for edge_type in (GraphElemType.RELATION.value, ""):
+            for edge in edges.get(edge_type, []):
+                graph.append_edge(edge)
+                dirty.update((edge.sid, edge.tid))
+        self._community_detector.mark_dirty(dirty)
 
     def delete_document(self, chunk_ids: str) -> None:
         """Delete document in the graph."""
@@ -164,6 +225,7 @@ class MemGraphStoreAdapter(GraphStoreAdapter):
     def delete_triplet(self, sub: str, rel: str, obj: str) -> None:
         """Delete triplet."""
         self._graph_store._graph.del_edges(sub, obj, rel)
+        self._community_detector.mark_dirty((sub, obj))
 
     def drop(self):
         """Delete Graph."""
@@ -188,6 +250,7 @@ class MemGraphStoreAdapter(GraphStoreAdapter):
     def truncate(self):
         """Truncate Graph."""
         self._graph_store._graph.truncate()
+        self._community_detector.reset()
 
     def check_label(self, graph_elem_type: GraphElemType) -> bool:
         """Check if the label exists in the graph.
@@ -215,6 +278,54 @@ class MemGraphStoreAdapter(GraphStoreAdapter):
         """Explore the graph from given subjects up to a depth."""
         return self._graph_store._graph.search(subs, direct, depth, fan, limit)
 
+    def explore_trigraph(
+        self,
+        subs: Union[List[str], List[List[float]]],
+        topk: Optional[int] = None,
+        score_threshold: Optional[float] = None,
+        direct: Direction = Direction.BOTH,
+        depth: int = 3,
+        fan: Optional[int] = None,
+        limit: Optional[int] = None,
+    ) -> MemoryGraph:
+        """Explore the graph from given subjects up to a depth.
+
+        Only the keywords are supported, the memory graph store does not support
+        similarity search.
+        """
+        keywords = [sub for sub in subs if isinstance(sub, str)]
+        if not keywords:
+            return MemoryGraph()
+        if depth <= 0:
+            depth = 3
+        return self.explore(keywords, direct, depth, fan, limit)
+
+    def explore_docgraph_with_entities(
+        self,
+        subs: List[str],
+        topk: Optional[int] = None,
+        score_threshold: Optional[float] = None,
+        direct: Direction = Direction.BOTH,
+        depth: int = 3,
+        fan: Optional[int] = None,
+        limit: Optional[int] = None,
+    ) -> MemoryGraph:
+        """Explore the document graph, the memory graph store has no document."""
+        return MemoryGraph()
+
+    def explore_docgraph_without_entities(
+        self,
+        subs: Union[List[str], List[List[float]]],
+        topk: Optional[int] = None,
+        score_threshold: Optional[float] = None,
+        direct: Direction = Direction.BOTH,
+        depth: int = 3,
+        fan: Optional[int] = None,
+        limit: Optional[int] = None,
+    ) -> MemoryGraph:
+        """Explore the document graph, the memory graph store has no document."""
+        return MemoryGraph()
+
     def query(self, query: str, **kwargs) -> MemoryGraph:
         """Execute a query on graph."""
         raise NotImplementedError("Memory graph store does not support query")
@@ -0,0 +1,166 @@
+from typing import Dict, List
+
+import pytest
+
+from derisk.core import Chunk
+from derisk.storage.graph_store.graph import Edge, MemoryGraph, Vertex
+
+from ..community_detection import LocalCommunityDetector
+from ..community_store import CommunityStore
+from ..memgraph_store_adapter import MemGraphStoreAdapter
+
+
+def _clique(graph: MemoryGraph, vids: List[str]):
+    for i, sid in enumerate(vids):
+        for tid in vids[i + 1 :]:
+            graph.append_edge(Edge(sid, tid, "knows"))
+
+
+def _two_cliques() -> MemoryGraph:
+    graph = MemoryGraph()
+    _clique(graph, ["a1", "a2", "a3", "a4"])
+    _clique(graph, ["b1", "b2", "b3", "b4"])
+    graph.append_edge(Edge("a1", "b1", "knows"))
+    return graph
+
+
+def _communities(detector: LocalCommunityDetector):
+    return sorted(sorted(detector.get_members(cid)) for cid in detector.community_ids())
+
+
+def test_detect():
+    graph = _two_cliques()
+    detector = LocalCommunityDetector()
+    detector.mark_dirty(v.vid for v in graph.vertices())
+    changed, removed = detector.detect(graph)
+    assert _communities(detector) == [
+        ["a1", "a2", "a3", "a4"],
+        ["b1", "b2", "b3", "b4"],
+    ]
+    assert sorted(changed) == sorted(detector.community_ids())
+    assert removed == []
+    assert detector.get_community_id("a1") != detector.get_community_id("b1")
+
+
+def test_detect_incremental():
+    graph = _two_cliques()
+    detector = LocalCommunityDetector()
+    detector.mark_dirty(v.vid for v in graph.vertices())
+    detector.detect(graph)
+    a_cid = detector.get_community_id("a1")
+    b_cid = detector.get_community_id("b1")
+
+    # A new vertex joins clique a, clique b is not touched
+    _clique(graph, ["a1", "a2", "a5"])
+    detector.mark_dirty(["a1", "a2", "a5"])
+    changed, removed = detector.detect(graph)
+    assert changed == [a_cid]
+    assert removed == []
+    assert detector.get_members(a_cid) == {"a1", "a2", "a3", "a4", "a5"}
+    assert detector.get_community_id("b1") == b_cid
+
+    # Nothing changed
+    assert detector.detect(graph) == ([], [])
+
+
+def test_detect_split_and_isolated():
+    graph = MemoryGraph()
+    _clique(graph, ["a", "b", "c", "x", "y", "z"])
+    graph.upsert_vertex(Vertex("lonely"))
+    detector = LocalCommunityDetector()
+    detector.mark_dirty(v.vid for v in graph.vertices())
+    detector.detect(graph)
+    assert _communities(detector) == [
+        ["a", "b", "c", "x", "y", "z"],
+        ["lonely"],
+    ]
+
+    # The community is split after the edges between the halves are deleted
+    for sid in ["a", "b", "c"]:
+        for tid in ["x", "y", "z"]:
+            graph.del_edges(sid, tid, "knows")
+    detector.mark_dirty(["a", "b", "c", "x", "y", "z"])
+    changed, removed = detector.detect(graph)
+    assert len(changed) == 2
+    assert removed == []
+    assert _communities(detector) == [["a", "b", "c"], ["lonely"], ["x", "y", "z"]]
+
+    # The deleted vertices are removed
+    graph.del_vertices("lonely")
+    detector.mark_dirty(["lonely"])
+    changed, removed = detector.detect(graph)
+    assert changed == []
+    assert len(removed) == 1
+
+
+class MockSummarizer:
+    def __init__(self):
+        self.graphs = []
+
+    async def summarize(self, graph: str) -> str:
+        self.graphs.append(graph)
+        return f"summary {len(self.graphs)}"
+
+
+class MockVectorStore:
+    def __init__(self):
+        self.chunks: Dict[str, Chunk] = {}
+        self.num_loaded = 0
+
+    async def aload_document_with_limit(self, chunks, max_chunks_once_load, threads):
+        self.num_loaded += len(chunks)
+        for chunk in chunks:
+            self.chunks[chunk.chunk_id] = chunk
+        return [chunk.chunk_id for chunk in chunks]
+
+    def delete_by_ids(self, ids: str):
+        for vector_id in ids.split(","):
+            del self.chunks[vector_id]
+
+    def truncate(self):
+        self.chunks = {}
+
+
+@pytest.mark.asyncio
+async def test_build_communities_with_memory_graph():
+    adapter = MemGraphStoreAdapter()
+    summarizer = MockSummarizer()
+    vector_store = MockVectorStore()
+    store = CommunityStore(adapter, summarizer, vector_store)
+
+    adapter.upsert_graph(_two_cliques())
+    await store.build_communities(batch_size=2)
+    assert len(summarizer.graphs) == 2
+    assert vector_store.num_loaded == 2
+    community = await adapter.get_community(
+        adapter._community_detector.get_community_id("a1")
+    )
+    assert {v.vid for v in community.data.vertices()} == {"a1", "a2", "a3", "a4"}
+    assert community.data.edge_count == 6
+
+    # Only the changed community is summarized and saved again
+    adapter.insert_triplet("b1", "likes", "b2")
+    await store.build_communities()
+    assert len(summarizer.graphs) == 3
+    assert "likes" in summarizer.graphs[-1]
+    assert vector_store.num_loaded == 3
+    contents = sorted(c.content for c in vector_store.chunks.values())
+    assert contents == ["summary 1", "summary 3"]
+
+    # The merged community is removed from the metastore
+    for i in range(1, 5):
+        for j in range(1, 5):
+            adapter.insert_triplet(f"a{i}", "likes", f"b{j}")
+    await store.build_communities()
+    assert len(summarizer.graphs) == 4
+    assert vector_store.num_loaded == 4
+    assert [c.content for c in vector_store.chunks.values()] == ["summary 4"]
+
+
+def test_explore_trigraph():
+    adapter = MemGraphStoreAdapter()
+    adapter.upsert_graph(_two_cliques())
+    subgraph = adapter.explore_trigraph(["a2"], depth=1)
+    assert subgraph.edge_count == 3
+    assert adapter.explore_trigraph([[0.1, 0.2]]).edge_count == 0
+    assert adapter.explore_docgraph_with_entities(["a2"]).edge_count == 0
@@ -0,0 +1,132 @@
+from types import SimpleNamespace
+from typing import List
+
+from derisk.storage.graph_store.graph import Edge, GraphElemType, MemoryGraph, Vertex
+from derisk.storage.knowledge_graph.base import ParagraphChunk
+
+from ..memgraph_store_adapter import MemGraphStoreAdapter
+from ..tugraph_store_adapter import TuGraphStoreAdapter
+
+
+class FakeTuGraphConnector:
+    """Record the statements instead of running them."""
+
+    def __init__(self):
+        self.statements: List[str] = []
+
+    def create_graph(self, graph_name: str) -> bool:
+        # The graph exists, no schema is created
+        return False
+
+    def run(self, query: str, **kwargs):
+        self.statements.append(query)
+        return []
+
+
+class FakeTuGraphStore:
+    def __init__(self):
+        self.conn = FakeTuGraphConnector()
+        self.enable_similarity_search = False
+
+    def get_config(self):
+        return SimpleNamespace(name="test")
+
+
+def _chunks(n: int) -> List[ParagraphChunk]:
+    return [
+        ParagraphChunk(
+            chunk_id=f"c{i}",
+            chunk_name=f"chunk {i}",
+            content=f"content {i}",
+            chunk_parent_id="doc",
+            chunk_parent_name="document",
+            parent_is_document=True,
+        )
+        for i in range(n)
+    ]
+
+
+def _triplet_graph(i: int) -> MemoryGraph:
+    graph = MemoryGraph()
+    for vid in [f"e{i}", f"e{i + 1}"]:
+        graph.upsert_vertex(Vertex(vid, description="d", vertex_type="entity"))
+    graph.append_edge(
+        Edge(f"e{i}", f"e{i + 1}", "knows", description="d", edge_type="relation")
+    )
+    return graph
+
+
+def _load(adapter, chunks: List[ParagraphChunk], batch):
+    batch.upsert_documents(iter([ParagraphChunk(chunk_id="doc", chunk_name="doc")]))
+    batch.upsert_chunks(iter(chunks))
+    for i, chunk in enumerate(chunks):
+        batch.upsert_doc_include_chunk(chunk=chunk)
+        if i >= 1:
+            batch.upsert_chunk_next_chunk(chunk=chunks[i - 1], next_chunk=chunk)
+        graph = _triplet_graph(i)
+        batch.upsert_graph(graph)
+        for vertex in graph.vertices():
+            batch.upsert_chunk_include_entity(chunk=chunk, entity=vertex)
+
+
+def test_tugraph_statements():
+    store = FakeTuGraphStore()
+    adapter = TuGraphStoreAdapter(store)
+    chunks = _chunks(50)
+    _load(adapter, chunks, adapter)
+    unbatched = len(store.conn.statements)
+
+    store.conn.statements = []
+    with adapter.batch() as batch:
+        _load(adapter, chunks, batch)
+        assert store.conn.statements == []
+    # Upsert the entities, chunks, documents, then the doc-include-chunk,
+    # chunk-include-entity, chunk-next-chunk and relation edges
+    assert len(store.conn.statements) == 7
+    assert unbatched > 300
+    entity_statement = store.conn.statements[0]
+    assert entity_statement.startswith('CALL db.upsertVertex("entity"')
+    # The shared entities are deduplicated
+    assert entity_statement.count('id: "e1"') == 1
+    assert sum("db.upsertEdge" in s for s in store.conn.statements) == 4
+
+
+def test_flush_when_full():
+    store = FakeTuGraphStore()
+    adapter = TuGraphStoreAdapter(store)
+    with adapter.batch(max_batch_size=3) as batch:
+        for i in range(4):
+            batch.upsert_entities(iter([Vertex(f"e{i}")]))
+        assert len(batch) == 1
+        assert len(store.conn.statements) == 1
+    assert len(store.conn.statements) == 2
+
+
+def test_discard_on_error():
+    store = FakeTuGraphStore()
+    adapter = TuGraphStoreAdapter(store)
+    try:
+        with adapter.batch() as batch:
+            batch.upsert_graph(_triplet_graph(0))
+            raise RuntimeError("extract failed")
+    except RuntimeError:
+        pass
+    assert store.conn.statements == []
+
+
+def test_memgraph_batch():
+    adapter = MemGraphStoreAdapter()
+    with adapter.batch() as batch:
+        _load(adapter, _chunks(3), batch)
+        batch.upsert_graph(MemoryGraph())
+        batch.upsert_entities(iter([Vertex("e1", name="E1", extra="x")]))
+    graph = adapter.graph_store._graph
+    # Only the entities and the relations are kept in memory
+    assert graph.vertex_count == 4
+    assert graph.edge_count == 3
+    assert graph.get_vertex("e1").props == {
+        "description": "d",
+        "vertex_type": GraphElemType.ENTITY.value,
+        "extra": "x",
+    }
+    assert graph.get_vertex("e1").name == "E1"
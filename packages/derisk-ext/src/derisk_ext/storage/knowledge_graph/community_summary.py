@@ -7,7 +7,9 @@ from typing import List, Optional, Tuple
 
 from derisk.core import Chunk, Embeddings, LLMClient
 from derisk.core.awel.flow import Parameter, ResourceCategory, register_resource
+from derisk.storage.cache.storage.base import CacheStorage
 from derisk.storage.graph_store.base import GraphStoreConfig
+from derisk.storage.graph_store.graph import Graph
 from derisk.storage.knowledge_graph.base import ParagraphChunk
 from derisk.storage.vector_store.base import VectorStoreConfig
 from derisk.storage.vector_store.filters import MetadataFilters
@@ -15,6 +17,7 @@ from derisk.util.i18n_utils import _
 from derisk_ext.rag.retriever.graph_retriever.graph_retriever import GraphRetriever
 from derisk_ext.rag.transformer.community_summarizer import CommunitySummarizer
 from derisk_ext.rag.transformer.graph_embedder import GraphEmbedder
+from derisk_ext.rag.transformer.graph_extraction_cache import GraphExtractionCache
 from derisk_ext.rag.transformer.graph_extractor import GraphExtractor
 from derisk_ext.rag.transformer.text_embedder import TextEmbedder
 from derisk_ext.storage.graph_store.tugraph_store import TuGraphStoreConfig
@@ -183,6 +186,7 @@ class CommunitySummaryKnowledgeGraph(BuiltinKnowledgeGraph):
         vector_store_config: Optional["VectorStoreConfig"] = None,
         kg_max_chunks_once_load: Optional[int] = 10,
         kg_max_threads: Optional[int] = 1,
+        kg_extraction_cache_storage: Optional[CacheStorage] = None,
     ):
         """Initialize community summary knowledge graph class."""
         super().__init__(
@@ -239,6 +243,15 @@ class CommunitySummaryKnowledgeGraph(BuiltinKnowledgeGraph):
             score_threshold=kg_extract_score_threshold,
         )
 
+        # Only the changed chunks are extracted again when a document is re-synced,
+        # no cache if the storage is not configured
+        self._graph_extraction_cache: Optional[GraphExtractionCache] = None
+        if kg_extraction_cache_storage:
+            self._graph_extraction_cache = GraphExtractionCache(
+                kg_extraction_cache_storage,
+                self._graph_extractor.prompt_version,
+                self._graph_extractor.model_name,
+            )
         self._graph_embedder = GraphEmbedder(embedding_fn)
         self._text_embedder = TextEmbedder(embedding_fn)
 
@@ -322,23 +335,25 @@ class CommunitySummaryKnowledgeGraph(BuiltinKnowledgeGraph):
             for idx, chunk in enumerate(paragraph_chunks):
                 chunk.embedding = embeddings[idx]
 
-        # upsert the document and chunks vertices
-        self._graph_store_adapter.upsert_documents(iter([documment_chunk]))
-        self._graph_store_adapter.upsert_chunks(iter(paragraph_chunks))
-
-        # upsert the document structure
-        for chunk_index, chunk in enumerate(paragraph_chunks):
-            # document -> include -> chunk
-            if chunk.parent_is_document:
-                self._graph_store_adapter.upsert_doc_include_chunk(chunk=chunk)
-            else:  # chunk -> include -> chunk
-                self._graph_store_adapter.upsert_chunk_include_chunk(chunk=chunk)
-
-            # chunk -> next -> chunk
-            if chunk_index >= 1:
-                self._graph_store_adapter.upsert_chunk_next_chunk(
-                    chunk=paragraph_chunks[chunk_index - 1], next_chunk=chunk
-                )
+        # Upsert the document structure in a few bulk writes
+        with self._graph_store_adapter.batch() as batch:
+            # upsert the document and chunks vertices
+            batch.upsert_documents(iter([documment_chunk]))
+            batch.upsert_chunks(iter(paragraph_chunks))
+
+            # upsert the document structure
+            for chunk_index, chunk in enumerate(paragraph_chunks):
+                # document -> include -> chunk
+                if chunk.parent_is_document:
+                    batch.upsert_doc_include_chunk(chunk=chunk)
+                else:  # chunk -> include -> chunk
+                    batch.upsert_chunk_include_chunk(chunk=chunk)
+
+                # chunk -> next -> chunk
+                if chunk_index >= 1:
+                    batch.upsert_chunk_next_chunk(
+                        chunk=paragraph_chunks[chunk_index - 1], next_chunk=chunk
+                    )
 
     async def _aload_triplet_graph(self, chunks: List[Chunk]) -> None:
         """Load the knowledge graph from the chunks.
@@ -350,42 +365,54 @@ class CommunitySummaryKnowledgeGraph(BuiltinKnowledgeGraph):
 
         document_graph_enabled = self._document_graph_enabled
 
+        async def extract(texts: List[str]) -> Optional[List[List[Graph]]]:
+            return await self._graph_extractor.batch_extract(
+                texts, batch_size=self._triplet_extraction_batch_size
+            )
+
+        async def embed(graphs: List[Graph]) -> List[Graph]:
+            return await self._graph_embedder.batch_embed(
+                inputs=graphs, batch_size=self._triplet_embedding_batch_size
+            )
+
         # Extract the triplets from the chunks, and return the list of graphs
-        # in the same order as the input texts
-        graphs_list = await self._graph_extractor.batch_extract(
-            [chunk.content for chunk in chunks],
-            batch_size=self._triplet_extraction_batch_size,
-        )
+        # in the same order as the input texts, the unchanged chunks are read from
+        # the cache. If enable the similarity search, add the embedding to the
+        # graphs
+        texts = [chunk.content for chunk in chunks]
+        enable_embedding = self._graph_store.enable_similarity_search
+        cache = self._graph_extraction_cache
+        if cache:
+            graphs_list = await cache.abatch_extract(
+                texts, extract, embed if enable_embedding else None
+            )
+            logger.info(f"Graph extraction cache stats: {cache.get_stats()}")
+        else:
+            graphs_list = await extract(texts)
+            if graphs_list and enable_embedding:
+                graphs_list = [await embed(graphs) for graphs in graphs_list]
         if not graphs_list:
             raise ValueError("No graphs extracted from the chunks")
 
-        # If enable the similarity search, add the embedding to the graphs
-        if self._graph_store.enable_similarity_search:
+        # Upsert the graphs into the graph store in a few bulk writes
+        with self._graph_store_adapter.batch() as batch:
             for idx, graphs in enumerate(graphs_list):
-                embeded_graphs = await self._graph_embedder.batch_embed(
-                    inputs=graphs,
-                    batch_size=self._triplet_embedding_batch_size,
-                )
-                graphs_list[idx] = embeded_graphs
-
-        # Upsert the graphs into the graph store
-        for idx, graphs in enumerate(graphs_list):
-            for graph in graphs:
-                if document_graph_enabled:
-                    # Append the chunk id to the edge
-                    for edge in graph.edges():
-                        edge.set_prop("_chunk_id", chunks[idx].chunk_id)
-                        graph.append_edge(edge=edge)
-
-                # Upsert the graph
-                self._graph_store_adapter.upsert_graph(graph)
-
-                # chunk -> include -> entity
-                if document_graph_enabled:
-                    for vertex in graph.vertices():
-                        self._graph_store_adapter.upsert_chunk_include_entity(
-                            chunk=chunks[idx], entity=vertex
-                        )
+                for graph in graphs:
+                    if document_graph_enabled:
+                        # Append the chunk id to the edge
+                        for edge in graph.edges():
+                            edge.set_prop("_chunk_id", chunks[idx].chunk_id)
+                            graph.append_edge(edge=edge)
+
+                    # Upsert the graph
+                    batch.upsert_graph(graph)
+
+                    # chunk -> include -> entity
+                    if document_graph_enabled:
+                        for vertex in graph.vertices():
+                            batch.upsert_chunk_include_entity(
+                                chunk=chunks[idx], entity=vertex
+                            )
 
     def _load_chunks(
         self, chunks: List[ParagraphChunk]
@@ -0,0 +1,72 @@
+"""Benchmark the render of a stream chunk against the full render of the view.
+
+A stream chunk only renders the streamed message, its cost should stay flat while
+the full render grows with the number of messages, run:
+
+    python -m derisk_ext.vis.benchmarks.gpt_vis_stream_benchmarks --num_chunks 50
+"""
+
+import argparse
+import asyncio
+import json
+import time
+
+from derisk.agent import ActionOutput
+from derisk.agent.core.memory.gpts import GptsMemory, GptsMessage
+from derisk_ext.vis.gptvis.gpt_vis_converter import GptVisConverter
+
+_CONV_ID = "benchmark_conv"
+message_nums = [100, 500, 1000]
+
+
+def _message(idx: int, content: str = None) -> GptsMessage:
+    content = content or f"The result of step {idx}"
+    action_out = ActionOutput(content=content, view=f"**{content}**")
+    return GptsMessage(
+        conv_id=_CONV_ID,
+        conv_session_id=_CONV_ID,
+        sender="assistant",
+        sender_name="SRE Agent",
+        receiver="user",
+        message_id=f"msg_{idx}",
+        role="assistant",
+        content=content,
+        thinking=f"Thinking of step {idx}",
+        rounds=idx,
+        action_report=json.dumps(action_out.to_dict()),
+    )
+
+
+async def run_benchmark(num_chunks: int, rounds: int):
+    converter = GptVisConverter()
+    print(f"chunks: {num_chunks}, rounds: {rounds}")
+    print(f"{'messages':>10}{'chunk(ms)':>12}{'full(ms)':>12}")
+    for num_messages in message_nums:
+        memory = GptsMemory()
+        memory.init(_CONV_ID, vis_converter=converter)
+        for i in range(num_messages):
+            memory._cache_messages(_CONV_ID, [_message(i)])
+        # Render the prefix once
+        await memory.vis_messages(_CONV_ID)
+
+        start = time.perf_counter()
+        for i in range(num_chunks):
+            # The streaming message is updated for each chunk
+            chunk = _message(num_messages, "token " * (i + 1))
+            await memory.append_message(_CONV_ID, chunk, save_db=False)
+        chunk_cost = (time.perf_counter() - start) / num_chunks
+
+        messages = await memory.get_messages(_CONV_ID)
+        start = time.perf_counter()
+        for _ in range(rounds):
+            await converter.visualization(messages)
+        full_cost = (time.perf_counter() - start) / rounds
+        print(f"{num_messages:>10}{chunk_cost * 1000:>12.2f}{full_cost * 1000:>12.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--num_chunks", type=int, default=50)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+    asyncio.run(run_benchmark(args.num_chunks, args.rounds))
@@ -5,7 +5,12 @@ from typing import List, Optional, Dict, Union
 
 from derisk.agent import ActionOutput, UserProxyAgent
 from derisk.agent.core.memory.gpts import GptsMessage, GptsPlan
-from derisk.vis.vis_converter import VisProtocolConverter, SystemVisTag
+from derisk.vis.vis_converter import (
+    SystemVisTag,
+    VisProtocolConverter,
+    VisRenderCache,
+    message_fingerprint,
+)
 
 NONE_GOAL_PREFIX: str = "none_goal_count_"
 logger = logging.getLogger(__name__)
@@ -66,9 +71,72 @@ class GptVisConverter(VisProtocolConverter):
         incremental: bool = False,
     ):
         # VIS消息组装
+        deal_messages = self._deal_messages(messages)
+
+        vis_items: List[str] = []
+        for message in deal_messages:
+            vis_items.append(await self._messages_to_agents_vis(message))
+        message_view = "\n".join(vis_items)
+        if stream_msg:
+            temp_view = await self.agent_stream_message(stream_msg)
+            message_view = message_view + "\n" + temp_view
+        return message_view
+
+    async def incremental_visualization(
+        self,
+        messages: List[GptsMessage],
+        plans_map: Optional[Dict[str, GptsPlan]] = None,
+        gpt_msg: Optional[GptsMessage] = None,
+        stream_msg: Optional[Union[Dict, str]] = None,
+        is_first_chunk: bool = False,
+        incremental: bool = False,
+        render_cache: Optional[VisRenderCache] = None,
+    ):
+        # The subclasses with another layout render the whole view again
+        layout_changed = type(self).visualization is not GptVisConverter.visualization
+        if render_cache is None or layout_changed:
+            return await self.visualization(
+                messages,
+                plans_map=plans_map,
+                gpt_msg=gpt_msg,
+                stream_msg=stream_msg,
+                is_first_chunk=is_first_chunk,
+                incremental=incremental,
+            )
+        start = render_cache.dirty_from
+        if start is not None:
+            # Only the messages from the first changed one are rendered again
+            render_cache.truncate(start)
+            for index in range(start, len(messages)):
+                message = messages[index]
+                if not self._is_vis_message(message):
+                    continue
+                fingerprint = message_fingerprint(message)
+                view = render_cache.get_message_view(message.message_id, fingerprint)
+                if view is None:
+                    view = await self._messages_to_agents_vis(message)
+                    render_cache.set_message_view(
+                        message.message_id, fingerprint, view
+                    )
+                render_cache.append(index, view)
+            if start == 0:
+                render_cache.retain_messages(
+                    {m.message_id for m in messages if self._is_vis_message(m)}
+                )
+            render_cache.dirty_from = None
+        message_view = render_cache.view
+        if stream_msg:
+            temp_view = await self.agent_stream_message(stream_msg)
+            message_view = message_view + "\n" + temp_view
+        return message_view
+
+    def _is_vis_message(self, message: GptsMessage) -> bool:
+        return bool(message.action_report) or message.receiver == "Human"
+
+    def _deal_messages(self, messages: List[GptsMessage]) -> List[GptsMessage]:
         deal_messages: List[GptsMessage] = []
         for message in messages:
-            if not message.action_report and message.receiver != "Human":
+            if not self._is_vis_message(message):
                 continue
             deal_messages.append(message)
             # last_message: Optional[GptsMessage] = (
@@ -82,16 +150,7 @@ class GptVisConverter(VisProtocolConverter):
             #         deal_messages[-1] = message
             #     else:
             #         deal_messages.append(message)
-
-        deal_messages = sorted(deal_messages, key=lambda _message: _message.rounds)
-        vis_items: List[str] = []
-        for message in deal_messages:
-            vis_items.append(await self._messages_to_agents_vis(message))
-        message_view = "\n".join(vis_items)
-        if stream_msg:
-            temp_view = await self.agent_stream_message(stream_msg)
-            message_view = message_view + "\n" + temp_view
-        return message_view
+        return sorted(deal_messages, key=lambda _message: _message.rounds)
 
     async def agent_stream_message(
         self,
@@ -0,0 +1,68 @@
+import json
+
+import pytest
+
+from derisk.agent import ActionOutput
+from derisk.agent.core.memory.gpts import GptsMemory, GptsMessage
+from derisk.vis.vis_converter import VisRenderCache
+
+from ..gpt_vis_converter import GptVisConverter
+
+_CONV_ID = "test_conv"
+
+
+def _message(idx: int, content: str = None) -> GptsMessage:
+    content = content or f"The result of step {idx}"
+    action_out = ActionOutput(content=content, view=f"**{content}**")
+    return GptsMessage(
+        conv_id=_CONV_ID,
+        conv_session_id=_CONV_ID,
+        sender="assistant",
+        sender_name="SRE Agent",
+        receiver="user",
+        message_id=f"msg_{idx}",
+        role="assistant",
+        content=content,
+        thinking=f"Thinking of step {idx}",
+        rounds=idx,
+        action_report=json.dumps(action_out.to_dict()),
+    )
+
+
+@pytest.fixture(scope="module")
+def converter():
+    return GptVisConverter()
+
+
+@pytest.mark.asyncio
+async def test_incremental_same_as_full(converter: GptVisConverter):
+    messages = [_message(i) for i in range(20)]
+    render_cache = VisRenderCache()
+    stream_msg = {"sender": "SRE Agent", "model": "llm", "content": "Hi"}
+
+    view = await converter.incremental_visualization(
+        messages, stream_msg=stream_msg, render_cache=render_cache
+    )
+    assert view == await converter.visualization(messages, stream_msg=stream_msg)
+
+    messages[5] = _message(5, "Updated")
+    render_cache.invalidate()
+    view = await converter.incremental_visualization(
+        messages, render_cache=render_cache
+    )
+    assert view == await converter.visualization(messages)
+    assert "Updated" in view
+
+
+@pytest.mark.asyncio
+async def test_stream_view_same_as_full(converter: GptVisConverter):
+    memory = GptsMemory()
+    memory.init(_CONV_ID, vis_converter=converter)
+    for i in range(10):
+        await memory.append_message(_CONV_ID, _message(i), save_db=False)
+    # The streaming message is updated for each chunk
+    for i in range(3):
+        chunk = _message(10, "token " * (i + 1))
+        await memory.append_message(_CONV_ID, chunk, save_db=False)
+    messages = await memory.get_messages(_CONV_ID)
+    assert memory.view_cache[_CONV_ID] == await converter.visualization(messages)
@@ -379,6 +379,22 @@ def get_knowledge_task(
             err_code="E000X", msg=f"get knowledge task error {str(e)}"
         )
 
+@router.get("/spaces/tasks/metrics")
+def get_knowledge_task_metrics(
+    token: APIToken = Depends(check_api_key),
+    service: Service = Depends(get_service),
+) -> Result:
+    logger.info(f"get_knowledge_task_metrics params: {token}")
+
+    try:
+        return Result.succ(service.get_task_queue_metrics())
+    except Exception as e:
+        logger.error(f"get_knowledge_task_metrics error {e}")
+
+        return Result.failed(
+            err_code="E000X", msg=f"get knowledge task metrics error {str(e)}"
+        )
+
 @router.delete("/spaces/{knowledge_id}/tasks")
 def delete_knowledge_task(
     knowledge_id: str,
@@ -0,0 +1,89 @@
+"""Benchmark the top-k chunk lookup by vector ids against the full-space load.
+
+The top-k lookup latency should stay flat while the full-space load grows with the
+number of chunks, run:
+
+    python -m derisk_serve.rag.benchmarks.chunk_lookup_benchmarks --num_docs 100
+"""
+
+import argparse
+import time
+from datetime import datetime
+
+from derisk.storage.metadata import db
+from derisk_serve.rag.models.chunk_db import DocumentChunkDao, DocumentChunkEntity
+from derisk_serve.rag.models.document_db import KnowledgeDocumentEntity
+
+
+def create_space(knowledge_id: str, num_docs: int, chunks_per_doc: int):
+    now = datetime.now()
+    with db.session() as session:
+        for d in range(num_docs):
+            doc_id = f"{knowledge_id}_doc_{d}"
+            session.add(
+                KnowledgeDocumentEntity(
+                    doc_id=doc_id,
+                    doc_name=doc_id,
+                    knowledge_id=knowledge_id,
+                    status="FINISHED",
+                    gmt_created=now,
+                    gmt_modified=now,
+                )
+            )
+            session.add_all(
+                [
+                    DocumentChunkEntity(
+                        chunk_id=f"{doc_id}_chunk_{c}",
+                        doc_id=doc_id,
+                        doc_name=doc_id,
+                        knowledge_id=knowledge_id,
+                        vector_id=f"{doc_id}_vector_{c}",
+                        content="content",
+                        gmt_created=now,
+                        gmt_modified=now,
+                    )
+                    for c in range(chunks_per_doc)
+                ]
+            )
+
+
+def run_benchmark(num_docs: int, chunks_per_doc: int, top_k: int, rounds: int):
+    db.init_db("sqlite:///:memory:")
+    db.create_all()
+    dao = DocumentChunkDao()
+    sizes = {
+        "small_space": (max(num_docs // 10, 1), chunks_per_doc),
+        "large_space": (num_docs, chunks_per_doc),
+    }
+    for knowledge_id, (docs, chunks) in sizes.items():
+        create_space(knowledge_id, docs, chunks)
+
+    print(f"top_k: {top_k}, rounds: {rounds}")
+    print(f"{'space':>12}{'chunks':>10}{'lookup(ms)':>12}{'full load(ms)':>15}")
+    for knowledge_id in sizes:
+        vector_ids = [
+            f"{knowledge_id}_doc_0_vector_{i}"
+            for i in range(min(top_k, chunks_per_doc))
+        ]
+        start = time.perf_counter()
+        for _ in range(rounds):
+            dao.get_chunks_by_vector_ids(knowledge_id, vector_ids)
+        lookup_cost = (time.perf_counter() - start) / rounds
+
+        start = time.perf_counter()
+        all_chunks = dao.get_chunks_by_knowledge_id(knowledge_id, "FINISHED")
+        full_cost = time.perf_counter() - start
+        print(
+            f"{knowledge_id:>12}{len(all_chunks):>10}{lookup_cost * 1000:>12.2f}"
+            f"{full_cost * 1000:>15.2f}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--num_docs", type=int, default=100)
+    parser.add_argument("--chunks_per_doc", type=int, default=200)
+    parser.add_argument("--top_k", type=int, default=10)
+    parser.add_argument("--rounds", type=int, default=10)
+    args = parser.parse_args()
+    run_benchmark(args.num_docs, args.chunks_per_doc, args.top_k, args.rounds)
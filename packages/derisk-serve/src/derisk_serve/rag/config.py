@@ -67,9 +67,26 @@ class ServeConfig(BaseServeConfig):
         metadata={"help": _("knowledge max chunks once load")},
     )
     max_threads: Optional[int] = field(
-        default=1,
+        default=4,
         metadata={"help": _("knowledge max load thread")},
     )
+    max_sync_documents: Optional[int] = field(
+        default=4,
+        metadata={"help": _("knowledge max documents synced concurrently")},
+    )
+    max_parallel_tasks: Optional[int] = field(
+        default=4,
+        metadata={"help": _("knowledge max tasks run concurrently in each node")},
+    )
+    task_lease_seconds: Optional[int] = field(
+        default=60,
+        metadata={
+            "help": _(
+                "knowledge task lease seconds, the tasks of a dead node are taken "
+                "over by other nodes after their leases expire"
+            )
+        },
+    )
     rerank_top_k: Optional[int] = field(
         default=3,
         metadata={"help": _("knowledge rerank top k")},
@@ -6,6 +6,7 @@ from derisk.rag.knowledge.base import Knowledge
 from derisk.storage.full_text.base import FullTextStoreBase
 from derisk.storage.knowledge_graph.base import KnowledgeGraphBase
 from derisk.storage.vector_store.base import VectorStoreBase
+from derisk.util.executor_utils import blocking_func_to_async_no_executor
 from derisk.util.tracer import root_tracer
 from derisk_ext.rag import ChunkParameters
 from derisk_ext.rag.chunk_manager import ChunkManager
@@ -18,6 +19,14 @@ class DomainGeneralIndex(DomainKnowledgeIndex):
     ) -> list[Chunk]:
         if not knowledge:
             raise ValueError("knowledge must be provided.")
+        # Parse and split in a thread, the documents can be synced concurrently
+        return await blocking_func_to_async_no_executor(
+            self._extract, knowledge, chunk_parameter
+        )
+
+    def _extract(
+        self, knowledge: Knowledge, chunk_parameter: ChunkParameters
+    ) -> list[Chunk]:
         with root_tracer.start_span("DomainGeneralIndex.knowledge.load"):
             documents = knowledge.load()
         with root_tracer.start_span("DomainGeneralIndex.chunk_manager.split"):
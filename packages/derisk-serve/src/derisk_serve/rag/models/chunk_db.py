@@ -1,7 +1,17 @@
 from datetime import datetime
 from typing import Any, Dict, List, Union
 
-from sqlalchemy import Column, DateTime, Integer, String, Text, func, not_
+from sqlalchemy import (
+    Column,
+    DateTime,
+    Integer,
+    String,
+    Text,
+    bindparam,
+    func,
+    not_,
+    update,
+)
 
 from derisk._private.pydantic import model_to_dict
 from derisk.storage.metadata import BaseDao, Model
@@ -22,7 +32,7 @@ class DocumentChunkEntity(Model):
     doc_id = Column(String(100))
     content = Column(Text)
     questions = Column(Text)
-    vector_id = Column(String(100))
+    vector_id = Column(String(100), index=True)
     full_text_id = Column(String(100))
     meta_data = Column(Text)
     tags = Column(Text)
@@ -171,6 +181,36 @@ class DocumentChunkDao(BaseDao):
             session.merge(entry)
             return self.to_response(entry)
 
+    def update_vector_ids(
+        self, vector_ids: Dict[str, str], batch_size: int = 500
+    ) -> int:
+        """Update the vector ids of the chunks in bulk.
+
+        Args:
+            vector_ids(Dict[str, str]): The vector id of each chunk id.
+            batch_size(int): The max number of chunks in one statement.
+
+        Returns:
+            int: The number of the updated chunk ids.
+        """
+        params = [
+            {"b_chunk_id": chunk_id, "b_vector_id": vector_id}
+            for chunk_id, vector_id in vector_ids.items()
+            if chunk_id and vector_id
+        ]
+        if not params:
+            return 0
+        table = DocumentChunkEntity.__table__
+        stmt = (
+            update(table)
+            .where(table.c.chunk_id == bindparam("b_chunk_id"))
+            .values(vector_id=bindparam("b_vector_id"), gmt_modified=datetime.now())
+        )
+        with self.session() as session:
+            for i in range(0, len(params), batch_size):
+                session.execute(stmt, params[i : i + batch_size])
+        return len(params)
+
     def update_chunk(self, chunk: DocumentChunkEntity):
         """Update a chunk"""
         try:
@@ -337,3 +377,107 @@ class DocumentChunkDao(BaseDao):
         session.close()
 
         return result
+
+    def get_chunks_by_vector_ids(
+        self,
+        knowledge_id: str,
+        vector_ids: List[str],
+        status: str = "FINISHED",
+        batch_size: int = 500,
+    ) -> List[DocumentChunkEntity]:
+        """Get the chunks of a knowledge space whose vector ids are in vector_ids.
+
+        Only the rows matching the given vector ids are loaded, so the cost depends
+        on the number of recalled chunks instead of the size of the space.
+
+        Args:
+            knowledge_id(str): The knowledge space id.
+            vector_ids(List[str]): The vector ids returned by the vector store.
+            status(str): The status of the documents the chunks belong to.
+            batch_size(int): The max number of ids in one ``IN`` clause.
+
+        Returns:
+            List[DocumentChunkEntity]: The matched chunks.
+        """
+        vector_ids = list(dict.fromkeys(vid for vid in vector_ids if vid))
+        if not vector_ids:
+            return []
+        session = self.get_raw_session()
+        try:
+            result = []
+            for i in range(0, len(vector_ids), batch_size):
+                document_chunks = session.query(DocumentChunkEntity)
+                document_chunks = document_chunks.join(
+                    KnowledgeDocumentEntity,
+                    KnowledgeDocumentEntity.doc_id == DocumentChunkEntity.doc_id,
+                )
+                document_chunks = document_chunks.filter(
+                    KnowledgeDocumentEntity.knowledge_id == knowledge_id
+                )
+                if status is not None:
+                    document_chunks = document_chunks.filter(
+                        KnowledgeDocumentEntity.status == status
+                    )
+                document_chunks = document_chunks.filter(
+                    DocumentChunkEntity.vector_id.in_(vector_ids[i : i + batch_size])
+                )
+                result.extend(document_chunks.all())
+            return result
+        finally:
+            session.close()
+
+    def get_chunks_by_ids(
+        self, ids: List[int], batch_size: int = 500
+    ) -> List[DocumentChunkEntity]:
+        """Get the chunks by their primary keys, in the order of the ids.
+
+        Args:
+            ids(List[int]): The ids of the chunks.
+            batch_size(int): The max number of ids in one ``IN`` clause.
+
+        Returns:
+            List[DocumentChunkEntity]: The existing chunks.
+        """
+        ids = list(dict.fromkeys(i for i in ids if i is not None))
+        if not ids:
+            return []
+        session = self.get_raw_session()
+        try:
+            chunks = {}
+            for i in range(0, len(ids), batch_size):
+                document_chunks = session.query(DocumentChunkEntity).filter(
+                    DocumentChunkEntity.id.in_(ids[i : i + batch_size])
+                )
+                chunks.update({chunk.id: chunk for chunk in document_chunks.all()})
+            return [chunks[i] for i in ids if i in chunks]
+        finally:
+            session.close()
+
+    def get_chunks_by_chunk_ids(
+        self, chunk_ids: List[str], batch_size: int = 500
+    ) -> List[DocumentChunkEntity]:
+        """Get the chunks by their chunk ids, in the order of the chunk ids.
+
+        Args:
+            chunk_ids(List[str]): The chunk ids of the chunks.
+            batch_size(int): The max number of chunk ids in one ``IN`` clause.
+
+        Returns:
+            List[DocumentChunkEntity]: The existing chunks.
+        """
+        chunk_ids = list(dict.fromkeys(i for i in chunk_ids if i))
+        if not chunk_ids:
+            return []
+        session = self.get_raw_session()
+        try:
+            chunks = {}
+            for i in range(0, len(chunk_ids), batch_size):
+                document_chunks = session.query(DocumentChunkEntity).filter(
+                    DocumentChunkEntity.chunk_id.in_(chunk_ids[i : i + batch_size])
+                )
+                chunks.update(
+                    {chunk.chunk_id: chunk for chunk in document_chunks.all()}
+                )
+            return [chunks[i] for i in chunk_ids if i in chunks]
+        finally:
+            session.close()
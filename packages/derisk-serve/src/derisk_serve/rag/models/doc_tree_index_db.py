@@ -0,0 +1,222 @@
+"""The persistent header tree index of the documents.
+
+The tree of a document is made of its title and headers, each chunk is a leaf
+under the header path in its metadata. The tree is stored as the header path of
+each chunk (one row per level), the rows are keyed by the hash of the normalized
+header, so the chunks under a matched node can be found without loading the trees
+of the whole knowledge space.
+"""
+
+import hashlib
+import json
+import logging
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import Column, DateTime, Index, Integer, String, Text
+
+from derisk.storage.metadata import BaseDao, DatabaseManager, Model
+from derisk_ext.rag.retriever.doc_tree import (
+    HEADER1,
+    HEADER2,
+    HEADER3,
+    HEADER4,
+    HEADER5,
+    HEADER6,
+    TITLE,
+)
+
+from .chunk_db import DocumentChunkEntity
+from .index_state_db import DOC_TREE_INDEX, KnowledgeIndexStateDao
+
+logger = logging.getLogger(__name__)
+
+# The metadata keys of the tree levels, 0: title, 1: header1, ...
+TREE_LEVEL_KEYS = [TITLE, HEADER1, HEADER2, HEADER3, HEADER4, HEADER5, HEADER6]
+
+
+def header_hash(header: str) -> str:
+    """Return the hash of the normalized header, the match is case-insensitive."""
+    normalized = (header or "").strip().lower()
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+def header_path(metadata: Optional[Dict[str, Any]]) -> List[Tuple[int, str]]:
+    """Return the (level, header) path of a chunk, empty if the chunk has no title.
+
+    It is the same as the path added by :class:`DocTreeIndex`.
+    """
+    if not metadata or not metadata.get(TITLE):
+        return []
+    path = []
+    for level, key in enumerate(TREE_LEVEL_KEYS):
+        header = metadata.get(key)
+        if isinstance(header, str) and header.strip():
+            path.append((level, header))
+    return path
+
+
+class KnowledgeDocTreeIndexEntity(Model):
+    __tablename__ = "knowledge_doc_tree_index"
+    __table_args__ = (
+        Index("idx_doc_tree_header", "knowledge_id", "header_hash"),
+        Index("idx_doc_tree_doc_id", "doc_id"),
+    )
+    id = Column(Integer, primary_key=True)
+    knowledge_id = Column(String(100))
+    doc_id = Column(String(100))
+    chunk_id = Column(String(100))
+    level = Column(Integer)
+    header_hash = Column(String(64))
+    header = Column(Text)
+    gmt_created = Column(DateTime, name="gmt_create")
+
+    def __repr__(self):
+        return (
+            f"KnowledgeDocTreeIndexEntity(id={self.id}, "
+            f"knowledge_id='{self.knowledge_id}', doc_id='{self.doc_id}', "
+            f"chunk_id='{self.chunk_id}', level='{self.level}', "
+            f"header='{self.header}')"
+        )
+
+
+class KnowledgeDocTreeIndexDao(BaseDao):
+    def __init__(self, db_manager: Optional[DatabaseManager] = None):
+        super().__init__(db_manager)
+        self._state_dao = KnowledgeIndexStateDao(db_manager)
+
+    def add_document(
+        self,
+        knowledge_id: str,
+        doc_id: str,
+        chunks: Sequence[Tuple[str, Optional[Dict[str, Any]]]],
+    ) -> int:
+        """Replace the tree of a document.
+
+        Args:
+            knowledge_id(str): The knowledge space id.
+            doc_id(str): The doc id of the document.
+            chunks(Sequence[Tuple[str, Optional[Dict[str, Any]]]]): The chunk id and
+                the metadata of each chunk.
+
+        Returns:
+            int: The number of the tree rows.
+        """
+        with self.session() as session:
+            session.query(KnowledgeDocTreeIndexEntity).filter(
+                KnowledgeDocTreeIndexEntity.doc_id == doc_id
+            ).delete(synchronize_session=False)
+            entries = self._build_entries(knowledge_id, doc_id, chunks)
+            session.add_all(entries)
+            return len(entries)
+
+    def search(self, knowledge_id: str, keywords: Sequence[str]) -> List[str]:
+        """Return the ids of the chunks under the nodes matching the keywords.
+
+        Returns:
+            List[str]: The chunk ids in the order of writing, without duplicates.
+        """
+        hashes = list({header_hash(k) for k in keywords if k and k.strip()})
+        if not hashes:
+            return []
+        with self.session(commit=False) as session:
+            rows = (
+                session.query(KnowledgeDocTreeIndexEntity.chunk_id)
+                .filter(
+                    KnowledgeDocTreeIndexEntity.knowledge_id == knowledge_id,
+                    KnowledgeDocTreeIndexEntity.header_hash.in_(hashes),
+                )
+                .order_by(KnowledgeDocTreeIndexEntity.id.asc())
+                .all()
+            )
+            return list(dict.fromkeys(row[0] for row in rows))
+
+    def is_built(self, knowledge_id: str) -> bool:
+        """Whether the trees of the knowledge space have been indexed by rebuild,
+        the chunks written before the index existed are only indexed by rebuild."""
+        return self._state_dao.is_built(knowledge_id, DOC_TREE_INDEX)
+
+    def delete_by_doc_ids(self, doc_ids: List[str]):
+        """Delete the trees of the documents."""
+        if not doc_ids:
+            return
+        with self.session() as session:
+            session.query(KnowledgeDocTreeIndexEntity).filter(
+                KnowledgeDocTreeIndexEntity.doc_id.in_(doc_ids)
+            ).delete(synchronize_session=False)
+
+    def delete_by_knowledge_id(self, knowledge_id: str):
+        """Delete the trees of the knowledge space."""
+        with self.session() as session:
+            session.query(KnowledgeDocTreeIndexEntity).filter(
+                KnowledgeDocTreeIndexEntity.knowledge_id == knowledge_id
+            ).delete(synchronize_session=False)
+            self._state_dao.delete(session, knowledge_id, DOC_TREE_INDEX)
+
+    def rebuild(self, knowledge_id: str, batch_size: int = 1000) -> int:
+        """Rebuild the trees of the knowledge space from the chunk metadata.
+
+        Returns:
+            int: The number of the tree rows.
+        """
+        count = 0
+        with self.session() as session:
+            session.query(KnowledgeDocTreeIndexEntity).filter(
+                KnowledgeDocTreeIndexEntity.knowledge_id == knowledge_id
+            ).delete(synchronize_session=False)
+            chunks = (
+                session.query(
+                    DocumentChunkEntity.chunk_id,
+                    DocumentChunkEntity.doc_id,
+                    DocumentChunkEntity.meta_data,
+                )
+                .filter(DocumentChunkEntity.knowledge_id == knowledge_id)
+                .order_by(DocumentChunkEntity.id.asc())
+                .yield_per(batch_size)
+            )
+            entries = []
+            for chunk_id, doc_id, meta_data in chunks:
+                entries.extend(
+                    self._build_entries(
+                        knowledge_id, doc_id, [(chunk_id, _load_meta(meta_data))]
+                    )
+                )
+                if len(entries) >= batch_size:
+                    count += len(entries)
+                    session.add_all(entries)
+                    entries = []
+            count += len(entries)
+            session.add_all(entries)
+            self._state_dao.mark_built(session, knowledge_id, DOC_TREE_INDEX)
+        return count
+
+    def _build_entries(
+        self,
+        knowledge_id: str,
+        doc_id: str,
+        chunks: Sequence[Tuple[str, Optional[Dict[str, Any]]]],
+    ) -> List[KnowledgeDocTreeIndexEntity]:
+        now = datetime.now()
+        return [
+            KnowledgeDocTreeIndexEntity(
+                knowledge_id=knowledge_id,
+                doc_id=doc_id,
+                chunk_id=chunk_id,
+                level=level,
+                header_hash=header_hash(header),
+                header=header,
+                gmt_created=now,
+            )
+            for chunk_id, metadata in chunks
+            for level, header in header_path(metadata)
+        ]
+
+
+def _load_meta(meta_data: Optional[str]) -> Optional[Dict[str, Any]]:
+    if not meta_data:
+        return None
+    try:
+        metadata = json.loads(meta_data)
+    except ValueError:
+        return None
+    return metadata if isinstance(metadata, dict) else None
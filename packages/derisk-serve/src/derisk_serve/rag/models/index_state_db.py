@@ -0,0 +1,79 @@
+"""The build state of the derived indexes of the knowledge spaces.
+
+The derived indexes (e.g. the question index) are kept up to date when the
+documents are written, but the spaces created before an index existed must be
+indexed from their documents once. A row marks that the index of a space has been
+built, the existence of the index rows can't tell it, because a new document of
+an old space writes its rows before the old documents are indexed.
+"""
+
+from datetime import datetime
+
+from sqlalchemy import Column, DateTime, Integer, String, UniqueConstraint
+
+from derisk.storage.metadata import BaseDao, Model
+
+QUESTION_INDEX = "question"
+DOC_TREE_INDEX = "doc_tree"
+
+
+class KnowledgeIndexStateEntity(Model):
+    __tablename__ = "knowledge_index_state"
+    __table_args__ = (
+        UniqueConstraint("knowledge_id", "index_name", name="uk_knowledge_index"),
+    )
+    id = Column(Integer, primary_key=True)
+    knowledge_id = Column(String(100))
+    index_name = Column(String(50))
+    gmt_created = Column(DateTime, name="gmt_create")
+
+    def __repr__(self):
+        return (
+            f"KnowledgeIndexStateEntity(id={self.id}, "
+            f"knowledge_id='{self.knowledge_id}', index_name='{self.index_name}')"
+        )
+
+
+class KnowledgeIndexStateDao(BaseDao):
+    def is_built(self, knowledge_id: str, index_name: str) -> bool:
+        """Whether the index of the knowledge space has been built."""
+        with self.session(commit=False) as session:
+            entry = (
+                session.query(KnowledgeIndexStateEntity.id)
+                .filter(
+                    KnowledgeIndexStateEntity.knowledge_id == knowledge_id,
+                    KnowledgeIndexStateEntity.index_name == index_name,
+                )
+                .first()
+            )
+            return entry is not None
+
+    def mark_built(self, session, knowledge_id: str, index_name: str):
+        """Mark the index of the knowledge space as built.
+
+        It is called in the session which builds the index, so the mark is
+        committed with the index rows.
+        """
+        exists = (
+            session.query(KnowledgeIndexStateEntity.id)
+            .filter(
+                KnowledgeIndexStateEntity.knowledge_id == knowledge_id,
+                KnowledgeIndexStateEntity.index_name == index_name,
+            )
+            .first()
+        )
+        if exists is None:
+            session.add(
+                KnowledgeIndexStateEntity(
+                    knowledge_id=knowledge_id,
+                    index_name=index_name,
+                    gmt_created=datetime.now(),
+                )
+            )
+
+    def delete(self, session, knowledge_id: str, index_name: str):
+        """Delete the build mark of the index of the knowledge space."""
+        session.query(KnowledgeIndexStateEntity).filter(
+            KnowledgeIndexStateEntity.knowledge_id == knowledge_id,
+            KnowledgeIndexStateEntity.index_name == index_name,
+        ).delete(synchronize_session=False)
@@ -1,8 +1,8 @@
 import logging
-from datetime import datetime
-from typing import List, Optional
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
 
-from sqlalchemy import Column, DateTime, Integer, String
+from sqlalchemy import Column, DateTime, Integer, String, and_, func, or_, update
 
 from derisk.storage.metadata import BaseDao, Model
 
@@ -236,4 +236,165 @@ class KnowledgeTaskDao(BaseDao):
         finally:
             session.close()
 
+    def claim_knowledge_tasks(
+        self,
+        worker_id: str,
+        limit: int,
+        lease_seconds: int,
+        ignore_status: Optional[List[str]] = None,
+        exclude_ids: Optional[List[int]] = None,
+        recheck_seconds: int = 0,
+    ) -> List[KnowledgeTaskEntity]:
+        """Claim the unfinished tasks, the lease of a claimed task is held by the
+        worker until it is not renewed for lease_seconds.
+
+        A task can be claimed if it has no worker, it is leased by this worker and
+        not updated for recheck_seconds, or its lease is expired (the worker is
+        dead). The claim is a conditional update, so a task is claimed by only one
+        worker.
+
+        Args:
+            worker_id(str): The id of the worker.
+            limit(int): The max number of the tasks to claim.
+            lease_seconds(int): The seconds of the lease.
+            ignore_status(Optional[List[str]]): The finished status.
+            exclude_ids(Optional[List[int]]): The ids of the tasks running in this
+                worker.
+            recheck_seconds(int): The seconds before a task left running by this
+                worker (e.g. waiting for its document to be synced) is claimed
+                again.
+
+        Returns:
+            List[KnowledgeTaskEntity]: The claimed tasks.
+        """
+        if limit <= 0:
+            return []
+        session = self.get_raw_session()
+        try:
+            now = datetime.now()
+            expire_before = now - timedelta(seconds=lease_seconds)
+            recheck_before = now - timedelta(seconds=recheck_seconds)
+            claimable = or_(
+                KnowledgeTaskEntity.host.is_(None),
+                KnowledgeTaskEntity.host == "",
+                and_(
+                    KnowledgeTaskEntity.host == worker_id,
+                    KnowledgeTaskEntity.gmt_modified <= recheck_before,
+                ),
+                KnowledgeTaskEntity.gmt_modified.is_(None),
+                KnowledgeTaskEntity.gmt_modified < expire_before,
+            )
+            candidates = session.query(KnowledgeTaskEntity.id).filter(claimable)
+            if ignore_status:
+                candidates = candidates.filter(
+                    KnowledgeTaskEntity.status.notin_(ignore_status)
+                )
+            if exclude_ids:
+                candidates = candidates.filter(
+                    KnowledgeTaskEntity.id.notin_(exclude_ids)
+                )
+            # Fetch more candidates, some of them may be claimed by other workers
+            candidate_ids = [
+                row[0]
+                for row in candidates.order_by(KnowledgeTaskEntity.id.asc())
+                .limit(limit * 2)
+                .all()
+            ]
+
+            claimed_ids = []
+            for task_id in candidate_ids:
+                result = session.execute(
+                    update(KnowledgeTaskEntity)
+                    .where(KnowledgeTaskEntity.id == task_id, claimable)
+                    .values(host=worker_id, gmt_modified=now)
+                    .execution_options(synchronize_session=False)
+                )
+                session.commit()
+                if result.rowcount == 1:
+                    claimed_ids.append(task_id)
+                if len(claimed_ids) >= limit:
+                    break
+            if not claimed_ids:
+                return []
+
+            tasks = (
+                session.query(KnowledgeTaskEntity)
+                .filter(KnowledgeTaskEntity.id.in_(claimed_ids))
+                .order_by(KnowledgeTaskEntity.id.asc())
+                .all()
+            )
+            session.expunge_all()
+            return tasks
+        except Exception as e:
+            logger.error(f"Error in claim_knowledge_tasks: {str(e)}")
+            session.rollback()
+            raise
+        finally:
+            session.close()
 
+    def renew_knowledge_task_leases(self, worker_id: str, task_ids: List[int]) -> int:
+        """Renew the leases of the tasks held by the worker.
+
+        Returns:
+            int: The number of the renewed tasks, the tasks whose lease is taken by
+                other workers are not renewed.
+        """
+        if not task_ids:
+            return 0
+        session = self.get_raw_session()
+        try:
+            result = session.execute(
+                update(KnowledgeTaskEntity)
+                .where(
+                    KnowledgeTaskEntity.id.in_(task_ids),
+                    KnowledgeTaskEntity.host == worker_id,
+                )
+                .values(gmt_modified=datetime.now())
+                .execution_options(synchronize_session=False)
+            )
+            session.commit()
+            return result.rowcount
+        finally:
+            session.close()
+
+    def get_task_queue_metrics(
+        self, lease_seconds: int, ignore_status: Optional[List[str]] = None
+    ) -> Dict[str, int]:
+        """Get the depth of the task queue.
+
+        Returns:
+            Dict[str, int]: The number of the unfinished tasks of each status, the
+                number of the leased tasks and the tasks with expired leases.
+        """
+        session = self.get_raw_session()
+        try:
+            tasks = session.query(KnowledgeTaskEntity)
+            if ignore_status:
+                tasks = tasks.filter(KnowledgeTaskEntity.status.notin_(ignore_status))
+            expire_before = datetime.now() - timedelta(seconds=lease_seconds)
+            no_host = or_(
+                KnowledgeTaskEntity.host.is_(None), KnowledgeTaskEntity.host == ""
+            )
+            metrics = {
+                f"{(status or 'unknown').lower()}_tasks": count
+                for status, count in tasks.with_entities(
+                    KnowledgeTaskEntity.status, func.count(KnowledgeTaskEntity.id)
+                )
+                .group_by(KnowledgeTaskEntity.status)
+                .all()
+            }
+            metrics["queue_depth"] = sum(metrics.values())
+            metrics["unleased_tasks"] = tasks.filter(no_host).count()
+            leased = tasks.filter(~no_host)
+            metrics["expired_lease_tasks"] = leased.filter(
+                or_(
+                    KnowledgeTaskEntity.gmt_modified.is_(None),
+                    KnowledgeTaskEntity.gmt_modified < expire_before,
+                )
+            ).count()
+            metrics["leased_tasks"] = (
+                leased.count() - metrics["expired_lease_tasks"]
+            )
+            return metrics
+        finally:
+            session.close()
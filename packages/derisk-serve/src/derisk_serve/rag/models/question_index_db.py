@@ -0,0 +1,221 @@
+"""The index of the FAQ questions of the documents and chunks.
+
+The questions of the documents and chunks are stored as json strings, the index
+maps the hash of each normalized question to the document (and the chunk), so the
+QA retriever can find the hits without scanning the whole knowledge space.
+"""
+
+import hashlib
+import json
+import logging
+import re
+import unicodedata
+from datetime import datetime
+from typing import List, Optional
+
+from sqlalchemy import Column, DateTime, Index, Integer, String, Text
+
+from derisk.storage.metadata import BaseDao, DatabaseManager, Model
+from derisk.util.string_utils import remove_trailing_punctuation
+
+from .chunk_db import DocumentChunkEntity
+from .document_db import KnowledgeDocumentEntity
+from .index_state_db import QUESTION_INDEX, KnowledgeIndexStateDao
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_question(question: str) -> str:
+    """Normalize the question, the punctuation at the end, the case and the
+    redundant whitespaces are ignored."""
+    question = unicodedata.normalize("NFKC", question or "")
+    question = re.sub(r"\s+", " ", question).strip()
+    return remove_trailing_punctuation(question).strip().casefold()
+
+
+def question_hash(question: str) -> str:
+    """Return the hash of the normalized question."""
+    return hashlib.sha256(normalize_question(question).encode("utf-8")).hexdigest()
+
+
+def parse_questions(questions: Optional[str]) -> List[str]:
+    """Parse the questions stored as a json string."""
+    if not questions:
+        return []
+    try:
+        parsed = json.loads(questions)
+    except (TypeError, ValueError):
+        logger.warning(f"Invalid questions: {questions}")
+        return []
+    if isinstance(parsed, str):
+        parsed = [parsed]
+    if not isinstance(parsed, list):
+        return []
+    return [q for q in parsed if isinstance(q, str) and normalize_question(q)]
+
+
+class KnowledgeQuestionIndexEntity(Model):
+    __tablename__ = "knowledge_question_index"
+    __table_args__ = (
+        Index("idx_knowledge_question", "knowledge_id", "question_hash"),
+        Index("idx_question_doc_id", "doc_id"),
+    )
+    id = Column(Integer, primary_key=True)
+    knowledge_id = Column(String(100))
+    question_hash = Column(String(64))
+    question = Column(Text)
+    doc_id = Column(String(100))
+    # The id of the document chunk, None means the question of the whole document
+    chunk_id = Column(Integer)
+    gmt_created = Column(DateTime, name="gmt_create")
+
+    def __repr__(self):
+        return (
+            f"KnowledgeQuestionIndexEntity(id={self.id}, "
+            f"knowledge_id='{self.knowledge_id}', question='{self.question}', "
+            f"doc_id='{self.doc_id}', chunk_id='{self.chunk_id}')"
+        )
+
+
+class KnowledgeQuestionIndexDao(BaseDao):
+    def __init__(self, db_manager: Optional[DatabaseManager] = None):
+        super().__init__(db_manager)
+        self._state_dao = KnowledgeIndexStateDao(db_manager)
+
+    def find(
+        self, knowledge_id: str, question: str
+    ) -> List[KnowledgeQuestionIndexEntity]:
+        """Find the documents and chunks whose questions contain the question."""
+        if not normalize_question(question):
+            return []
+        with self.session(commit=False) as session:
+            entries = (
+                session.query(KnowledgeQuestionIndexEntity)
+                .filter(
+                    KnowledgeQuestionIndexEntity.knowledge_id == knowledge_id,
+                    KnowledgeQuestionIndexEntity.question_hash
+                    == question_hash(question),
+                )
+                .order_by(KnowledgeQuestionIndexEntity.id.asc())
+                .all()
+            )
+            session.expunge_all()
+            return entries
+
+    def is_built(self, knowledge_id: str) -> bool:
+        """Whether the questions of the knowledge space have been indexed by
+        rebuild, the questions written before the index existed are only indexed
+        by rebuild."""
+        return self._state_dao.is_built(knowledge_id, QUESTION_INDEX)
+
+    def update_questions(
+        self,
+        knowledge_id: str,
+        doc_id: str,
+        questions: Optional[str],
+        chunk_id: Optional[int] = None,
+    ):
+        """Replace the questions of a document (or of a chunk if chunk_id is given).
+
+        Args:
+            knowledge_id(str): The knowledge space id.
+            doc_id(str): The doc id of the document.
+            questions(Optional[str]): The questions stored as a json string.
+            chunk_id(Optional[int]): The id of the document chunk.
+        """
+        with self.session() as session:
+            self._delete_questions(session, doc_id, chunk_id)
+            session.add_all(
+                self._build_entries(knowledge_id, doc_id, questions, chunk_id)
+            )
+
+    def delete_by_doc_ids(self, doc_ids: List[str]):
+        """Delete the questions of the documents and their chunks."""
+        if not doc_ids:
+            return
+        with self.session() as session:
+            session.query(KnowledgeQuestionIndexEntity).filter(
+                KnowledgeQuestionIndexEntity.doc_id.in_(doc_ids)
+            ).delete(synchronize_session=False)
+
+    def delete_by_knowledge_id(self, knowledge_id: str):
+        """Delete the questions of the knowledge space."""
+        with self.session() as session:
+            session.query(KnowledgeQuestionIndexEntity).filter(
+                KnowledgeQuestionIndexEntity.knowledge_id == knowledge_id
+            ).delete(synchronize_session=False)
+            self._state_dao.delete(session, knowledge_id, QUESTION_INDEX)
+
+    def rebuild(self, knowledge_id: str) -> int:
+        """Rebuild the index of the knowledge space from the documents and chunks.
+
+        Returns:
+            int: The number of the indexed questions.
+        """
+        with self.session() as session:
+            session.query(KnowledgeQuestionIndexEntity).filter(
+                KnowledgeQuestionIndexEntity.knowledge_id == knowledge_id
+            ).delete(synchronize_session=False)
+            documents = (
+                session.query(
+                    KnowledgeDocumentEntity.doc_id, KnowledgeDocumentEntity.questions
+                )
+                .filter(KnowledgeDocumentEntity.knowledge_id == knowledge_id)
+                .all()
+            )
+            entries = []
+            for doc_id, questions in documents:
+                entries.extend(self._build_entries(knowledge_id, doc_id, questions))
+            doc_ids = [doc_id for doc_id, _ in documents]
+            batch_size = 500
+            for i in range(0, len(doc_ids), batch_size):
+                chunks = (
+                    session.query(
+                        DocumentChunkEntity.id,
+                        DocumentChunkEntity.doc_id,
+                        DocumentChunkEntity.questions,
+                    )
+                    .filter(
+                        DocumentChunkEntity.doc_id.in_(doc_ids[i : i + batch_size]),
+                        DocumentChunkEntity.questions.isnot(None),
+                    )
+                    .all()
+                )
+                for chunk_id, doc_id, questions in chunks:
+                    entries.extend(
+                        self._build_entries(knowledge_id, doc_id, questions, chunk_id)
+                    )
+            session.add_all(entries)
+            self._state_dao.mark_built(session, knowledge_id, QUESTION_INDEX)
+            return len(entries)
+
+    def _delete_questions(self, session, doc_id: str, chunk_id: Optional[int]):
+        query = session.query(KnowledgeQuestionIndexEntity).filter(
+            KnowledgeQuestionIndexEntity.doc_id == doc_id
+        )
+        if chunk_id is None:
+            query = query.filter(KnowledgeQuestionIndexEntity.chunk_id.is_(None))
+        else:
+            query = query.filter(KnowledgeQuestionIndexEntity.chunk_id == chunk_id)
+        query.delete(synchronize_session=False)
+
+    def _build_entries(
+        self,
+        knowledge_id: str,
+        doc_id: str,
+        questions: Optional[str],
+        chunk_id: Optional[int] = None,
+    ) -> List[KnowledgeQuestionIndexEntity]:
+        now = datetime.now()
+        hashes = {question_hash(q): q for q in parse_questions(questions)}
+        return [
+            KnowledgeQuestionIndexEntity(
+                knowledge_id=knowledge_id,
+                question_hash=h,
+                question=q,
+                doc_id=doc_id,
+                chunk_id=chunk_id,
+                gmt_created=now,
+            )
+            for h, q in hashes.items()
+        ]
@@ -1,9 +1,10 @@
 import json
 import logging
-from typing import List, Optional
+import threading
+from typing import List, Optional, Set
 
 from derisk.component import ComponentType, SystemApp
-from derisk.core import Chunk, LLMClient, Document
+from derisk.core import Chunk, LLMClient
 from derisk.model import DefaultLLMClient
 from derisk.model.cluster import WorkerManagerFactory
 from derisk.rag.embedding.embedding_factory import EmbeddingFactory
@@ -12,7 +13,11 @@ from derisk.rag.retriever.base import BaseRetriever, RetrieverStrategy
 from derisk.rag.transformer.keyword_extractor import KeywordExtractor
 from derisk.storage.vector_store.filters import MetadataFilters
 from derisk.util.executor_utils import ExecutorFactory, blocking_func_to_async
-from derisk_ext.rag.retriever.doc_tree import TreeNode
+from derisk_ext.rag.retriever.doc_tree import (
+    RETRIEVER_NAME as DOC_TREE_RETRIEVER_NAME,
+)
+from derisk_serve.rag.models.chunk_db import DocumentChunkDao
+from derisk_serve.rag.models.doc_tree_index_db import KnowledgeDocTreeIndexDao
 from derisk_serve.rag.models.models import KnowledgeSpaceDao
 from derisk_serve.rag.retriever.qa_retriever import QARetriever
 from derisk_serve.rag.retriever.retriever_chain import RetrieverChain
@@ -20,6 +25,10 @@ from derisk_serve.rag.storage_manager import StorageManager
 
 logger = logging.getLogger(__name__)
 
+# The knowledge spaces whose doc tree index has been checked in this process
+_TREE_INDEXED_SPACES: Set[str] = set()
+_TREE_INDEX_LOCK = threading.Lock()
+
 
 class KnowledgeSpaceRetriever(BaseRetriever):
     """Knowledge Space retriever."""
@@ -75,6 +84,8 @@ class KnowledgeSpaceRetriever(BaseRetriever):
         self._executor = self._system_app.get_component(
             ComponentType.EXECUTOR_DEFAULT, ExecutorFactory
         ).create()
+        self._chunk_dao = DocumentChunkDao()
+        self._doc_tree_index_dao = KnowledgeDocTreeIndexDao()
 
         self._retriever_chain = RetrieverChain(
             retrievers=[
@@ -263,81 +274,53 @@ class KnowledgeSpaceRetriever(BaseRetriever):
 
     async def tree_index_retrieve(
         self, query: str, top_k: int, filters: Optional[MetadataFilters] = None
-    ):
-        """Search for keywords in the tree index."""
-        # Check if the keyword is in the node title
-        # If the node has children, recursively search in them
-        # If the node is a leaf, check if it contains the keyword
+    ) -> List[Chunk]:
+        """Search for keywords in the tree index.
+
+        The chunks under the title and header nodes matching the keywords are
+        returned, the trees are maintained when the documents are written, so only
+        the matched chunks are loaded.
+        """
         try:
-            docs_res = self.rag_service.get_document_list(
-                {
-                    "knowledge_id": self._knowledge_id,
-                }
-            )
-            docs = []
-            for doc_res in docs_res:
-                doc = Document(
-                    content=doc_res.content,
-                )
-                chunks_res = self.rag_service.get_chunk_list(
-                    {
-                        "doc_id": doc_res.doc_id,
-                    }
-                )
-                chunks = [
-                    Chunk(
-                        chunk_id=chunk_res.chunk_id,
-                        content=chunk_res.content,
-                        metadata=json.loads(chunk_res.meta_data),
-                    )
-                    for chunk_res in chunks_res
-                ]
-                doc.chunks = chunks
-                docs.append(doc)
             keyword_extractor = KeywordExtractor(
                 llm_client=self.llm_client, model_name=self._llm_model
             )
-            from derisk_ext.rag.retriever.doc_tree import DocTreeRetriever
-
-            tree_retriever = DocTreeRetriever(
-                docs=docs,
-                keywords_extractor=keyword_extractor,
-                top_k=self._top_k,
-                query_rewrite=self._query_rewrite,
-                rerank=self._rerank,
+            keywords = await keyword_extractor.extract(query)
+            logger.info(f"Tree index retrieve, query:{query} keywords: {keywords}")
+            return await blocking_func_to_async(
+                self._executor, self._search_doc_tree, keywords
             )
-            candidates = []
-            tree_nodes = await tree_retriever.aretrieve_with_scores(query, top_k, filters)
-            # Convert tree nodes to chunks
-            for node in tree_nodes:
-                chunks = self._traverse(node)
-                candidates.extend(chunks)
-            return candidates
         except Exception as e:
             logger.error(f"Error in tree index retrieval: {e}")
             return []
 
-    def _traverse(self, node: TreeNode):
-        """Traverse the tree and search for the keyword."""
-        # Check if the node has children
-        result = []
-        if node.children:
-            for child in node.children:
-                result.extend(self._traverse(child))
-        else:
-            # If the node is a leaf, check if it contains the keyword
-            chunk_res = self.rag_service.get_chunk_list(
-                {
-                    "chunk_id": node.node_id,
-                }
+    def _search_doc_tree(self, keywords: List[str]) -> List[Chunk]:
+        """Return the chunks under the tree nodes matching the keywords."""
+        self._ensure_doc_tree_index()
+        chunk_ids = self._doc_tree_index_dao.search(self._knowledge_id, keywords)
+        chunks = self._chunk_dao.get_chunks_by_chunk_ids(chunk_ids)
+        logger.info(f"Tree index retrieve: {len(chunks)} chunks.")
+        return [
+            Chunk(
+                chunk_id=chunk.chunk_id,
+                content=chunk.content,
+                metadata=json.loads(chunk.meta_data) if chunk.meta_data else {},
+                retriever=DOC_TREE_RETRIEVER_NAME,
             )
-            if chunk_res:
-                result.append(
-                    Chunk(
-                        chunk_id=chunk_res[0].chunk_id,
-                        content=chunk_res[0].content,
-                        metadata=json.loads(chunk_res[0].meta_data),
-                        retriever=node.retriever,
-                    )
+            for chunk in chunks
+        ]
+
+    def _ensure_doc_tree_index(self):
+        """Build the tree index of the space which was created before the index
+        existed, only checked once in each process."""
+        if self._knowledge_id in _TREE_INDEXED_SPACES:
+            return
+        with _TREE_INDEX_LOCK:
+            if self._knowledge_id in _TREE_INDEXED_SPACES:
+                return
+            if not self._doc_tree_index_dao.is_built(self._knowledge_id):
+                count = self._doc_tree_index_dao.rebuild(self._knowledge_id)
+                logger.info(
+                    f"build doc tree index of {self._knowledge_id}, nodes: {count}"
                 )
-        return result
+            _TREE_INDEXED_SPACES.add(self._knowledge_id)
@@ -1,23 +1,32 @@
 import ast
 import json
 import logging
-from typing import Any, List, Optional
+import threading
+from typing import Any, Dict, List, Optional, Set
+
+import numpy as np
 
 from derisk.component import ComponentType, SystemApp
 from derisk.core import Chunk
 from derisk.rag.retriever.base import BaseRetriever
 from derisk.storage.vector_store.filters import MetadataFilters
 from derisk.util.executor_utils import ExecutorFactory, blocking_func_to_async
-from derisk.util.similarity_util import calculate_cosine_similarity
-from derisk.util.string_utils import remove_trailing_punctuation
 from derisk_serve.rag.models.models import KnowledgeSpaceDao
 
 from ..models.chunk_db import DocumentChunkDao, DocumentChunkEntity
 from ..models.document_db import KnowledgeDocumentDao
+from ..models.question_index_db import (
+    KnowledgeQuestionIndexDao,
+    KnowledgeQuestionIndexEntity,
+)
 
 CHUNK_PAGE_SIZE = 1000
 logger = logging.getLogger(__name__)
 
+# The knowledge spaces whose question index is checked in this process
+_INDEXED_SPACES: Set[str] = set()
+_INDEX_LOCK = threading.Lock()
+
 
 class QARetriever(BaseRetriever):
     """Document QA retriever."""
@@ -44,6 +53,7 @@ class QARetriever(BaseRetriever):
         self._document_dao = KnowledgeDocumentDao()
         self._chunk_dao = DocumentChunkDao()
         self._embedding_fn = embedding_fn
+        self._question_index_dao = KnowledgeQuestionIndexDao()
 
         space = self._space_dao.get_one({"knowledge_id": space_id})
         if not space:
@@ -52,7 +62,7 @@ class QARetriever(BaseRetriever):
             space = self._space_dao.get_one({"name": space_id})
         if not space:
             raise ValueError("space not found")
-        self.documents = self._document_dao.get_list({"space": space.name})
+        self._knowledge_id = space.knowledge_id
         self._executor = self._system_app.get_component(
             ComponentType.EXECUTOR_DEFAULT, ExecutorFactory
         ).create()
@@ -67,28 +77,13 @@ class QARetriever(BaseRetriever):
         Return:
             List[Chunk]: list of chunks
         """
-        query = remove_trailing_punctuation(query)
         candidate_results = []
-        for doc in self.documents:
-            if doc.questions:
-                questions = json.loads(doc.questions)
-                if query in questions:
-                    chunks = self._chunk_dao.get_document_chunks(
-                        DocumentChunkEntity(document_id=doc.id),
-                        page_size=CHUNK_PAGE_SIZE,
-                    )
-                    candidates = [
-                        Chunk(
-                            content=chunk.content,
-                            metadata=ast.literal_eval(chunk.meta_info),
-                            retriever=self.name(),
-                            score=0.0,
-                        )
-                        for chunk in chunks
-                    ]
-                    candidate_results.extend(
-                        self._cosine_similarity_rerank(candidates, query)
-                    )
+        for doc_id in self._document_hits(query):
+            candidates = [
+                self._to_chunk(chunk, score=0.0, wrap_meta=False)
+                for chunk in self._get_document_chunks(doc_id)
+            ]
+            candidate_results.extend(self._cosine_similarity_rerank(candidates, query))
         return candidate_results
 
     def _retrieve_with_score(
@@ -106,54 +101,75 @@ class QARetriever(BaseRetriever):
         Return:
             List[Chunk]: list of chunks with score
         """
-        query = remove_trailing_punctuation(query)
+        hits = self._find_questions(query)
+        chunk_ids = [hit.chunk_id for hit in hits if hit.chunk_id is not None]
+        if chunk_ids:
+            chunks = self._chunk_dao.get_chunks_by_ids(chunk_ids)
+            if chunks:
+                logger.info(f"qa chunk hit:{[c.id for c in chunks]}, question:{query}")
+                candidate_results = [
+                    self._to_chunk(chunk, score=1.0) for chunk in chunks
+                ]
+                return self._cosine_similarity_rerank(candidate_results, query)
+
         candidate_results = []
-        doc_ids = [doc.id for doc in self.documents]
-        query_param = DocumentChunkEntity()
-        chunks = self._chunk_dao.get_chunks_with_questions(
-            query=query_param, document_ids=doc_ids
-        )
-        for chunk in chunks:
-            if chunk.questions:
-                questions = json.loads(chunk.questions)
-                if query in questions:
-                    logger.info(f"qa chunk hit:{chunk}, question:{query}")
-                    candidate_results.append(
-                        Chunk(
-                            content=chunk.content,
-                            chunk_id=str(chunk.id),
-                            metadata={"prop_field": ast.literal_eval(chunk.meta_info)},
-                            retriever=self.name(),
-                            score=1.0,
-                        )
-                    )
-        if len(candidate_results) > 0:
-            return self._cosine_similarity_rerank(candidate_results, query)
-
-        for doc in self.documents:
-            if doc.questions:
-                questions = json.loads(doc.questions)
-                if query in questions:
-                    logger.info(f"qa document hit:{doc}, question:{query}")
-                    chunks = self._chunk_dao.get_document_chunks(
-                        DocumentChunkEntity(document_id=doc.id),
-                        page_size=CHUNK_PAGE_SIZE,
-                    )
-                    candidates_with_scores = [
-                        Chunk(
-                            content=chunk.content,
-                            chunk_id=str(chunk.id),
-                            metadata={"prop_field": ast.literal_eval(chunk.meta_info)},
-                            retriever=self.name(),
-                            score=1.0,
-                        )
-                        for chunk in chunks
-                    ]
-                    candidate_results.extend(
-                        self._cosine_similarity_rerank(candidates_with_scores, query)
-                    )
+        for doc_id in self._document_hits(query, hits):
+            logger.info(f"qa document hit:{doc_id}, question:{query}")
+            candidates_with_scores = [
+                self._to_chunk(chunk, score=1.0)
+                for chunk in self._get_document_chunks(doc_id)
+            ]
+            candidate_results.extend(
+                self._cosine_similarity_rerank(candidates_with_scores, query)
+            )
         return candidate_results
 
+    def _find_questions(self, query: str) -> List[KnowledgeQuestionIndexEntity]:
+        """Find the documents and chunks whose questions contain the query."""
+        self._ensure_index()
+        return self._question_index_dao.find(self._knowledge_id, query)
+
+    def _document_hits(
+        self,
+        query: str,
+        hits: Optional[List[KnowledgeQuestionIndexEntity]] = None,
+    ) -> List[str]:
+        if hits is None:
+            hits = self._find_questions(query)
+        return list(dict.fromkeys(hit.doc_id for hit in hits if hit.chunk_id is None))
+
+    def _ensure_index(self):
+        """Build the question index of the space which was created before the index
+        existed, only checked once in each process."""
+        if self._knowledge_id in _INDEXED_SPACES:
+            return
+        with _INDEX_LOCK:
+            if self._knowledge_id in _INDEXED_SPACES:
+                return
+            if not self._question_index_dao.is_built(self._knowledge_id):
+                count = self._question_index_dao.rebuild(self._knowledge_id)
+                logger.info(
+                    f"build question index of {self._knowledge_id}, questions: {count}"
+                )
+            _INDEXED_SPACES.add(self._knowledge_id)
+
+    def _get_document_chunks(self, doc_id: str) -> List[DocumentChunkEntity]:
+        return self._chunk_dao.get_document_chunks(
+            DocumentChunkEntity(doc_id=doc_id), page_size=CHUNK_PAGE_SIZE
+        )
+
+    def _to_chunk(
+        self, chunk: DocumentChunkEntity, score: float, wrap_meta: bool = True
+    ) -> Chunk:
+        metadata = _parse_meta_data(chunk.meta_data)
+        return Chunk(
+            content=chunk.content,
+            chunk_id=str(chunk.id),
+            metadata={"prop_field": metadata} if wrap_meta else metadata,
+            retriever=self.name(),
+            score=score,
+        )
+
     async def _aretrieve(
         self, query: str, filters: Optional[MetadataFilters] = None
     ) -> List[Chunk]:
@@ -191,27 +207,32 @@ class QARetriever(BaseRetriever):
     def _cosine_similarity_rerank(
         self, candidates_with_scores: List[Chunk], query: str
     ) -> List[Chunk]:
-        """Rerank candidates using cosine similarity."""
+        """Rerank candidates using cosine similarity.
+
+        The candidates are embedded with one batched call and scored together.
+        """
         if len(candidates_with_scores) > self._top_k:
-            for candidate in candidates_with_scores:
-                similarity = calculate_cosine_similarity(
-                    embeddings=self._embedding_fn,
-                    prediction=query,
-                    contexts=[candidate.content],
-                )
-                score = float(similarity.mean())
-                candidate.score = score
-            candidates_with_scores.sort(key=lambda x: x.score, reverse=True)
-            candidates_with_scores = candidates_with_scores[: self._top_k]
+            query_embedding = np.asarray(
+                self._embedding_fn.embed_query(query), dtype=np.float32
+            )
+            embeddings = np.asarray(
+                self._embedding_fn.embed_documents(
+                    [candidate.content for candidate in candidates_with_scores]
+                ),
+                dtype=np.float32,
+            )
+            norms = np.linalg.norm(embeddings, axis=1) * np.linalg.norm(query_embedding)
+            scores = (embeddings @ query_embedding) / np.where(norms > 0, norms, 1.0)
+            indexes = np.argsort(-scores, kind="stable")[: self._top_k]
             candidates_with_scores = [
                 Chunk(
-                    content=candidate.content,
-                    chunk_id=candidate.chunk_id,
-                    metadata=candidate.metadata,
+                    content=candidates_with_scores[i].content,
+                    chunk_id=candidates_with_scores[i].chunk_id,
+                    metadata=candidates_with_scores[i].metadata,
                     retriever=self.name(),
                     score=1.0,
                 )
-                for candidate in candidates_with_scores
+                for i in indexes
             ]
         return candidates_with_scores
 
@@ -219,3 +240,16 @@ class QARetriever(BaseRetriever):
     def name(cls):
         """Return retriever name."""
         return "qa_retriever"
+
+
+def _parse_meta_data(meta_data: Optional[str]) -> Dict[str, Any]:
+    if not meta_data:
+        return {}
+    try:
+        parsed = json.loads(meta_data)
+    except ValueError:
+        try:
+            parsed = ast.literal_eval(meta_data)
+        except (ValueError, SyntaxError):
+            return {}
+    return parsed if isinstance(parsed, dict) else {}
@@ -12,7 +12,7 @@ import uuid
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timedelta
 from enum import Enum
-from typing import List, Optional, cast, Any, Dict
+from typing import List, Optional, cast, Any, Dict, Tuple
 
 from fastapi import HTTPException, File
 
@@ -71,8 +71,10 @@ from ..models.document_db import (
     KnowledgeDocumentDao,
     KnowledgeDocumentEntity,
 )
+from ..models.doc_tree_index_db import KnowledgeDocTreeIndexDao
 from ..models.knowledge_task_db import KnowledgeTaskEntity, KnowledgeTaskDao
 from ..models.models import KnowledgeSpaceDao, KnowledgeSpaceEntity
+from ..models.question_index_db import KnowledgeQuestionIndexDao
 from ..models.rag_span_db import RagFlowSpanDao
 from ..operators.knowledge_space import SpaceRetrieverOperator
 from ..operators.summary import SummaryOperator
@@ -106,7 +108,9 @@ class Service(BaseService[KnowledgeSpaceEntity, SpaceServeRequest, SpaceServeRes
         chunk_dao: Optional[DocumentChunkDao] = None,
         task_dao: Optional[KnowledgeTaskDao] = None,
         rag_span_dao: Optional[RagFlowSpanDao] = None,
-        gpts_app_dao: Optional[GptsAppDao] = None
+        gpts_app_dao: Optional[GptsAppDao] = None,
+        question_index_dao: Optional[KnowledgeQuestionIndexDao] = None,
+        doc_tree_index_dao: Optional[KnowledgeDocTreeIndexDao] = None,
     ):
         self._system_app = system_app
         self._dao: KnowledgeSpaceDao = dao
@@ -115,9 +119,15 @@ class Service(BaseService[KnowledgeSpaceEntity, SpaceServeRequest, SpaceServeRes
         self._task_dao: KnowledgeTaskDao = task_dao
         self._rag_span_dao: RagFlowSpanDao = rag_span_dao
         self._gpts_app_dao: GptsAppDao = gpts_app_dao
+        self._question_index_dao: KnowledgeQuestionIndexDao = question_index_dao
+        self._doc_tree_index_dao: KnowledgeDocTreeIndexDao = doc_tree_index_dao
         self._serve_config = config
 
         self._knowledge_id_stores = {}
+        # The knowledge tasks leased and running in this node
+        self._running_tasks: Dict[int, asyncio.Task] = {}
+        self._task_wakeup: Optional[asyncio.Event] = None
+        self._task_worker_id: Optional[str] = None
 
 
         super().__init__(system_app)
@@ -135,6 +145,12 @@ class Service(BaseService[KnowledgeSpaceEntity, SpaceServeRequest, SpaceServeRes
         self._task_dao = self._task_dao or KnowledgeTaskDao()
         self._rag_span_dao = self._rag_span_dao or RagFlowSpanDao()
         self._gpts_app_dao = self._gpts_app_dao or GptsAppDao()
+        self._question_index_dao = (
+            self._question_index_dao or KnowledgeQuestionIndexDao()
+        )
+        self._doc_tree_index_dao = (
+            self._doc_tree_index_dao or KnowledgeDocTreeIndexDao()
+        )
         self._system_app = system_app
 
     @property
@@ -468,6 +484,8 @@ class Service(BaseService[KnowledgeSpaceEntity, SpaceServeRequest, SpaceServeRes
 
             # delete documents
             self._document_dao.raw_delete(document_query)
+        self._question_index_dao.delete_by_knowledge_id(space.knowledge_id)
+        self._doc_tree_index_dao.delete_by_knowledge_id(space.knowledge_id)
         # delete space
         self._dao.delete(query_request)
         return True
@@ -499,6 +517,9 @@ class Service(BaseService[KnowledgeSpaceEntity, SpaceServeRequest, SpaceServeRes
         self._document_dao.update(
             {"id": entity.id}, self._document_dao.to_request(entity)
         )
+        self._question_index_dao.update_questions(
+            entity.knowledge_id, entity.doc_id, entity.questions
+        )
 
     def delete_document(self, document_id: str) -> Optional[DocumentServeResponse]:
         """Delete a Flow entity
@@ -534,6 +555,8 @@ class Service(BaseService[KnowledgeSpaceEntity, SpaceServeRequest, SpaceServeRes
         self._chunk_dao.raw_delete(docuemnt.id)
         # delete document
         self._document_dao.raw_delete(docuemnt)
+        self._question_index_dao.delete_by_doc_ids([docuemnt.doc_id])
+        self._doc_tree_index_dao.delete_by_doc_ids([docuemnt.doc_id])
         return docuemnt
 
     def get_list(self, request: SpaceServeRequest) -> List[SpaceServeResponse]:
@@ -649,6 +672,21 @@ class Service(BaseService[KnowledgeSpaceEntity, SpaceServeRequest, SpaceServeRes
             ]
             entity.questions = json.dumps(questions, ensure_ascii=False)
         self._chunk_dao.update_chunk(entity)
+        if request.questions:
+            self._update_chunk_question_index(entity)
+
+    def _update_chunk_question_index(self, chunk: DocumentChunkEntity):
+        """Update the FAQ question index after the questions of a chunk changed."""
+        knowledge_id = chunk.knowledge_id
+        if not knowledge_id and chunk.doc_id:
+            document = self._document_dao.get_one({"doc_id": chunk.doc_id})
+            knowledge_id = document.knowledge_id if document else None
+        if not knowledge_id or not chunk.doc_id:
+            logger.warning(f"can't index the questions of chunk {chunk.id}")
+            return
+        self._question_index_dao.update_questions(
+            knowledge_id, chunk.doc_id, chunk.questions, chunk_id=chunk.id
+        )
 
     async def _batch_document_sync(
         self, space_id, sync_requests: List[KnowledgeSyncRequest]
@@ -660,7 +698,7 @@ class Service(BaseService[KnowledgeSpaceEntity, SpaceServeRequest, SpaceServeRes
         Returns:
             - List[int]: document ids
         """
-        doc_ids = []
+        sync_docs = []
         for sync_request in sync_requests:
             docs = self._document_dao.documents_by_ids([sync_request.doc_id])
             if len(docs) == 0:
@@ -688,9 +726,30 @@ class Service(BaseService[KnowledgeSpaceEntity, SpaceServeRequest, SpaceServeRes
                     if space_context is None
                     else int(space_context["embedding"]["chunk_overlap"])
                 )
-            await self._sync_knowledge_document(space_id, doc, chunk_parameters)
-            doc_ids.append(doc.id)
-        return doc_ids
+            sync_docs.append((doc, chunk_parameters))
+        await self._sync_knowledge_documents(space_id, sync_docs)
+        return [doc.id for doc, _ in sync_docs]
+
+    async def _sync_knowledge_documents(
+        self,
+        knowledge_id,
+        sync_docs: List[Tuple[KnowledgeDocumentEntity, ChunkParameters]],
+        knowledge_id_store: Optional[IndexStoreBase] = None,
+    ) -> None:
+        """sync knowledge documents concurrently, at most max_sync_documents
+        documents are synced at the same time"""
+        max_sync_documents = self._serve_config.max_sync_documents or 1
+        semaphore = asyncio.Semaphore(max(1, max_sync_documents))
+
+        async def _sync(doc: KnowledgeDocumentEntity, chunk_parameters):
+            async with semaphore:
+                await self._sync_knowledge_document(
+                    knowledge_id, doc, chunk_parameters, knowledge_id_store
+                )
+
+        await asyncio.gather(
+            *[_sync(doc, chunk_parameters) for doc, chunk_parameters in sync_docs]
+        )
 
     async def _sync_knowledge_document(
         self,
@@ -762,7 +821,14 @@ class Service(BaseService[KnowledgeSpaceEntity, SpaceServeRequest, SpaceServeRes
             )
             for chunk_doc in chunks
         ]
-        self._chunk_dao.create_documents_chunks(chunk_entities)
+        await blocking_func_to_async(
+            self.system_app,
+            self._save_document_chunks,
+            knowledge_id,
+            doc.doc_id,
+            chunk_entities,
+            chunks,
+        )
         doc.chunk_size = len(chunks)
 
         await blocking_func_to_async(
@@ -780,6 +846,20 @@ class Service(BaseService[KnowledgeSpaceEntity, SpaceServeRequest, SpaceServeRes
 
         logger.info(f"begin save document chunks, doc:{doc.doc_name}")
 
+    def _save_document_chunks(
+        self,
+        knowledge_id: str,
+        doc_id: str,
+        chunk_entities: List[DocumentChunkEntity],
+        chunks: List[Chunk],
+    ):
+        self._chunk_dao.create_documents_chunks(chunk_entities)
+        self._doc_tree_index_dao.add_document(
+            knowledge_id,
+            doc_id,
+            [(chunk_doc.chunk_id, chunk_doc.metadata) for chunk_doc in chunks],
+        )
+
     @trace("async_doc_process")
     async def async_doc_process(
         self,
@@ -832,11 +912,13 @@ class Service(BaseService[KnowledgeSpaceEntity, SpaceServeRequest, SpaceServeRes
                     )
                     logger.info(f"async_doc_process end 当前线程数: {threading.active_count()}")
 
-                    vector_ids = []
-                    for save_chunk in save_chunks:
-                        query_chunk = {"chunk_id": save_chunk.chunk_id}
-                        self._chunk_dao.update(query_chunk, save_chunk)
-                        vector_ids.append(save_chunk.vector_id)
+                    vector_ids = [save_chunk.vector_id for save_chunk in save_chunks]
+                    # Update the vector ids of all chunks in bulk
+                    await blocking_func_to_async(
+                        self.system_app,
+                        self._chunk_dao.update_vector_ids,
+                        {chunk.chunk_id: chunk.vector_id for chunk in save_chunks},
+                    )
             doc.status = SyncStatus.FINISHED.name
             doc.result = "document persist into index store success"
             if vector_ids:
@@ -1031,6 +1113,8 @@ class Service(BaseService[KnowledgeSpaceEntity, SpaceServeRequest, SpaceServeRes
         )
 
         id = self._document_dao.create_knowledge_document(document)
+        if id is not None and questions:
+            self._question_index_dao.update_questions(knowledge_id, doc_id, questions)
 
         end_time = timeit.default_timer()
         cost_time = round(end_time - start_time, 2)
@@ -1076,7 +1160,7 @@ class Service(BaseService[KnowledgeSpaceEntity, SpaceServeRequest, SpaceServeRes
         start_time = timeit.default_timer()
         logger.info(f"abatch_document_sync start, 当前线程数：{threading.active_count()}")
 
-        doc_ids = []
+        sync_docs = []
 
         for sync_request in sync_requests:
             docs = await self.adocuments_by_doc_ids([sync_request.doc_id])
@@ -1106,11 +1190,12 @@ class Service(BaseService[KnowledgeSpaceEntity, SpaceServeRequest, SpaceServeRes
             #         else int(space_context["embedding"]["chunk_overlap"])
             #     )
 
-            await self._sync_knowledge_document(
-                knowledge_id, doc, chunk_parameters, knowledge_id_store
-            )
+            sync_docs.append((doc, chunk_parameters))
 
-            doc_ids.append(doc.doc_id)
+        await self._sync_knowledge_documents(
+            knowledge_id, sync_docs, knowledge_id_store
+        )
+        doc_ids = [doc.doc_id for doc, _ in sync_docs]
 
         end_time = timeit.default_timer()
         cost_time = round(end_time - start_time, 2)
@@ -1295,7 +1380,7 @@ class Service(BaseService[KnowledgeSpaceEntity, SpaceServeRequest, SpaceServeRes
             task.status = TaskStatusType.FINISHED.name
             task.error_msg += "\n retry more than max times , task still failed"
             task.end_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            task.host = self.get_host_ip()
+            task.host = self.task_worker_id
 
         self._task_dao.update_knowledge_task_batch(tasks=[task])
         return True
@@ -1318,49 +1403,144 @@ class Service(BaseService[KnowledgeSpaceEntity, SpaceServeRequest, SpaceServeRes
         return self._knowledge_id_stores
 
 
+    @property
+    def task_worker_id(self) -> str:
+        """The id of this node in the knowledge task queue."""
+        if not self._task_worker_id:
+            self._task_worker_id = f"{self.get_host_ip()}:{os.getpid()}"
+        return self._task_worker_id
+
+    @property
+    def task_heartbeat_seconds(self) -> int:
+        """The seconds between the lease renewals of a running task, a task left
+        running by this node is checked again after it."""
+        return max(1, self._serve_config.task_lease_seconds // 3)
+
     async def auto_sync(self):
-        # get task
-        tasks = self._task_dao.get_knowledge_tasks_by_status(ignore_status=[TaskStatusType.SUCCEED.name, TaskStatusType.FINISHED.name], limit=1)
+        """Claim the knowledge tasks for the free slots of this node and run them."""
+        max_parallel_tasks = max(1, self._serve_config.max_parallel_tasks or 1)
+        free_slots = max_parallel_tasks - len(self._running_tasks)
+        if free_slots <= 0:
+            logger.info(f"all {max_parallel_tasks} task slots are busy")
+            return True
+
+        tasks = await blocking_func_to_async(
+            self.system_app,
+            self._task_dao.claim_knowledge_tasks,
+            worker_id=self.task_worker_id,
+            limit=free_slots,
+            lease_seconds=self._serve_config.task_lease_seconds,
+            ignore_status=[TaskStatusType.SUCCEED.name, TaskStatusType.FINISHED.name],
+            exclude_ids=list(self._running_tasks.keys()),
+            recheck_seconds=self.task_heartbeat_seconds,
+        )
         if len(tasks) == 0:
             logger.info(f"no task to sync")
 
             return True
-        task = tasks[0]
-
-        # check host
-        current_host = self.get_host_ip()
-        if not task.host:
-            logger.info(f"task host is None, update host : {current_host}")
+        logger.info(
+            f"auto_sync claimed {len(tasks)} tasks, worker is {self.task_worker_id}"
+        )
+        for task in tasks:
+            self._running_tasks[task.id] = asyncio.create_task(
+                self._run_leased_task(task)
+            )
+        return True
 
-            task.host = current_host
-            self._task_dao.update_knowledge_task_batch(tasks=[task])
-        elif current_host != task.host:
-            logger.info(f"current host is {current_host}, task host is {task.host}, break")
+    async def _run_leased_task(self, task: KnowledgeTaskEntity):
+        """Run a claimed task, its lease is renewed until the task is done."""
+        heartbeat = asyncio.create_task(self._renew_task_lease(task))
+        try:
+            await self._process_task(task)
+        finally:
+            heartbeat.cancel()
+            self._running_tasks.pop(task.id, None)
+            if self._task_wakeup and task.status in (
+                TaskStatusType.SUCCEED.name,
+                TaskStatusType.FINISHED.name,
+            ):
+                # Claim the next task without waiting for the interval, the task
+                # still running is checked again in the next period
+                self._task_wakeup.set()
 
-            return True
-        else:
+    async def _renew_task_lease(self, task: KnowledgeTaskEntity):
+        interval = self.task_heartbeat_seconds
+        while True:
+            await asyncio.sleep(interval)
             try:
-                # init knowledge id index store
-                knowledge_id_stores = self.init_knowledge_id_stores()
-
-                if task.status == TaskStatusType.TODO.name:
-                    # 未开始
-                    await self.start_task(task=task, knowledge_id_stores=knowledge_id_stores)
-                elif task.status == TaskStatusType.RUNNING.name:
-                    # 已开始，有doc_id
-                    await self.check_doc_sync_status(task=task)
-                elif task.status == TaskStatusType.FAILED.name:
-                    # 已开始，没有doc_id
-                    await self.retry_task(task=task, knowledge_id_stores=knowledge_id_stores)
+                renewed = await blocking_func_to_async(
+                    self.system_app,
+                    self._task_dao.renew_knowledge_task_leases,
+                    self.task_worker_id,
+                    [task.id],
+                )
+                if renewed:
+                    # The task is saved by merge, keep the lease when it is saved
+                    task.gmt_modified = datetime.now()
                 else:
-                    # 异常情况
-                    self.end_task(task=task, error_msg="task status is abnormal, force task end")
+                    logger.warning(f"the lease of task {task.task_id} is lost")
             except Exception as e:
-                logger.error(f"auto_sync error, {str(e)}")
+                logger.warning(f"renew the lease of task {task.task_id} error, {e}")
+
+    async def _process_task(self, task: KnowledgeTaskEntity):
+        try:
+            # init knowledge id index store
+            knowledge_id_stores = self.init_knowledge_id_stores()
 
-                self.end_task(task=task, error_msg="auto sync error, force task end: " + str(e))
+            if task.status == TaskStatusType.TODO.name:
+                # 未开始
+                await self.start_task(
+                    task=task, knowledge_id_stores=knowledge_id_stores
+                )
+            elif task.status == TaskStatusType.RUNNING.name:
+                # 已开始，有doc_id
+                await self.check_doc_sync_status(task=task)
+            elif task.status == TaskStatusType.FAILED.name:
+                # 已开始，没有doc_id
+                await self.retry_task(
+                    task=task, knowledge_id_stores=knowledge_id_stores
+                )
+            else:
+                # 异常情况
+                self.end_task(
+                    task=task, error_msg="task status is abnormal, force task end"
+                )
+        except Exception as e:
+            logger.error(f"auto_sync error, {str(e)}")
+
+            self.end_task(
+                task=task, error_msg="auto sync error, force task end: " + str(e)
+            )
+        return True
+
+    async def start_task(
+        self, task: KnowledgeTaskEntity, knowledge_id_stores: Optional[dict] = None
+    ):
+        logger.info(f"start_task start, task id is {task.task_id}")
+
+        if not task.doc_id:
+            self.end_task(task=task, error_msg="task has no doc_id, force task end")
             return True
 
+        task.status = TaskStatusType.RUNNING.name
+        task.retry_times = task.retry_times or 0
+        task.start_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        self._task_dao.update_knowledge_task_batch(tasks=[task])
+
+        # The sync status is checked when the task is claimed again
+        await self.retry_doc(task=task, knowledge_id_stores=knowledge_id_stores)
+        return True
+
+    def get_task_queue_metrics(self) -> Dict[str, int]:
+        """Get the depth of the knowledge task queue and the running tasks of this
+        node."""
+        metrics = self._task_dao.get_task_queue_metrics(
+            lease_seconds=self._serve_config.task_lease_seconds,
+            ignore_status=[TaskStatusType.SUCCEED.name, TaskStatusType.FINISHED.name],
+        )
+        metrics["node_running_tasks"] = len(self._running_tasks)
+        return metrics
+
     def check_active_threads(self):
         if threading.active_count() > 400:
             logger.warning(f"当前线程数： {threading.active_count()}, stop sync task! ")
@@ -1375,6 +1555,7 @@ class Service(BaseService[KnowledgeSpaceEntity, SpaceServeRequest, SpaceServeRes
 
         # 等待主程序运行成功再开启定时任务
         await asyncio.sleep(60)
+        self._task_wakeup = asyncio.Event()
         while True:
             now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
             logger.info(f"run_periodic start {now}")
@@ -1385,7 +1566,12 @@ class Service(BaseService[KnowledgeSpaceEntity, SpaceServeRequest, SpaceServeRes
                     await self.auto_sync()
             except Exception as e:
                 logger.warning("Periodic task failed", exc_info=e)
-            await asyncio.sleep(interval)
+            # Wake up early when a running task is done
+            try:
+                await asyncio.wait_for(self._task_wakeup.wait(), timeout=interval)
+            except asyncio.TimeoutError:
+                pass
+            self._task_wakeup.clear()
 
     def _run_async_loop(self, interval: Optional[int]):
         # Run the asyncio loop in a separate OS thread
@@ -1647,6 +1833,8 @@ class Service(BaseService[KnowledgeSpaceEntity, SpaceServeRequest, SpaceServeRes
 
         # delete chunks
         self._chunk_dao.raw_delete(doc_id=doc_id)
+        self._question_index_dao.delete_by_doc_ids([doc_id])
+        self._doc_tree_index_dao.delete_by_doc_ids([doc_id])
         # delete document
         return self._document_dao.raw_delete(KnowledgeDocumentEntity(doc_id=doc_id))
 
@@ -2147,6 +2335,35 @@ class Service(BaseService[KnowledgeSpaceEntity, SpaceServeRequest, SpaceServeRes
             self.system_app, self.get_chunk_id_dict_by_space_id, knowledge_id
         )
 
+    def get_chunk_id_dict_by_vector_ids(self, knowledge_id: str, vector_ids: List[str]):
+        """Get the vector_id -> chunk dict of the recalled chunks only."""
+        start_time = timeit.default_timer()
+
+        chunks = self._chunk_dao.get_chunks_by_vector_ids(
+            knowledge_id=knowledge_id, vector_ids=vector_ids, status="FINISHED"
+        )
+        chunk_id_dict = {chunk.vector_id: chunk for chunk in chunks}
+
+        end_time = timeit.default_timer()
+        cost_time = round(end_time - start_time, 2)
+        logger.info(
+            f"get_chunk_id_dict_by_vector_ids cost time is {cost_time} seconds, "
+            f"space id is {knowledge_id}, vector ids len is {len(vector_ids)}, "
+            f"chunk id dict len is {len(chunk_id_dict)}"
+        )
+
+        return chunk_id_dict
+
+    async def aget_chunk_id_dict_by_vector_ids(
+        self, knowledge_id: str, vector_ids: List[str]
+    ):
+        return await blocking_func_to_async(
+            self.system_app,
+            self.get_chunk_id_dict_by_vector_ids,
+            knowledge_id,
+            vector_ids,
+        )
+
     def get_doc_id_dict(self, knowledge_id: str):
         logger.info(f"get doc id dict knowledge id is: {knowledge_id}")
         start_time = timeit.default_timer()
@@ -2173,7 +2390,11 @@ class Service(BaseService[KnowledgeSpaceEntity, SpaceServeRequest, SpaceServeRes
         )
 
     def build_document_search_response(
-        self, knowledge_id: str, chunk: Chunk, chunk_id_dict: dict, doc_id_dict: dict
+        self,
+        knowledge_id: str,
+        chunk: Chunk,
+        chunk_id_dict: dict,
+        doc_id_dict: Optional[dict] = None,
     ):
         if "prop_field" in chunk.metadata.keys():
             meta_data = chunk.metadata.get("prop_field")
@@ -2228,14 +2449,15 @@ class Service(BaseService[KnowledgeSpaceEntity, SpaceServeRequest, SpaceServeRes
             knowledge_id
         )
 
-        chunks, chunk_id_dict, doc_id_dict = await asyncio.gather(
-            self.aget_chunks_by_similarity(
-                knowledge_id=knowledge_id,
-                request=request,
-                knowledge_space_retriever=knowledge_space_retriever,
-            ),
-            self.aget_chunk_id_dict_by_space_id(knowledge_id=knowledge_id),
-            self.aget_doc_id_dict(knowledge_id=knowledge_id),
+        chunks = await self.aget_chunks_by_similarity(
+            knowledge_id=knowledge_id,
+            request=request,
+            knowledge_space_retriever=knowledge_space_retriever,
+        )
+        # Only look up the recalled chunks instead of loading the whole space
+        chunk_id_dict = await self.aget_chunk_id_dict_by_vector_ids(
+            knowledge_id=knowledge_id,
+            vector_ids=[str(chunk.chunk_id) for chunk in chunks],
         )
 
         document_response_list = []
@@ -2244,7 +2466,6 @@ class Service(BaseService[KnowledgeSpaceEntity, SpaceServeRequest, SpaceServeRes
                 knowledge_id=knowledge_id,
                 chunk=chunk,
                 chunk_id_dict=chunk_id_dict,
-                doc_id_dict=doc_id_dict,
             )
             document_response_list.append(document_search_response)
         logger.info(
@@ -2648,6 +2869,8 @@ class Service(BaseService[KnowledgeSpaceEntity, SpaceServeRequest, SpaceServeRes
             entity = self.update_chunk_content(entity=entity, request=request)
 
         self._chunk_dao.update_chunk(entity)
+        if request.questions is not None:
+            self._update_chunk_question_index(entity)
         logger.info(f"update chunk success {entity.chunk_id}")
 
         return True
@@ -9,10 +9,12 @@ from derisk.model import DefaultLLMClient
 from derisk.model.cluster import WorkerManagerFactory
 from derisk.rag.embedding import EmbeddingFactory
 from derisk.storage.base import IndexStoreBase
+from derisk.storage.cache import CacheManager
 from derisk.storage.full_text.base import FullTextStoreBase
 from derisk.storage.vector_store.base import VectorStoreBase, VectorStoreConfig
 from derisk.util.executor_utils import DefaultExecutorFactory
 from derisk_ext.storage.full_text.elasticsearch import ElasticDocumentStore
+from derisk_ext.storage.full_text.local_bm25 import LocalFullTextConfig
 from derisk_ext.storage.knowledge_graph.knowledge_graph import BuiltinKnowledgeGraph
 
 logger = logging.getLogger(__name__)
@@ -113,6 +115,12 @@ class StorageManager(BaseComponent):
                         CommunitySummaryKnowledgeGraph,
                     )
 
+                    cache_manager = self.system_app.get_component(
+                        ComponentType.MODEL_CACHE_MANAGER,
+                        CacheManager,
+                        default_component=None,
+                    )
+
                     return CommunitySummaryKnowledgeGraph(
                         config=storage_config.graph,
                         name=collection_name,
@@ -136,6 +144,11 @@ class StorageManager(BaseComponent):
                         embedding_fn=embedding_fn,
                         kg_max_chunks_once_load=rag_config.max_chunks_once_load,
                         kg_max_threads=rag_config.max_threads,
+                        kg_extraction_cache_storage=(
+                            cache_manager.get_content_storage()
+                            if cache_manager
+                            else None
+                        ),
                     )
             return BuiltinKnowledgeGraph(
                 config=storage_config.graph,
@@ -152,6 +165,17 @@ class StorageManager(BaseComponent):
         if index_name in self._store_cache:
             return self._store_cache[index_name]
         with self._cache_lock:
+            if isinstance(storage_config.full_text, LocalFullTextConfig):
+                # The local store keeps the index state in memory, share it
+                store = self._store_cache.get(index_name)
+                if store is None:
+                    store = storage_config.full_text.create_store(
+                        name=collection_name,
+                        k1=rag_config.bm25_k1,
+                        b=rag_config.bm25_b,
+                    )
+                    self._store_cache[index_name] = store
+                return store
             return ElasticDocumentStore(
                 es_config=storage_config.full_text,
                 name=collection_name,
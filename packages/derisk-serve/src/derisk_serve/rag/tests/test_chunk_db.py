@@ -0,0 +1,120 @@
+from datetime import datetime
+
+import pytest
+
+from derisk.storage.metadata import db
+
+from ..models.chunk_db import DocumentChunkDao, DocumentChunkEntity
+from ..models.document_db import KnowledgeDocumentEntity
+
+
+@pytest.fixture(autouse=True)
+def setup_and_teardown():
+    db.init_db("sqlite:///:memory:")
+    db.create_all()
+
+    yield
+
+
+@pytest.fixture
+def dao():
+    return DocumentChunkDao()
+
+
+def _create_space(knowledge_id: str, num_docs: int, chunks_per_doc: int):
+    now = datetime.now()
+    with db.session() as session:
+        for d in range(num_docs):
+            doc_id = f"{knowledge_id}_doc_{d}"
+            session.add(
+                KnowledgeDocumentEntity(
+                    doc_id=doc_id,
+                    doc_name=doc_id,
+                    knowledge_id=knowledge_id,
+                    status="FINISHED",
+                    gmt_created=now,
+                    gmt_modified=now,
+                )
+            )
+            session.add_all(
+                [
+                    DocumentChunkEntity(
+                        chunk_id=f"{doc_id}_chunk_{c}",
+                        doc_id=doc_id,
+                        doc_name=doc_id,
+                        knowledge_id=knowledge_id,
+                        vector_id=f"{doc_id}_vector_{c}",
+                        content="content",
+                        gmt_created=now,
+                        gmt_modified=now,
+                    )
+                    for c in range(chunks_per_doc)
+                ]
+            )
+
+
+def test_get_chunks_by_vector_ids(dao):
+    _create_space("space_1", num_docs=3, chunks_per_doc=10)
+    _create_space("space_2", num_docs=1, chunks_per_doc=10)
+
+    vector_ids = [
+        "space_1_doc_0_vector_1",
+        "space_1_doc_2_vector_9",
+        "space_1_doc_2_vector_9",
+        # Belongs to another space
+        "space_2_doc_0_vector_1",
+        "not_exist",
+    ]
+    chunks = dao.get_chunks_by_vector_ids("space_1", vector_ids)
+    assert sorted(chunk.vector_id for chunk in chunks) == [
+        "space_1_doc_0_vector_1",
+        "space_1_doc_2_vector_9",
+    ]
+    assert {chunk.doc_id for chunk in chunks} == {"space_1_doc_0", "space_1_doc_2"}
+
+
+def test_get_chunks_by_vector_ids_empty(dao):
+    _create_space("space_1", num_docs=1, chunks_per_doc=2)
+    assert dao.get_chunks_by_vector_ids("space_1", []) == []
+    assert dao.get_chunks_by_vector_ids("space_1", [None, ""]) == []
+
+
+def test_get_chunks_by_vector_ids_batched(dao):
+    _create_space("space_1", num_docs=2, chunks_per_doc=30)
+    vector_ids = [f"space_1_doc_{d}_vector_{c}" for d in range(2) for c in range(30)]
+    chunks = dao.get_chunks_by_vector_ids("space_1", vector_ids, batch_size=7)
+    assert len(chunks) == 60
+
+
+def test_get_chunks_by_vector_ids_skip_unfinished(dao):
+    _create_space("space_1", num_docs=1, chunks_per_doc=2)
+    with db.session() as session:
+        session.query(KnowledgeDocumentEntity).update({"status": "RUNNING"})
+    assert dao.get_chunks_by_vector_ids("space_1", ["space_1_doc_0_vector_0"]) == []
+
+
+def test_get_chunks_by_vector_ids_only_loads_top_k(dao):
+    _create_space("small_space", num_docs=2, chunks_per_doc=20)
+    _create_space("large_space", num_docs=20, chunks_per_doc=20)
+
+    vector_ids = [f"large_space_doc_0_vector_{i}" for i in range(10)]
+    chunks = dao.get_chunks_by_vector_ids("large_space", vector_ids)
+    assert sorted(chunk.vector_id for chunk in chunks) == sorted(vector_ids)
+    assert len(dao.get_chunks_by_knowledge_id("large_space", "FINISHED")) == 400
+
+
+def test_update_vector_ids(dao):
+    _create_space("space_1", num_docs=2, chunks_per_doc=5)
+    vector_ids = {f"space_1_doc_0_chunk_{c}": f"new_vector_{c}" for c in range(5)}
+    vector_ids["not_existed"] = "new_vector"
+    assert dao.update_vector_ids(vector_ids, batch_size=2) == 6
+
+    chunks = dao.get_chunks_by_chunk_ids(
+        ["space_1_doc_0_chunk_0", "space_1_doc_0_chunk_4", "space_1_doc_1_chunk_0"]
+    )
+    assert [chunk.vector_id for chunk in chunks] == [
+        "new_vector_0",
+        "new_vector_4",
+        "space_1_doc_1_vector_0",
+    ]
+    assert dao.update_vector_ids({}) == 0
@@ -0,0 +1,152 @@
+import json
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import MagicMock
+
+import pytest
+
+from derisk.rag.transformer.keyword_extractor import KeywordExtractor
+from derisk.storage.metadata import db
+
+from ..models.chunk_db import DocumentChunkDao, DocumentChunkEntity
+from ..models.doc_tree_index_db import KnowledgeDocTreeIndexDao, header_path
+from ..retriever import knowledge_space
+from ..retriever.knowledge_space import KnowledgeSpaceRetriever
+
+_CHUNKS = {
+    "doc_1": [
+        ("doc_1_chunk_0", {"title": "Guide", "Header1": "Install"}),
+        ("doc_1_chunk_1", {"title": "Guide", "Header1": "Install", "Header2": "Pip"}),
+        ("doc_1_chunk_2", {"title": "Guide", "Header1": "Upgrade"}),
+        ("doc_1_chunk_3", {"source": "no title"}),
+    ],
+    "doc_2": [
+        ("doc_2_chunk_0", {"title": "FAQ", "Header1": "install"}),
+    ],
+}
+
+
+@pytest.fixture(autouse=True)
+def setup_and_teardown(tmp_path):
+    # A file database, the retriever queries it in the executor threads
+    db.init_db(f"sqlite:///{tmp_path / 'test.db'}")
+    db.create_all()
+    knowledge_space._TREE_INDEXED_SPACES.clear()
+
+    yield
+
+
+def _create_chunks(knowledge_id: str = "space_1"):
+    with db.session() as session:
+        session.add_all(
+            [
+                DocumentChunkEntity(
+                    chunk_id=chunk_id,
+                    doc_id=doc_id,
+                    knowledge_id=knowledge_id,
+                    content=f"content of {chunk_id}",
+                    meta_data=json.dumps(metadata),
+                )
+                for doc_id, chunks in _CHUNKS.items()
+                for chunk_id, metadata in chunks
+            ]
+        )
+
+
+def _retriever(knowledge_id: str = "space_1"):
+    retriever = KnowledgeSpaceRetriever.__new__(KnowledgeSpaceRetriever)
+    retriever._knowledge_id = knowledge_id
+    retriever._llm_model = "test_model"
+    retriever._system_app = MagicMock()
+    retriever._executor = ThreadPoolExecutor(1)
+    retriever._chunk_dao = DocumentChunkDao()
+    retriever._doc_tree_index_dao = KnowledgeDocTreeIndexDao()
+    return retriever
+
+
+def test_header_path():
+    assert header_path({"title": "Guide", "Header2": "Pip"}) == [
+        (0, "Guide"),
+        (2, "Pip"),
+    ]
+    assert header_path({"Header1": "Install"}) == []
+    assert header_path(None) == []
+
+
+def test_search():
+    dao = KnowledgeDocTreeIndexDao()
+    for doc_id, chunks in _CHUNKS.items():
+        dao.add_document("space_1", doc_id, chunks)
+    assert dao.search("space_1", ["Install"]) == [
+        "doc_1_chunk_0",
+        "doc_1_chunk_1",
+        "doc_2_chunk_0",
+    ]
+    assert dao.search("space_1", [" guide ", "PIP"]) == [
+        "doc_1_chunk_0",
+        "doc_1_chunk_1",
+        "doc_1_chunk_2",
+    ]
+    assert dao.search("space_1", ["no title"]) == []
+    assert dao.search("space_2", ["Install"]) == []
+
+    # Rewrite a document
+    dao.add_document("space_1", "doc_1", [("doc_1_chunk_9", {"title": "Install"})])
+    assert dao.search("space_1", ["install"]) == ["doc_2_chunk_0", "doc_1_chunk_9"]
+
+    dao.delete_by_doc_ids(["doc_2"])
+    assert dao.search("space_1", ["install"]) == ["doc_1_chunk_9"]
+    dao.delete_by_knowledge_id("space_1")
+    assert dao.search("space_1", ["install"]) == []
+
+
+def test_rebuild_for_existing_space():
+    _create_chunks()
+    retriever = _retriever()
+    chunks = retriever._search_doc_tree(["upgrade"])
+    assert [c.chunk_id for c in chunks] == ["doc_1_chunk_2"]
+    assert chunks[0].metadata == {"title": "Guide", "Header1": "Upgrade"}
+    assert chunks[0].retriever == "doc_tree_retriever"
+    assert KnowledgeDocTreeIndexDao().is_built("space_1")
+
+
+def test_rebuild_after_new_document():
+    _create_chunks()
+    dao = KnowledgeDocTreeIndexDao()
+    # A new document of the legacy space is indexed before the old ones
+    with db.session() as session:
+        session.add(
+            DocumentChunkEntity(
+                chunk_id="doc_3_chunk_0",
+                doc_id="doc_3",
+                knowledge_id="space_1",
+                content="content of doc_3_chunk_0",
+                meta_data=json.dumps({"title": "Docker"}),
+            )
+        )
+    dao.add_document("space_1", "doc_3", [("doc_3_chunk_0", {"title": "Docker"})])
+    assert not dao.is_built("space_1")
+
+    retriever = _retriever()
+    chunks = retriever._search_doc_tree(["upgrade"])
+    assert [c.chunk_id for c in chunks] == ["doc_1_chunk_2"]
+    assert dao.is_built("space_1")
+    assert dao.search("space_1", ["docker"]) == ["doc_3_chunk_0"]
+
+    dao.delete_by_knowledge_id("space_1")
+    assert not dao.is_built("space_1")
+
+
+@pytest.mark.asyncio
+async def test_tree_index_retrieve(monkeypatch):
+    _create_chunks()
+
+    async def _extract(self, text):
+        return ["Pip", "FAQ"]
+
+    monkeypatch.setattr(KeywordExtractor, "extract", _extract)
+    chunks = await _retriever().tree_index_retrieve("how to install by pip", 4)
+    assert [c.chunk_id for c in chunks] == ["doc_1_chunk_1", "doc_2_chunk_0"]
+    assert [c.content for c in chunks] == [
+        "content of doc_1_chunk_1",
+        "content of doc_2_chunk_0",
+    ]
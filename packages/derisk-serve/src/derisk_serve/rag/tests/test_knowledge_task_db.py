@@ -0,0 +1,128 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from derisk.storage.metadata import db
+
+from ..models.knowledge_task_db import KnowledgeTaskDao, KnowledgeTaskEntity
+
+_FINISHED = ["SUCCEED", "FINISHED"]
+
+
+@pytest.fixture(autouse=True)
+def setup_and_teardown():
+    db.init_db("sqlite:///:memory:")
+    db.create_all()
+
+    yield
+
+
+@pytest.fixture
+def dao():
+    return KnowledgeTaskDao()
+
+
+def _create_tasks(statuses, host=None, gmt_modified=None):
+    with db.session() as session:
+        session.add_all(
+            [
+                KnowledgeTaskEntity(
+                    task_id=f"task_{i}",
+                    knowledge_id="space_1",
+                    doc_id=f"doc_{i}",
+                    status=status,
+                    host=host,
+                    gmt_modified=gmt_modified or datetime.now(),
+                )
+                for i, status in enumerate(statuses)
+            ]
+        )
+
+
+def _claim(dao, worker_id, limit, exclude_ids=None):
+    return dao.claim_knowledge_tasks(
+        worker_id,
+        limit,
+        lease_seconds=60,
+        ignore_status=_FINISHED,
+        exclude_ids=exclude_ids,
+    )
+
+
+def test_claim(dao):
+    _create_tasks(["TODO", "RUNNING", "SUCCEED", "TODO", "FAILED", "FINISHED"])
+    tasks_a = _claim(dao, "worker_a", 2)
+    assert [task.task_id for task in tasks_a] == ["task_0", "task_1"]
+    assert all(task.host == "worker_a" for task in tasks_a)
+
+    # The leased tasks are skipped by other workers
+    tasks_b = _claim(dao, "worker_b", 10)
+    assert [task.task_id for task in tasks_b] == ["task_3", "task_4"]
+    assert _claim(dao, "worker_c", 10) == []
+
+    # The worker claims its tasks again except the running ones
+    task_ids = [task.id for task in tasks_a]
+    assert _claim(dao, "worker_a", 10, exclude_ids=task_ids[:1])[0].id == task_ids[1]
+
+
+def test_recheck_running_task(dao):
+    _create_tasks(["RUNNING"])
+    claims = 0
+    for _ in range(10):
+        tasks = dao.claim_knowledge_tasks(
+            "worker_a",
+            1,
+            lease_seconds=60,
+            ignore_status=_FINISHED,
+            recheck_seconds=20,
+        )
+        claims += len(tasks)
+        for task in tasks:
+            # The document is still running, the check only saves the task
+            task.gmt_modified = datetime.now()
+            dao.update_knowledge_task_batch([task])
+    # The task left running is not claimed again until the recheck seconds pass
+    assert claims == 1
+
+    with db.session() as session:
+        session.query(KnowledgeTaskEntity).update(
+            {"gmt_modified": datetime.now() - timedelta(seconds=30)}
+        )
+    assert len(_claim(dao, "worker_b", 1)) == 0
+    tasks = dao.claim_knowledge_tasks(
+        "worker_a", 1, lease_seconds=60, ignore_status=_FINISHED, recheck_seconds=20
+    )
+    assert [task.task_id for task in tasks] == ["task_0"]
+
+
+def test_steal_expired_lease(dao):
+    expired = datetime.now() - timedelta(seconds=120)
+    _create_tasks(["TODO", "RUNNING"], host="10.0.0.1", gmt_modified=expired)
+    tasks = _claim(dao, "worker_a", 1)
+    assert [task.task_id for task in tasks] == ["task_0"]
+    assert dao.renew_knowledge_task_leases("worker_a", [tasks[0].id]) == 1
+    # The lease is held by other worker
+    assert dao.renew_knowledge_task_leases("worker_b", [tasks[0].id]) == 0
+
+    tasks = _claim(dao, "worker_b", 10)
+    assert [task.task_id for task in tasks] == ["task_1"]
+
+
+def test_task_queue_metrics(dao):
+    expired = datetime.now() - timedelta(seconds=120)
+    _create_tasks(["TODO", "TODO", "RUNNING", "SUCCEED"])
+    _claim(dao, "worker_a", 1)
+    with db.session() as session:
+        session.query(KnowledgeTaskEntity).filter(
+            KnowledgeTaskEntity.task_id == "task_2"
+        ).update({"host": "worker_b", "gmt_modified": expired})
+
+    metrics = dao.get_task_queue_metrics(lease_seconds=60, ignore_status=_FINISHED)
+    assert metrics == {
+        "todo_tasks": 2,
+        "running_tasks": 1,
+        "queue_depth": 3,
+        "unleased_tasks": 1,
+        "expired_lease_tasks": 1,
+        "leased_tasks": 1,
+    }
@@ -0,0 +1,183 @@
+import json
+from datetime import datetime
+from typing import List
+from unittest.mock import MagicMock
+
+import pytest
+
+from derisk.core import Embeddings
+from derisk.storage.metadata import db
+
+from ..models.chunk_db import DocumentChunkEntity
+from ..models.document_db import KnowledgeDocumentEntity
+from ..models.models import KnowledgeSpaceEntity
+from ..models.question_index_db import (
+    KnowledgeQuestionIndexDao,
+    normalize_question,
+)
+from ..retriever import qa_retriever
+from ..retriever.qa_retriever import QARetriever
+
+
+class KeywordEmbeddings(Embeddings):
+    """Embed the text by the counts of some keywords."""
+
+    keywords = ["install", "upgrade", "python", "docker"]
+
+    def __init__(self):
+        self.calls = 0
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        self.calls += 1
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        self.calls += 1
+        return self._embed(text)
+
+    def _embed(self, text: str) -> List[float]:
+        return [float(text.count(k)) for k in self.keywords] + [0.01]
+
+
+@pytest.fixture(autouse=True)
+def setup_and_teardown():
+    db.init_db("sqlite:///:memory:")
+    db.create_all()
+    qa_retriever._INDEXED_SPACES.clear()
+
+    yield
+
+
+def _create_space(knowledge_id: str = "space_1"):
+    now = datetime.now()
+    with db.session() as session:
+        session.add(
+            KnowledgeSpaceEntity(
+                knowledge_id=knowledge_id, name=knowledge_id, gmt_created=now
+            )
+        )
+        session.add(
+            KnowledgeDocumentEntity(
+                doc_id="doc_1",
+                doc_name="doc_1",
+                knowledge_id=knowledge_id,
+                questions=json.dumps(["How to install"]),
+                gmt_created=now,
+            )
+        )
+        session.add(
+            KnowledgeDocumentEntity(
+                doc_id="doc_2", doc_name="doc_2", knowledge_id=knowledge_id
+            )
+        )
+        contents = [
+            "install python",
+            "upgrade docker",
+            "install docker",
+            "upgrade python",
+            "python python",
+            "install install python",
+        ]
+        session.add_all(
+            [
+                DocumentChunkEntity(
+                    chunk_id=f"doc_1_chunk_{i}",
+                    doc_id="doc_1",
+                    knowledge_id=knowledge_id,
+                    content=content,
+                    meta_data=json.dumps({"index": i}),
+                )
+                for i, content in enumerate(contents)
+            ]
+        )
+        session.add(
+            DocumentChunkEntity(
+                chunk_id="doc_2_chunk_0",
+                doc_id="doc_2",
+                knowledge_id=knowledge_id,
+                content="upgrade docker",
+                questions=json.dumps(["How to upgrade docker?"]),
+                meta_data=json.dumps({"index": 0}),
+            )
+        )
+
+
+def _retriever(embeddings, top_k: int = 2):
+    return QARetriever(
+        space_id="space_1", top_k=top_k, embedding_fn=embeddings, system_app=MagicMock()
+    )
+
+
+def test_normalize_question():
+    assert normalize_question("  How to   Install？") == "how to install"
+    assert normalize_question("How to install?") == normalize_question("how to install")
+
+
+def test_chunk_hit():
+    _create_space()
+    embeddings = KeywordEmbeddings()
+    chunks = _retriever(embeddings)._retrieve_with_score("how to upgrade Docker", 0.0)
+    assert [c.content for c in chunks] == ["upgrade docker"]
+    assert chunks[0].metadata == {"prop_field": {"index": 0}}
+    # No rerank for the candidates less than top k
+    assert embeddings.calls == 0
+
+
+def test_document_hit_batched_rerank():
+    _create_space()
+    embeddings = KeywordEmbeddings()
+    retriever = _retriever(embeddings)
+    chunks = retriever._retrieve_with_score("How to install?", 0.0)
+    assert [c.content for c in chunks] == ["install install python", "install python"]
+    assert all(c.score == 1.0 for c in chunks)
+    # One call for the query, one batched call for the candidates
+    assert embeddings.calls == 2
+
+    assert retriever._retrieve_with_score("How to uninstall", 0.0) == []
+    assert len(retriever._retrieve("How to install")) == 2
+
+
+def test_incremental_update():
+    _create_space()
+    retriever = _retriever(KeywordEmbeddings())
+    assert retriever._retrieve_with_score("How to install", 0.0)
+
+    dao = KnowledgeQuestionIndexDao()
+    # The index of the existing space is built at the first query
+    assert dao.is_built("space_1")
+    dao.update_questions("space_1", "doc_1", json.dumps(["How to use python"]))
+    assert retriever._retrieve_with_score("How to install", 0.0) == []
+    assert len(retriever._retrieve_with_score("how to use python", 0.0)) == 2
+
+    dao.delete_by_doc_ids(["doc_1"])
+    assert retriever._retrieve_with_score("how to use python", 0.0) == []
+    # The chunk questions are kept
+    assert retriever._retrieve_with_score("how to upgrade docker", 0.0)
+
+
+def test_backfill_after_new_edit():
+    _create_space()
+    dao = KnowledgeQuestionIndexDao()
+    # A document of the legacy space is created (or edited) before any query
+    with db.session() as session:
+        session.add(
+            KnowledgeDocumentEntity(
+                doc_id="doc_3",
+                doc_name="doc_3",
+                knowledge_id="space_1",
+                questions=json.dumps(["How to use docker"]),
+            )
+        )
+    dao.update_questions("space_1", "doc_3", json.dumps(["How to use docker"]))
+    assert not dao.is_built("space_1")
+
+    retriever = _retriever(KeywordEmbeddings())
+    # The legacy questions are still backfilled
+    assert retriever._retrieve_with_score("How to install", 0.0)
+    assert retriever._retrieve_with_score("how to upgrade docker", 0.0)
+    assert dao.is_built("space_1")
+    assert [hit.doc_id for hit in dao.find("space_1", "how to use docker")] == ["doc_3"]
+
+    # Not backfilled again after the space is deleted and the ids are reused
+    dao.delete_by_knowledge_id("space_1")
+    assert not dao.is_built("space_1")